@@ -13,6 +13,7 @@ from app.services import task as tm
 
 FUNC_MAP = {
     "start": tm.start,
+    "rerender": tm.rerender,
     # 'start_test': tm.start_test
 }
 
@@ -15,6 +15,7 @@ from app.controllers.manager.base_manager import TaskQueueFullError
 from app.controllers.manager.memory_manager import InMemoryTaskManager
 from app.controllers.manager.redis_manager import RedisTaskManager
 from app.controllers.v1.base import new_router
+from app.models import const
 from app.models.exception import HttpException
 from app.models.schema import (
     AudioRequest,
@@ -25,6 +26,7 @@ from app.models.schema import (
     TaskListResponse,
     TaskQueryRequest,
     TaskQueryResponse,
+    TaskRerenderRequest,
     TaskResponse,
     TaskVideoRequest,
     VideoMaterialUploadResponse,
@@ -281,6 +283,79 @@ def get_task(
     )
 
 
+@router.post(
+    "/tasks/{task_id}/rerender",
+    response_model=TaskResponse,
+    summary="Re-render a finished task with new subtitle or BGM styles",
+)
+def rerender_task(
+    request: Request,
+    body: TaskRerenderRequest,
+    task_id: str = Path(..., description="Task ID"),
+):
+    request_id = base.get_task_id(request)
+    task = sm.state.get_task(task_id)
+    if not task:
+        raise HttpException(
+            task_id=task_id, status_code=404, message=f"{request_id}: task not found"
+        )
+    if tm.is_task_busy(task):
+        raise HttpException(
+            task_id=task_id,
+            status_code=409,
+            message=f"{request_id}: task is still running",
+        )
+    if task.get("state") != const.TASK_STATE_COMPLETE:
+        # 失败任务可能残留部分拼接视频，重新渲染会掩盖原来的错误。
+        raise HttpException(
+            task_id=task_id,
+            status_code=409,
+            message=f"{request_id}: only completed tasks can be re-rendered",
+        )
+
+    overrides = body.model_dump(exclude_none=True)
+    try:
+        # 缺少拼接视频或 script.json 属于确定性输入错误，在排队前同步返回，
+        # 避免调用方只能在轮询时才发现任务无法重新渲染。
+        tm.prepare_rerender(task_id, overrides)
+    except ValueError as e:
+        raise HttpException(
+            task_id=task_id, status_code=400, message=f"{request_id}: {str(e)}"
+        )
+
+    # 先把重新渲染标记为处理中，让删除接口和重复的重新渲染请求都返回 409；
+    # 任务本身的 state 不变，已经生成的视频在重新渲染期间仍可查询和下载。
+    sm.state.patch_task(
+        task_id,
+        rerender_state=const.RERENDER_STATE_PROCESSING,
+        rerender_progress=50,
+        rerender_error=None,
+    )
+    try:
+        task_manager.add_task(tm.rerender, task_id=task_id, overrides=overrides)
+    except Exception as e:
+        # 调度失败时恢复上一次重新渲染的记录。
+        sm.state.patch_task(
+            task_id,
+            rerender_state=task.get("rerender_state"),
+            rerender_progress=task.get("rerender_progress"),
+            rerender_error=task.get("rerender_error"),
+        )
+        if isinstance(e, TaskQueueFullError):
+            logger.warning(
+                f"reject re-render because queue is full, request_id: {request_id}, "
+                f"task_id: {task_id}"
+            )
+            raise HttpException(
+                task_id=task_id, status_code=429, message=f"{request_id}: {str(e)}"
+            )
+        raise
+
+    response = {"task_id": task_id, "request_id": request_id}
+    logger.success(f"Task re-render queued: {utils.to_json(response)}")
+    return utils.get_response(200, response)
+
+
 @router.delete(
     "/tasks/{task_id}",
     response_model=TaskDeletionResponse,
@@ -31,5 +31,9 @@ CROSS_POST_STATE_PROCESSING = "processing"
 CROSS_POST_STATE_COMPLETE = "complete"
 CROSS_POST_STATE_FAILED = "failed"
 
+RERENDER_STATE_PROCESSING = "processing"
+RERENDER_STATE_COMPLETE = "complete"
+RERENDER_STATE_FAILED = "failed"
+
 FILE_TYPE_VIDEOS = ["mp4", "mov", "mkv", "webm"]
 FILE_TYPE_IMAGES = ["jpg", "jpeg", "png", "bmp"]
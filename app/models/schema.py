@@ -46,6 +46,12 @@ class VideoAspect(str, Enum):
         raise ValueError(f"unsupported video aspect: {self}")
 
 
+class RenderProfile(str, Enum):
+    draft = "draft"
+    standard = "standard"
+    final = "final"
+
+
 _Config = ConfigDict(
     arbitrary_types_allowed=True,
     # Note: ensure your key names match renamed V2 parameters if needed
@@ -124,6 +130,10 @@ class VideoParams(BaseModel):
     stroke_color: Optional[str] = "#000000"
     stroke_width: float = 1.5
     n_threads: Optional[int] = 2
+    # draft 以较低分辨率、帧率和快速编码预设渲染预览；final 使用更慢的编码预设。
+    render_profile: Optional[RenderProfile] = RenderProfile.standard
+    # 仅 draft 生效：只渲染前 N 秒，0 表示完整渲染。
+    preview_duration: float = Field(default=0, ge=0)
     paragraph_number: int = Field(default=1, ge=1, le=10)
     video_script_prompt: str = Field(default="", max_length=2000)
     custom_system_prompt: str = Field(default="", max_length=8000)
@@ -218,6 +228,31 @@ class TaskVideoRequest(VideoParams, BaseModel):
     pass
 
 
+class TaskRerenderRequest(BaseModel):
+    """
+    重新渲染已完成任务时允许覆盖的成片样式。
+
+    未传入的字段沿用原任务参数；拼接视频、配音和字幕时间轴都直接复用任务
+    目录中的产物，因此这里只开放最终合成阶段读取的字段。渲染档位决定了
+    拼接视频的分辨率，不能在重新渲染时单独修改。
+    """
+
+    subtitle_enabled: Optional[bool] = None
+    subtitle_position: Optional[str] = None
+    custom_position: Optional[float] = Field(default=None, ge=0, le=100)
+    font_name: Optional[str] = None
+    text_fore_color: Optional[str] = None
+    text_background_color: Union[bool, str, None] = None
+    rounded_subtitle_background: Optional[bool] = None
+    font_size: Optional[int] = Field(default=None, ge=1)
+    stroke_color: Optional[str] = None
+    stroke_width: Optional[float] = Field(default=None, ge=0)
+    bgm_type: Optional[str] = None
+    bgm_file: Optional[str] = None
+    bgm_volume: Optional[float] = Field(default=None, ge=0)
+    voice_volume: Optional[float] = Field(default=None, ge=0)
+
+
 class TaskQueryRequest(BaseModel):
     pass
 
@@ -265,6 +300,9 @@ class TaskStatusData(BaseModel):
     ] = None
     cross_post_results: Optional[List[dict[str, Any]]] = None
     cross_post_error: Optional[str] = None
+    rerender_state: Optional[Literal["processing", "complete", "failed"]] = None
+    rerender_progress: Optional[int] = None
+    rerender_error: Optional[str] = None
 
 
 class TaskListData(BaseModel):
@@ -335,6 +373,7 @@ class TaskQueryResponse(BaseResponse):
 
     生成失败时包含 `failed_stage` 和 `error`；生成完成后如果启用了自动发布，
     `cross_post_state` 会依次进入 pending、processing、complete 或 failed。
+    重新渲染不改变 `state`，进度和结果记录在 `rerender_*` 字段中。
     """
 
     data: TaskStatusData
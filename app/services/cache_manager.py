@@ -10,12 +10,17 @@ from typing import Iterator
 
 from loguru import logger
 
-from app.utils import utils
+from app.utils import file_lock, utils
 
 
-# 在线素材使用 URL 的 MD5 作为稳定文件名。缓存管理只接受该命名格式，避免把
-# 用户误放到目录中的视频、说明文件或其它业务文件当作缓存删除。
-_VIDEO_CACHE_FILE_PATTERN = re.compile(r"^vid-[0-9a-f]{32}\.mp4$")
+# 在线素材使用 URL 的 MD5 作为稳定文件名，图片素材渲染的片段使用 `img-`
+# 前缀加内容哈希。缓存管理只接受这两种命名格式，避免把用户误放到目录中的
+# 视频、说明文件或其它业务文件当作缓存删除。下载或渲染过程中的 `.part`
+# 临时文件和锁文件同样按该格式命名，一并统计和清理。
+_VIDEO_CACHE_FILE_PATTERN = re.compile(
+    r"^(?:vid|img)-[0-9a-f]{32}\.mp4(?:\.part|\.lock)?$"
+)
+_DOWNLOAD_SIDE_FILE_SUFFIXES = (".part", ".lock")
 _SECONDS_PER_DAY = 24 * 60 * 60
 
 
@@ -155,6 +160,36 @@ def get_video_cache_stats(max_age_days: int | None = None) -> VideoCacheStats:
     )
 
 
+def _delete_cache_file(entry: _VideoCacheEntry) -> bool:
+    """
+    删除单个缓存文件，素材正在下载或渲染而跳过时返回 False。
+
+    `.part` 和 `.lock` 只在持有对应素材的下载锁时删除，锁被占用说明下载
+    或图片渲染仍在进行；删除 `.part` 后锁文件也随之删除，持锁删除锁文件是安全的。
+    素材文件本身不受下载锁保护，与原有行为一致直接删除。
+    """
+    if not entry.name.endswith(_DOWNLOAD_SIDE_FILE_SUFFIXES):
+        os.unlink(entry.path)
+        return True
+
+    lock_path = f"{entry.path.rsplit('.', 1)[0]}.lock"
+    if not os.path.exists(entry.path):
+        # 同一次清理中已随 `.part` 一起删除，不能再为它创建新的锁文件。
+        return False
+    try:
+        with file_lock.exclusive_file_lock(lock_path, timeout=0):
+            if entry.path != lock_path:
+                os.unlink(entry.path)
+            try:
+                os.unlink(lock_path)
+            except FileNotFoundError:
+                pass
+    except TimeoutError:
+        logger.info(f"skip video cache file being downloaded: file={entry.name}")
+        return False
+    return True
+
+
 def clean_video_cache(max_age_days: int | None = None) -> VideoCacheCleanupResult:
     """
     清理默认视频缓存，并返回可向用户展示的汇总结果。
@@ -194,7 +229,10 @@ def clean_video_cache(max_age_days: int | None = None) -> VideoCacheCleanupResul
                 or os.path.islink(entry.path)
             ):
                 raise ValueError("cache file is outside the managed directory")
-            os.unlink(entry.path)
+            if not _delete_cache_file(entry):
+                candidate_count -= 1
+                candidate_size -= entry.size
+                continue
             deleted_count += 1
             deleted_size += entry.size
         except (OSError, ValueError) as exc:
@@ -0,0 +1,245 @@
+"""标准化中间片段的磁盘缓存。"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from loguru import logger
+
+from app.config import config
+from app.models.schema import VideoTransitionMode
+from app.utils import utils
+
+
+# 片段的缩放、补边或转场实现发生变化时递增版本号，让旧缓存自然失效。
+# 版本 2 起缓存键包含渲染档位和特效后端，版本 1 的片段不区分这两者。
+_CACHE_FORMAT_VERSION = 2
+_HASH_CHUNK_SIZE = 1024 * 1024
+_BYTES_PER_MB = 1024 * 1024
+
+# 同一素材会在一次任务的多个片段和多个视频里反复出现。按文件路径、大小和
+# 修改时间记住内容哈希，避免每个片段都重新读取整份素材。
+_source_hash_lock = threading.Lock()
+_source_hashes: dict[tuple[str, int, int], str] = {}
+_eviction_lock = threading.Lock()
+
+
+def get_max_cache_bytes() -> int:
+    """返回缓存容量上限，0 表示关闭缓存。"""
+    try:
+        max_mb = float(config.app.get("video_clip_cache_max_mb", 0) or 0)
+    except (TypeError, ValueError):
+        logger.warning(
+            "invalid video_clip_cache_max_mb configured, clip cache disabled"
+        )
+        return 0
+    return max(0, int(max_mb * _BYTES_PER_MB))
+
+
+def is_enabled() -> bool:
+    return get_max_cache_bytes() > 0
+
+
+def _cache_dir() -> Path:
+    """
+    返回所有任务共用的片段缓存目录。
+
+    缓存位于 ``storage`` 下而不是任务目录，才能让同一任务的多个视频、并发
+    任务以及服务重启后的任务复用相同素材片段。
+    """
+    return Path(utils.storage_dir("cache_clips", create=True))
+
+
+def source_content_hash(file_path: str) -> str:
+    """
+    计算素材内容的 SHA-256。
+
+    缓存键按内容而不是路径生成：同一素材可能存放在全局缓存目录或任务目录，
+    不同 URL 也可能下载到相同文件，按内容寻址才能让这些片段互相命中。
+    """
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    with _source_hash_lock:
+        cached = _source_hashes.get(memo_key)
+    if cached:
+        return cached
+
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as fp:
+        for chunk in iter(lambda: fp.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    content_hash = digest.hexdigest()
+    with _source_hash_lock:
+        _source_hashes[memo_key] = content_hash
+    return content_hash
+
+
+def build_cache_key(
+    source_file: str,
+    start_time: float,
+    end_time: float,
+    width: int,
+    height: int,
+    clip_speed: float,
+    transition: str | None,
+    transition_side: str,
+    max_clip_duration: float,
+    fps: int,
+    preset: str,
+    scale: float,
+    effects_backend: str,
+) -> str:
+    """
+    根据所有会影响片段画面的参数生成缓存键。
+
+    帧率、编码预设和缩放比例来自渲染档位，draft 片段不能被 final 渲染复用；
+    MoviePy 和 FFmpeg 两种特效后端的缩放与转场实现不同，输出也分开缓存。
+    """
+    # 只有滑动转场会用到方向，其余转场忽略它，避免随机方向拆散可命中的条目。
+    slide_transitions = (
+        VideoTransitionMode.slide_in.value,
+        VideoTransitionMode.slide_out.value,
+    )
+    side = transition_side if transition in slide_transitions else ""
+    payload = json.dumps(
+        {
+            "version": _CACHE_FORMAT_VERSION,
+            "source": source_content_hash(source_file),
+            "start_time": round(float(start_time), 6),
+            "end_time": round(float(end_time), 6),
+            "resolution": [int(width), int(height)],
+            "clip_speed": round(float(clip_speed), 6),
+            "transition": transition or "",
+            "transition_side": side,
+            "max_clip_duration": round(float(max_clip_duration), 6),
+            "fps": int(fps),
+            "preset": preset,
+            "scale": round(float(scale), 6),
+            "effects_backend": effects_backend,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _entry_paths(cache_key: str) -> tuple[Path, Path]:
+    cache_dir = _cache_dir()
+    return cache_dir / f"{cache_key}.mp4", cache_dir / f"{cache_key}.json"
+
+
+def _link_or_copy(source: Path, target: str) -> None:
+    """优先用硬链接把缓存文件放到任务目录，跨文件系统时回退为复制。"""
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def restore_clip(cache_key: str, target_file: str) -> float | None:
+    """
+    命中时把缓存片段放到 ``target_file`` 并返回片段时长，未命中返回 None。
+
+    调用方在拼接完成后会删除任务里的临时片段，因此不能直接返回缓存路径，
+    而是链接或复制一份，删除时不会影响缓存本身。
+    """
+    clip_path, meta_path = _entry_paths(cache_key)
+    try:
+        with meta_path.open("r", encoding="utf-8") as fp:
+            duration = float(json.load(fp)["duration"])
+        if os.path.exists(target_file):
+            os.remove(target_file)
+        _link_or_copy(clip_path, target_file)
+        # 以修改时间记录最近使用时间，淘汰时按它实现 LRU。
+        os.utime(clip_path)
+    except FileNotFoundError:
+        return None
+    except Exception as exc:
+        logger.warning(f"failed to restore cached clip: key={cache_key}, error={exc}")
+        return None
+    return duration
+
+
+def _write_atomic(target: Path, write) -> None:
+    """在缓存目录内写临时文件后 ``os.replace``，保证其它进程只看到完整文件。"""
+    temp_path: Path | None = None
+    try:
+        with tempfile.NamedTemporaryFile(
+            dir=target.parent,
+            prefix=f".{target.name}.",
+            suffix=".tmp",
+            delete=False,
+        ) as temp_file:
+            temp_path = Path(temp_file.name)
+            write(temp_file)
+            temp_file.flush()
+            os.fsync(temp_file.fileno())
+        os.replace(temp_path, target)
+        temp_path = None
+    finally:
+        if temp_path is not None:
+            temp_path.unlink(missing_ok=True)
+
+
+def publish_clip(cache_key: str, clip_file: str, duration: float) -> None:
+    """
+    把新编码的片段发布到缓存，失败只记录日志。
+
+    先写时长元数据再替换视频文件；读取方以视频文件存在为准并同时要求元数据
+    完整，因此并发任务不会读到半个文件或缺少时长的条目。
+    """
+    clip_path, meta_path = _entry_paths(cache_key)
+    try:
+        _write_atomic(
+            meta_path,
+            lambda fp: fp.write(json.dumps({"duration": duration}).encode("utf-8")),
+        )
+        with open(clip_file, "rb") as source:
+            _write_atomic(clip_path, lambda fp: shutil.copyfileobj(source, fp))
+    except Exception as exc:
+        logger.warning(f"failed to publish clip cache: key={cache_key}, error={exc}")
+        return
+    evict_to_limit()
+
+
+def evict_to_limit(max_bytes: int | None = None) -> int:
+    """按最近使用时间淘汰旧片段，直到总大小不超过上限，返回删除的条目数。"""
+    limit = get_max_cache_bytes() if max_bytes is None else max_bytes
+    cache_dir = _cache_dir()
+    with _eviction_lock:
+        entries = []
+        total_size = 0
+        with os.scandir(cache_dir) as scanner:
+            for entry in scanner:
+                if not entry.name.endswith(".mp4") or entry.name.startswith("."):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.name))
+                total_size += stat.st_size
+
+        deleted = 0
+        for _mtime, size, name in sorted(entries):
+            if total_size <= limit:
+                break
+            cache_key = name[: -len(".mp4")]
+            clip_path, meta_path = _entry_paths(cache_key)
+            try:
+                clip_path.unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+            except OSError as exc:
+                logger.warning(f"failed to evict cached clip: {name}, error={exc}")
+                continue
+            total_size -= size
+            deleted += 1
+        if deleted:
+            logger.info(f"evicted {deleted} cached clips, remaining size: {total_size}")
+        return deleted
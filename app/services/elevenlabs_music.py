@@ -10,7 +10,7 @@ from loguru import logger
 
 from app.config import config
 from app.services import bgm as bgm_service
-from app.utils import utils
+from app.utils import http_client, utils
 
 
 DEFAULT_BASE_URL = "https://api.elevenlabs.io"
@@ -113,7 +113,7 @@ def test_connection() -> dict[str, Any]:
     if not api_key:
         raise ElevenLabsAuthenticationError("ElevenLabs API key is required")
     try:
-        with requests.get(
+        with http_client.get(
             f"{_base_url()}{SUBSCRIPTION_PATH}",
             headers={"xi-api-key": api_key},
             timeout=(15, 30),
@@ -311,7 +311,7 @@ def _request_bgm(video_path: str, output_path: str, prompt: str) -> str:
             request_data["description"] = prompt
         try:
             with open(video_path, "rb") as video_file:
-                response = requests.post(
+                response = http_client.post(
                     f"{_base_url()}{VIDEO_TO_MUSIC_PATH}",
                     headers={"xi-api-key": get_api_key()},
                     params={"output_format": "mp3_44100_128"},
@@ -18,6 +18,8 @@ from urllib.parse import quote, urlsplit
 import requests
 from loguru import logger
 
+from app.utils import http_client
+
 
 DEFAULT_RESULT_PORT_NAME = "output"
 DEFAULT_BASE_URL = "https://loomloom.shengsuanyun.com/loom/v1"
@@ -272,7 +274,8 @@ class LoomLoomScriptBackend:
     ):
         settings.validate(require_api_token=credential_provider is None)
         self.settings = settings
-        self._session = session or requests.Session()
+        # execute 和轮询自带重试循环，适配器层再重试会让等待时间成倍增加。
+        self._session = session or http_client.get_session(retry=False)
         self._credential_provider = credential_provider or (lambda: settings.api_token)
         self._sleep = sleep
         self._clock = clock
@@ -607,9 +610,10 @@ class LoomLoomScriptBackend:
                 "a LoomLoom credential is required for this request"
             )
         try:
-            response = self._session.request(
+            response = http_client.request(
                 method,
                 url,
+                session=self._session,
                 headers={
                     "Accept": "application/json",
                     "Authorization": f"Bearer {api_token}",
@@ -786,8 +790,9 @@ class LoomLoomVideoBackend(LoomLoomScriptBackend):
         downloaded_bytes = 0
         response = None
         try:
-            response = self._session.get(
+            response = http_client.get(
                 access_url,
+                session=self._session,
                 stream=True,
                 timeout=(5.0, self.settings.request_timeout_seconds),
             )
@@ -2,6 +2,9 @@ import os
 import random
 import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from pathlib import Path
 from typing import Any, Callable, List
 from urllib.parse import quote_plus, urlencode, urlsplit, urlunsplit
@@ -12,8 +15,8 @@ from moviepy.video.io.VideoFileClip import VideoFileClip
 
 from app.config import config
 from app.models.schema import MaterialInfo, VideoAspect, VideoConcatMode
-from app.services import material_cache, task_artifacts
-from app.utils import utils
+from app.services import material_cache, media_probe, task_artifacts
+from app.utils import file_lock, http_client, mp4_header, utils
 
 # Thread-safe counter for API key rotation
 _api_key_counter = 0
@@ -138,23 +141,6 @@ def _persist_material_sources(
         )
 
 
-def _get_tls_verify() -> bool:
-    # 默认开启 TLS 证书校验，防止素材搜索和下载过程被中间人篡改。
-    # 仅在企业代理、自签证书等明确需要的场景下，允许用户通过
-    # `config.toml` 显式设置 `tls_verify = false` 临时关闭。
-    tls_verify = config.app.get("tls_verify", True)
-    if isinstance(tls_verify, str):
-        tls_verify = tls_verify.strip().lower() not in ("0", "false", "no", "off")
-
-    if not tls_verify:
-        logger.warning(
-            "TLS certificate verification is disabled by config.app.tls_verify=false. "
-            "Only use this in trusted proxy environments."
-        )
-
-    return bool(tls_verify)
-
-
 def get_api_key(cfg_key: str):
     api_keys = config.app.get(cfg_key)
     if not api_keys:
@@ -311,11 +297,11 @@ def search_videos_pexels(
     logger.info(f"searching videos on pexels: term={search_term!r}")
 
     try:
-        r = requests.get(
+        r = http_client.get(
             query_url,
             headers=headers,
             proxies=config.proxy,
-            verify=_get_tls_verify(),
+            verify=http_client.get_tls_verify(),
             timeout=(30, 60),
         )
         response = r.json()
@@ -398,8 +384,8 @@ def search_videos_pixabay(
     )
 
     try:
-        r = requests.get(
-            query_url, proxies=config.proxy, verify=_get_tls_verify(), timeout=(30, 60)
+        r = http_client.get(
+            query_url, proxies=config.proxy, verify=http_client.get_tls_verify(), timeout=(30, 60)
         )
         status_code = int(getattr(r, "status_code", 200))
         headers = getattr(r, "headers", {}) or {}
@@ -542,11 +528,11 @@ def search_videos_coverr(
     logger.info(f"searching videos on coverr: term={search_term!r}")
 
     try:
-        r = requests.get(
+        r = http_client.get(
             query_url,
             headers=headers,
             proxies=config.proxy,
-            verify=_get_tls_verify(),
+            verify=http_client.get_tls_verify(),
             timeout=(30, 60),
         )
         response = r.json()
@@ -743,12 +729,13 @@ def generate_videos_wavespeed(
     # 提交 POST 绝不自动重试：请求可能已经在远端创建了付费任务，重发会造成
     # 重复生成和重复扣费（与官方 SDK 的 submission 策略一致）。
     try:
-        submit_response = requests.post(
+        submit_response = http_client.post(
             f"{WAVESPEED_API_BASE_URL}/{model_id}",
+            retry=False,
             json=payload,
             headers=headers,
             proxies=config.proxy,
-            verify=_get_tls_verify(),
+            verify=http_client.get_tls_verify(),
             timeout=(30, 60),
         )
     except Exception as e:
@@ -867,11 +854,13 @@ def _wait_for_wavespeed_prediction(
     consecutive_failures = 0
     while True:
         try:
-            response = requests.get(
+            # 轮询自带退避重试和总时限，适配器层不再重试。
+            response = http_client.get(
                 f"{WAVESPEED_API_BASE_URL}/predictions/{prediction_id}/result",
+                retry=False,
                 headers=headers,
                 proxies=config.proxy,
-                verify=_get_tls_verify(),
+                verify=http_client.get_tls_verify(),
                 timeout=(30, 60),
             )
             status_code = _wavespeed_status_code(response)
@@ -984,7 +973,166 @@ def _save_wavespeed_video_with_retry(video_url: str, save_dir: str) -> str:
     return ""
 
 
-def save_video(video_url: str, save_dir: str = "") -> str:
+_DOWNLOAD_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
+}
+_DOWNLOAD_CHUNK_SIZE = 256 * 1024
+# 连接中断后按已下载字节数续传的次数，每次续传前短暂退避。
+_DOWNLOAD_RESUME_ATTEMPTS = 3
+_DOWNLOAD_RESUME_BACKOFF_SECONDS = 1.0
+# 等待其它进程下载同一素材的上限：单个下载有连接和读取超时，并最多续传
+# 数次，正常情况下远小于这个时长。
+_DOWNLOAD_LOCK_TIMEOUT_SECONDS = 30 * 60
+_DOWNLOAD_INTERRUPTED_ERRORS = (
+    requests.ConnectionError,
+    requests.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class _DownloadRateLimiter:
+    """
+    进程内所有素材下载共享的带宽上限。
+
+    每写入一个数据块就按配置速率预约它占用的传输时间，读取下一块前等待
+    预约时间结束；多个下载线程共用同一条时间线，合计速率不超过上限。
+    上限在每次调用时读取，WebUI 修改配置后立即生效。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._available_at = 0.0
+
+    def consume(self, size: int):
+        try:
+            rate = float(config.app.get("material_download_max_bytes_per_second", 0) or 0)
+        except (TypeError, ValueError):
+            rate = 0.0
+        if rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._available_at = max(now, self._available_at) + size / rate
+            delay = self._available_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+_download_rate_limiter = _DownloadRateLimiter()
+_download_slots_lock = threading.Lock()
+_download_slots: tuple[int, threading.BoundedSemaphore] | None = None
+
+
+def _get_download_slots() -> threading.BoundedSemaphore | None:
+    """
+    返回限制进程内同时下载连接数的信号量，未配置上限时返回 None。
+
+    `material_download_concurrency` 只约束单个任务，多个任务同时运行时
+    仍可能一起打满带宽或触发素材站限流，这里的上限对整个进程生效。
+    """
+    global _download_slots
+    try:
+        limit = int(config.app.get("material_download_max_connections", 0) or 0)
+    except (TypeError, ValueError):
+        limit = 0
+    if limit <= 0:
+        return None
+    with _download_slots_lock:
+        if _download_slots is None or _download_slots[0] != limit:
+            _download_slots = (limit, threading.BoundedSemaphore(limit))
+        return _download_slots[1]
+
+
+class _DownloadCancelledError(Exception):
+    """并发下载凑够时长后，放弃仍在传输的多余素材。"""
+
+
+def _download_to_part_file(
+    video_url: str, part_path: str, cancel_event: threading.Event | None = None
+):
+    """
+    把素材流式写入 `.part` 临时文件，连接中断时用 HTTP Range 续传。
+
+    内存中只保留一个数据块。已有的 `.part` 文件（包括上次任务中断留下的）
+    从末尾继续请求；服务器不支持 Range 时返回完整内容，改为从头覆盖写入。
+    续传次数耗尽后抛出最后一次的网络异常，`.part` 文件保留给下次续传。
+    `cancel_event` 被设置后在下一个数据块处停止，删除临时文件并抛出
+    `_DownloadCancelledError`：被放弃的素材没有人再需要，不保留续传数据。
+    """
+    for attempt in range(_DOWNLOAD_RESUME_ATTEMPTS + 1):
+        if cancel_event is not None and cancel_event.is_set():
+            raise _DownloadCancelledError("material download abandoned before start")
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        headers = dict(_DOWNLOAD_HEADERS)
+        if offset:
+            headers["Range"] = f"bytes={offset}-"
+        slots = _get_download_slots()
+        try:
+            with slots if slots is not None else nullcontext():
+                response = http_client.get(
+                    video_url,
+                    headers=headers,
+                    proxies=config.proxy,
+                    verify=http_client.get_tls_verify(),
+                    timeout=(60, 240),
+                    stream=True,
+                )
+                try:
+                    if offset and response.status_code == 416:
+                        # 临时文件已经不短于远端文件，无法判断是否完整，重新下载。
+                        os.remove(part_path)
+                        continue
+                    response.raise_for_status()
+                    if response.status_code != 206:
+                        offset = 0
+                    content_length = response.headers.get("content-length")
+                    expected_size = (
+                        offset + int(content_length) if content_length else None
+                    )
+                    with open(part_path, "ab" if offset else "wb") as fp:
+                        for chunk in response.iter_content(
+                            chunk_size=_DOWNLOAD_CHUNK_SIZE
+                        ):
+                            if cancel_event is not None and cancel_event.is_set():
+                                break
+                            if not chunk:
+                                continue
+                            fp.write(chunk)
+                            _download_rate_limiter.consume(len(chunk))
+                    if cancel_event is not None and cancel_event.is_set():
+                        os.remove(part_path)
+                        raise _DownloadCancelledError(
+                            "material download abandoned, enough clips collected"
+                        )
+                    downloaded_size = os.path.getsize(part_path)
+                    if expected_size is not None and downloaded_size < expected_size:
+                        raise requests.ConnectionError(
+                            "connection closed before the body was complete: "
+                            f"{downloaded_size}/{expected_size} bytes"
+                        )
+                    return
+                finally:
+                    response.close()
+        except _DOWNLOAD_INTERRUPTED_ERRORS as e:
+            if attempt >= _DOWNLOAD_RESUME_ATTEMPTS:
+                raise
+            downloaded_size = (
+                os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            )
+            delay = _DOWNLOAD_RESUME_BACKOFF_SECONDS * (attempt + 1)
+            logger.warning(
+                "material download interrupted, resume from the downloaded bytes: "
+                f"attempt={attempt + 1}/{_DOWNLOAD_RESUME_ATTEMPTS}, "
+                f"downloaded={downloaded_size}, error={type(e).__name__}, "
+                f"detail={_redact_request_error(e, video_url)}, retry_in={delay:.1f}s"
+            )
+            time.sleep(delay)
+    raise requests.ConnectionError("material download could not be completed")
+
+
+def save_video(
+    video_url: str, save_dir: str = "", cancel_event: threading.Event | None = None
+) -> str:
     if not save_dir:
         save_dir = utils.storage_dir("cache_videos")
 
@@ -1001,47 +1149,254 @@ def save_video(video_url: str, save_dir: str = "") -> str:
         logger.info(f"video already exists: {video_path}")
         return video_path
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/115.0.0.0 Safari/537.36"
-    }
+    # 多个任务（包括其它 worker、API 和 WebUI 进程）可能同时选中同一个素材。
+    # 按 URL 哈希加跨进程文件锁，只有一个进程下载，其它进程等待后直接复用，
+    # 避免同时写同一个 `.part` 文件。等锁期间素材被放弃时立即退出，不在
+    # 长超时内占着下载线程。
+    try:
+        with file_lock.exclusive_file_lock(
+            f"{video_path}.lock",
+            timeout=_DOWNLOAD_LOCK_TIMEOUT_SECONDS,
+            cancel_event=cancel_event,
+        ):
+            if os.path.exists(video_path) and os.path.getsize(video_path) > 0:
+                logger.info(f"video downloaded by another task: {video_path}")
+                return video_path
+            return _download_and_validate_video(video_url, video_path, cancel_event)
+    except file_lock.LockWaitCancelledError as exc:
+        raise _DownloadCancelledError(
+            "material download abandoned while waiting for another task"
+        ) from exc
+
 
+def _download_and_validate_video(
+    video_url: str, video_path: str, cancel_event: threading.Event | None = None
+) -> str:
+    """在持有下载锁时下载素材并校验，只有通过校验的文件才会出现在最终路径上。"""
     # if video does not exist, download it
-    with open(video_path, "wb") as f:
-        f.write(
-            requests.get(
-                video_url,
-                headers=headers,
-                proxies=config.proxy,
-                verify=_get_tls_verify(),
-                timeout=(60, 240),
-            ).content
+    part_path = f"{video_path}.part"
+    _download_to_part_file(video_url, part_path, cancel_event)
+    if os.path.getsize(part_path) > 0 and _is_valid_video_file(part_path):
+        # 校验通过后才原子替换到最终路径：未加锁的存在性检查和进程中途
+        # 退出后的下一次运行，都只会看到完整且有效的素材。
+        os.replace(part_path, video_path)
+        return video_path
+
+    try:
+        os.remove(part_path)
+    except OSError as remove_error:
+        logger.warning(
+            f"failed to remove invalid video file: {part_path}, error: {str(remove_error)}"
         )
+    return ""
 
-    if os.path.exists(video_path) and os.path.getsize(video_path) > 0:
-        clip = None
-        try:
-            clip = VideoFileClip(video_path)
-            duration = clip.duration
-            fps = clip.fps
-            if duration > 0 and fps > 0:
-                return video_path
-        except Exception as e:
-            logger.warning(f"invalid video file: {video_path} => {str(e)}")
+
+def _is_valid_video_file(video_path: str) -> bool:
+    """
+    确认下载结果是能读出时长和帧率的视频。
+
+    绝大多数素材站返回 MP4，先只读头部盒子确认时长和帧率，避免每个下载
+    都启动一次 FFmpeg；头部无法解析时再用 FFmpeg 探测，最后才用 MoviePy
+    打开。校验的是 `.part` 临时文件，不写入元数据索引，避免索引里留下
+    临时路径的记录。
+    """
+    header = mp4_header.parse_mp4_header(video_path)
+    if header is not None and header.duration > 0 and header.fps > 0:
+        return True
+
+    metadata = media_probe.probe_video(video_path)
+    if metadata is not None and metadata.duration > 0 and metadata.fps > 0:
+        return True
+
+    clip = None
+    try:
+        clip = VideoFileClip(video_path)
+        if clip.duration > 0 and clip.fps > 0:
+            return True
+        logger.warning(f"invalid video file: {video_path} => empty duration or fps")
+    except Exception as e:
+        logger.warning(f"invalid video file: {video_path} => {str(e)}")
+    finally:
+        if clip is not None:
             try:
-                os.remove(video_path)
-            except Exception as remove_error:
+                clip.close()
+            except Exception as close_error:
                 logger.warning(
-                    f"failed to remove invalid video file: {video_path}, error: {str(remove_error)}"
+                    f"failed to close video clip: {video_path}, error: {str(close_error)}"
+                )
+    return False
+
+
+def _get_material_concurrency(provider: str, operation: str) -> int:
+    """
+    返回素材源同时进行的搜索或下载请求数，`operation` 为 search/download。
+
+    `<provider>_<operation>_concurrency` 优先于全局的
+    `material_<operation>_concurrency`，便于给限流较严的素材源单独调低；
+    默认 1 即逐个请求。
+    """
+    value = config.app.get(
+        f"{provider}_{operation}_concurrency",
+        config.app.get(f"material_{operation}_concurrency", 1),
+    )
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        logger.warning(
+            f"invalid material {operation} concurrency: {value!r}, "
+            "send requests one by one"
+        )
+        return 1
+
+
+def _save_material_candidate(
+    item: MaterialInfo,
+    search_term: str | None,
+    material_directory: str,
+    cancel_event: threading.Event | None = None,
+) -> str:
+    """保存单个候选素材，日志在逐个下载和并发下载时一致。"""
+    source_info = item.source_info if isinstance(item.source_info, dict) else {}
+    if search_term is None:
+        logger.info(
+            f"downloading {item.provider} video: "
+            f"asset_id={source_info.get('asset_id') or 'unknown'}"
+        )
+    else:
+        logger.info(
+            f"downloading ordered {item.provider} video for {search_term!r}: "
+            f"asset_id={source_info.get('asset_id') or 'unknown'}"
+        )
+    if cancel_event is None:
+        return save_video(video_url=item.url, save_dir=material_directory)
+    if cancel_event.is_set():
+        raise _DownloadCancelledError("material download abandoned before start")
+    return save_video(
+        video_url=item.url, save_dir=material_directory, cancel_event=cancel_event
+    )
+
+
+def _download_material_candidates(
+    candidates: List[tuple[str | None, MaterialInfo]],
+    *,
+    provider: str,
+    material_directory: str,
+    audio_duration: float,
+    max_clip_duration: int,
+    ordered: bool = False,
+) -> tuple[List[str], list[dict[str, Any]]]:
+    """
+    按候选顺序下载素材，累计有效时长超过配音时长后停止。
+
+    `candidates` 是 (关键词, 素材) 列表，顺序即最终素材顺序。并发下载时
+    最多保持 N 个请求在途，但结果仍按候选顺序消费：排在前面的下载完成
+    之前，后面的结果不会计入时长，因此选中的素材、顺序和来源记录都与
+    逐个下载相同。在途素材的预计时长已经足够覆盖配音时不再提交新下载，
+    某个下载失败后再继续补提交；凑够时长后取消尚未开始的下载，并通知
+    在途下载在下一个数据块处放弃、删除临时文件，不再消耗带宽和素材站
+    的请求配额；正在等待其它任务下载同一素材的线程也随之退出。
+    """
+    label = "ordered " if ordered else ""
+    video_paths: List[str] = []
+    material_sources: list[dict[str, Any]] = []
+    total_duration = 0.0
+
+    def log_download_error(item: MaterialInfo, error: Exception):
+        logger.error(
+            f"failed to download {label}material video: "
+            f"provider={item.provider}, error={type(error).__name__}, "
+            f"detail={_redact_request_error(error, item.url)}"
+        )
+
+    def accept(item: MaterialInfo, saved_video_path: str) -> bool:
+        """记录一个下载成功的素材，返回累计时长是否已经足够。"""
+        nonlocal total_duration
+        logger.info(f"video saved: {saved_video_path}")
+        video_paths.append(saved_video_path)
+        try:
+            material_sources.append(_material_source_record(item, saved_video_path))
+        except Exception as source_error:
+            # 来源记录异常不能把已经成功下载的素材视为下载失败，更不能
+            # 阻断视频生成；保留供应商和异常类型用于后续定位。
+            logger.warning(
+                f"failed to prepare {label}material source record: "
+                f"provider={item.provider}, "
+                f"error={type(source_error).__name__}, detail={source_error}"
+            )
+        total_duration += min(max_clip_duration, item.duration)
+        if total_duration > audio_duration:
+            logger.info(
+                f"total duration of downloaded videos: {total_duration} seconds, "
+                "skip downloading more"
+            )
+            return True
+        return False
+
+    concurrency = _get_material_concurrency(provider, "download")
+    if concurrency <= 1:
+        for search_term, item in candidates:
+            try:
+                saved_video_path = _save_material_candidate(
+                    item, search_term, material_directory
+                )
+            except Exception as e:
+                log_download_error(item, e)
+                continue
+            if saved_video_path and accept(item, saved_video_path):
+                break
+        return video_paths, material_sources
+
+    logger.info(f"downloading {provider} videos with {concurrency} concurrent requests")
+    executor = ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="material-download"
+    )
+    cancel_event = threading.Event()
+    pending = deque()
+    next_index = 0
+    enough = False
+    try:
+        while not enough:
+            pending_duration = sum(
+                min(max_clip_duration, item.duration) for item, _ in pending
+            )
+            while (
+                next_index < len(candidates)
+                and sum(not future.done() for _, future in pending) < concurrency
+                and total_duration + pending_duration <= audio_duration
+            ):
+                search_term, item = candidates[next_index]
+                next_index += 1
+                future = executor.submit(
+                    _save_material_candidate,
+                    item,
+                    search_term,
+                    material_directory,
+                    cancel_event,
                 )
-        finally:
-            if clip is not None:
+                pending.append((item, future))
+                pending_duration += min(max_clip_duration, item.duration)
+            if not pending:
+                break
+
+            running = [future for _, future in pending if not future.done()]
+            if running and not pending[0][1].done():
+                wait(running, return_when=FIRST_COMPLETED)
+            while pending and pending[0][1].done():
+                item, future = pending.popleft()
                 try:
-                    clip.close()
-                except Exception as close_error:
-                    logger.warning(
-                        f"failed to close video clip: {video_path}, error: {str(close_error)}"
-                    )
-    return ""
+                    saved_video_path = future.result()
+                except Exception as e:
+                    log_download_error(item, e)
+                    continue
+                if saved_video_path and accept(item, saved_video_path):
+                    enough = True
+                    break
+    finally:
+        # 在途下载收到通知后很快退出，这里不等待它们，凑够时长后立即进入
+        # 后续流程。
+        cancel_event.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    return video_paths, material_sources
 
 
 def _search_videos_with_cache(
@@ -1137,6 +1492,41 @@ def _search_videos_with_cache(
         return items
 
 
+def _search_terms(
+    search_videos: Callable[..., List[MaterialInfo]],
+    search_terms: List[str],
+    provider: str,
+    minimum_duration: int,
+    video_aspect: VideoAspect,
+) -> List[List[MaterialInfo]]:
+    """
+    搜索全部关键词，按关键词原顺序返回每个关键词的结果。
+
+    缓存未命中时每次搜索都是一次 0.5~2 秒的远端请求，并发搜索可以把多个
+    关键词的等待时间重叠起来。结果按关键词顺序返回，调用方的去重和排序
+    与逐个搜索完全相同；同一关键词的并发请求仍由搜索缓存锁合并。
+    """
+
+    def search(search_term: str) -> List[MaterialInfo]:
+        video_items = search_videos(
+            search_term=search_term,
+            minimum_duration=minimum_duration,
+            video_aspect=video_aspect,
+        )
+        logger.info(f"found {len(video_items)} videos for '{search_term}'")
+        return video_items
+
+    concurrency = min(_get_material_concurrency(provider, "search"), len(search_terms))
+    if concurrency <= 1:
+        return [search(search_term) for search_term in search_terms]
+
+    logger.info(f"searching {provider} videos with {concurrency} concurrent requests")
+    with ThreadPoolExecutor(
+        max_workers=concurrency, thread_name_prefix="material-search"
+    ) as executor:
+        return list(executor.map(search, search_terms))
+
+
 def download_videos(
     task_id: str,
     search_terms: List[str],
@@ -1194,6 +1584,7 @@ def download_videos(
             task_id=task_id,
             search_terms=search_terms,
             search_videos=search_videos,
+            provider=provider,
             video_aspect=video_aspect,
             audio_duration=audio_duration,
             max_clip_duration=max_clip_duration,
@@ -1203,14 +1594,14 @@ def download_videos(
     valid_video_items = []
     valid_video_urls = []
     found_duration = 0.0
-    for search_term in search_terms:
-        video_items = search_videos(
-            search_term=search_term,
-            minimum_duration=max_clip_duration,
-            video_aspect=video_aspect,
-        )
-        logger.info(f"found {len(video_items)} videos for '{search_term}'")
-
+    term_results = _search_terms(
+        search_videos,
+        search_terms,
+        provider=provider,
+        minimum_duration=max_clip_duration,
+        video_aspect=video_aspect,
+    )
+    for video_items in term_results:
         for item in video_items:
             if item.url not in valid_video_urls:
                 valid_video_items.append(item)
@@ -1220,52 +1611,17 @@ def download_videos(
     logger.info(
         f"found total videos: {len(valid_video_items)}, required duration: {audio_duration} seconds, found duration: {found_duration} seconds"
     )
-    video_paths = []
-    material_sources: list[dict[str, Any]] = []
-
     concat_mode_value = getattr(video_concat_mode, "value", video_concat_mode)
     if concat_mode_value == VideoConcatMode.random.value:
         random.shuffle(valid_video_items)
 
-    total_duration = 0.0
-    for item in valid_video_items:
-        try:
-            source_info = item.source_info if isinstance(item.source_info, dict) else {}
-            logger.info(
-                f"downloading {item.provider} video: "
-                f"asset_id={source_info.get('asset_id') or 'unknown'}"
-            )
-            saved_video_path = save_video(
-                video_url=item.url, save_dir=material_directory
-            )
-            if saved_video_path:
-                logger.info(f"video saved: {saved_video_path}")
-                video_paths.append(saved_video_path)
-                try:
-                    material_sources.append(
-                        _material_source_record(item, saved_video_path)
-                    )
-                except Exception as source_error:
-                    # 来源记录异常不能把已经成功下载的素材视为下载失败，更不能
-                    # 阻断视频生成；保留供应商和异常类型用于后续定位。
-                    logger.warning(
-                        "failed to prepare material source record: "
-                        f"provider={item.provider}, "
-                        f"error={type(source_error).__name__}, detail={source_error}"
-                    )
-                seconds = min(max_clip_duration, item.duration)
-                total_duration += seconds
-                if total_duration > audio_duration:
-                    logger.info(
-                        f"total duration of downloaded videos: {total_duration} seconds, skip downloading more"
-                    )
-                    break
-        except Exception as e:
-            logger.error(
-                "failed to download material video: "
-                f"provider={item.provider}, error={type(e).__name__}, "
-                f"detail={_redact_request_error(e, item.url)}"
-            )
+    video_paths, material_sources = _download_material_candidates(
+        [(None, item) for item in valid_video_items],
+        provider=provider,
+        material_directory=material_directory,
+        audio_duration=audio_duration,
+        max_clip_duration=max_clip_duration,
+    )
     logger.success(f"downloaded {len(video_paths)} videos")
     _persist_material_sources(task_id, material_sources)
     return video_paths
@@ -1351,6 +1707,7 @@ def _download_videos_by_script_order(
     audio_duration: float,
     max_clip_duration: int,
     material_directory: str,
+    provider: str,
 ) -> List[str]:
     """
     按脚本文案顺序下载素材。
@@ -1366,14 +1723,14 @@ def _download_videos_by_script_order(
     valid_video_urls = set()
     found_duration = 0.0
 
-    for search_term in search_terms:
-        video_items = search_videos(
-            search_term=search_term,
-            minimum_duration=max_clip_duration,
-            video_aspect=video_aspect,
-        )
-        logger.info(f"found {len(video_items)} videos for '{search_term}'")
-
+    term_results = _search_terms(
+        search_videos,
+        search_terms,
+        provider=provider,
+        minimum_duration=max_clip_duration,
+        video_aspect=video_aspect,
+    )
+    for search_term, video_items in zip(search_terms, term_results):
         term_items = []
         for item in video_items:
             if item.url in valid_video_urls:
@@ -1390,60 +1747,29 @@ def _download_videos_by_script_order(
         f"required duration: {audio_duration} seconds, found duration: {found_duration} seconds"
     )
 
-    video_paths = []
-    material_sources: list[dict[str, Any]] = []
-    total_duration = 0.0
+    # 轮询顺序展开成一个列表：第 1 轮是每个关键词的第 1 个候选，依此类推。
+    # 下载按这个顺序消费结果，串行与并发两种方式得到的素材顺序一致。
+    ordered_candidates = []
     candidate_index = 0
-    while candidate_groups and total_duration <= audio_duration:
-        has_candidate = False
-        for search_term, term_items in candidate_groups:
-            if candidate_index >= len(term_items):
-                continue
-
-            has_candidate = True
-            item = term_items[candidate_index]
-            try:
-                source_info = (
-                    item.source_info if isinstance(item.source_info, dict) else {}
-                )
-                logger.info(
-                    f"downloading ordered {item.provider} video for {search_term!r}: "
-                    f"asset_id={source_info.get('asset_id') or 'unknown'}"
-                )
-                saved_video_path = save_video(
-                    video_url=item.url, save_dir=material_directory
-                )
-                if saved_video_path:
-                    logger.info(f"video saved: {saved_video_path}")
-                    video_paths.append(saved_video_path)
-                    try:
-                        material_sources.append(
-                            _material_source_record(item, saved_video_path)
-                        )
-                    except Exception as source_error:
-                        logger.warning(
-                            "failed to prepare ordered material source record: "
-                            f"provider={item.provider}, "
-                            f"error={type(source_error).__name__}, "
-                            f"detail={source_error}"
-                        )
-                    total_duration += min(max_clip_duration, item.duration)
-                    if total_duration > audio_duration:
-                        logger.info(
-                            f"total duration of downloaded videos: {total_duration} seconds, skip downloading more"
-                        )
-                        break
-            except Exception as e:
-                logger.error(
-                    "failed to download ordered material video: "
-                    f"provider={item.provider}, error={type(e).__name__}, "
-                    f"detail={_redact_request_error(e, item.url)}"
-                )
-
-        if not has_candidate:
+    while True:
+        round_candidates = [
+            (search_term, term_items[candidate_index])
+            for search_term, term_items in candidate_groups
+            if candidate_index < len(term_items)
+        ]
+        if not round_candidates:
             break
+        ordered_candidates.extend(round_candidates)
         candidate_index += 1
 
+    video_paths, material_sources = _download_material_candidates(
+        ordered_candidates,
+        provider=provider,
+        material_directory=material_directory,
+        audio_duration=audio_duration,
+        max_clip_duration=max_clip_duration,
+        ordered=True,
+    )
     logger.success(f"downloaded {len(video_paths)} ordered videos")
     _persist_material_sources(task_id, material_sources)
     return video_paths
@@ -9,7 +9,7 @@ from uuid import uuid4
 from loguru import logger
 from PIL import Image, UnidentifiedImageError
 
-from app.utils import utils
+from app.utils import mp4_header, utils
 
 
 # Local materials are usually short clips. This matches Streamlit's default upload
@@ -136,6 +136,14 @@ def _validate_video(
     else:
         raise MaterialUploadError("uploaded file must contain a video, not an image")
 
+    # MP4/MOV 头部已经声明零时长或零帧率时无需再启动 FFmpeg 解码。头部正常
+    # 不代表每一帧都能解码，因此仍需完整解码校验，解析失败同样交给 FFmpeg。
+    header = mp4_header.parse_mp4_header(file_path)
+    if header is not None and (header.duration <= 0 or header.fps <= 0):
+        raise MaterialUploadError(
+            "uploaded file must contain a completely decodable video stream"
+        )
+
     try:
         decoded = subprocess.run(
             [
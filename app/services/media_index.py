@@ -0,0 +1,255 @@
+"""跨任务持久化的素材元数据索引。"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from loguru import logger
+
+from app.services import media_probe
+from app.services.media_probe import VideoMetadata
+from app.utils import utils
+
+# 表结构变化时递增版本号，旧库会在打开时整表重建。
+# 版本 2 起关键帧改为按需扫描，未扫描的记录 keyframes 为 NULL。
+_SCHEMA_VERSION = 2
+_DB_FILE_NAME = "media_index.db"
+# 多个任务进程可能同时写入同一个库，写锁等待时间需要覆盖一次正常的提交。
+_CONNECT_TIMEOUT_SECONDS = 10
+
+_schema_lock = threading.Lock()
+_initialized_paths: set[str] = set()
+
+
+def _db_path() -> str:
+    """
+    返回索引数据库路径。
+
+    索引放在 ``storage`` 根目录而不是任务目录：同一份素材会被多个任务、多个
+    视频以及服务重启后的任务反复使用，只有跨任务共享才能省掉重复探测。
+    """
+    return os.path.join(utils.storage_dir(create=True), _DB_FILE_NAME)
+
+
+def _connect() -> sqlite3.Connection:
+    """
+    每次调用单独打开连接。
+
+    元数据读写都是一次性的短事务，按需打开连接比维护线程级连接池简单，
+    也不受 sqlite3 连接不能跨线程、跨进程共享的限制。
+    """
+    db_path = _db_path()
+    connection = sqlite3.connect(db_path, timeout=_CONNECT_TIMEOUT_SECONDS)
+    with _schema_lock:
+        if db_path not in _initialized_paths:
+            _ensure_schema(connection)
+            _initialized_paths.add(db_path)
+    return connection
+
+
+def _ensure_schema(connection: sqlite3.Connection) -> None:
+    with connection:
+        # WAL 允许探测写入时其它进程继续读取，避免并行片段处理互相阻塞。
+        connection.execute("PRAGMA journal_mode=WAL")
+        version = connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != _SCHEMA_VERSION:
+            connection.execute("DROP TABLE IF EXISTS media_metadata")
+        connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS media_metadata (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                duration REAL NOT NULL,
+                width INTEGER NOT NULL,
+                height INTEGER NOT NULL,
+                fps REAL NOT NULL,
+                codec TEXT NOT NULL,
+                pix_fmt TEXT NOT NULL,
+                rotation INTEGER NOT NULL,
+                has_audio INTEGER NOT NULL,
+                has_video INTEGER NOT NULL,
+                keyframe_interval REAL,
+                keyframes TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        connection.execute(f"PRAGMA user_version={_SCHEMA_VERSION}")
+
+
+def _row_to_metadata(row: tuple) -> VideoMetadata:
+    (
+        duration,
+        width,
+        height,
+        fps,
+        codec,
+        pix_fmt,
+        rotation,
+        has_audio,
+        has_video,
+        keyframes,
+    ) = row
+    return VideoMetadata(
+        duration=float(duration),
+        width=int(width),
+        height=int(height),
+        fps=float(fps),
+        codec=codec,
+        pix_fmt=pix_fmt,
+        rotation=int(rotation),
+        has_audio=bool(has_audio),
+        keyframes=(
+            None
+            if keyframes is None
+            else tuple(float(value) for value in json.loads(keyframes))
+        ),
+        has_video=bool(has_video),
+    )
+
+
+def _lookup(path: str, size: int, mtime_ns: int) -> VideoMetadata | None:
+    with closing(_connect()) as connection:
+        row = connection.execute(
+            """
+            SELECT duration, width, height, fps, codec, pix_fmt, rotation,
+                   has_audio, has_video, keyframes
+            FROM media_metadata
+            WHERE path = ? AND size = ? AND mtime_ns = ?
+            """,
+            (path, size, mtime_ns),
+        ).fetchone()
+    return _row_to_metadata(row) if row else None
+
+
+def _store(path: str, size: int, mtime_ns: int, metadata: VideoMetadata) -> None:
+    with closing(_connect()) as connection, connection:
+        # 同一路径只保留最新一条记录，文件被覆盖后旧记录随之被替换。
+        connection.execute(
+            """
+            INSERT OR REPLACE INTO media_metadata (
+                path, size, mtime_ns, duration, width, height, fps, codec,
+                pix_fmt, rotation, has_audio, has_video, keyframe_interval,
+                keyframes, updated_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                path,
+                size,
+                mtime_ns,
+                metadata.duration,
+                metadata.width,
+                metadata.height,
+                metadata.fps,
+                metadata.codec,
+                metadata.pix_fmt,
+                metadata.rotation,
+                int(metadata.has_audio),
+                int(metadata.has_video),
+                None if metadata.keyframes is None else metadata.keyframe_interval,
+                None if metadata.keyframes is None else json.dumps(metadata.keyframes),
+                time.time(),
+            ),
+        )
+
+
+def _store_keyframes(
+    path: str, size: int, mtime_ns: int, metadata: VideoMetadata
+) -> None:
+    with closing(_connect()) as connection, connection:
+        # 只更新与当前文件版本一致的记录；扫描期间文件被替换时放弃写入。
+        connection.execute(
+            """
+            UPDATE media_metadata
+            SET keyframe_interval = ?, keyframes = ?, updated_at = ?
+            WHERE path = ? AND size = ? AND mtime_ns = ?
+            """,
+            (
+                metadata.keyframe_interval,
+                json.dumps(metadata.keyframes),
+                time.time(),
+                path,
+                size,
+                mtime_ns,
+            ),
+        )
+
+
+def get_media_metadata(file_path: str) -> VideoMetadata | None:
+    """
+    返回素材的元数据，优先读取索引，未命中时探测并写回索引。
+
+    记录以“绝对路径 + 文件大小 + 纳秒修改时间”为准，文件被重新下载或覆盖
+    后自动视为未命中。探测失败不写入索引，下次仍会重新探测，避免一次临时
+    错误让素材长期不可用。索引库不可用时直接探测，不影响正常流程。
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    path = os.path.abspath(file_path)
+
+    try:
+        cached = _lookup(path, stat.st_size, stat.st_mtime_ns)
+    except sqlite3.Error as exc:
+        logger.warning(f"failed to read media index: {path}, error: {str(exc)}")
+        cached = None
+    if cached is not None:
+        return cached
+
+    metadata = media_probe.probe_media(file_path)
+    if metadata is None:
+        return None
+    try:
+        _store(path, stat.st_size, stat.st_mtime_ns, metadata)
+    except sqlite3.Error as exc:
+        logger.warning(f"failed to update media index: {path}, error: {str(exc)}")
+    return metadata
+
+
+def get_video_metadata(video_path: str) -> VideoMetadata | None:
+    """与 `get_media_metadata` 相同，但纯音频或无法解析的文件返回 None。"""
+    metadata = get_media_metadata(video_path)
+    if metadata is None or not metadata.has_video:
+        return None
+    return metadata
+
+
+def get_keyframes(video_path: str) -> tuple[float, ...] | None:
+    """
+    返回视频的关键帧时间，索引里尚未记录时扫描一次并写回。
+
+    关键帧扫描要读完整条视频，只有流复制规划需要，所以不放在
+    `get_media_metadata` 的首次探测里。扫描失败返回 None 且不写入索引。
+    """
+    metadata = get_video_metadata(video_path)
+    if metadata is None:
+        return None
+    if metadata.keyframes is not None:
+        return metadata.keyframes
+
+    try:
+        stat = os.stat(video_path)
+    except OSError:
+        return None
+    keyframes = media_probe.probe_keyframes(video_path)
+    if keyframes is None:
+        return None
+    path = os.path.abspath(video_path)
+    try:
+        _store_keyframes(
+            path,
+            stat.st_size,
+            stat.st_mtime_ns,
+            dataclasses.replace(metadata, keyframes=keyframes),
+        )
+    except sqlite3.Error as exc:
+        logger.warning(f"failed to update media index: {path}, error: {str(exc)}")
+    return keyframes
@@ -0,0 +1,214 @@
+"""音视频素材元数据探测。"""
+
+from __future__ import annotations
+
+import bisect
+import re
+import subprocess
+from dataclasses import dataclass
+
+from loguru import logger
+from moviepy.video.io.ffmpeg_reader import FFmpegInfosParser
+
+from app.utils import utils
+
+# 流参数探测只解码第一帧，正常素材在一秒内完成；超时说明文件或磁盘异常。
+_PROBE_TIMEOUT_SECONDS = 30
+# 只解码关键帧的扫描仍需读取整条视频，长素材在慢盘上可能需要数十秒。
+_KEYFRAME_PROBE_TIMEOUT_SECONDS = 120
+_KEYFRAME_TIME_PATTERN = re.compile(r"pts_time:\s*(-?[0-9.]+)")
+# `Video: h264 (High) (avc1 / 0x31637661), yuv420p(progressive), ...`
+# 中第一个逗号后的标识符就是像素格式。
+_PIX_FMT_PATTERN = re.compile(r"Stream #\d+:\d+.*?: Video: [^,]+, (\w+)")
+
+
+@dataclass(frozen=True)
+class VideoMetadata:
+    """
+    一次探测得到的媒体流信息，时间单位均为秒。
+
+    纯音频文件同样使用该结构：``has_video`` 为 False，画面相关字段为 0 或
+    空值，``duration`` 取容器时长，与 AudioFileClip 读取的时长一致。
+    """
+
+    duration: float
+    width: int
+    height: int
+    fps: float
+    codec: str
+    pix_fmt: str
+    rotation: int
+    has_audio: bool
+    # None 表示尚未扫描关键帧，见 `probe_keyframes`。
+    keyframes: tuple[float, ...] | None = None
+    has_video: bool = True
+
+    @property
+    def keyframe_interval(self) -> float:
+        """返回相邻关键帧的最大间隔，未扫描或不足两个关键帧时返回 0。"""
+        if self.keyframes is None or len(self.keyframes) < 2:
+            return 0.0
+        return max(
+            later - earlier
+            for earlier, later in zip(self.keyframes, self.keyframes[1:])
+        )
+
+
+def _run_ffmpeg(command: list[str], file_path: str, timeout: float):
+    try:
+        return subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+            check=False,
+            timeout=timeout,
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        logger.warning(f"failed to probe media: {file_path}, error: {str(exc)}")
+        return None
+
+
+def probe_media(file_path: str) -> VideoMetadata | None:
+    """
+    用一次 FFmpeg 调用读取媒体流参数，不扫描关键帧。
+
+    运行环境通常只有 imageio-ffmpeg 提供的 ffmpeg，没有 ffprobe。这里只解码
+    第一帧，既能拿到输入信息，又能确认视频流可以解码；流参数复用 MoviePy
+    的解析器，与 VideoFileClip/AudioFileClip 读到的尺寸、帧率和时长保持一致。
+    纯音频文件没有可输出的流，FFmpeg 会以非零状态退出，但输入信息已经完整
+    打印，仍可用于读取时长。关键帧只有流复制规划需要，按需调用
+    `probe_keyframes`。探测失败时返回 None，调用方应回退到不依赖元数据的
+    处理方式。
+    """
+    command = [
+        utils.get_ffmpeg_binary(),
+        "-hide_banner",
+        "-i",
+        file_path,
+        "-map",
+        "0:v:0?",
+        "-an",
+        "-sn",
+        "-dn",
+        "-frames:v",
+        "1",
+        "-f",
+        "null",
+        "-",
+    ]
+    result = _run_ffmpeg(command, file_path, _PROBE_TIMEOUT_SECONDS)
+    if result is None:
+        return None
+
+    stderr = result.stderr or ""
+    # MoviePy 的解析器只认识输入段；输出段里同样有 Stream 行，会干扰解析。
+    header = stderr.split("Stream mapping:", 1)[0]
+    try:
+        infos = FFmpegInfosParser(header, file_path).parse()
+    except Exception as exc:
+        logger.warning(
+            f"failed to probe media: {file_path}, error: {stderr.strip()[-500:] or exc}"
+        )
+        return None
+
+    if not infos.get("video_found"):
+        if not infos.get("audio_found") or not infos.get("duration"):
+            logger.warning(f"no audio or video stream found: {file_path}")
+            return None
+        return VideoMetadata(
+            duration=float(infos["duration"]),
+            width=0,
+            height=0,
+            fps=0.0,
+            codec="",
+            pix_fmt="",
+            rotation=0,
+            has_audio=True,
+            keyframes=(),
+            has_video=False,
+        )
+
+    if result.returncode != 0:
+        logger.warning(
+            f"failed to probe media: {file_path}, error: {stderr.strip()[-500:]}"
+        )
+        return None
+
+    pix_fmt_match = _PIX_FMT_PATTERN.search(header)
+    width, height = infos["video_size"]
+    rotation = abs(int(infos.get("video_rotation") or 0))
+    if rotation in (90, 270):
+        # 与 VideoFileClip 一致，按显示方向报告宽高。
+        width, height = height, width
+    return VideoMetadata(
+        duration=float(infos.get("video_duration") or infos.get("duration") or 0),
+        width=int(width),
+        height=int(height),
+        fps=float(infos.get("video_fps") or 0),
+        codec=str(infos.get("video_codec_name") or ""),
+        pix_fmt=pix_fmt_match.group(1) if pix_fmt_match else "",
+        rotation=rotation,
+        has_audio=bool(infos.get("audio_found")),
+    )
+
+
+def probe_keyframes(video_path: str) -> tuple[float, ...] | None:
+    """
+    读取视频全部关键帧的时间，失败时返回 None。
+
+    用 `-skip_frame nokey` 只解码关键帧，再从 showinfo 输出里取时间戳。
+    即便跳过非关键帧，FFmpeg 仍要读完整条视频，所以只在流复制规划确实
+    需要关键帧时调用，结果由元数据索引缓存。
+    """
+    command = [
+        utils.get_ffmpeg_binary(),
+        "-hide_banner",
+        "-skip_frame",
+        "nokey",
+        "-i",
+        video_path,
+        "-map",
+        "0:v:0",
+        "-an",
+        "-sn",
+        "-dn",
+        "-vf",
+        "showinfo",
+        "-f",
+        "null",
+        "-",
+    ]
+    result = _run_ffmpeg(command, video_path, _KEYFRAME_PROBE_TIMEOUT_SECONDS)
+    if result is None:
+        return None
+    if result.returncode != 0:
+        logger.warning(
+            f"failed to probe keyframes: {video_path}, "
+            f"error: {(result.stderr or '').strip()[-500:]}"
+        )
+        return None
+    return tuple(
+        sorted(
+            float(value) for value in _KEYFRAME_TIME_PATTERN.findall(result.stderr)
+        )
+    )
+
+
+def probe_video(video_path: str) -> VideoMetadata | None:
+    """探测视频文件；纯音频或无法解析的文件返回 None。"""
+    metadata = probe_media(video_path)
+    if metadata is None or not metadata.has_video:
+        return None
+    return metadata
+
+
+def floor_keyframe(keyframes: tuple[float, ...], time_point: float) -> float | None:
+    """返回不晚于 `time_point` 的最后一个关键帧时间，没有时返回 None。"""
+    # 关键帧时间来自文本输出，允许 1ms 误差，避免恰好落在关键帧上的切点被
+    # 浮点舍入推到前一个关键帧。
+    index = bisect.bisect_right(keyframes, time_point + 0.001)
+    if index == 0:
+        return None
+    return keyframes[index - 1]
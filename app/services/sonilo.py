@@ -13,7 +13,7 @@ from loguru import logger
 
 from app.config import config
 from app.services import bgm as bgm_service
-from app.utils import utils
+from app.utils import http_client, utils
 
 
 DEFAULT_BASE_URL = "https://api.sonilo.com"
@@ -89,7 +89,7 @@ def test_connection() -> dict[str, Any]:
     if not api_key:
         raise SoniloError("Sonilo API key is required")
     try:
-        response = requests.get(
+        response = http_client.get(
             f"{_base_url()}{SERVICES_PATH}",
             headers={"Authorization": f"Bearer {api_key}"},
             timeout=(15, 30),
@@ -285,7 +285,7 @@ def _request_bgm(video_path: str, output_path: str, prompt: str) -> str:
         )
         try:
             with open(video_path, "rb") as video_file:
-                response = requests.post(
+                response = http_client.post(
                     f"{_base_url()}{VIDEO_TO_MUSIC_PATH}",
                     headers={"Authorization": f"Bearer {get_api_key()}"},
                     files={"video": (Path(video_path).name, video_file, "video/mp4")},
@@ -13,7 +13,12 @@ from loguru import logger
 
 from app.config import config
 from app.models import const
-from app.models.schema import VideoConcatMode, VideoParams
+from app.models.schema import (
+    RenderProfile,
+    TaskRerenderRequest,
+    VideoConcatMode,
+    VideoParams,
+)
 from app.services import bgm as bgm_service
 from app.services import (
     elevenlabs_music,
@@ -115,6 +120,7 @@ def is_task_busy(task: dict | None) -> bool:
     return (
         state == const.TASK_STATE_PROCESSING
         or task.get("cross_post_state") in _ACTIVE_CROSS_POST_STATES
+        or task.get("rerender_state") == const.RERENDER_STATE_PROCESSING
     )
 
 
@@ -621,7 +627,11 @@ def get_video_materials(
     if params.video_source == "local":
         logger.info("\n\n## preprocess local materials")
         materials = video.preprocess_video(
-            materials=params.video_materials, clip_duration=params.video_clip_duration
+            materials=params.video_materials,
+            clip_duration=params.video_clip_duration,
+            video_aspect=params.video_aspect,
+            threads=params.n_threads,
+            output_dir=utils.task_dir(task_id),
         )
         if not materials:
             _mark_task_failed(
@@ -763,12 +773,64 @@ def _record_loomloom_run_reference(
     return None
 
 
+def _prepare_subtitle_overlay(task_id, params, subtitle_path) -> str:
+    """
+    按配置为整个任务只生成一次字幕卡或 ASS 文件，失败时返回空字符串。
+
+    字幕、字体和位置在同一任务的所有视频中完全相同，每个视频都由 FFmpeg
+    绘制同一份叠加文件，避免重复合成 TextClip。
+    """
+    subtitle_backend = video.get_subtitle_backend()
+    if subtitle_backend == "moviepy":
+        return ""
+    try:
+        return video.prepare_subtitle_overlay(
+            subtitle_path=subtitle_path,
+            params=params,
+            output_dir=utils.task_dir(task_id),
+            backend=subtitle_backend,
+        )
+    except Exception:
+        logger.exception(
+            f"failed to prepare subtitle overlay, fallback to moviepy: "
+            f"task_id={task_id}"
+        )
+        return ""
+
+
+def _trim_audio_for_draft_preview(task_id, params, audio_file, audio_duration):
+    """
+    草稿预览只渲染开头几秒，返回裁短后的 ``(audio_file, audio_duration)``。
+
+    把旁白裁短后，拼接、字幕和混音都按裁短后的时长规划，与完整渲染共用
+    同一套流程；重新渲染草稿预览时也要用同一段旁白匹配已有的拼接视频。
+    ``audio_duration`` 为 None 时只在需要裁短判断时才读取音频时长。
+    """
+    render_profile = getattr(params.render_profile, "value", params.render_profile)
+    if render_profile != RenderProfile.draft.value or not params.preview_duration:
+        return audio_file, audio_duration
+    if audio_duration is None:
+        audio_duration = voice.get_audio_duration(audio_file)
+    if params.preview_duration < audio_duration:
+        audio_file = video.trim_audio_for_preview(
+            audio_file, params.preview_duration, utils.task_dir(task_id)
+        )
+        audio_duration = params.preview_duration
+        logger.info(
+            f"rendering draft preview of the first {audio_duration:g}s: {audio_file}"
+        )
+    return audio_file, audio_duration
+
+
 def generate_final_videos(
     task_id, params, downloaded_videos, audio_file, subtitle_path, audio_duration
 ):
     final_video_paths = []
     combined_video_paths = []
     warnings = []
+    audio_file, audio_duration = _trim_audio_for_draft_preview(
+        task_id, params, audio_file, audio_duration
+    )
     video_music_provider = _VIDEO_MUSIC_PROVIDERS.get(params.bgm_type)
     video_music_requested = (
         video_music_provider is not None
@@ -784,12 +846,48 @@ def generate_final_videos(
         video_concat_mode = VideoConcatMode.random
     video_transition_mode = params.video_transition_mode
 
+    # 提供商配乐需要先上传合成好的无字幕视频，只能走“先拼接再合成”的两段式
+    # 流程；其余情况可以按配置使用 FFmpeg 单次编码引擎直接输出成片。
+    use_ffmpeg_engine = (
+        video.get_render_engine() == "ffmpeg" and not video_music_requested
+    )
+
+    subtitle_overlay = _prepare_subtitle_overlay(task_id, params, subtitle_path)
+
     _progress = 50
     for i in range(params.video_count):
         index = i + 1
         combined_video_path = path.join(
             utils.task_dir(task_id), f"combined-{index}.mp4"
         )
+        final_video_path = path.join(utils.task_dir(task_id), f"final-{index}.mp4")
+        if use_ffmpeg_engine:
+            logger.info(
+                f"\n\n## rendering video with ffmpeg: {index} => {final_video_path}"
+            )
+            try:
+                video.render_video_with_ffmpeg(
+                    output_file=final_video_path,
+                    video_paths=downloaded_videos,
+                    audio_file=audio_file,
+                    subtitle_path=subtitle_path,
+                    params=params,
+                    video_concat_mode=video_concat_mode,
+                    bgm_file_override="" if video_music_provider else None,
+                    subtitle_overlay=subtitle_overlay,
+                )
+                _progress += 50 / params.video_count
+                sm.state.update_task(task_id, progress=_progress)
+                final_video_paths.append(final_video_path)
+                continue
+            except Exception:
+                # 单次编码引擎依赖较新的 FFmpeg 滤镜，个别素材也可能触发滤镜图
+                # 协商失败。此时回退到 MoviePy 流程，保证任务仍能产出成片。
+                logger.exception(
+                    f"ffmpeg render engine failed, fallback to moviepy: "
+                    f"task_id={task_id}, video_index={index}"
+                )
+
         logger.info(f"\n\n## combining video: {index} => {combined_video_path}")
         video.combine_videos(
             combined_video_path=combined_video_path,
@@ -801,13 +899,12 @@ def generate_final_videos(
             max_clip_duration=params.video_clip_duration,
             threads=params.n_threads,
             clip_speed=params.video_clip_speed,
+            render_profile=params.render_profile,
         )
 
         _progress += 50 / params.video_count / 2
         sm.state.update_task(task_id, progress=_progress)
 
-        final_video_path = path.join(utils.task_dir(task_id), f"final-{index}.mp4")
-
         # 视频配乐模式先明确禁用默认 BGM 解析，避免旧任务残留的 bgm_file 被
         # 误用。只有音量大于 0 才生成代理并调用付费 API；0 音量统一跳过。
         bgm_file_override = "" if video_music_provider else None
@@ -845,6 +942,7 @@ def generate_final_videos(
             output_file=final_video_path,
             params=params,
             bgm_file_override=bgm_file_override,
+            subtitle_overlay=subtitle_overlay,
         )
         if (
             video_music_provider is not None
@@ -870,6 +968,252 @@ def generate_final_videos(
     return final_video_paths, combined_video_paths, warnings
 
 
+# 重新渲染只开放最终合成阶段读取的字段，其余参数必须与复用的拼接视频、
+# 配音和字幕保持一致。
+RERENDER_OVERRIDE_FIELDS = tuple(TaskRerenderRequest.model_fields)
+
+
+def _resolve_rerender_audio(
+    task_id: str, task_directory: str, params, allow_server_file_input: bool
+) -> str:
+    """按原任务的产出规则找回旁白音频，找不到时返回空字符串。"""
+    task = sm.state.get_task(task_id) or {}
+    recorded_audio = path.realpath(str(task.get("audio_file") or ""))
+    task_root = path.realpath(task_directory)
+    try:
+        recorded_is_task_local = (
+            path.commonpath([task_root, recorded_audio]) == task_root
+        )
+    except ValueError:
+        recorded_is_task_local = False
+    # 状态中的路径可能是试听缓存等非默认文件名，只信任任务目录内的文件。
+    if recorded_is_task_local and path.isfile(recorded_audio):
+        return recorded_audio
+
+    tts_audio = path.join(task_directory, "audio.mp3")
+    if path.isfile(tts_audio):
+        return tts_audio
+
+    # 自定义音频不会写入 audio.mp3，按原任务相同的路径边界重新解析。
+    return resolve_custom_audio_file(
+        task_id,
+        params.custom_audio_file,
+        allow_server_file_input=allow_server_file_input,
+    )
+
+
+def prepare_rerender(
+    task_id: str,
+    overrides: dict | None = None,
+    *,
+    allow_server_file_input: bool = False,
+):
+    """
+    读取已完成任务的产物并合并样式覆盖。
+
+    返回 ``(params, combined_videos, audio_file, subtitle_path)``。任务未完成、
+    任务目录、``script.json``、拼接视频或旁白缺失时抛出 ``ValueError``；失败
+    任务可能残留部分拼接视频，不能当作可复用的产物。CLI 使用内存状态时
+    进程退出后查不到任务记录，这时以全部 ``final-N.mp4`` 都已生成作为完成
+    依据。单次编码引擎不会保留 ``combined-N.mp4``，这类任务只能重新提交
+    完整流程。
+    """
+    overrides = dict(overrides or {})
+    unknown_fields = sorted(set(overrides) - set(RERENDER_OVERRIDE_FIELDS))
+    if unknown_fields:
+        raise ValueError(f"unsupported re-render fields: {', '.join(unknown_fields)}")
+
+    task = sm.state.get_task(task_id)
+    if task and task.get("state") != const.TASK_STATE_COMPLETE:
+        raise ValueError("only completed tasks can be re-rendered")
+
+    task_id = str(task_id or "")
+    task_directory = path.join(utils.task_dir(), task_id)
+    if not task_id or path.basename(task_id) != task_id or not path.isdir(
+        task_directory
+    ):
+        raise ValueError(f"task directory does not exist: {task_id}")
+
+    try:
+        script_data = task_artifacts.read_script_data(task_id)
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"task script data is unavailable: {exc}") from exc
+    saved_params = script_data.get("params")
+    if not isinstance(saved_params, dict):
+        raise ValueError("task script data does not contain video params")
+    params = VideoParams(**{**saved_params, **overrides})
+    if not task and not all(
+        path.isfile(path.join(task_directory, f"final-{index}.mp4"))
+        for index in range(1, params.video_count + 1)
+    ):
+        raise ValueError("only completed tasks can be re-rendered")
+
+    combined_videos = []
+    for index in range(1, params.video_count + 1):
+        combined_video = path.join(task_directory, f"combined-{index}.mp4")
+        if not path.isfile(combined_video):
+            break
+        combined_videos.append(combined_video)
+    if not combined_videos:
+        raise ValueError(
+            "task has no combined videos to reuse; tasks rendered by the ffmpeg "
+            "render engine must be generated again"
+        )
+
+    audio_file = _resolve_rerender_audio(
+        task_id, task_directory, params, allow_server_file_input
+    )
+    if not audio_file:
+        raise ValueError("task narration audio is unavailable")
+
+    subtitle_path = path.join(task_directory, "subtitle.srt")
+    if not path.isfile(subtitle_path):
+        if params.subtitle_enabled:
+            logger.warning(
+                f"task has no subtitle file, re-render without subtitles: {task_id}"
+            )
+        subtitle_path = ""
+
+    return params, combined_videos, audio_file, subtitle_path
+
+
+def _mark_rerender_failed(task_id: str, error: str) -> dict:
+    """
+    记录重新渲染失败，同时保留原任务的状态、成片和中间产物字段。
+
+    上一次生成的视频仍然有效，任务的 ``state`` 保持不变，失败只写入
+    ``rerender_state`` 和 ``rerender_error``，用户仍能查询和下载原成片。
+    """
+    message = str(error or "unknown re-render error").strip()
+    logger.error(f"re-render failed, task_id: {task_id}, error: {message}")
+    failure = {
+        "task_id": task_id,
+        "rerender_state": const.RERENDER_STATE_FAILED,
+        "rerender_error": message,
+    }
+    sm.state.patch_task(
+        task_id,
+        rerender_state=failure["rerender_state"],
+        rerender_error=failure["rerender_error"],
+    )
+    return failure
+
+
+def rerender(
+    task_id: str,
+    overrides: dict | None = None,
+    *,
+    allow_server_file_input: bool = False,
+):
+    """
+    复用已完成任务的拼接视频、配音和字幕，只按新样式重新执行最终合成。
+
+    修改字幕字体、颜色、位置或 BGM 时无需再调用 LLM、TTS 和素材下载。新成片
+    先写入临时文件，全部成功后才替换 ``final-N.mp4``，失败时保留原成片。
+    视频配乐供应商的音乐不会重新生成，沿用原任务已下载的配乐文件。
+    """
+    logger.info(
+        f"start re-render: {task_id}, overrides: {', '.join(sorted(overrides or {}))}"
+    )
+    try:
+        params, combined_videos, audio_file, subtitle_path = prepare_rerender(
+            task_id,
+            overrides,
+            allow_server_file_input=allow_server_file_input,
+        )
+    except ValueError as exc:
+        return _mark_rerender_failed(task_id, str(exc))
+
+    sm.state.patch_task(
+        task_id,
+        rerender_state=const.RERENDER_STATE_PROCESSING,
+        rerender_progress=50,
+        rerender_error=None,
+    )
+    task_directory = path.join(utils.task_dir(), task_id)
+    subtitle_overlay = _prepare_subtitle_overlay(task_id, params, subtitle_path)
+    video_music_provider = _VIDEO_MUSIC_PROVIDERS.get(params.bgm_type)
+    video_music_requested = (
+        video_music_provider is not None
+        and bgm_service.should_use_bgm(params.bgm_type, params.bgm_volume)
+    )
+
+    rendered_videos = []
+    warnings = []
+    _progress = 50
+    try:
+        # 草稿预览的拼接视频按裁短后的旁白生成，重新渲染必须使用同一段旁白。
+        audio_file, _ = _trim_audio_for_draft_preview(
+            task_id,
+            params,
+            audio_file,
+            (sm.state.get_task(task_id) or {}).get("audio_duration"),
+        )
+        for index, combined_video_path in enumerate(combined_videos, start=1):
+            bgm_file_override = "" if video_music_provider else None
+            if video_music_requested:
+                generated_bgm_path = path.join(
+                    task_directory,
+                    f"{params.bgm_type}-bgm-{index}{video_music_provider['suffix']}",
+                )
+                if path.isfile(generated_bgm_path):
+                    bgm_file_override = generated_bgm_path
+                else:
+                    warnings.append(
+                        {
+                            "code": video_music_provider["warning_code"],
+                            "video_index": index,
+                        }
+                    )
+
+            final_video_path = path.join(task_directory, f"final-{index}.mp4")
+            temp_video_path = path.join(task_directory, f"final-{index}.rerender.mp4")
+            logger.info(f"\n\n## re-rendering video: {index} => {final_video_path}")
+            rendered_videos.append((temp_video_path, final_video_path))
+            video.generate_video(
+                video_path=combined_video_path,
+                audio_path=audio_file,
+                subtitle_path=subtitle_path,
+                output_file=temp_video_path,
+                params=params,
+                bgm_file_override=bgm_file_override,
+                subtitle_overlay=subtitle_overlay,
+            )
+            _progress += 50 / len(combined_videos)
+            sm.state.patch_task(task_id, rerender_progress=_progress)
+
+        for temp_video_path, final_video_path in rendered_videos:
+            os.replace(temp_video_path, final_video_path)
+    except Exception as exc:
+        logger.exception(f"re-render failed, task_id: {task_id}")
+        for temp_video_path, _ in rendered_videos:
+            if path.exists(temp_video_path):
+                os.remove(temp_video_path)
+        return _mark_rerender_failed(task_id, f"{type(exc).__name__}: {exc}")
+
+    final_video_paths = [final for _, final in rendered_videos]
+    logger.success(
+        f"task {task_id} re-rendered, generated {len(final_video_paths)} videos."
+    )
+    kwargs = {
+        "videos": final_video_paths,
+        "combined_videos": combined_videos,
+        "audio_file": audio_file,
+        "subtitle_path": subtitle_path,
+        "warnings": warnings or None,
+    }
+    # 只更新成片和重新渲染字段，任务本身的 state、进度、错误信息和原始
+    # 产物路径保持不变。
+    sm.state.patch_task(
+        task_id,
+        videos=final_video_paths,
+        warnings=kwargs["warnings"],
+        rerender_state=const.RERENDER_STATE_COMPLETE,
+        rerender_progress=100,
+    )
+    return kwargs
+
+
 def _patch_cross_post_state(task_id: str, **kwargs) -> bool | None:
     """安全更新发布字段；短暂状态后端故障时有限重试。"""
     for attempt in range(1, _CROSS_POST_STATE_WRITE_ATTEMPTS + 1):
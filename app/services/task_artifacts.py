@@ -61,6 +61,20 @@ def write_script_data(task_id: str, payload: Mapping[str, Any]) -> None:
     _write_json_atomic(_script_file(task_id), payload)
 
 
+def read_script_data(task_id: str) -> dict[str, Any]:
+    """
+    读取任务的 ``script.json`` 清单。
+
+    重新渲染依赖清单里的原始参数恢复成片配置，文件缺失或内容不是 JSON
+    对象时直接抛出异常，由调用方转换为明确的输入错误。
+    """
+    with _script_file(task_id).open("r", encoding="utf-8") as script_file:
+        payload = json.load(script_file)
+    if not isinstance(payload, dict):
+        raise ValueError("task script data must be a JSON object")
+    return payload
+
+
 def patch_script_data(task_id: str, **updates: Any) -> bool:
     """
     在保留原有字段的前提下补充任务清单，失败时返回 ``False``。
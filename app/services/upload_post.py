@@ -9,6 +9,7 @@ from typing import Optional
 import requests
 from loguru import logger
 from app.config import config
+from app.utils import http_client
 
 
 class UploadPostService:
@@ -71,7 +72,7 @@ class UploadPostService:
 
                 headers = {'Authorization': f'Apikey {self.api_key}'}
 
-                response = requests.post(
+                response = http_client.post(
                     f"{self.API_BASE}/api/upload",
                     headers=headers,
                     data=data,
@@ -108,7 +109,7 @@ class UploadPostService:
                 'Authorization': f'Apikey {self.api_key}'
             }
 
-            response = requests.get(
+            response = http_client.get(
                 f"{self.API_BASE}/api/uploadposts/status",
                 params={'request_id': request_id},
                 headers=headers,
@@ -0,0 +1,178 @@
+import struct
+
+from PIL import ImageColor
+
+# ASS 样式行的字段顺序固定，样式和事件都按这里的 Format 输出。
+_STYLE_FORMAT = (
+    "Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+    "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, "
+    "Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, "
+    "Encoding"
+)
+_EVENT_FORMAT = (
+    "Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text"
+)
+
+
+def read_libass_metrics(font_path: str) -> tuple[int, int, int] | None:
+    """
+    读取 libass 排版使用的字体纵向度量，返回 (unitsPerEm, ascent, descent)。
+
+    libass 优先使用 OS/2 表的 usWinAscent/usWinDescent，并把 Fontsize 解释
+    为 ascent + descent 的像素高度；Pillow 使用 hhea 度量并把字号当作 em
+    大小。两者差异因字体而异，只有读出原始度量才能换算出一致的字形大小。
+    TTC 字体集合与 Pillow 默认行为一致，读取第一个字体。无法解析时返回 None。
+    """
+    try:
+        with open(font_path, "rb") as fp:
+            data = fp.read()
+        offset = 0
+        if data[:4] == b"ttcf":
+            (offset,) = struct.unpack_from(">I", data, 12)
+        (table_count,) = struct.unpack_from(">H", data, offset + 4)
+        tables = {}
+        for index in range(table_count):
+            tag, _checksum, table_offset, _length = struct.unpack_from(
+                ">4sIII", data, offset + 12 + index * 16
+            )
+            tables[tag] = table_offset
+        (units_per_em,) = struct.unpack_from(">H", data, tables[b"head"] + 18)
+        ascent = descent = 0
+        if b"OS/2" in tables:
+            ascent, descent = struct.unpack_from(">HH", data, tables[b"OS/2"] + 74)
+        if ascent + descent <= 0:
+            ascent, descent = struct.unpack_from(">hh", data, tables[b"hhea"] + 4)
+            descent = -descent
+    except (OSError, KeyError, struct.error):
+        return None
+    if units_per_em <= 0 or ascent + descent <= 0:
+        return None
+    return units_per_em, ascent, descent
+
+
+def format_ass_time(seconds: float) -> str:
+    """把秒转换为 ASS 的 `H:MM:SS.cc` 时间格式。"""
+    centiseconds = max(0, int(round(seconds * 100)))
+    hours, centiseconds = divmod(centiseconds, 360000)
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    secs, centiseconds = divmod(centiseconds, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centiseconds:02d}"
+
+
+def ass_color(color, default: str = "#FFFFFF", alpha: int = 0) -> str:
+    """
+    把 `#RRGGBB` 或颜色名转换为 ASS 的 `&HAABBGGRR`。
+
+    ASS 的 alpha 与常见约定相反，0 表示不透明、255 表示全透明。
+    """
+    try:
+        red, green, blue = ImageColor.getrgb(str(color))[:3]
+    except (TypeError, ValueError):
+        red, green, blue = ImageColor.getrgb(default)[:3]
+    safe_alpha = max(0, min(255, int(alpha)))
+    return f"&H{safe_alpha:02X}{blue:02X}{green:02X}{red:02X}"
+
+
+def escape_ass_text(text: str) -> str:
+    """
+    转义字幕正文，保留换行。
+
+    ASS 把花括号当作覆盖标签、把反斜杠当作转义前缀，字幕里原样出现时会
+    被吞掉或改变样式。花括号使用 libass 支持的 `\\{`、`\\}` 转义；反斜杠
+    没有通用转义写法，替换为外观相近的全角字符。
+    """
+    escaped = (
+        str(text)
+        .replace("\\", "＼")
+        .replace("{", "\\{")
+        .replace("}", "\\}")
+    )
+    return escaped.replace("\r\n", "\n").replace("\n", "\\N")
+
+
+def rounded_box_drawing(width: int, height: int, radius: int) -> str:
+    """返回左上角为原点的圆角矩形绘图指令，radius 为 0 时是普通矩形。"""
+    width = max(1, int(width))
+    height = max(1, int(height))
+    radius = max(0, min(int(radius), width // 2, height // 2))
+    if radius == 0:
+        return f"m 0 0 l {width} 0 l {width} {height} l 0 {height}"
+    right = width - radius
+    bottom = height - radius
+    return (
+        f"m {radius} 0 l {right} 0 b {width} 0 {width} 0 {width} {radius} "
+        f"l {width} {bottom} b {width} {height} {width} {height} {right} {height} "
+        f"l {radius} {height} b 0 {height} 0 {height} 0 {bottom} "
+        f"l 0 {radius} b 0 0 0 0 {radius} 0"
+    )
+
+
+def dialogue(layer: int, start: float, end: float, style: str, text: str) -> str:
+    """生成一条 Dialogue 事件，位置等信息由调用方写在覆盖标签里。"""
+    return (
+        f"Dialogue: {layer},{format_ass_time(start)},{format_ass_time(end)},"
+        f"{style},,0,0,0,,{text}"
+    )
+
+
+def build_ass_document(
+    video_width: int,
+    video_height: int,
+    font_name: str,
+    font_size: float,
+    bold: bool,
+    text_color: str,
+    stroke_color: str,
+    stroke_width: float,
+    events: list[str],
+) -> str:
+    """
+    生成完整的 ASS 文档。
+
+    PlayRes 与成片分辨率一致，坐标和字号都直接使用像素；WrapStyle 2 关闭
+    libass 的自动换行，换行完全沿用调用方按 MoviePy 规则预先计算的结果。
+    """
+    primary = ass_color(text_color, default="#FFFFFF")
+    outline = ass_color(stroke_color, default="#000000")
+    style_values = [
+        font_name,
+        f"{font_size:.2f}",
+        primary,
+        primary,
+        outline,
+        "&H00000000",
+        "-1" if bold else "0",
+        "0",
+        "0",
+        "0",
+        "100",
+        "100",
+        "0",
+        "0",
+        "1",
+        f"{max(0.0, float(stroke_width)):g}",
+        "0",
+        "5",
+        "0",
+        "0",
+        "0",
+        "1",
+    ]
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {int(video_width)}",
+        f"PlayResY: {int(video_height)}",
+        "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        f"Format: {_STYLE_FORMAT}",
+        f"Style: Default,{','.join(style_values)}",
+        "",
+        "[Events]",
+        f"Format: {_EVENT_FORMAT}",
+        *events,
+        "",
+    ]
+    return "\n".join(lines)
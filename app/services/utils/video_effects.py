@@ -116,17 +116,138 @@ def _zoom_frame(frame: np.ndarray, scale_factor: float) -> np.ndarray:
     return np.asarray(transformed)
 
 
+class _ZoomKernel:
+    """`_zoom_frame` 的 NumPy 向量化实现，用于逐帧缩放整段视频。
+
+    中心缩放在横纵方向上可分离：每个输出列只从两个源列插值，每个输出行只
+    从两个源行插值。某个缩放比例下的采样索引和权重只与画面尺寸有关，按
+    比例缓存后，逐帧只剩两次 gather 和整数线性插值。采样坐标和边缘钳制
+    与 Pillow EXTENT + BILINEAR 变换一致；权重量化为 1/256，并像 Pillow
+    一样截断取整，结果与 `_zoom_frame` 的差异不超过 1。
+
+    中间结果和输出帧都写入复用的缓冲区，省去 Pillow 往返时每帧的数组复制
+    和新分配。返回的数组会在下一次调用时被覆盖，调用方需要在此之前用完，
+    MoviePy 逐帧编码正好满足这一点。
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self._grids = {}
+        self._buffers = {}
+
+    @staticmethod
+    def _axis_grid(size: int, scale_factor: float):
+        crop = size / scale_factor
+        start = (size - crop) / 2
+        # Pillow 先在输出像素中心 (x + 0.5) 处映射源坐标，再减 0.5 得到相对
+        # 于源像素中心的位置；越界坐标与 Pillow 一样钳制到边缘像素。
+        coords = start + (np.arange(size) + 0.5) * (crop / size) - 0.5
+        coords = np.clip(coords, 0, size - 1)
+        low = np.floor(coords).astype(np.intp)
+        high = np.minimum(low + 1, size - 1)
+        weight = np.round((coords - low) * 256).astype(np.uint32)
+        return low, high, weight
+
+    def _grid(self, scale_factor: float, channels: int):
+        key = (scale_factor, channels)
+        grid = self._grids.get(key)
+        if grid is None:
+            row_low, row_high, row_weight = self._axis_grid(self.height, scale_factor)
+            col_low, col_high, col_weight = self._axis_grid(self.width, scale_factor)
+            # 帧按 (高, 宽 × 通道) 展平，列索引展开到每个通道，gather 时沿连续
+            # 内存进行；只读取被采样到的源行区间。
+            channel_offsets = np.arange(channels)
+            first_row = int(row_low[0])
+            last_row = int(row_high[-1]) + 1
+            col_weight = np.repeat(col_weight, channels).astype(np.uint16)[None, :]
+            row_weight = row_weight[:, None]
+            grid = (
+                first_row,
+                last_row,
+                (col_low[:, None] * channels + channel_offsets).ravel(),
+                (col_high[:, None] * channels + channel_offsets).ravel(),
+                256 - col_weight,
+                col_weight,
+                row_low - first_row,
+                row_high - first_row,
+                256 - row_weight,
+                row_weight,
+            )
+            self._grids[key] = grid
+        return grid
+
+    def _buffer(self, name: str, shape: tuple, dtype) -> np.ndarray:
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self._buffers[name] = buffer
+        return buffer
+
+    def apply(self, frame: np.ndarray, scale_factor: float) -> np.ndarray:
+        if scale_factor <= 0:
+            raise ValueError("scale_factor must be greater than zero")
+        if abs(scale_factor - 1.0) < 1e-9:
+            return frame
+        if frame.dtype != np.uint8 or frame.ndim != 3:
+            return _zoom_frame(frame, scale_factor)
+
+        height, width, channels = frame.shape
+        (
+            first_row,
+            last_row,
+            col_low,
+            col_high,
+            col_weight_low,
+            col_weight_high,
+            row_low,
+            row_high,
+            row_weight_low,
+            row_weight_high,
+        ) = self._grid(scale_factor, channels)
+        source = np.ascontiguousarray(frame).reshape(height, width * channels)
+        source = source[first_row:last_row]
+        sampled_shape = (last_row - first_row, width * channels)
+        output_shape = (height, width * channels)
+        left = self._buffer("left", sampled_shape, np.uint8)
+        right = self._buffer("right", sampled_shape, np.uint8)
+        columns = self._buffer("columns", sampled_shape, np.uint16)
+        columns_right = self._buffer("columns_right", sampled_shape, np.uint16)
+        top = self._buffer("top", output_shape, np.uint16)
+        bottom = self._buffer("bottom", output_shape, np.uint16)
+        rows = self._buffer("rows", output_shape, np.uint32)
+        rows_bottom = self._buffer("rows_bottom", output_shape, np.uint32)
+        output = self._buffer("output", output_shape, np.uint8)
+
+        # 横向插值保留 8 位小数精度（值 × 256），纵向插值后再一次性截断，
+        # 避免两次取整累积误差。
+        np.take(source, col_low, axis=1, out=left)
+        np.take(source, col_high, axis=1, out=right)
+        np.multiply(left, col_weight_low, out=columns)
+        np.multiply(right, col_weight_high, out=columns_right)
+        np.add(columns, columns_right, out=columns)
+        np.take(columns, row_low, axis=0, out=top)
+        np.take(columns, row_high, axis=0, out=bottom)
+        np.multiply(top, row_weight_low, out=rows)
+        np.multiply(bottom, row_weight_high, out=rows_bottom)
+        np.add(rows, rows_bottom, out=rows)
+        np.right_shift(rows, 16, out=rows)
+        np.copyto(output, rows, casting="unsafe")
+        return output.reshape(height, width, channels)
+
+
 def zoomin_transition(clip: Clip, t: float) -> Clip:
     """在整个片段内从原始画面平滑放大到 1.2 倍。"""
     # t 暂时保留，用于与其它转场函数保持统一调用签名；缩放需要覆盖完整片段，
     # 否则短暂缩放结束后画面会突然静止，不适合静态或低运动量素材。
     _ = t
     duration = max(clip.duration, 0.001)
+    kernel = _ZoomKernel(*clip.size)
 
     def scale_effect(get_frame, current_time: float):
         progress = min(max(current_time / duration, 0), 1)
         scale_factor = 1 + (_ZOOM_MAX_SCALE - 1) * progress
-        return _zoom_frame(get_frame(current_time), scale_factor)
+        return kernel.apply(get_frame(current_time), scale_factor)
 
     return clip.transform(scale_effect)
 
@@ -136,10 +257,130 @@ def zoomout_transition(clip: Clip, t: float) -> Clip:
     # 与 zoomin_transition 一致，t 仅用于兼容统一的转场调用接口。
     _ = t
     duration = max(clip.duration, 0.001)
+    kernel = _ZoomKernel(*clip.size)
 
     def scale_effect(get_frame, current_time: float):
         progress = min(max(current_time / duration, 0), 1)
         scale_factor = _ZOOM_MAX_SCALE - (_ZOOM_MAX_SCALE - 1) * progress
-        return _zoom_frame(get_frame(current_time), scale_factor)
+        return kernel.apply(get_frame(current_time), scale_factor)
 
     return clip.transform(scale_effect)
+
+
+def _ffmpeg_number(value: float) -> str:
+    # 滤镜表达式里统一使用定长小数，避免科学计数法被 FFmpeg 误解析。
+    return f"{value:.6f}"
+
+
+def _ffmpeg_slide_filter(
+    width: int,
+    height: int,
+    side: str,
+    progress: str,
+    entering: bool,
+) -> str:
+    """用“加宽黑边 + 逐帧移动裁剪窗口”复刻 MoviePy 的滑入/滑出位移。
+
+    画面放在双倍画布的一侧，另一侧填黑；裁剪窗口随进度平移，就等价于
+    片段在黑底上移动。这样整条转场保持为单输入的线性滤镜链，不需要额外的
+    颜色源和 overlay，便于直接拼进单次编码的 filtergraph。
+    """
+    remaining = f"(1-{progress})"
+    if side in ("left", "right"):
+        # 黑边始终位于画面即将出现或离开的那一侧：right 方向把画面放在右半边，
+        # left 方向放在左半边，滑入和滑出只是窗口移动方向相反。
+        offset = width if side == "right" else 0
+        if entering:
+            x = f"{width}*{progress}" if side == "right" else f"{width}*{remaining}"
+        else:
+            x = f"{width}*{remaining}" if side == "right" else f"{width}*{progress}"
+        return (
+            f"pad={width * 2}:{height}:{offset}:0:black,"
+            f"crop={width}:{height}:x='{x}':y=0"
+        )
+    if side in ("top", "bottom"):
+        offset = height if side == "bottom" else 0
+        if entering:
+            y = f"{height}*{progress}" if side == "bottom" else f"{height}*{remaining}"
+        else:
+            y = f"{height}*{remaining}" if side == "bottom" else f"{height}*{progress}"
+        return (
+            f"pad={width}:{height * 2}:0:{offset}:black,"
+            f"crop={width}:{height}:x=0:y='{y}'"
+        )
+    # 未知方向与 MoviePy 实现一致，保持画面静止。
+    return ""
+
+
+def _ffmpeg_zoom_filter(
+    progress: str, zoom_in: bool, max_scale: float = _ZOOM_MAX_SCALE
+) -> str:
+    """用 perspective 的浮点四角坐标复刻 `_zoom_frame` 的亚像素中心裁剪。
+
+    scale+crop 组合只能使用整数裁剪边界，缩放比例连续变化时会产生与
+    `_zoom_frame` 注释中相同的抖动。perspective 的源坐标接受浮点值并逐帧
+    求值，裁剪框始终围绕同一个浮点中心对称，效果与 Pillow EXTENT 变换一致。
+    """
+    growth = _ffmpeg_number(max_scale - 1)
+    if zoom_in:
+        scale = f"(1+{growth}*{progress})"
+    else:
+        scale = f"({_ffmpeg_number(max_scale)}-{growth}*{progress})"
+    left = f"(W-W/{scale})/2"
+    right = f"(W+W/{scale})/2"
+    top = f"(H-H/{scale})/2"
+    bottom = f"(H+H/{scale})/2"
+    return (
+        f"perspective=x0='{left}':y0='{top}':x1='{right}':y1='{top}':"
+        f"x2='{left}':y2='{bottom}':x3='{right}':y3='{bottom}':"
+        "sense=source:eval=frame:interpolation=linear"
+    )
+
+
+def ffmpeg_transition_filter(
+    transition: str | None,
+    duration: float,
+    t: float,
+    side: str,
+    width: int,
+    height: int,
+    fps: int,
+) -> str:
+    """返回与同名 MoviePy 转场等效的 FFmpeg 滤镜链，不需要转场时返回空串。
+
+    `transition` 取 `VideoTransitionMode` 的值，`duration` 是片段最终播放
+    时长，`t` 是转场时长。滤镜假定输入已经是目标分辨率、时间戳从 0 开始，
+    因此可以直接串接在片段缩放和裁剪之后。
+    """
+    transition_time = _ffmpeg_number(max(t, 0.001))
+    if transition == "FadeIn":
+        return f"fade=t=in:st=0:d={transition_time}"
+    if transition == "FadeOut":
+        start = _ffmpeg_number(max(duration - t, 0))
+        return f"fade=t=out:st={start}:d={transition_time}"
+    if transition == "SlideIn":
+        progress = f"min(t/{transition_time},1)"
+        return _ffmpeg_slide_filter(width, height, side, progress, entering=True)
+    if transition == "SlideOut":
+        start = _ffmpeg_number(max(duration - t, 0))
+        progress = f"clip((t-{start})/{transition_time},0,1)"
+        return _ffmpeg_slide_filter(width, height, side, progress, entering=False)
+    if transition in ("ZoomIn", "ZoomOut"):
+        # 缩放覆盖整个片段。perspective 只提供帧序号，用帧率换算播放进度，
+        # 与 MoviePy 版本按 current_time / duration 计算的进度保持一致。
+        total_frames = _ffmpeg_number(max(duration, 0.001) * fps)
+        progress = f"min(in/{total_frames},1)"
+        return _ffmpeg_zoom_filter(progress, zoom_in=transition == "ZoomIn")
+    return ""
+
+
+def ffmpeg_ken_burns_filter(duration: float, fps: int, max_scale: float) -> str:
+    """返回整段从原始画面平滑放大到 `max_scale` 倍的滤镜，用于图片生成视频。
+
+    与转场缩放共用亚像素 perspective 实现。FFmpeg 的 zoompan 会把裁剪位置
+    取整到像素，慢速推近时画面会逐帧抖动，因此这里不使用 zoompan。
+    """
+    total_frames = _ffmpeg_number(max(duration, 0.001) * fps)
+    return _ffmpeg_zoom_filter(
+        f"min(in/{total_frames},1)", zoom_in=True, max_scale=max_scale
+    )
@@ -10,6 +10,8 @@ import requests
 from loguru import logger
 from packaging.version import InvalidVersion, Version
 
+from app.utils import http_client
+
 
 LATEST_RELEASE_API_URL: Final = (
     "https://api.github.com/repos/harry0703/MoneyPrinterTurbo/releases/latest"
@@ -54,7 +56,7 @@ def get_available_update(current_version: str) -> str | None:
         return None
 
     try:
-        response = requests.get(
+        response = http_client.get(
             LATEST_RELEASE_API_URL,
             headers=RELEASE_CHECK_HEADERS,
             timeout=RELEASE_CHECK_TIMEOUT,
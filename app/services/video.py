@@ -1,20 +1,27 @@
+import bisect
+import hashlib
 import itertools
 import io
+import json
+import math
 import os
 import random
 import gc
+import multiprocessing
+import shutil
 import subprocess
 import sys
 import tempfile
 import unicodedata
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from contextlib import ExitStack, redirect_stdout
+from dataclasses import dataclass
 from functools import lru_cache
 from typing import List
 from loguru import logger
 import numpy as np
 from moviepy import (
     AudioFileClip,
-    ColorClip,
     CompositeAudioClip,
     CompositeVideoClip,
     ImageClip,
@@ -22,21 +29,25 @@ from moviepy import (
     VideoFileClip,
     afx,
 )
-from moviepy.video.tools.subtitles import SubtitlesClip
+from moviepy.tools import compute_position
+from moviepy.video.tools.subtitles import SubtitlesClip, file_to_subtitles
 from PIL import Image, ImageDraw, ImageFont
 
 from app.config import config
 from app.models import const
 from app.models.schema import (
     MaterialInfo,
+    RenderProfile,
     VideoAspect,
     VideoConcatMode,
     VideoParams,
     VideoTransitionMode,
 )
 from app.services import bgm as bgm_service
-from app.services.utils import video_effects
-from app.utils import file_security, utils
+from app.services import clip_cache
+from app.services import media_index, media_probe
+from app.services.utils import ass_subtitles, video_effects
+from app.utils import file_lock, file_security, utils
 
 class SubClippedVideoClip:
     def __init__(
@@ -48,6 +59,7 @@ class SubClippedVideoClip:
         height=None,
         duration=None,
         source_file_path=None,
+        stream_copy=False,
     ):
         self.file_path = file_path
         self.start_time = start_time
@@ -55,6 +67,8 @@ class SubClippedVideoClip:
         self.width = width
         self.height = height
         self.source_file_path = source_file_path or file_path
+        # 为 True 时片段区间已对齐关键帧，可以直接 `-c copy` 裁剪而无需重编码。
+        self.stream_copy = stream_copy
         if duration is None:
             self.duration = end_time - start_time
         else:
@@ -89,6 +103,118 @@ _SUPPORTED_VIDEO_CODECS = (
     "h264_videotoolbox",
 )
 _runtime_disabled_video_codecs = set()
+# 流复制产出的片段会和 MoviePy 编码的 30fps/yuv420p/H.264 片段一起进入 concat，
+# 只有参数完全一致的素材才允许跳过重编码。
+_STREAM_COPY_CODECS = ("h264",)
+_STREAM_COPY_PIX_FMTS = ("yuv420p",)
+_RENDER_ENGINE_MOVIEPY = "moviepy"
+_RENDER_ENGINE_FFMPEG = "ffmpeg"
+_SUPPORTED_RENDER_ENGINES = (_RENDER_ENGINE_MOVIEPY, _RENDER_ENGINE_FFMPEG)
+_SUBTITLE_BACKEND_MOVIEPY = "moviepy"
+_SUBTITLE_BACKEND_OVERLAY = "overlay"
+_SUBTITLE_BACKEND_ASS = "ass"
+_SUPPORTED_SUBTITLE_BACKENDS = (
+    _SUBTITLE_BACKEND_MOVIEPY,
+    _SUBTITLE_BACKEND_OVERLAY,
+    _SUBTITLE_BACKEND_ASS,
+)
+
+
+@dataclass(frozen=True)
+class _RenderSettings:
+    """一个渲染档位的输出参数：分辨率缩放比例、帧率和 x264 编码预设。"""
+
+    scale: float
+    fps: int
+    preset: str
+
+
+# draft 用于调整字幕样式、转场和音量时快速预览：半分辨率、半帧率、最快
+# 编码预设，CPU 开销约为标准渲染的几分之一。final 只换成更慢的编码预设，
+# 同样码率下画质更好。standard 与原有输出完全一致。
+_RENDER_PROFILE_SETTINGS = {
+    RenderProfile.draft.value: _RenderSettings(scale=0.5, fps=15, preset="ultrafast"),
+    RenderProfile.standard.value: _RenderSettings(scale=1.0, fps=fps, preset="medium"),
+    RenderProfile.final.value: _RenderSettings(scale=1.0, fps=fps, preset="slow"),
+}
+_STANDARD_RENDER_SETTINGS = _RENDER_PROFILE_SETTINGS[RenderProfile.standard.value]
+# 只有软件编码器使用 x264 风格的预设名称，硬件编码器保持各自的默认值。
+_PRESET_VIDEO_CODECS = ("libx264",)
+# 按需裁剪时最后一段至少保留的时长（秒），与转场时长一致。
+_MIN_PLANNED_CLIP_DURATION = 1.0
+_CLIP_TIMELINE_VERSION = 1
+# 成片分段编码的 GOP 时长（秒），片段边界只落在 GOP 的整数倍上。
+_FINAL_ENCODE_GOP_SECONDS = 2
+
+
+def get_render_settings(render_profile=None) -> _RenderSettings:
+    """返回渲染档位对应的输出参数，未知档位回退到 standard。"""
+    profile = getattr(render_profile, "value", render_profile) or (
+        RenderProfile.standard.value
+    )
+    settings = _RENDER_PROFILE_SETTINGS.get(str(profile).strip().lower())
+    if settings is None:
+        logger.warning(
+            f"unsupported render profile: {profile}, "
+            f"fallback to {RenderProfile.standard.value}"
+        )
+        return _STANDARD_RENDER_SETTINGS
+    return settings
+
+
+def get_render_resolution(video_aspect, render_profile=None) -> tuple[int, int]:
+    """
+    返回画幅在指定渲染档位下的输出分辨率。
+
+    缩放后的宽高取偶数，yuv420p 要求色度平面按 2 像素对齐。
+    """
+    video_width, video_height = VideoAspect(video_aspect).to_resolution()
+    scale = get_render_settings(render_profile).scale
+    if scale == 1.0:
+        return video_width, video_height
+    return (
+        max(2, int(round(video_width * scale / 2)) * 2),
+        max(2, int(round(video_height * scale / 2)) * 2),
+    )
+
+
+def _video_preset_args(codec: str, render_settings: _RenderSettings) -> list[str]:
+    """返回 FFmpeg 命令中的编码预设参数，硬件编码器不传预设。"""
+    if codec in _PRESET_VIDEO_CODECS:
+        return ["-preset", render_settings.preset]
+    return []
+
+
+def _video_preset(codec: str, render_settings: _RenderSettings) -> str:
+    """
+    返回传给 MoviePy 的编码预设。
+
+    MoviePy 总会带上 `-preset`，默认值 medium 在各编码器上都能被接受；
+    硬件编码器不认识 ultrafast 等 x264 预设，因此只对软件编码器替换。
+    """
+    if codec in _PRESET_VIDEO_CODECS:
+        return render_settings.preset
+    return _STANDARD_RENDER_SETTINGS.preset
+
+
+def _scale_subtitle_params(params: VideoParams, render_settings: _RenderSettings):
+    """
+    按渲染档位缩放字号和描边，降低分辨率时字幕占画面的比例保持不变。
+
+    字幕渲染会把描边宽度取整，原本有描边时至少保留 1 像素，避免预览里
+    描边整个消失。
+    """
+    if render_settings.scale == 1.0:
+        return params
+    stroke_width = params.stroke_width * render_settings.scale
+    if params.stroke_width >= 1:
+        stroke_width = max(1.0, stroke_width)
+    return params.model_copy(
+        update={
+            "font_size": max(1, int(round(params.font_size * render_settings.scale))),
+            "stroke_width": stroke_width,
+        }
+    )
 
 
 def _get_required_video_duration(audio_duration: float) -> float:
@@ -289,16 +415,34 @@ def _fallback_write_videofile(clip, output_file: str, failed_codec: str, reason:
     return _DEFAULT_VIDEO_CODEC
 
 
-def _write_videofile_with_codec_fallback(clip, output_file: str, codec: str, **kwargs):
+def _write_videofile_with_codec_fallback(
+    clip,
+    output_file: str,
+    codec: str,
+    render_settings: _RenderSettings | None = None,
+    **kwargs,
+):
     """
     使用指定编码器写出视频，失败时自动用 libx264 重试一次。
 
     硬件编码器是否可用不仅取决于 FFmpeg，还取决于显卡、驱动和当前运行环境。
     生成任务不能因为高级编码器不可用而整体失败，所以这里把回退集中处理。
+    传入 `render_settings` 时按实际使用的编码器选择编码预设。
     """
     effective_codec = _get_effective_video_codec(codec)
+
+    def preset_kwargs(video_codec: str) -> dict:
+        if render_settings is None:
+            return {}
+        return {"preset": _video_preset(video_codec, render_settings)}
+
     try:
-        clip.write_videofile(output_file, codec=effective_codec, **kwargs)
+        clip.write_videofile(
+            output_file,
+            codec=effective_codec,
+            **kwargs,
+            **preset_kwargs(effective_codec),
+        )
         return effective_codec
     except Exception as exc:
         if effective_codec == _DEFAULT_VIDEO_CODEC:
@@ -309,6 +453,7 @@ def _write_videofile_with_codec_fallback(clip, output_file: str, codec: str, **k
             failed_codec=effective_codec,
             reason=str(exc),
             **kwargs,
+            **preset_kwargs(_DEFAULT_VIDEO_CODEC),
         )
 
 
@@ -329,12 +474,45 @@ def _format_ffmpeg_concat_path(file_path: str) -> str:
     return _escape_ffmpeg_concat_path(absolute_path.replace("\\", "/"))
 
 
+def _run_ffmpeg_with_codec_fallback(build_command, failure_message: str) -> str:
+    """
+    按当前生效的视频编码器执行 FFmpeg 命令，硬件编码失败时用 libx264 重试。
+
+    `build_command` 接收编码器名称并返回完整命令。回退规则与
+    `_write_videofile_with_codec_fallback` 保持一致：只有 libx264 重试成功，
+    才把原编码器加入运行期禁用列表，避免把通用 IO 问题误判为硬件不可用。
+    """
+
+    def run_command(codec: str) -> str:
+        result = subprocess.run(
+            build_command(codec),
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            error_message = (result.stderr or result.stdout or "").strip()
+            raise RuntimeError(error_message or failure_message)
+        return codec
+
+    effective_codec = _get_effective_video_codec()
+    try:
+        return run_command(effective_codec)
+    except Exception as exc:
+        if effective_codec == _DEFAULT_VIDEO_CODEC:
+            raise
+        result_codec = run_command(_DEFAULT_VIDEO_CODEC)
+        _disable_runtime_video_codec(effective_codec, str(exc))
+        return result_codec
+
+
 def concat_video_clips_with_ffmpeg(
     clip_files: List[str],
     output_file: str,
     threads: int,
     output_dir: str,
     max_duration: float | None = None,
+    render_settings: _RenderSettings = _STANDARD_RENDER_SETTINGS,
 ):
     concat_list_file = os.path.join(output_dir, "ffmpeg-concat-list.txt")
     with open(concat_list_file, "w", encoding="utf-8") as fp:
@@ -353,6 +531,7 @@ def concat_video_clips_with_ffmpeg(
             concat_list_file,
             "-c:v",
             codec,
+            *_video_preset_args(codec, render_settings),
             "-threads",
             str(threads or 2),
             "-pix_fmt",
@@ -363,31 +542,12 @@ def concat_video_clips_with_ffmpeg(
         command.append(output_file)
         return command
 
-    def run_concat(codec: str):
-        command = build_command(codec)
+    try:
         # 使用 ffmpeg 只做一次串联与编码，避免 MoviePy 逐段合并时反复重编码，
         # 从而降低画质劣化与颜色偏移风险。
-        result = subprocess.run(
-            command,
-            capture_output=True,
-            text=True,
-            check=False,
+        return _run_ffmpeg_with_codec_fallback(
+            build_command, failure_message="ffmpeg concat failed"
         )
-        if result.returncode != 0:
-            error_message = (result.stderr or result.stdout or "").strip()
-            raise RuntimeError(error_message or "ffmpeg concat failed")
-        return codec
-
-    try:
-        effective_codec = _get_effective_video_codec()
-        try:
-            return run_concat(effective_codec)
-        except Exception as exc:
-            if effective_codec == _DEFAULT_VIDEO_CODEC:
-                raise
-            result_codec = run_concat(_DEFAULT_VIDEO_CODEC)
-            _disable_runtime_video_codec(effective_codec, str(exc))
-            return result_codec
     finally:
         delete_files(concat_list_file)
 
@@ -535,59 +695,144 @@ def get_bgm_file(bgm_type: str = "random", bgm_file: str = ""):
     return ""
 
 
-def combine_videos(
-    combined_video_path: str,
-    video_paths: List[str],
-    audio_file: str,
-    video_aspect: VideoAspect = VideoAspect.portrait,
-    video_concat_mode: VideoConcatMode = VideoConcatMode.random,
-    video_transition_mode: VideoTransitionMode = None,
-    max_clip_duration: int = 5,
-    threads: int = 2,
-    clip_speed: float = 1.0,
-) -> str:
+def _read_audio_duration(audio_file: str) -> float:
+    """读取旁白音频时长，读取完成或失败后都立即释放 reader。"""
     audio_clip = AudioFileClip(audio_file)
     try:
         # 这里只需要读取旁白音频时长来决定素材视频拼接长度；后续不会再使用
         # audio_clip。读取完成后立即关闭，避免早退或异常路径泄漏文件句柄。
-        audio_duration = audio_clip.duration
+        return audio_clip.duration
     finally:
         close_clip(audio_clip)
-    logger.info(f"audio duration: {audio_duration} seconds")
-    logger.info(f"maximum clip duration: {max_clip_duration} seconds")
-    required_video_duration = _get_required_video_duration(audio_duration)
-    logger.info(
-        f"required video duration: {required_video_duration:.2f} seconds "
-        f"(audio duration + {_VIDEO_DURATION_SAFETY_MARGIN:.2f}s safety margin)"
+
+
+def _read_video_duration(video_file: str) -> float:
+    """优先从元数据索引读取视频时长，索引不可用时回退到 MoviePy。"""
+    metadata = media_index.get_video_metadata(video_file)
+    if metadata is not None:
+        return metadata.duration
+    clip = _open_video_clip_quietly(video_file)
+    try:
+        return clip.duration
+    finally:
+        close_clip(clip)
+
+
+def _is_stream_copy_compatible(
+    metadata: media_probe.VideoMetadata | None, target_size: tuple[int, int]
+) -> bool:
+    """判断素材是否已经是目标分辨率、编码、像素格式和帧率。"""
+    if metadata is None:
+        return False
+    return (
+        (metadata.width, metadata.height) == tuple(target_size)
+        and metadata.codec in _STREAM_COPY_CODECS
+        and metadata.pix_fmt in _STREAM_COPY_PIX_FMTS
+        and abs(metadata.fps - fps) < 0.01
+        # 流复制会原样保留旋转元数据，而 concat 按第一个片段解释方向。
+        and metadata.rotation == 0
     )
 
-    # 兼容 API 直接调用时未传转场模式的情况，避免后续访问 .value 时崩溃。
-    transition_value = getattr(video_transition_mode, "value", video_transition_mode)
-    normalized_clip_speed = utils.normalize_clip_speed(clip_speed)
-    if normalized_clip_speed != 1.0:
-        # 只记录一次最终生效值，既方便定位 API 越界参数被归一化的问题，
-        # 也避免在逐片段热路径中重复输出相同日志。
-        logger.info(f"clip playback speed: {normalized_clip_speed:.2f}x")
-    # max_clip_duration 约束的是成片里的最终播放时长，而不是源视频读取时长。
-    # MoviePy 以 0.5 倍速播放 1.5 秒源画面会得到 3 秒片段，以 2 倍速播放
-    # 6 秒源画面同样会得到 3 秒片段。因此切片前必须按速度反推源时长；如果
-    # 仍固定读取 3 秒再慢放、裁剪，下一段却从源视频第 3 秒开始，会跳过中间
-    # 1.5 秒画面。该计算同时保证不同速度下的源时间线连续且无重叠。
-    source_clip_duration = max_clip_duration * normalized_clip_speed
-    output_dir = os.path.dirname(combined_video_path)
 
-    aspect = VideoAspect(video_aspect)
-    video_width, video_height = aspect.to_resolution()
+def _plan_stream_copy_ranges(
+    video_path: str,
+    metadata: media_probe.VideoMetadata | None,
+    clip_duration: float,
+    source_clip_duration: float,
+    sequential: bool,
+    target_size: tuple[int, int],
+) -> List[tuple[float, float]] | None:
+    """
+    为可流复制的素材规划对齐关键帧的源区间，不满足条件时返回 None。
 
-    processed_clips = []
+    `-c copy` 只能从关键帧开始裁剪，所以每段的终点都向前吸附到最近的关键帧，
+    下一段再从该关键帧开始。这样各段仍然首尾相接、没有重叠，且不会超过
+    最大片段时长；两个切点之间没有关键帧时无法满足约束，整条素材回退重编码。
+    关键帧扫描要读完整条素材，只对格式已经兼容的素材按需进行。
+    """
+    if not _is_stream_copy_compatible(metadata, target_size):
+        return None
+    keyframes = metadata.keyframes
+    if keyframes is None:
+        keyframes = media_index.get_keyframes(video_path)
+    if not keyframes or keyframes[0] > 0.001:
+        return None
+
+    ranges = []
+    start_time = 0.0
+    while start_time < clip_duration:
+        target_end = start_time + source_clip_duration
+        if target_end >= clip_duration:
+            end_time = clip_duration
+        else:
+            end_time = media_probe.floor_keyframe(keyframes, target_end)
+            if end_time is None or end_time <= start_time:
+                logger.debug(
+                    f"keyframes are too sparse for stream copy: {video_path}"
+                )
+                return None
+        ranges.append((start_time, end_time))
+        start_time = end_time
+        if sequential:
+            break
+    return ranges
+
+
+def _plan_subclipped_items(
+    video_paths: List[str],
+    video_concat_mode: VideoConcatMode,
+    source_clip_duration: float,
+    stream_copy_size: tuple[int, int] | None = None,
+) -> List[SubClippedVideoClip]:
+    """
+    把素材切成按源时间线连续的候选片段，并按拼接模式排好使用顺序。
+
+    这里只探测素材时长和尺寸，不做任何编码。MoviePy 逐段合成和 FFmpeg
+    单次编码引擎都从同一份候选列表出发，保证两种引擎挑选素材的规则一致。
+    传入 `stream_copy_size` 时，已符合目标格式的素材会按关键帧切分并标记
+    为可流复制。
+    """
+    concat_mode_value = getattr(video_concat_mode, "value", video_concat_mode)
+    sequential = concat_mode_value == VideoConcatMode.sequential.value
     subclipped_items = []
-    video_duration = 0
     for video_path in video_paths:
-        clip = _open_video_clip_quietly(video_path)
-        clip_duration = clip.duration
-        clip_w, clip_h = clip.size
-        close_clip(clip)
-        
+        # 优先读取持久化元数据索引，同一素材在后续任务里不必再启动解码器；
+        # 索引不可用或探测失败时回退到 MoviePy 打开素材。
+        metadata = media_index.get_video_metadata(video_path)
+        if metadata is not None:
+            clip_duration = metadata.duration
+            clip_w, clip_h = metadata.width, metadata.height
+        else:
+            clip = _open_video_clip_quietly(video_path)
+            clip_duration = clip.duration
+            clip_w, clip_h = clip.size
+            close_clip(clip)
+
+        copy_ranges = None
+        if stream_copy_size is not None:
+            copy_ranges = _plan_stream_copy_ranges(
+                video_path,
+                metadata,
+                clip_duration=clip_duration,
+                source_clip_duration=source_clip_duration,
+                sequential=sequential,
+                target_size=stream_copy_size,
+            )
+        if copy_ranges:
+            for start_time, end_time in copy_ranges:
+                subclipped_items.append(
+                    SubClippedVideoClip(
+                        file_path=video_path,
+                        start_time=start_time,
+                        end_time=end_time,
+                        width=clip_w,
+                        height=clip_h,
+                        source_file_path=video_path,
+                        stream_copy=True,
+                    )
+                )
+            continue
+
         start_time = 0
 
         while start_time < clip_duration:
@@ -609,209 +854,923 @@ def combine_videos(
                 )
 
             start_time = end_time
-            if video_concat_mode.value == VideoConcatMode.sequential.value:
+            if sequential:
                 break
 
     subclipped_items = _prioritize_unique_source_clips(
         subclipped_items=subclipped_items,
         concat_mode=video_concat_mode,
     )
-        
     logger.debug(f"total subclipped items: {len(subclipped_items)}")
-    
-    # Add downloaded clips over and over until the duration of the audio (max_duration) has been reached
-    for i, subclipped_item in enumerate(subclipped_items):
-        if video_duration >= required_video_duration:
-            break
-        
-        logger.debug(
-            f"processing clip {i+1}: {subclipped_item.width}x{subclipped_item.height}, "
-            f"source: {os.path.basename(subclipped_item.source_file_path)}, "
-            f"current duration: {video_duration:.2f}s, "
-            f"remaining: {required_video_duration - video_duration:.2f}s"
-        )
-        
+    return subclipped_items
+
+
+_SHUFFLE_TRANSITIONS = (
+    VideoTransitionMode.fade_in.value,
+    VideoTransitionMode.fade_out.value,
+    VideoTransitionMode.slide_in.value,
+    VideoTransitionMode.slide_out.value,
+    VideoTransitionMode.zoom_in.value,
+    VideoTransitionMode.zoom_out.value,
+)
+_SLIDE_SIDES = ("left", "right", "top", "bottom")
+
+
+def _clip_transition_seed(subclipped_item: SubClippedVideoClip) -> str:
+    """
+    返回片段挑选转场用的随机种子：素材标识加源区间。
+
+    片段缓存开启时素材标识使用内容哈希（与缓存键共用同一份计算结果），
+    否则使用文件路径，避免为不需要缓存的片段读取整个素材文件。
+    """
+    source = subclipped_item.file_path
+    if clip_cache.is_enabled():
         try:
-            clip = _open_video_clip_quietly(subclipped_item.file_path).subclipped(
-                subclipped_item.start_time, subclipped_item.end_time
-            )
-            # 播放速度属于素材本身属性，应在转场前应用。这样 Fade/Slide 等一秒转场
-            # 不会跟随素材速度变成 0.5 秒或 2 秒；后续最大时长裁剪继续作为
-            # 浮点误差或异常素材时长的安全兜底，保证最终片段不突破配置上限。
-            if normalized_clip_speed != 1.0:
-                clip = clip.with_speed_scaled(normalized_clip_speed)
-            clip_duration = clip.duration
-            # Not all videos are same size, so we need to resize them
-            clip_w, clip_h = clip.size
-            if clip_w != video_width or clip_h != video_height:
-                clip_ratio = clip.w / clip.h
-                video_ratio = video_width / video_height
-                logger.debug(f"resizing clip, source: {clip_w}x{clip_h}, ratio: {clip_ratio:.2f}, target: {video_width}x{video_height}, ratio: {video_ratio:.2f}")
-                
-                if clip_ratio == video_ratio:
-                    clip = clip.resized(new_size=(video_width, video_height))
-                else:
-                    if clip_ratio > video_ratio:
-                        scale_factor = video_width / clip_w
-                    else:
-                        scale_factor = video_height / clip_h
-
-                    new_width = int(clip_w * scale_factor)
-                    new_height = int(clip_h * scale_factor)
-
-                    background = ColorClip(size=(video_width, video_height), color=(0, 0, 0)).with_duration(clip_duration)
-                    clip_resized = clip.resized(new_size=(new_width, new_height)).with_position("center")
-                    clip = CompositeVideoClip([background, clip_resized])
-                    
-            shuffle_side = random.choice(["left", "right", "top", "bottom"])
-            if transition_value in (None, VideoTransitionMode.none.value):
-                clip = clip
-            elif transition_value == VideoTransitionMode.fade_in.value:
-                clip = video_effects.fadein_transition(clip, 1)
-            elif transition_value == VideoTransitionMode.fade_out.value:
-                clip = video_effects.fadeout_transition(clip, 1)
-            elif transition_value == VideoTransitionMode.slide_in.value:
-                clip = video_effects.slidein_transition(clip, 1, shuffle_side)
-            elif transition_value == VideoTransitionMode.slide_out.value:
-                clip = video_effects.slideout_transition(clip, 1, shuffle_side)
-            elif transition_value == VideoTransitionMode.zoom_in.value:
-                clip = video_effects.zoomin_transition(clip, 1)
-            elif transition_value == VideoTransitionMode.zoom_out.value:
-                clip = video_effects.zoomout_transition(clip, 1)
-            elif transition_value == VideoTransitionMode.shuffle.value:
-                transition_funcs = [
-                    lambda c: video_effects.fadein_transition(c, 1),
-                    lambda c: video_effects.fadeout_transition(c, 1),
-                    lambda c: video_effects.slidein_transition(c, 1, shuffle_side),
-                    lambda c: video_effects.slideout_transition(c, 1, shuffle_side),
-                    lambda c: video_effects.zoomin_transition(c, 1),
-                    lambda c: video_effects.zoomout_transition(c, 1),
-                ]
-                shuffle_transition = random.choice(transition_funcs)
-                clip = shuffle_transition(clip)
-
-            if clip.duration > max_clip_duration:
-                clip = clip.subclipped(0, max_clip_duration)
-                
-            # wirte clip to temp file
-            clip_file = f"{output_dir}/temp-clip-{i+1}.mp4"
-            _write_videofile_with_codec_fallback(
-                clip,
-                clip_file,
-                codec=_get_configured_video_codec(),
-                logger=None,
-                fps=fps,
-            )
+            source = clip_cache.source_content_hash(source)
+        except OSError:
+            pass
+    return (
+        f"{source}:{float(subclipped_item.start_time):.6f}:"
+        f"{float(subclipped_item.end_time):.6f}"
+    )
 
-            # Store clip duration before closing
-            clip_duration_saved = clip.duration
-            close_clip(clip)
 
-            processed_clips.append(
-                SubClippedVideoClip(
-                    file_path=clip_file,
-                    duration=clip_duration_saved,
-                    width=clip_w,
-                    height=clip_h,
-                    source_file_path=subclipped_item.source_file_path,
-                )
-            )
-            video_duration += clip_duration_saved
-            
-        except Exception as e:
-            logger.error(f"failed to process clip: {str(e)}")
-    
-    # loop processed clips until the video duration covers the audio duration and the small safety margin.
-    if video_duration < required_video_duration:
-        logger.warning(
-            f"video duration ({video_duration:.2f}s) is shorter than required duration "
-            f"({required_video_duration:.2f}s), looping clips to match audio length."
-        )
-        base_clips = processed_clips.copy()
-        for clip in itertools.cycle(base_clips):
-            if video_duration >= required_video_duration:
-                break
-            processed_clips.append(clip)
-            video_duration += clip.duration
-        logger.info(
-            f"video duration: {video_duration:.2f}s, audio duration: {audio_duration:.2f}s, "
-            f"required duration: {required_video_duration:.2f}s, "
-            f"looped {len(processed_clips)-len(base_clips)} clips"
-        )
-     
-    # merge video clips progressively, avoid loading all videos at once to avoid memory overflow
-    logger.info("starting clip merging process")
-    if not processed_clips:
-        logger.warning("no clips available for merging")
-        return combined_video_path
-    
-    clip_files = [clip.file_path for clip in processed_clips]
-    logger.info(f"concatenating {len(clip_files)} clips with ffmpeg")
-    concat_video_clips_with_ffmpeg(
-        clip_files=clip_files,
-        output_file=combined_video_path,
-        threads=threads,
-        output_dir=output_dir,
-        max_duration=audio_duration,
+def _choose_clip_transition(
+    transition_value, seed: str | None = None
+) -> tuple[str | None, str]:
+    """
+    为单个片段确定实际使用的转场和滑动方向。
+
+    Shuffle 和滑动方向都带随机性。先把随机结果固定成具体取值，再交给
+    MoviePy 或 FFmpeg 去执行，两个渲染引擎才能共享同一套挑选规则。传入
+    `seed`（见 `_clip_transition_seed`）时结果由片段本身决定：重复渲染同一
+    源区间会选中同样的转场，片段缓存才能在 shuffle 模式下命中。
+    """
+    rng = random.Random(seed) if seed is not None else random
+    side = rng.choice(_SLIDE_SIDES)
+    if transition_value == VideoTransitionMode.shuffle.value:
+        return rng.choice(_SHUFFLE_TRANSITIONS), side
+    if transition_value in (None, VideoTransitionMode.none.value):
+        return None, side
+    return transition_value, side
+
+
+def _fit_geometry(
+    clip_w: int, clip_h: int, video_width: int, video_height: int
+) -> tuple[int, int, int, int] | None:
+    """
+    计算素材适配目标画幅的缩放尺寸和居中偏移，尺寸已一致时返回 None。
+
+    同比例素材直接缩放到目标尺寸；比例不同时按较长边等比缩放，再居中放到
+    黑色画布上。MoviePy 和 FFmpeg 两条路径共用这里的整数截断规则，补出的
+    黑边位置完全一致。
+    """
+    if clip_w == video_width and clip_h == video_height:
+        return None
+    clip_ratio = clip_w / clip_h
+    video_ratio = video_width / video_height
+    if clip_ratio == video_ratio:
+        return video_width, video_height, 0, 0
+
+    if clip_ratio > video_ratio:
+        scale_factor = video_width / clip_w
+    else:
+        scale_factor = video_height / clip_h
+    new_width = int(clip_w * scale_factor)
+    new_height = int(clip_h * scale_factor)
+    return (
+        new_width,
+        new_height,
+        (video_width - new_width) // 2,
+        (video_height - new_height) // 2,
     )
-    
-    # clean temp files
-    delete_files(clip_files)
-            
-    logger.info("video combining completed")
-    return combined_video_path
 
 
-def wrap_text(text, max_width, font="Arial", fontsize=60):
-    # 字幕换行必须在真正创建 TextClip 前完成，否则 MoviePy 只会按原始文本
-    # 计算渲染区域。这里用 PIL 按当前字体和字号测量宽度，确保每一行都尽量
-    # 控制在视频可用宽度内，避免大字号或中文长句直接溢出画面。
-    font = ImageFont.truetype(font, fontsize)
-    max_width = int(max_width)
+def _pad_clip_to_canvas(clip, video_width: int, video_height: int, x: int, y: int):
+    """
+    把缩放后的片段放到预分配的黑色画布上，实现上下或左右补黑边。
 
-    # getbbox() 返回的是“当前字形的可见墨迹高度”，并不是字体行高。例如只含
-    # A、m、n 等无下伸部字符的英文会缺少 descent，多行时这个误差会逐行累积，
-    # 最终让 TextClip 的最后一行被画布裁掉。ascent + descent 来自字体自身，
-    # 不受具体语种和字符组合影响，也与 MoviePy 的 baseline 绘制模型一致。
-    ascent, descent = font.getmetrics()
-    line_height = int(ascent + descent)
-    if line_height <= 0:
-        # 正常 TrueType/OpenType 字体不会进入这里；保留可诊断日志和字号兜底，
-        # 避免损坏或非常规字体返回异常 metrics 后生成零高度字幕。
+    `ColorClip` + `CompositeVideoClip` 每帧都要生成整幅黑底再做一次 Pillow
+    合成；横屏素材转竖屏几乎每个片段都会走到这里。黑边在整段片段内不变，
+    画布只需分配一次，逐帧把画面切片赋值到固定位置即可。返回的帧会在下一帧
+    被覆盖，MoviePy 逐帧编码和后续转场都会在此之前用完或复制。
+    """
+    canvas = np.zeros((video_height, video_width, 3), dtype=np.uint8)
+
+    def pad_frame(get_frame, t):
+        frame = get_frame(t)
+        frame_height, frame_width = frame.shape[:2]
+        canvas[y : y + frame_height, x : x + frame_width] = frame[:, :, :3]
+        return canvas
+
+    return clip.transform(pad_frame)
+
+
+_EFFECTS_BACKEND_MOVIEPY = "moviepy"
+_EFFECTS_BACKEND_FFMPEG = "ffmpeg"
+_SUPPORTED_EFFECTS_BACKENDS = (_EFFECTS_BACKEND_MOVIEPY, _EFFECTS_BACKEND_FFMPEG)
+
+
+def get_video_effects_backend() -> str:
+    """
+    读取逐片段编码时的画幅适配和转场实现方式。
+
+    默认 `moviepy` 在 Python 里逐帧合成黑底、位移和缩放；`ffmpeg` 把同一套
+    转场换成 `ffmpeg_transition_filter` 生成的滤镜链，在编码器内部完成。
+    未知取值回退到 MoviePy。
+    """
+    configured_backend = str(
+        config.app.get("video_effects_backend", _EFFECTS_BACKEND_MOVIEPY)
+        or _EFFECTS_BACKEND_MOVIEPY
+    ).strip().lower()
+    if configured_backend not in _SUPPORTED_EFFECTS_BACKENDS:
         logger.warning(
-            "invalid subtitle font metrics, fallback to font size: "
-            f"ascent={ascent}, descent={descent}, fontsize={fontsize}"
+            f"unsupported video effects backend configured: {configured_backend}, "
+            f"fallback to {_EFFECTS_BACKEND_MOVIEPY}"
         )
-        line_height = max(1, int(fontsize))
+        return _EFFECTS_BACKEND_MOVIEPY
+    return configured_backend
+
+
+def _apply_clip_transition(clip, transition_value: str | None, side: str):
+    """用 MoviePy 特效实现 `_choose_clip_transition` 选出的转场。"""
+    if transition_value == VideoTransitionMode.fade_in.value:
+        return video_effects.fadein_transition(clip, 1)
+    if transition_value == VideoTransitionMode.fade_out.value:
+        return video_effects.fadeout_transition(clip, 1)
+    if transition_value == VideoTransitionMode.slide_in.value:
+        return video_effects.slidein_transition(clip, 1, side)
+    if transition_value == VideoTransitionMode.slide_out.value:
+        return video_effects.slideout_transition(clip, 1, side)
+    if transition_value == VideoTransitionMode.zoom_in.value:
+        return video_effects.zoomin_transition(clip, 1)
+    if transition_value == VideoTransitionMode.zoom_out.value:
+        return video_effects.zoomout_transition(clip, 1)
+    return clip
 
-    def get_text_size(inner_text):
-        inner_text = inner_text.strip()
-        if not inner_text:
-            return 0, line_height
-        left, top, right, bottom = font.getbbox(inner_text)
-        # bbox 仍适合测量换行所需的实际宽度；高度必须始终使用稳定字体行高。
-        return right - left, line_height
 
-    width, height = get_text_size(text)
-    if width <= max_width:
-        # SRT 条目允许作者手工换行。即使整段文本在宽度上不需要再次折行，
-        # 画布高度仍必须按现有行数计算，否则第二行及后续行会被裁掉。
-        return text, (text.count("\n") + 1) * line_height
+def _stream_copy_subclipped_item(
+    index: int, subclipped_item: SubClippedVideoClip, output_dir: str
+) -> SubClippedVideoClip | None:
+    """
+    用 `-c copy` 直接裁出已对齐关键帧的片段，失败时返回 None 交给重编码路径。
 
-    def split_long_token(token):
+    规划阶段已经确认素材分辨率、编码、像素格式和帧率与目标一致，且没有
+    转场和变速，此时解码、空操作缩放再编码只会浪费 CPU 并额外损失画质。
+    """
+    clip_file = f"{output_dir}/temp-clip-{index+1}.mp4"
+    duration = subclipped_item.end_time - subclipped_item.start_time
+    command = [
+        utils.get_ffmpeg_binary(),
+        "-y",
+        "-hide_banner",
+        "-ss",
+        f"{subclipped_item.start_time:.6f}",
+        "-i",
+        subclipped_item.file_path,
+        "-t",
+        f"{duration:.6f}",
+        "-map",
+        "0:v:0",
+        "-c",
+        "copy",
+        "-an",
+        "-avoid_negative_ts",
+        "make_zero",
+        clip_file,
+    ]
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        logger.warning(
+            f"stream copy failed, fallback to re-encoding: "
+            f"{subclipped_item.file_path}, "
+            f"error: {(result.stderr or result.stdout or '').strip()[-500:]}"
+        )
+        delete_files(clip_file)
+        return None
+
+    logger.debug(
+        f"stream copied clip {index+1}: {subclipped_item.file_path} "
+        f"[{subclipped_item.start_time:.2f}s, {subclipped_item.end_time:.2f}s]"
+    )
+    return SubClippedVideoClip(
+        file_path=clip_file,
+        duration=duration,
+        width=subclipped_item.width,
+        height=subclipped_item.height,
+        source_file_path=subclipped_item.source_file_path,
+    )
+
+
+def _encode_subclipped_item_with_ffmpeg(
+    subclipped_item: SubClippedVideoClip,
+    clip_file: str,
+    video_width: int,
+    video_height: int,
+    clip_speed: float,
+    max_clip_duration: float,
+    clip_transition: str | None,
+    transition_side: str,
+    render_settings: _RenderSettings = _STANDARD_RENDER_SETTINGS,
+) -> float:
+    """
+    用一条 FFmpeg 命令完成片段的变速、画幅适配和转场，返回片段时长。
+
+    滤镜链与单次编码渲染引擎共用 `_ffmpeg_segment_filter`，转场效果与
+    MoviePy 版本一致，但黑底合成、滑动和缩放都在 FFmpeg 内部逐帧完成。
+    """
+    source_duration = subclipped_item.end_time - subclipped_item.start_time
+    segment = _RenderSegment(
+        file_path=subclipped_item.file_path,
+        start_time=subclipped_item.start_time,
+        source_duration=source_duration,
+        duration=min(source_duration / clip_speed, max_clip_duration),
+        width=subclipped_item.width,
+        height=subclipped_item.height,
+        transition=clip_transition,
+        side=transition_side,
+    )
+    segment_filter = _ffmpeg_segment_filter(
+        segment, clip_speed, video_width, video_height, fps=render_settings.fps
+    )
+
+    def build_command(codec: str) -> list[str]:
+        return [
+            utils.get_ffmpeg_binary(),
+            "-y",
+            "-hide_banner",
+            "-ss",
+            f"{segment.start_time:.6f}",
+            "-t",
+            f"{segment.source_duration:.6f}",
+            "-i",
+            segment.file_path,
+            "-vf",
+            segment_filter,
+            "-an",
+            "-c:v",
+            codec,
+            *_video_preset_args(codec, render_settings),
+            "-pix_fmt",
+            "yuv420p",
+            "-r",
+            str(render_settings.fps),
+            clip_file,
+        ]
+
+    _run_ffmpeg_with_codec_fallback(
+        build_command, failure_message="ffmpeg clip effects failed"
+    )
+    return segment.duration
+
+
+def _get_clip_cache_key(
+    subclipped_item: SubClippedVideoClip,
+    video_width: int,
+    video_height: int,
+    clip_speed: float,
+    transition: str | None,
+    transition_side: str,
+    max_clip_duration: float,
+    render_settings: _RenderSettings,
+    effects_backend: str,
+) -> str | None:
+    """缓存开启时返回片段缓存键；素材无法读取时放弃缓存，不影响正常编码。"""
+    if not clip_cache.is_enabled():
+        return None
+    try:
+        return clip_cache.build_cache_key(
+            source_file=subclipped_item.file_path,
+            start_time=subclipped_item.start_time,
+            end_time=subclipped_item.end_time,
+            width=video_width,
+            height=video_height,
+            clip_speed=clip_speed,
+            transition=transition,
+            transition_side=transition_side,
+            max_clip_duration=max_clip_duration,
+            fps=render_settings.fps,
+            preset=render_settings.preset,
+            scale=render_settings.scale,
+            effects_backend=effects_backend,
+        )
+    except OSError as exc:
+        logger.warning(
+            f"failed to build clip cache key: {subclipped_item.file_path}, "
+            f"error: {str(exc)}"
+        )
+        return None
+
+
+def _process_subclipped_item(
+    index: int,
+    subclipped_item: SubClippedVideoClip,
+    output_dir: str,
+    video_width: int,
+    video_height: int,
+    clip_speed: float,
+    max_clip_duration: float,
+    transition_value,
+    codec: str,
+    effects_backend: str = _EFFECTS_BACKEND_MOVIEPY,
+    render_settings: _RenderSettings = _STANDARD_RENDER_SETTINGS,
+) -> SubClippedVideoClip | None:
+    """
+    把一个候选片段裁剪、缩放、加转场后写成 `temp-clip-N.mp4`。
+
+    该函数只依赖参数和模块级对象，既可在主进程串行调用，也可以交给进程池
+    执行。处理失败时返回 None 并记录日志，由调用方继续用后续素材补足时长。
+    `effects_backend` 为 `ffmpeg` 时先用 FFmpeg 滤镜完成整段处理，失败后
+    回退到 MoviePy。
+    """
+    if subclipped_item.stream_copy:
+        copied_clip = _stream_copy_subclipped_item(index, subclipped_item, output_dir)
+        if copied_clip is not None:
+            return copied_clip
+
+    clip_file = f"{output_dir}/temp-clip-{index+1}.mp4"
+    clip_transition, transition_side = _choose_clip_transition(
+        transition_value, seed=_clip_transition_seed(subclipped_item)
+    )
+    cache_options = {
+        "video_width": video_width,
+        "video_height": video_height,
+        "clip_speed": clip_speed,
+        "transition": clip_transition,
+        "transition_side": transition_side,
+        "max_clip_duration": max_clip_duration,
+        "render_settings": render_settings,
+    }
+    cache_key = _get_clip_cache_key(
+        subclipped_item, effects_backend=effects_backend, **cache_options
+    )
+    if cache_key:
+        cached_duration = clip_cache.restore_clip(cache_key, clip_file)
+        if cached_duration is not None:
+            logger.debug(f"clip cache hit: {clip_file}")
+            return SubClippedVideoClip(
+                file_path=clip_file,
+                duration=cached_duration,
+                width=subclipped_item.width,
+                height=subclipped_item.height,
+                source_file_path=subclipped_item.source_file_path,
+            )
+
+    if effects_backend == _EFFECTS_BACKEND_FFMPEG:
+        try:
+            clip_duration = _encode_subclipped_item_with_ffmpeg(
+                subclipped_item,
+                clip_file,
+                video_width=video_width,
+                video_height=video_height,
+                clip_speed=clip_speed,
+                max_clip_duration=max_clip_duration,
+                clip_transition=clip_transition,
+                transition_side=transition_side,
+                render_settings=render_settings,
+            )
+            if cache_key:
+                clip_cache.publish_clip(cache_key, clip_file, clip_duration)
+            return SubClippedVideoClip(
+                file_path=clip_file,
+                duration=clip_duration,
+                width=subclipped_item.width,
+                height=subclipped_item.height,
+                source_file_path=subclipped_item.source_file_path,
+            )
+        except Exception as exc:
+            logger.warning(
+                f"failed to apply clip effects with ffmpeg, fallback to moviepy: "
+                f"{subclipped_item.file_path}, error: {str(exc)[-500:]}"
+            )
+            delete_files(clip_file)
+            # 回退后的片段由 MoviePy 生成，只能记在 MoviePy 后端的缓存键下。
+            if cache_key:
+                cache_key = _get_clip_cache_key(
+                    subclipped_item,
+                    effects_backend=_EFFECTS_BACKEND_MOVIEPY,
+                    **cache_options,
+                )
+
+    try:
+        clip = _open_video_clip_quietly(subclipped_item.file_path).subclipped(
+            subclipped_item.start_time, subclipped_item.end_time
+        )
+        # 播放速度属于素材本身属性，应在转场前应用。这样 Fade/Slide 等一秒转场
+        # 不会跟随素材速度变成 0.5 秒或 2 秒；后续最大时长裁剪继续作为
+        # 浮点误差或异常素材时长的安全兜底，保证最终片段不突破配置上限。
+        if clip_speed != 1.0:
+            clip = clip.with_speed_scaled(clip_speed)
+        # Not all videos are same size, so we need to resize them
+        clip_w, clip_h = clip.size
+        geometry = _fit_geometry(clip_w, clip_h, video_width, video_height)
+        if geometry is not None:
+            new_width, new_height, x, y = geometry
+            logger.debug(f"resizing clip, source: {clip_w}x{clip_h}, ratio: {clip_w / clip_h:.2f}, target: {video_width}x{video_height}, ratio: {video_width / video_height:.2f}")
+            clip = clip.resized(new_size=(new_width, new_height))
+            if (new_width, new_height) != (video_width, video_height):
+                clip = _pad_clip_to_canvas(clip, video_width, video_height, x, y)
+
+        clip = _apply_clip_transition(clip, clip_transition, transition_side)
+
+        if clip.duration > max_clip_duration:
+            clip = clip.subclipped(0, max_clip_duration)
+
+        # wirte clip to temp file
+        _write_videofile_with_codec_fallback(
+            clip,
+            clip_file,
+            codec=codec,
+            render_settings=render_settings,
+            logger=None,
+            fps=render_settings.fps,
+        )
+
+        # Store clip duration before closing
+        clip_duration_saved = clip.duration
+        close_clip(clip)
+        if cache_key:
+            clip_cache.publish_clip(cache_key, clip_file, clip_duration_saved)
+
+        return SubClippedVideoClip(
+            file_path=clip_file,
+            duration=clip_duration_saved,
+            width=clip_w,
+            height=clip_h,
+            source_file_path=subclipped_item.source_file_path,
+        )
+    except Exception as e:
+        logger.error(f"failed to process clip: {str(e)}")
+        return None
+
+
+def _get_clip_worker_count(threads: int) -> int:
+    """
+    返回逐片段编码使用的进程数，未开启并行时返回 1。
+
+    每个片段都是独立的解码、缩放和编码流程，适合多进程并行。进程数受
+    任务的 `n_threads` 和 CPU 核数共同约束，避免多个任务同时运行时把
+    机器压满。
+    """
+    if not config.app.get("video_clip_parallel", False):
+        return 1
+    return max(1, min(int(threads or 1), os.cpu_count() or 1))
+
+
+def _estimate_clip_duration(
+    subclipped_item: SubClippedVideoClip, clip_speed: float, max_clip_duration: float
+) -> float:
+    """按源区间、播放速度和最大片段时长估算片段在成片中的时长。"""
+    return min(subclipped_item.duration / clip_speed, max_clip_duration)
+
+
+def _plan_clip_timeline(
+    subclipped_items: List[SubClippedVideoClip],
+    required_duration: float,
+    clip_speed: float,
+    max_clip_duration: float,
+    trim_to_need: bool = True,
+) -> List[SubClippedVideoClip]:
+    """
+    从候选片段开头挑出刚好覆盖 `required_duration` 的片段。
+
+    开启 `trim_to_need` 时，越过所需时长的最后一段只保留需要的源区间，不再
+    把整段编码后再由拼接阶段的 `-t` 丢弃；裁剪后至少保留
+    `_MIN_PLANNED_CLIP_DURATION` 秒，避免生成只有几帧、转场也放不下的片段。
+    流复制片段本身不编码，裁剪没有收益，保持关键帧对齐的原始区间。
+    """
+    planned_items = []
+    planned_duration = 0.0
+    for item in subclipped_items:
+        if planned_duration >= required_duration:
+            break
+        duration = _estimate_clip_duration(item, clip_speed, max_clip_duration)
+        remaining = required_duration - planned_duration
+        if trim_to_need and duration > remaining and not item.stream_copy:
+            duration = min(duration, max(remaining, _MIN_PLANNED_CLIP_DURATION))
+            item = SubClippedVideoClip(
+                file_path=item.file_path,
+                start_time=item.start_time,
+                end_time=min(item.end_time, item.start_time + duration * clip_speed),
+                width=item.width,
+                height=item.height,
+                source_file_path=item.source_file_path,
+            )
+        planned_items.append(item)
+        planned_duration += duration
+    return planned_items
+
+
+def _process_planned_clips(
+    subclipped_items: List[SubClippedVideoClip],
+    required_video_duration: float,
+    worker_count: int,
+    clip_options: dict,
+    trim_to_need: bool = False,
+) -> tuple[List[SubClippedVideoClip], List[SubClippedVideoClip]]:
+    """
+    按时间线规划编码刚好覆盖所需时长的片段，返回 (计划片段, 编码结果)。
+
+    两个列表一一对应，并保持候选顺序。每一批先用 `_plan_clip_timeline`
+    按估算时长挑出片段（可选裁剪最后一段），再逐个或用进程池并发编码；
+    有片段处理失败时，从后续候选中按剩余时长重新规划一批，即“跳过失败
+    片段继续向后取”。并发时编码器在主进程中提前完成 encoder 探测，子进程
+    不必各自重复检测；真实编码失败时仍由子进程内的 libx264 回退逻辑兜底。
+    """
+    clip_speed = clip_options["clip_speed"]
+    max_clip_duration = clip_options["max_clip_duration"]
+    planned_clips = []
+    processed_clips = []
+    video_duration = 0.0
+    next_index = 0
+    with ExitStack() as stack:
+        executor = None
+        if worker_count > 1:
+            codec = _get_effective_video_codec()
+            logger.info(f"processing clips with {worker_count} worker processes")
+            # fork 会复制 API/WebUI 进程中的线程锁状态，spawn 在各平台上行为一致。
+            executor = stack.enter_context(
+                ProcessPoolExecutor(
+                    max_workers=worker_count,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            )
+        else:
+            codec = _get_configured_video_codec()
+
+        while (
+            video_duration < required_video_duration
+            and next_index < len(subclipped_items)
+        ):
+            batch = _plan_clip_timeline(
+                subclipped_items[next_index:],
+                required_duration=required_video_duration - video_duration,
+                clip_speed=clip_speed,
+                max_clip_duration=max_clip_duration,
+                trim_to_need=trim_to_need,
+            )
+            indexes = range(next_index, next_index + len(batch))
+            next_index += len(batch)
+            logger.debug(
+                f"planned {len(batch)} clips for the remaining "
+                f"{required_video_duration - video_duration:.2f}s"
+            )
+            if executor is None:
+                results = [
+                    _process_subclipped_item(index, item, codec=codec, **clip_options)
+                    for index, item in zip(indexes, batch)
+                ]
+            else:
+                futures = [
+                    executor.submit(
+                        _process_subclipped_item,
+                        index,
+                        item,
+                        codec=codec,
+                        **clip_options,
+                    )
+                    for index, item in zip(indexes, batch)
+                ]
+                results = [future.result() for future in futures]
+            for item, processed_clip in zip(batch, results):
+                if processed_clip is None:
+                    continue
+                planned_clips.append(item)
+                processed_clips.append(processed_clip)
+                video_duration += processed_clip.duration
+
+    return planned_clips, processed_clips
+
+
+def _write_clip_timeline(
+    timeline_file: str,
+    audio_duration: float,
+    required_video_duration: float,
+    planned_clips: List[SubClippedVideoClip],
+    processed_clips: List[SubClippedVideoClip],
+):
+    """
+    把拼接时间线写成 JSON，便于排查素材选择、裁剪和循环复用。
+
+    `processed_clips` 的前 `len(planned_clips)` 项与计划片段一一对应，之后
+    是素材不足时循环复用的片段，用 `repeat_of` 指向被复用片段的位置。该
+    文件只用于诊断，写入失败只记录警告。
+    """
+    positions = {}
+    clips = []
+    timeline_start = 0.0
+    for position, clip in enumerate(processed_clips):
+        entry = {
+            "position": position,
+            "timeline_start": round(timeline_start, 3),
+            "duration": round(clip.duration, 3),
+        }
+        if position < len(planned_clips):
+            item = planned_clips[position]
+            positions[id(clip)] = position
+            entry.update(
+                source=item.source_file_path,
+                source_start=round(item.start_time, 3),
+                source_end=round(item.end_time, 3),
+                stream_copy=item.stream_copy,
+            )
+        else:
+            entry["repeat_of"] = positions.get(id(clip))
+        clips.append(entry)
+        timeline_start += clip.duration
+
+    timeline = {
+        "version": _CLIP_TIMELINE_VERSION,
+        "audio_duration": round(audio_duration, 3),
+        "required_duration": round(required_video_duration, 3),
+        "planned_duration": round(timeline_start, 3),
+        "clips": clips,
+    }
+    try:
+        with open(timeline_file, "w", encoding="utf-8") as fp:
+            json.dump(timeline, fp, ensure_ascii=False, indent=2)
+    except OSError as exc:
+        logger.warning(f"failed to write clip timeline: {timeline_file}, {exc}")
+        return
+    logger.info(f"clip timeline written: {timeline_file}")
+
+
+def combine_videos(
+    combined_video_path: str,
+    video_paths: List[str],
+    audio_file: str,
+    video_aspect: VideoAspect = VideoAspect.portrait,
+    video_concat_mode: VideoConcatMode = VideoConcatMode.random,
+    video_transition_mode: VideoTransitionMode = None,
+    max_clip_duration: int = 5,
+    threads: int = 2,
+    clip_speed: float = 1.0,
+    render_profile: RenderProfile = RenderProfile.standard,
+) -> str:
+    audio_duration = _read_audio_duration(audio_file)
+    logger.info(f"audio duration: {audio_duration} seconds")
+    logger.info(f"maximum clip duration: {max_clip_duration} seconds")
+    required_video_duration = _get_required_video_duration(audio_duration)
+    logger.info(
+        f"required video duration: {required_video_duration:.2f} seconds "
+        f"(audio duration + {_VIDEO_DURATION_SAFETY_MARGIN:.2f}s safety margin)"
+    )
+
+    # 兼容 API 直接调用时未传转场模式的情况，避免后续访问 .value 时崩溃。
+    transition_value = getattr(video_transition_mode, "value", video_transition_mode)
+    normalized_clip_speed = utils.normalize_clip_speed(clip_speed)
+    if normalized_clip_speed != 1.0:
+        # 只记录一次最终生效值，既方便定位 API 越界参数被归一化的问题，
+        # 也避免在逐片段热路径中重复输出相同日志。
+        logger.info(f"clip playback speed: {normalized_clip_speed:.2f}x")
+    # max_clip_duration 约束的是成片里的最终播放时长，而不是源视频读取时长。
+    # MoviePy 以 0.5 倍速播放 1.5 秒源画面会得到 3 秒片段，以 2 倍速播放
+    # 6 秒源画面同样会得到 3 秒片段。因此切片前必须按速度反推源时长；如果
+    # 仍固定读取 3 秒再慢放、裁剪，下一段却从源视频第 3 秒开始，会跳过中间
+    # 1.5 秒画面。该计算同时保证不同速度下的源时间线连续且无重叠。
+    source_clip_duration = max_clip_duration * normalized_clip_speed
+    output_dir = os.path.dirname(combined_video_path)
+
+    render_settings = get_render_settings(render_profile)
+    video_width, video_height = get_render_resolution(video_aspect, render_profile)
+
+    # 流复制只能原样搬运画面，转场、变速和预览帧率都必须重新编码。
+    stream_copy_size = None
+    if (
+        config.app.get("video_stream_copy", False)
+        and transition_value in (None, VideoTransitionMode.none.value)
+        and normalized_clip_speed == 1.0
+        and render_settings.fps == fps
+    ):
+        stream_copy_size = (video_width, video_height)
+    subclipped_items = _plan_subclipped_items(
+        video_paths=video_paths,
+        video_concat_mode=video_concat_mode,
+        source_clip_duration=source_clip_duration,
+        stream_copy_size=stream_copy_size,
+    )
+
+    clip_options = {
+        "output_dir": output_dir,
+        "video_width": video_width,
+        "video_height": video_height,
+        "clip_speed": normalized_clip_speed,
+        "max_clip_duration": max_clip_duration,
+        "transition_value": transition_value,
+        # 在主进程读取配置再传给子进程，spawn 出的进程不会继承运行期修改的配置。
+        "effects_backend": get_video_effects_backend(),
+        "render_settings": render_settings,
+    }
+    trim_to_need = bool(config.app.get("video_clip_trim_to_need", False))
+    planned_clips, processed_clips = _process_planned_clips(
+        subclipped_items=subclipped_items,
+        required_video_duration=required_video_duration,
+        worker_count=_get_clip_worker_count(threads),
+        clip_options=clip_options,
+        trim_to_need=trim_to_need,
+    )
+    video_duration = sum(clip.duration for clip in processed_clips)
+
+    # loop processed clips until the video duration covers the audio duration and the small safety margin.
+    if video_duration < required_video_duration:
+        logger.warning(
+            f"video duration ({video_duration:.2f}s) is shorter than required duration "
+            f"({required_video_duration:.2f}s), looping clips to match audio length."
+        )
+        base_clips = processed_clips.copy()
+        for clip in itertools.cycle(base_clips):
+            if video_duration >= required_video_duration:
+                break
+            processed_clips.append(clip)
+            video_duration += clip.duration
+        logger.info(
+            f"video duration: {video_duration:.2f}s, audio duration: {audio_duration:.2f}s, "
+            f"required duration: {required_video_duration:.2f}s, "
+            f"looped {len(processed_clips)-len(base_clips)} clips"
+        )
+     
+    # merge video clips progressively, avoid loading all videos at once to avoid memory overflow
+    logger.info("starting clip merging process")
+    if not processed_clips:
+        logger.warning("no clips available for merging")
+        return combined_video_path
+    
+    if trim_to_need:
+        _write_clip_timeline(
+            timeline_file=f"{os.path.splitext(combined_video_path)[0]}.timeline.json",
+            audio_duration=audio_duration,
+            required_video_duration=required_video_duration,
+            planned_clips=planned_clips,
+            processed_clips=processed_clips,
+        )
+
+    clip_files = [clip.file_path for clip in processed_clips]
+    logger.info(f"concatenating {len(clip_files)} clips with ffmpeg")
+    concat_video_clips_with_ffmpeg(
+        clip_files=clip_files,
+        output_file=combined_video_path,
+        threads=threads,
+        output_dir=output_dir,
+        max_duration=audio_duration,
+        render_settings=render_settings,
+    )
+    
+    # clean temp files
+    delete_files(clip_files)
+            
+    logger.info("video combining completed")
+    return combined_video_path
+
+
+@lru_cache(maxsize=32)
+def _load_font(font: str, font_size: int) -> ImageFont.FreeTypeFont:
+    """按 (字体, 字号) 缓存 Pillow 字体对象，避免每条字幕重复解析字体文件。"""
+    return ImageFont.truetype(font, font_size)
+
+
+class _GlyphMetrics:
+    """
+    单个字体和字号的字形宽度表，用于快速计算一行文字的宽度。
+
+    Pillow 基础排版下，`getbbox(text)` 的横向范围等于各字形笔位依次累加
+    advance（含字偶距），再与每个字形超出 advance 的墨迹取最大/最小值。
+    因此缓存每个字符的 advance、左右溢出量和字符对的字偶距后，逐字累加
+    即可得到与 `getbbox` 一致的宽度，不必对每个候选前缀重新排版。
+    Raqm 排版会做复杂文字整形，字符宽度不能简单相加，此时直接调用
+    `getbbox`。
+    """
+
+    def __init__(self, font: ImageFont.FreeTypeFont):
+        self.font = font
+        self.use_table = font.layout_engine == ImageFont.Layout.BASIC
+        self._glyphs = {}
+        self._kerning = {}
+
+    def _glyph(self, char: str) -> tuple[float, float, float]:
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            advance = self.font.getlength(char)
+            left, _top, right, _bottom = self.font.getbbox(char)
+            glyph = (advance, left, right - advance)
+            self._glyphs[char] = glyph
+        return glyph
+
+    def _kern(self, previous: str, char: str) -> float:
+        pair = previous + char
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            kerning = (
+                self.font.getlength(pair)
+                - self._glyph(previous)[0]
+                - self._glyph(char)[0]
+            )
+            self._kerning[pair] = kerning
+        return kerning
+
+    def extend(self, state: tuple, text: str) -> tuple:
+        """
+        在一行已有文字的累计状态后追加文字，返回新状态。
+
+        状态是 (笔位, 最左墨迹, 最右墨迹, 最后一个字符)，追加只需处理新增
+        字符，逐字扩展候选行时总开销与行长成线性关系。
+        """
+        pen, left, right, previous = state
+        for char in text:
+            advance, overhang_left, overhang_right = self._glyph(char)
+            if previous:
+                pen += self._kern(previous, char)
+            left = min(left, pen + overhang_left)
+            right = max(right, pen + advance + overhang_right)
+            pen += advance
+            previous = char
+        return pen, left, right, previous
+
+    @staticmethod
+    def width(state: tuple) -> float:
+        return state[2] - state[1]
+
+    def measure(self, text: str) -> float:
+        """返回与 `getbbox` 一致的文字宽度。"""
+        if not self.use_table:
+            left, _top, right, _bottom = self.font.getbbox(text)
+            return right - left
+        return self.width(self.extend(_EMPTY_LINE_STATE, text))
+
+
+_EMPTY_LINE_STATE = (0.0, 0.0, 0.0, "")
+
+
+@lru_cache(maxsize=32)
+def _get_glyph_metrics(font: str, font_size: int) -> _GlyphMetrics:
+    """按 (字体, 字号) 缓存字形宽度表，跨字幕、跨视频复用。"""
+    return _GlyphMetrics(_load_font(font, font_size))
+
+
+def wrap_text(text, max_width, font="Arial", fontsize=60):
+    # 字幕换行必须在真正创建 TextClip 前完成，否则 MoviePy 只会按原始文本
+    # 计算渲染区域。这里用 PIL 按当前字体和字号测量宽度，确保每一行都尽量
+    # 控制在视频可用宽度内，避免大字号或中文长句直接溢出画面。
+    glyph_metrics = _get_glyph_metrics(font, fontsize)
+    font = glyph_metrics.font
+    max_width = int(max_width)
+
+    # getbbox() 返回的是“当前字形的可见墨迹高度”，并不是字体行高。例如只含
+    # A、m、n 等无下伸部字符的英文会缺少 descent，多行时这个误差会逐行累积，
+    # 最终让 TextClip 的最后一行被画布裁掉。ascent + descent 来自字体自身，
+    # 不受具体语种和字符组合影响，也与 MoviePy 的 baseline 绘制模型一致。
+    ascent, descent = font.getmetrics()
+    line_height = int(ascent + descent)
+    if line_height <= 0:
+        # 正常 TrueType/OpenType 字体不会进入这里；保留可诊断日志和字号兜底，
+        # 避免损坏或非常规字体返回异常 metrics 后生成零高度字幕。
+        logger.warning(
+            "invalid subtitle font metrics, fallback to font size: "
+            f"ascent={ascent}, descent={descent}, fontsize={fontsize}"
+        )
+        line_height = max(1, int(fontsize))
+
+    def get_text_size(inner_text):
+        inner_text = inner_text.strip()
+        if not inner_text:
+            return 0, line_height
+        # bbox 宽度仍适合测量换行所需的实际宽度；高度必须始终使用稳定字体
+        # 行高。宽度由字形宽度表计算，结果与 getbbox 一致。
+        return glyph_metrics.measure(inner_text), line_height
+
+    width, height = get_text_size(text)
+    if width <= max_width:
+        # SRT 条目允许作者手工换行。即使整段文本在宽度上不需要再次折行，
+        # 画布高度仍必须按现有行数计算，否则第二行及后续行会被裁掉。
+        return text, (text.count("\n") + 1) * line_height
+
+    def split_long_token(token):
         # 当一个 token 本身就超宽时（常见于中文无空格长句，或英文超长单词），
         # 退化为字符级拆分。关键点是：检测到 candidate 超宽时，先提交上一个
         # 仍然合法的 current，再把当前字符放入下一行，不能把超宽字符塞回上一行。
+        # 逐字扩展时用累计状态增量计算候选行宽度，避免每加一个字就对整行
+        # 重新排版，中文长句的换行因此从 O(n²) 降为 O(n)。
         lines = []
         current = ""
+        state = _EMPTY_LINE_STATE
         for char in token:
             candidate = f"{current}{char}"
-            candidate_width, _ = get_text_size(candidate)
+            candidate_state = glyph_metrics.extend(state, char)
+            if glyph_metrics.use_table and candidate == candidate.strip():
+                candidate_width = glyph_metrics.width(candidate_state)
+            else:
+                candidate_width, _ = get_text_size(candidate)
             if candidate_width <= max_width or not current:
                 current = candidate
+                state = candidate_state
                 continue
             lines.append(current)
             current = char
+            state = glyph_metrics.extend(_EMPTY_LINE_STATE, char)
         if current:
             lines.append(current)
         return lines
@@ -988,23 +1947,563 @@ def subtitle_font_supports_text(font_path: str, text: str) -> bool:
     return _subtitle_font_supports_sample(font_path, sample)
 
 
-def generate_video(
-    video_path: str,
-    audio_path: str,
-    subtitle_path: str,
-    output_file: str,
-    params: VideoParams,
-    bgm_file_override: str | None = None,
-) -> bool:
-    """
-    合成最终视频，并返回本次背景音乐处理是否成功。
+def _get_subtitle_font_path(params: VideoParams) -> str:
+    """返回字幕字体的绝对路径；未指定字体时回退到项目默认字体。"""
+    if not params.font_name:
+        params.font_name = "STHeitiMedium.ttc"
+    font_path = os.path.join(utils.font_dir(), params.font_name)
+    if os.name == "nt":
+        font_path = font_path.replace("\\", "/")
+    return font_path
+
+
+def _resolve_subtitle_background_color(params: VideoParams):
+    # 兼容历史参数：API 里 `text_background_color` 既可能是布尔值，
+    # 也可能是实际颜色字符串。统一在这里归一化，避免把 True/False
+    # 直接传给 TextClip 后出现不可预期的渲染结果。
+    if isinstance(params.text_background_color, bool):
+        return "#000000" if params.text_background_color else None
+    return params.text_background_color
+
+
+@dataclass(frozen=True)
+class _SubtitleLayout:
+    """单条字幕的换行结果和字幕块尺寸，MoviePy 与 ASS 两种渲染方式共用。"""
+
+    wrapped_text: str
+    max_width: float
+    bg_color: str | None
+    rounded_bg_enabled: bool
+    pad_x: int
+    interline: int
+    text_clip_margin_y: int
+    clip_h: int
+
+
+def _layout_subtitle_text(
+    phrase: str, params: VideoParams, font_path: str, video_width: int
+) -> _SubtitleLayout:
+    """按字幕样式计算换行和字幕块高度，不创建任何 MoviePy 对象。"""
+    params.font_size = int(params.font_size)
+    params.stroke_width = int(params.stroke_width)
+    max_width = video_width * 0.9
+    bg_color = _resolve_subtitle_background_color(params)
+    rounded_bg_enabled = bool(
+        getattr(params, "rounded_subtitle_background", False) and bg_color
+    )
+    has_subtitle_background = bool(bg_color)
+    # 圆角背景按文字真实宽度生成，左右留白应更克制；旧矩形背景仍保留
+    # 较大的安全边距，避免历史配置中的长字幕贴边或被裁切。
+    padding_ratio = 0.4 if rounded_bg_enabled else 0.6
+    pad_x = int(params.font_size * padding_ratio) if has_subtitle_background else 0
+    # 字幕背景需要给文字左右留出明确内边距。先从可用宽度中扣除
+    # padding 再换行，避免长英文或大字号刚好撑满 90% 视频宽度后，
+    # 文字贴到背景框边缘，看起来像被裁切。普通矩形背景和圆角背景
+    # 都走这条逻辑；无背景字幕则保持原有最大宽度。
+    text_max_width = max(1, int(max_width) - 2 * pad_x)
+    wrapped_txt, txt_height = wrap_text(
+        phrase,
+        max_width=text_max_width,
+        font=font_path,
+        fontsize=params.font_size,
+    )
+    interline = int(params.font_size * 0.25)
+    line_count = wrapped_txt.count("\n") + 1
+    vertical_padding = int(params.font_size * 0.35)
+    # Pillow/MoviePy 会把描边向字形上下两侧扩张，并把这部分计入每一行
+    # 的行进高度。若只在整个字幕块外增加一次描边留白，粗描边多行文本
+    # 仍会逐行累积误差。这里按实际行数计入双侧描边空间，默认细描边只
+    # 增加少量高度，而“小字号 + 粗描边 + 多行”也能完整显示。
+    stroke_padding = int(params.stroke_width * 2 * line_count)
+    text_clip_margin_y = max(
+        int(params.font_size * 0.3), int(params.stroke_width * 2)
+    )
+    # MoviePy 在 `method=label` 下会自动收缩文本框高度，遇到多行字幕、
+    # 描边或背景色时，容易把最后一行的下半部分裁掉。这里显式传入
+    # 一个更保守的高度，把行间距和额外上下留白一并算进去，保证字幕
+    # 背景框与文字本身都能完整渲染出来。
+    clip_h = int(
+        txt_height
+        + vertical_padding
+        + (interline * line_count)
+        + stroke_padding
+    )
+    return _SubtitleLayout(
+        wrapped_text=wrapped_txt,
+        max_width=max_width,
+        bg_color=bg_color,
+        rounded_bg_enabled=rounded_bg_enabled,
+        pad_x=pad_x,
+        interline=interline,
+        text_clip_margin_y=text_clip_margin_y,
+        clip_h=clip_h,
+    )
+
+
+def _measure_subtitle_box_width(
+    wrapped_txt: str, font_path: str, font_size: int, pad_x: int, max_width: float
+) -> int:
+    """圆角背景按最长一行文字的实际宽度加水平内边距，不超过最大宽度。"""
+    try:
+        glyph_metrics = _get_glyph_metrics(font_path, font_size)
+        text_w = max(
+            int(glyph_metrics.measure(line)) for line in wrapped_txt.split("\n")
+        )
+    except Exception as exc:
+        logger.warning(
+            f"failed to measure subtitle text width, fallback to max width: {str(exc)}"
+        )
+        text_w = int(max_width)
+    return max(1, min(int(max_width), text_w + 2 * pad_x))
+
+
+def _subtitle_block_y(params: VideoParams, block_height: float, video_height: int) -> float:
+    """按字幕位置参数返回字幕块左上角的纵坐标。"""
+    if params.subtitle_position == "bottom":
+        return video_height * 0.95 - block_height
+    if params.subtitle_position == "top":
+        return video_height * 0.05
+    if params.subtitle_position == "custom":
+        # Ensure the subtitle is fully within the screen bounds
+        margin = 10  # Additional margin, in pixels
+        max_y = video_height - block_height - margin
+        min_y = margin
+        custom_y = (video_height - block_height) * (params.custom_position / 100)
+        # Constrain the y value within the valid range
+        return max(min_y, min(custom_y, max_y))
+    return (video_height - block_height) / 2
+
+
+def _create_subtitle_clip(
+    subtitle_item,
+    params: VideoParams,
+    font_path: str,
+    video_width: int,
+    video_height: int,
+):
+    """
+    按字幕样式参数创建单条字幕的 MoviePy clip，并设置时间与画面位置。
+
+    MoviePy 合成路径和 FFmpeg 渲染引擎都依赖这份实现：前者直接参与合成，
+    后者把首帧导出为透明字幕卡。两条路径共用同一套换行、留白和定位规则，
+    才能保证切换渲染引擎后字幕外观不发生变化。
+    """
+    phrase = subtitle_item[1]
+    layout = _layout_subtitle_text(phrase, params, font_path, video_width)
+    wrapped_txt = layout.wrapped_text
+    max_width = layout.max_width
+    bg_color = layout.bg_color
+    pad_x = layout.pad_x
+    interline = layout.interline
+    text_clip_margin_y = layout.text_clip_margin_y
+    clip_h = layout.clip_h
+
+    if layout.rounded_bg_enabled:
+        # 圆角背景需要贴合文字宽度，而不是沿用 90% 视频宽度。这里先用
+        # PIL 测量最长一行文字，再加水平内边距，避免短字幕出现过宽底板。
+        box_w = _measure_subtitle_box_width(
+            wrapped_txt, font_path, params.font_size, pad_x, max_width
+        )
+        radius = max(8, int(params.font_size * 0.4))
+        text_clip = TextClip(
+            text=wrapped_txt,
+            font=font_path,
+            font_size=params.font_size,
+            color=params.text_fore_color,
+            bg_color=None,
+            stroke_color=params.stroke_color,
+            stroke_width=params.stroke_width,
+            interline=interline,
+            size=(box_w, None),
+            text_align="center",
+            margin=(0, text_clip_margin_y),
+        )
+        clip_h = max(clip_h, text_clip.h)
+        bg_clip = _rounded_subtitle_background_clip(
+            width=box_w,
+            height=clip_h,
+            color=bg_color,
+            alpha=140,
+            radius=radius,
+        )
+        text_position = _get_visible_center_position(text_clip, box_w, clip_h)
+        _clip = CompositeVideoClip(
+            [bg_clip, text_clip.with_position(text_position)],
+            size=(box_w, clip_h),
+        )
+    elif bg_color:
+        size = (
+            int(max_width),
+            clip_h,
+        )
+        text_clip = TextClip(
+            text=wrapped_txt,
+            font=font_path,
+            font_size=params.font_size,
+            color=params.text_fore_color,
+            bg_color=None,
+            stroke_color=params.stroke_color,
+            stroke_width=params.stroke_width,
+            interline=interline,
+            size=(int(max_width), None),
+            text_align="center",
+            margin=(0, text_clip_margin_y),
+        )
+        size = (size[0], max(size[1], text_clip.h))
+        bg_clip = _rounded_subtitle_background_clip(
+            width=size[0],
+            height=size[1],
+            color=bg_color,
+            alpha=255,
+            radius=0,
+        )
+        text_position = _get_visible_center_position(text_clip, size[0], size[1])
+        _clip = CompositeVideoClip(
+            [bg_clip, text_clip.with_position(text_position)],
+            size=size,
+        )
+    else:
+        size = (
+            int(max_width),
+            clip_h,
+        )
+        _clip = TextClip(
+            text=wrapped_txt,
+            font=font_path,
+            font_size=params.font_size,
+            color=params.text_fore_color,
+            bg_color=None,
+            stroke_color=params.stroke_color,
+            stroke_width=params.stroke_width,
+            interline=interline,
+            size=size,
+            text_align="center",
+        )
+    duration = subtitle_item[0][1] - subtitle_item[0][0]
+    _clip = _clip.with_start(subtitle_item[0][0])
+    _clip = _clip.with_end(subtitle_item[0][1])
+    _clip = _clip.with_duration(duration)
+    if params.subtitle_position in ("bottom", "top", "custom"):
+        _clip = _clip.with_position(
+            ("center", _subtitle_block_y(params, _clip.h, video_height))
+        )
+    else:  # center
+        _clip = _clip.with_position(("center", "center"))
+    return _clip
+
+
+def _apply_subtitle_timeline(
+    clip_stack: ExitStack,
+    video_clip,
+    subtitle_path: str,
+    params: VideoParams,
+    font_path: str,
+    video_width: int,
+    video_height: int,
+    time_range: tuple[float, float] | None = None,
+):
+    """
+    把字幕预渲染成时间线并叠加到画面，没有字幕时原样返回 `video_clip`。
+
+    传入 `time_range` 时只渲染与该区间重叠的字幕，分段编码的每个进程只
+    需要准备自己片段内的字幕卡。
+    """
+    if not subtitle_path or not os.path.exists(subtitle_path):
+        return video_clip
+
+    def make_textclip(text):
+        return TextClip(
+            text=text,
+            font=font_path,
+            font_size=params.font_size,
+        )
+
+    sub = clip_stack.enter_context(
+        SubtitlesClip(
+            subtitles=subtitle_path,
+            encoding="utf-8",
+            make_textclip=make_textclip,
+        )
+    )
+    subtitles = sub.subtitles
+    if time_range is not None:
+        range_start, range_end = time_range
+        subtitles = [
+            item
+            for item in subtitles
+            if item[0][1] > range_start and item[0][0] < range_end
+        ]
+    timeline = _build_subtitle_timeline(
+        subtitles,
+        params=params,
+        font_path=font_path,
+        video_width=video_width,
+        video_height=video_height,
+    )
+    if not len(timeline):
+        return video_clip
+    return video_clip.transform(lambda get_frame, t: timeline.blit(get_frame(t), t))
+
+
+def get_final_encode_segment_duration() -> float:
+    """
+    读取成片分段并行编码的片段时长（秒），0 表示关闭。
+
+    非法取值按关闭处理并记录警告，避免配置错误让任务在合成阶段失败。
+    """
+    configured_duration = config.app.get("final_encode_segment_duration", 0) or 0
+    try:
+        segment_duration = float(configured_duration)
+    except (TypeError, ValueError):
+        segment_duration = -1
+    if not math.isfinite(segment_duration) or segment_duration < 0:
+        logger.warning(
+            f"invalid final encode segment duration: {configured_duration}, "
+            f"segmented encoding disabled"
+        )
+        return 0
+    return segment_duration
+
+
+def _plan_final_encode_segments(
+    video_duration: float, fps: int, segment_duration: float
+) -> list[tuple[float, float | None]]:
+    """
+    把成片时间线切成按 GOP 对齐的片段，返回 `(start, end)` 列表。
+
+    片段时长向上取整为整数个 GOP（`_FINAL_ENCODE_GOP_SECONDS` 秒），每个
+    片段都从关键帧开始、包含完整的 GOP，流复制拼接后的关键帧间隔与整段
+    编码一致；片段边界落在整秒上，逐帧采样时刻也与整段编码完全相同。
+    最后一段的 end 为 None，表示一直编码到视频结尾；不足一个 GOP 的尾巴
+    并入前一段。
+    """
+    if segment_duration <= 0 or video_duration <= 0 or fps <= 0:
+        return []
+    gop_count = max(1, math.ceil(segment_duration / _FINAL_ENCODE_GOP_SECONDS))
+    step = gop_count * _FINAL_ENCODE_GOP_SECONDS
+    starts = list(range(0, math.ceil(video_duration / step) * step, step))
+    if len(starts) > 1 and video_duration - starts[-1] < _FINAL_ENCODE_GOP_SECONDS:
+        starts.pop()
+    return [
+        (float(start), float(starts[index + 1]) if index + 1 < len(starts) else None)
+        for index, start in enumerate(starts)
+    ]
+
+
+def _get_final_encode_worker_count(threads: int, segment_count: int) -> int:
+    """分段编码的进程数受任务 `n_threads`、CPU 核数和片段数共同约束。"""
+    return max(1, min(int(threads or 1), os.cpu_count() or 1, segment_count))
+
+
+def _encode_final_video_segment(
+    video_path: str,
+    subtitle_path: str,
+    params: VideoParams,
+    font_path: str,
+    video_width: int,
+    video_height: int,
+    start_time: float,
+    end_time: float | None,
+    output_file: str,
+    codec: str,
+    render_settings: _RenderSettings,
+    threads: int,
+) -> str:
+    """
+    在独立进程中编码成片的一个时间片段，只输出画面，返回实际使用的编码器。
+
+    字幕时间线叠加在完整视频上再截取片段，字幕时刻无需换算；编码器回退
+    仍由 `_write_videofile_with_codec_fallback` 在每个片段内单独处理。
+    """
+    with ExitStack() as clip_stack:
+        source_video_clip = clip_stack.enter_context(
+            _open_video_clip_quietly(video_path)
+        )
+        segment_end = source_video_clip.duration if end_time is None else end_time
+        video_clip = _apply_subtitle_timeline(
+            clip_stack,
+            source_video_clip,
+            subtitle_path=subtitle_path,
+            params=params,
+            font_path=font_path,
+            video_width=video_width,
+            video_height=video_height,
+            time_range=(start_time, segment_end),
+        )
+        segment_clip = video_clip.subclipped(start_time, end_time)
+        return _write_videofile_with_codec_fallback(
+            segment_clip,
+            output_file=output_file,
+            codec=codec,
+            render_settings=render_settings,
+            audio=False,
+            threads=threads,
+            logger=None,
+            fps=render_settings.fps,
+            ffmpeg_params=[
+                "-g",
+                str(_FINAL_ENCODE_GOP_SECONDS * render_settings.fps),
+            ],
+        )
+
+
+def _concat_segments_with_audio(
+    segment_files: List[str],
+    audio_file: str,
+    output_file: str,
+    video_duration: float,
+):
+    """用 concat demuxer 流复制拼接画面片段，并挂上混好的音轨。"""
+    concat_list_file = f"{output_file}.segments.txt"
+    with open(concat_list_file, "w", encoding="utf-8") as fp:
+        for segment_file in segment_files:
+            fp.write(f"file '{_format_ffmpeg_concat_path(segment_file)}'\n")
+
+    command = [
+        utils.get_ffmpeg_binary(),
+        "-y",
+        "-hide_banner",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        concat_list_file,
+        "-i",
+        audio_file,
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c",
+        "copy",
+        "-t",
+        f"{video_duration:.3f}",
+        "-movflags",
+        "+faststart",
+        output_file,
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+    finally:
+        delete_files(concat_list_file)
+    if result.returncode != 0:
+        error_message = (result.stderr or result.stdout or "").strip()
+        raise RuntimeError(error_message or "ffmpeg segment concat failed")
+
+
+def _encode_final_video_in_segments(
+    video_path: str,
+    subtitle_path: str,
+    audio_mix_file: str,
+    output_file: str,
+    params: VideoParams,
+    font_path: str,
+    video_width: int,
+    video_height: int,
+    segments: list[tuple[float, float | None]],
+    render_settings: _RenderSettings,
+):
+    """
+    把成片按时间切片后由多个进程并行编码，再流复制拼接。
+
+    MoviePy 逐帧解码、叠加字幕和向编码器送帧都在单个 Python 线程里完成，
+    长视频单次 `write_videofile` 无法用满多核。片段只含画面，最后与预先
+    混好的音轨一起复制进成片。任一片段失败，或各片段因硬件编码器回退
+    用了不同编码器而无法流复制拼接时抛出异常，由调用方回退到整段编码。
+    """
+    worker_count = _get_final_encode_worker_count(params.n_threads, len(segments))
+    if worker_count < 2:
+        raise RuntimeError("segmented encoding needs at least two workers")
+
+    codec = _get_effective_video_codec()
+    threads_per_worker = max(1, int(params.n_threads or 2) // worker_count)
+    segment_files = [
+        f"{output_file}.segment-{index:03d}.mp4" for index in range(len(segments))
+    ]
+    logger.info(
+        f"encoding final video in {len(segments)} segments with "
+        f"{worker_count} worker processes"
+    )
+    try:
+        # fork 会复制 API/WebUI 进程中的线程锁状态，spawn 在各平台上行为一致。
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            max_workers=worker_count, mp_context=context
+        ) as executor:
+            futures = [
+                executor.submit(
+                    _encode_final_video_segment,
+                    video_path,
+                    subtitle_path,
+                    params,
+                    font_path,
+                    video_width,
+                    video_height,
+                    start_time,
+                    end_time,
+                    segment_file,
+                    codec,
+                    render_settings,
+                    threads_per_worker,
+                )
+                for (start_time, end_time), segment_file in zip(
+                    segments, segment_files
+                )
+            ]
+            used_codecs = {future.result() for future in futures}
+        if len(used_codecs) > 1:
+            raise RuntimeError(
+                f"segments were encoded with different codecs: {sorted(used_codecs)}"
+            )
+        _concat_segments_with_audio(
+            segment_files,
+            audio_file=audio_mix_file,
+            output_file=output_file,
+            video_duration=_read_video_duration(video_path),
+        )
+    finally:
+        delete_files(segment_files)
+
+
+def generate_video(
+    video_path: str,
+    audio_path: str,
+    subtitle_path: str,
+    output_file: str,
+    params: VideoParams,
+    bgm_file_override: str | None = None,
+    subtitle_overlay: str = "",
+) -> bool:
+    """
+    合成最终视频，并返回本次背景音乐处理是否成功。
 
     返回值只描述 BGM 处理状态：没有请求 BGM 或成功混合时返回 True；请求了
     BGM 但加载、特效或混合失败时返回 False。即使 BGM 失败仍会继续输出只有
     旁白的视频，让任务编排层决定是否向用户展示降级警告。
+
+    传入 `subtitle_overlay`（`prepare_subtitle_overlay` 生成的字幕卡清单或
+    ASS 文件）时，字幕由 FFmpeg 叠加或 libass 绘制，不再逐帧合成 TextClip；
+    FFmpeg 失败时回退到 MoviePy 合成。
+
+    混音方式为 `ffmpeg` 时先由 `prepare_audio_mix` 生成（或复用）混好的
+    音轨，成片只复制音频流；混音失败时回退到 MoviePy 逐块混音。没有字幕时
+    画面不需要任何改动，不论混音方式都先用 FFmpeg 混音，再直接复制视频流；
+    混音或复制失败时回退到 MoviePy 重新编码。
+
+    输出分辨率、帧率和编码预设由 `params.render_profile` 决定，字号和描边
+    按同样比例缩放，拼接视频需要用同一档位生成。
     """
-    aspect = VideoAspect(params.video_aspect)
-    video_width, video_height = aspect.to_resolution()
+    render_settings = get_render_settings(params.render_profile)
+    video_width, video_height = get_render_resolution(
+        params.video_aspect, params.render_profile
+    )
+    params = _scale_subtitle_params(params, render_settings)
 
     logger.info(f"generating video: {video_width} x {video_height}")
     logger.info(f"  ① video: {video_path}")
@@ -1017,183 +2516,101 @@ def generate_video(
     # write into the same directory as the output file
     output_dir = os.path.dirname(output_file)
 
-    font_path = ""
-    if params.subtitle_enabled:
-        if not params.font_name:
-            params.font_name = "STHeitiMedium.ttc"
-        font_path = os.path.join(utils.font_dir(), params.font_name)
-        if os.name == "nt":
-            font_path = font_path.replace("\\", "/")
-
-        logger.info(f"  ⑤ font: {font_path}")
+    # 分段编码的各片段只含画面，需要一条预先混好的音轨，因此长视频即使
+    # 使用 MoviePy 混音配置，也改由 FFmpeg 混音一次再复制到成片。
+    encode_segments = []
+    segment_duration = get_final_encode_segment_duration()
+    if segment_duration > 0:
+        encode_segments = _plan_final_encode_segments(
+            _read_video_duration(video_path),
+            fps=render_settings.fps,
+            segment_duration=segment_duration,
+        )
 
-    def resolve_subtitle_background_color():
-        # 兼容历史参数：API 里 `text_background_color` 既可能是布尔值，
-        # 也可能是实际颜色字符串。统一在这里归一化，避免把 True/False
-        # 直接传给 TextClip 后出现不可预期的渲染结果。
-        if isinstance(params.text_background_color, bool):
-            return "#000000" if params.text_background_color else None
-        return params.text_background_color
-
-    def create_text_clip(subtitle_item):
-        params.font_size = int(params.font_size)
-        params.stroke_width = int(params.stroke_width)
-        phrase = subtitle_item[1]
-        max_width = video_width * 0.9
-        bg_color = resolve_subtitle_background_color()
-        rounded_bg_enabled = bool(
-            getattr(params, "rounded_subtitle_background", False) and bg_color
-        )
-        has_subtitle_background = bool(bg_color)
-        # 圆角背景按文字真实宽度生成，左右留白应更克制；旧矩形背景仍保留
-        # 较大的安全边距，避免历史配置中的长字幕贴边或被裁切。
-        padding_ratio = 0.4 if rounded_bg_enabled else 0.6
-        pad_x = int(params.font_size * padding_ratio) if has_subtitle_background else 0
-        # 字幕背景需要给文字左右留出明确内边距。先从可用宽度中扣除
-        # padding 再换行，避免长英文或大字号刚好撑满 90% 视频宽度后，
-        # 文字贴到背景框边缘，看起来像被裁切。普通矩形背景和圆角背景
-        # 都走这条逻辑；无背景字幕则保持原有最大宽度。
-        text_max_width = max(1, int(max_width) - 2 * pad_x)
-        wrapped_txt, txt_height = wrap_text(
-            phrase,
-            max_width=text_max_width,
-            font=font_path,
-            fontsize=params.font_size,
-        )
-        interline = int(params.font_size * 0.25)
-        line_count = wrapped_txt.count("\n") + 1
-        vertical_padding = int(params.font_size * 0.35)
-        # Pillow/MoviePy 会把描边向字形上下两侧扩张，并把这部分计入每一行
-        # 的行进高度。若只在整个字幕块外增加一次描边留白，粗描边多行文本
-        # 仍会逐行累积误差。这里按实际行数计入双侧描边空间，默认细描边只
-        # 增加少量高度，而“小字号 + 粗描边 + 多行”也能完整显示。
-        stroke_padding = int(params.stroke_width * 2 * line_count)
-        text_clip_margin_y = max(
-            int(params.font_size * 0.3), int(params.stroke_width * 2)
-        )
-        # MoviePy 在 `method=label` 下会自动收缩文本框高度，遇到多行字幕、
-        # 描边或背景色时，容易把最后一行的下半部分裁掉。这里显式传入
-        # 一个更保守的高度，把行间距和额外上下留白一并算进去，保证字幕
-        # 背景框与文字本身都能完整渲染出来。
-        clip_h = int(
-            txt_height
-            + vertical_padding
-            + (interline * line_count)
-            + stroke_padding
-        )
-
-        if rounded_bg_enabled:
-            # 圆角背景需要贴合文字宽度，而不是沿用 90% 视频宽度。这里先用
-            # PIL 测量最长一行文字，再加水平内边距，避免短字幕出现过宽底板。
-            try:
-                font = ImageFont.truetype(font_path, params.font_size)
-                text_w = max(
-                    int(font.getbbox(line)[2] - font.getbbox(line)[0])
-                    for line in wrapped_txt.split("\n")
-                )
-            except Exception as exc:
-                logger.warning(
-                    f"failed to measure subtitle text width, fallback to max width: {str(exc)}"
-                )
-                text_w = int(max_width)
-
-            box_w = max(1, min(int(max_width), text_w + 2 * pad_x))
-            radius = max(8, int(params.font_size * 0.4))
-            text_clip = TextClip(
-                text=wrapped_txt,
-                font=font_path,
-                font_size=params.font_size,
-                color=params.text_fore_color,
-                bg_color=None,
-                stroke_color=params.stroke_color,
-                stroke_width=params.stroke_width,
-                interline=interline,
-                size=(box_w, None),
-                text_align="center",
-                margin=(0, text_clip_margin_y),
-            )
-            clip_h = max(clip_h, text_clip.h)
-            bg_clip = _rounded_subtitle_background_clip(
-                width=box_w,
-                height=clip_h,
-                color=bg_color,
-                alpha=140,
-                radius=radius,
-            )
-            text_position = _get_visible_center_position(text_clip, box_w, clip_h)
-            _clip = CompositeVideoClip(
-                [bg_clip, text_clip.with_position(text_position)],
-                size=(box_w, clip_h),
+    # 没有字幕时画面与拼接视频完全相同，只要有混好的音轨就能直接复制视频
+    # 流，因此无论混音配置如何都先用 FFmpeg 混音。
+    has_subtitles = bool(
+        params.subtitle_enabled and subtitle_path and os.path.exists(subtitle_path)
+    )
+    audio_mix_file = ""
+    mixed_bgm_succeeded = True
+    if (
+        get_audio_mix_backend() == _AUDIO_MIX_BACKEND_FFMPEG
+        or len(encode_segments) > 1
+        or not has_subtitles
+    ):
+        try:
+            audio_mix_file, mixed_bgm_succeeded = prepare_audio_mix(
+                audio_path=audio_path,
+                params=params,
+                output_dir=output_dir,
+                bgm_file_override=bgm_file_override,
             )
-        elif bg_color:
-            size = (
-                int(max_width),
-                clip_h,
+        except Exception:
+            logger.exception(
+                f"failed to mix audio with ffmpeg, fallback to moviepy: "
+                f"{output_file}"
             )
-            text_clip = TextClip(
-                text=wrapped_txt,
-                font=font_path,
-                font_size=params.font_size,
-                color=params.text_fore_color,
-                bg_color=None,
-                stroke_color=params.stroke_color,
-                stroke_width=params.stroke_width,
-                interline=interline,
-                size=(int(max_width), None),
-                text_align="center",
-                margin=(0, text_clip_margin_y),
+
+    if audio_mix_file and not has_subtitles:
+        # 直接复制视频流并挂上混好的音轨，既省去逐帧解码和编码，也避免一次
+        # 有损重编码。
+        try:
+            _remux_video_with_audio(video_path, audio_mix_file, output_file)
+            logger.info(f"video remuxed without re-encoding: {output_file}")
+            return mixed_bgm_succeeded
+        except Exception:
+            logger.exception(
+                f"failed to remux video, fallback to re-encoding: {output_file}"
             )
-            size = (size[0], max(size[1], text_clip.h))
-            bg_clip = _rounded_subtitle_background_clip(
-                width=size[0],
-                height=size[1],
-                color=bg_color,
-                alpha=255,
-                radius=0,
+
+    if subtitle_overlay and params.subtitle_enabled:
+        try:
+            bgm_mix_succeeded = _compose_video_with_ffmpeg(
+                video_path=video_path,
+                audio_path=audio_path,
+                output_file=output_file,
+                params=params,
+                subtitle_overlay=subtitle_overlay,
+                bgm_file_override=bgm_file_override,
+                audio_mix_file=audio_mix_file,
+                render_settings=render_settings,
             )
-            text_position = _get_visible_center_position(text_clip, size[0], size[1])
-            _clip = CompositeVideoClip(
-                [bg_clip, text_clip.with_position(text_position)],
-                size=size,
+            if audio_mix_file:
+                bgm_mix_succeeded = mixed_bgm_succeeded
+            logger.info(f"subtitle overlay composed with ffmpeg: {output_file}")
+            return bgm_mix_succeeded
+        except Exception:
+            logger.exception(
+                f"failed to compose subtitle overlay with ffmpeg, fallback to "
+                f"moviepy: {output_file}"
             )
-        else:
-            size = (
-                int(max_width),
-                clip_h,
+
+    font_path = ""
+    if params.subtitle_enabled:
+        font_path = _get_subtitle_font_path(params)
+        logger.info(f"  ⑤ font: {font_path}")
+
+    if audio_mix_file and len(encode_segments) > 1:
+        try:
+            _encode_final_video_in_segments(
+                video_path=video_path,
+                subtitle_path=subtitle_path,
+                audio_mix_file=audio_mix_file,
+                output_file=output_file,
+                params=params,
+                font_path=font_path,
+                video_width=video_width,
+                video_height=video_height,
+                segments=encode_segments,
+                render_settings=render_settings,
             )
-            _clip = TextClip(
-                text=wrapped_txt,
-                font=font_path,
-                font_size=params.font_size,
-                color=params.text_fore_color,
-                bg_color=None,
-                stroke_color=params.stroke_color,
-                stroke_width=params.stroke_width,
-                interline=interline,
-                size=size,
-                text_align="center",
+            return mixed_bgm_succeeded
+        except Exception:
+            logger.exception(
+                f"failed to encode final video in segments, fallback to a "
+                f"single encode: {output_file}"
             )
-        duration = subtitle_item[0][1] - subtitle_item[0][0]
-        _clip = _clip.with_start(subtitle_item[0][0])
-        _clip = _clip.with_end(subtitle_item[0][1])
-        _clip = _clip.with_duration(duration)
-        if params.subtitle_position == "bottom":
-            _clip = _clip.with_position(("center", video_height * 0.95 - _clip.h))
-        elif params.subtitle_position == "top":
-            _clip = _clip.with_position(("center", video_height * 0.05))
-        elif params.subtitle_position == "custom":
-            # Ensure the subtitle is fully within the screen bounds
-            margin = 10  # Additional margin, in pixels
-            max_y = video_height - _clip.h - margin
-            min_y = margin
-            custom_y = (video_height - _clip.h) * (params.custom_position / 100)
-            custom_y = max(
-                min_y, min(custom_y, max_y)
-            )  # Constrain the y value within the valid range
-            _clip = _clip.with_position(("center", custom_y))
-        else:  # center
-            _clip = _clip.with_position(("center", "center"))
-        return _clip
 
     # MoviePy 的 CompositeAudioClip.close() 不会关闭子 AudioFileClip。这里用
     # ExitStack 显式持有所有原始文件 reader，确保成功、字幕异常、混音失败和
@@ -1202,33 +2619,35 @@ def generate_video(
         source_video_clip = clip_stack.enter_context(
             _open_video_clip_quietly(video_path)
         )
-        voice_source_clip = clip_stack.enter_context(AudioFileClip(audio_path))
-        video_clip = source_video_clip
-        audio_clip = voice_source_clip.with_effects(
-            [afx.MultiplyVolume(params.voice_volume)]
+        video_clip = _apply_subtitle_timeline(
+            clip_stack,
+            source_video_clip,
+            subtitle_path=subtitle_path,
+            params=params,
+            font_path=font_path,
+            video_width=video_width,
+            video_height=video_height,
         )
 
-        def make_textclip(text):
-            return TextClip(
-                text=text,
-                font=font_path,
-                font_size=params.font_size,
+        if audio_mix_file:
+            # 混好的音轨已经按成片参数编码，MoviePy 只编码画面并复制音频流。
+            _write_videofile_with_codec_fallback(
+                video_clip,
+                output_file=output_file,
+                codec=_get_configured_video_codec(),
+                render_settings=render_settings,
+                audio=audio_mix_file,
+                audio_codec="copy",
+                threads=params.n_threads or 2,
+                logger=None,
+                fps=render_settings.fps,
             )
+            return mixed_bgm_succeeded
 
-        if subtitle_path and os.path.exists(subtitle_path):
-            sub = clip_stack.enter_context(
-                SubtitlesClip(
-                    subtitles=subtitle_path,
-                    encoding="utf-8",
-                    make_textclip=make_textclip,
-                )
-            )
-            text_clips = []
-            for item in sub.subtitles:
-                clip = create_text_clip(subtitle_item=item)
-                text_clips.append(clip)
-            video_clip = CompositeVideoClip([video_clip, *text_clips])
-            clip_stack.callback(video_clip.close)
+        voice_source_clip = clip_stack.enter_context(AudioFileClip(audio_path))
+        audio_clip = voice_source_clip.with_effects(
+            [afx.MultiplyVolume(params.voice_volume)]
+        )
 
         bgm_enabled = bgm_service.should_use_bgm(
             params.bgm_type, params.bgm_volume
@@ -1286,52 +2705,1396 @@ def generate_video(
             final_video_clip,
             output_file=output_file,
             codec=_get_configured_video_codec(),
+            render_settings=render_settings,
             audio_codec=audio_codec,
             audio_fps=output_audio_fps,
             audio_bitrate=audio_bitrate,
             temp_audiofile_path=_get_temp_audio_dir(output_dir),
             threads=params.n_threads or 2,
             logger=None,
-            fps=fps,
+            fps=render_settings.fps,
         )
         return bgm_mix_succeeded
 
 
-def preprocess_video(materials: List[MaterialInfo], clip_duration=4):
-    # WebUI 在某些二次生成场景下可能传入空素材列表，这里直接返回空结果，避免抛出 NoneType 异常。
-    if not materials:
-        return []
+def get_render_engine() -> str:
+    """
+    读取成片渲染引擎配置。
 
-    # 仅返回通过预处理校验的素材，避免低分辨率图片继续进入后续的视频合成流程。
-    valid_materials = []
-    local_videos_dir = utils.storage_dir("local_videos", create=True)
+    默认仍使用 MoviePy 逐段合成；`ffmpeg` 会把裁剪、缩放、转场、字幕和混音
+    放进同一张 filtergraph，只编码一次。未知取值回退到 MoviePy，避免配置
+    拼写错误让任务在合成阶段才失败。
+    """
+    configured_engine = str(
+        config.app.get("video_render_engine", _RENDER_ENGINE_MOVIEPY)
+        or _RENDER_ENGINE_MOVIEPY
+    ).strip().lower()
+    if configured_engine not in _SUPPORTED_RENDER_ENGINES:
+        logger.warning(
+            f"unsupported video render engine configured: {configured_engine}, "
+            f"fallback to {_RENDER_ENGINE_MOVIEPY}"
+        )
+        return _RENDER_ENGINE_MOVIEPY
+    return configured_engine
 
-    for material in materials:
-        if not material.url:
+
+@dataclass(frozen=True)
+class _RenderSegment:
+    """FFmpeg 单次编码时间线上的一个片段，时间单位均为秒。"""
+
+    file_path: str
+    start_time: float
+    source_duration: float
+    duration: float
+    width: int
+    height: int
+    transition: str | None
+    side: str
+
+
+def _plan_render_segments(
+    subclipped_items: List[SubClippedVideoClip],
+    required_video_duration: float,
+    max_clip_duration: float,
+    clip_speed: float,
+    transition_value,
+) -> List[_RenderSegment]:
+    """
+    按 combine_videos 的规则挑选片段，直到时间线覆盖所需时长。
+
+    片段时长按播放速度折算并受 `max_clip_duration` 约束；素材不足时循环
+    复用已选片段，循环片段沿用首次选中的转场，与 MoviePy 路径复用临时
+    片段文件的效果一致。
+    """
+    segments = []
+    video_duration = 0
+    for item in subclipped_items:
+        if video_duration >= required_video_duration:
+            break
+        source_duration = item.end_time - item.start_time
+        duration = min(source_duration / clip_speed, max_clip_duration)
+        if duration <= 0:
             continue
+        transition, side = _choose_clip_transition(
+            transition_value, seed=_clip_transition_seed(item)
+        )
+        segments.append(
+            _RenderSegment(
+                file_path=item.file_path,
+                start_time=item.start_time,
+                source_duration=source_duration,
+                duration=duration,
+                width=item.width,
+                height=item.height,
+                transition=transition,
+                side=side,
+            )
+        )
+        video_duration += duration
+
+    if segments and video_duration < required_video_duration:
+        logger.warning(
+            f"video duration ({video_duration:.2f}s) is shorter than required duration "
+            f"({required_video_duration:.2f}s), looping clips to match audio length."
+        )
+        base_segments = list(segments)
+        for segment in itertools.cycle(base_segments):
+            if video_duration >= required_video_duration:
+                break
+            segments.append(segment)
+            video_duration += segment.duration
+    return segments
+
+
+def _ffmpeg_fit_filter(
+    clip_w: int, clip_h: int, video_width: int, video_height: int
+) -> str:
+    """返回把素材适配到目标画幅的 scale/pad 滤镜，几何与 MoviePy 路径一致。"""
+    geometry = _fit_geometry(clip_w, clip_h, video_width, video_height)
+    if geometry is None:
+        return ""
+    new_width, new_height, x, y = geometry
+    if (new_width, new_height) == (video_width, video_height):
+        return f"scale={video_width}:{video_height}"
+    return (
+        f"scale={new_width}:{new_height},"
+        f"pad={video_width}:{video_height}:{x}:{y}:black"
+    )
+
+
+def _ffmpeg_segment_filter(
+    segment: _RenderSegment,
+    clip_speed: float,
+    video_width: int,
+    video_height: int,
+    fps: int,
+) -> str:
+    """
+    生成单个片段的变速、统一帧率、画幅适配、截断和转场滤镜链。
+
+    `fps` 取渲染档位的帧率：draft 档位以较低帧率输出，转场的逐帧位移也要
+    按同一帧率计算，否则滑动距离与片段实际帧数对不上。
+    """
+    duration = f"{segment.duration:.6f}"
+    filters = [
+        f"setpts=(PTS-STARTPTS)/{clip_speed:.6f}",
+        f"fps={fps}",
+        _ffmpeg_fit_filter(
+            segment.width, segment.height, video_width, video_height
+        ),
+        "setsar=1",
+        "format=yuv420p",
+        f"trim=duration={duration}",
+        "setpts=PTS-STARTPTS",
+        video_effects.ffmpeg_transition_filter(
+            segment.transition,
+            duration=segment.duration,
+            t=1,
+            side=segment.side,
+            width=video_width,
+            height=video_height,
+            fps=fps,
+        ),
+    ]
+    return ",".join(item for item in filters if item)
+
+
+def _subtitle_clip_to_rgba(clip) -> np.ndarray:
+    """把字幕 clip 的首帧和遮罩合成为 RGBA 图像数组。"""
+    rgb = np.asarray(clip.get_frame(0))[:, :, :3]
+    rgb = np.clip(rgb, 0, 255).astype(np.uint8)
+    if clip.mask is not None:
+        alpha = np.asarray(clip.mask.get_frame(0), dtype=float)
+        alpha = np.clip(np.round(alpha * 255), 0, 255).astype(np.uint8)
+    else:
+        alpha = np.full(rgb.shape[:2], 255, dtype=np.uint8)
+    return np.dstack([rgb, alpha])
+
+
+class _SubtitleTimeline:
+    """
+    按开始时间排序的字幕卡区间索引，用 NumPy 把当前时刻的字幕叠到视频帧上。
+
+    `CompositeVideoClip` 每帧都会遍历全部字幕 clip 判断是否在播放，并对命中
+    的字幕整帧做一次 Pillow alpha 合成；长视频几百条字幕时，逐帧开销随字幕
+    数量线性增长。这里预先把字幕渲染成裁掉透明边的 RGBA 数组，逐帧用二分
+    查找定位候选字幕，再只在字幕所在区域做 alpha 混合。
+    """
+
+    def __init__(self, cards: List[tuple[np.ndarray, int, int, float, float]]):
+        cards = sorted(cards, key=lambda card: card[3])
+        self._cards = cards
+        self._starts = [card[3] for card in cards]
+        # 前缀最大结束时间：从二分位置向前回溯时，一旦前面所有字幕都已结束
+        # 就可以停止。常见的字幕互不重叠，每帧只会检查一到两条。
+        self._max_ends = list(itertools.accumulate((card[4] for card in cards), max))
+
+    def __len__(self) -> int:
+        return len(self._cards)
+
+    def active_cards(self, t: float) -> List[tuple[np.ndarray, int, int, float, float]]:
+        """返回时刻 t 正在显示的字幕卡，保持开始时间顺序，后开始的叠在上层。"""
+        active = []
+        index = bisect.bisect_right(self._starts, t) - 1
+        while index >= 0 and self._max_ends[index] > t:
+            card = self._cards[index]
+            if card[4] > t:
+                active.append(card)
+            index -= 1
+        active.reverse()
+        return active
+
+    def blit(self, frame: np.ndarray, t: float) -> np.ndarray:
+        """把时刻 t 的字幕叠加到帧上，没有字幕时原样返回输入帧。"""
+        active = self.active_cards(t)
+        if not active:
+            return frame
+        # 解码器返回的帧可能是只读缓冲区，叠加前复制一份。
+        frame = np.array(frame, dtype=np.uint8, copy=True)
+        frame_height, frame_width = frame.shape[:2]
+        for rgba, x, y, _start, _end in active:
+            card_height, card_width = rgba.shape[:2]
+            left, top = max(0, x), max(0, y)
+            right = min(frame_width, x + card_width)
+            bottom = min(frame_height, y + card_height)
+            if right <= left or bottom <= top:
+                continue
+            card = rgba[top - y : bottom - y, left - x : right - x]
+            alpha = card[:, :, 3:4].astype(np.uint16)
+            region = frame[top:bottom, left:right, :3].astype(np.uint16)
+            # 与 Pillow alpha_composite 在不透明背景上的整数混合结果一致。
+            blended = (
+                card[:, :, :3].astype(np.uint16) * alpha
+                + region * (255 - alpha)
+                + 127
+            ) // 255
+            frame[top:bottom, left:right, :3] = blended.astype(np.uint8)
+        return frame
+
+
+def _crop_transparent_border(
+    rgba: np.ndarray, x: int, y: int
+) -> tuple[np.ndarray, int, int]:
+    """裁掉字幕卡四周全透明的区域，缩小逐帧混合的像素范围。"""
+    visible_rows = np.flatnonzero(rgba[:, :, 3].any(axis=1))
+    visible_cols = np.flatnonzero(rgba[:, :, 3].any(axis=0))
+    if not len(visible_rows):
+        return rgba[:0, :0], x, y
+    top, bottom = visible_rows[0], visible_rows[-1] + 1
+    left, right = visible_cols[0], visible_cols[-1] + 1
+    return (
+        np.ascontiguousarray(rgba[top:bottom, left:right]),
+        x + int(left),
+        y + int(top),
+    )
 
+
+def _build_subtitle_timeline(
+    subtitles: list,
+    params: VideoParams,
+    font_path: str,
+    video_width: int,
+    video_height: int,
+) -> _SubtitleTimeline:
+    """复用 `_create_subtitle_clip` 的样式和定位，把每条字幕只渲染一次。"""
+    cards = []
+    for item in subtitles:
+        clip = _create_subtitle_clip(
+            subtitle_item=item,
+            params=params,
+            font_path=font_path,
+            video_width=video_width,
+            video_height=video_height,
+        )
         try:
-            material_source_path = file_security.resolve_path_within_directory(
-                local_videos_dir, material.url
+            x, y = compute_position(
+                clip.size,
+                (video_width, video_height),
+                clip.pos(0),
+                clip.relative_pos,
             )
-        except ValueError as exc:
-            # local video_source 的素材路径来自 API 参数，必须限制在专用素材目录。
-            # 允许用户传文件名，也兼容历史返回的绝对路径，但不允许逃逸到系统
-            # 其他目录，避免任意文件读取或通过 MoviePy 探测本地敏感文件。
-            logger.warning(
-                f"skip unsafe local material: {material.url}, "
-                f"local_videos_dir: {local_videos_dir}, error: {str(exc)}"
+            rgba, x, y = _crop_transparent_border(
+                _subtitle_clip_to_rgba(clip), int(x), int(y)
             )
-            continue
+        finally:
+            close_clip(clip)
+        if rgba.size:
+            cards.append((rgba, x, y, float(item[0][0]), float(item[0][1])))
+    return _SubtitleTimeline(cards)
 
-        ext = utils.parse_extension(material_source_path)
+
+def _render_subtitle_cards(
+    subtitle_path: str,
+    params: VideoParams,
+    font_path: str,
+    video_width: int,
+    video_height: int,
+    work_dir: str,
+) -> List[tuple[str, int, int, float, float]]:
+    """
+    把每条字幕渲染成透明 PNG 字幕卡，返回 (路径, x, y, 开始, 结束)。
+
+    字幕内容在整条时间线内是静态的，没有必要逐帧合成。这里复用
+    `_create_subtitle_clip` 的样式和定位结果只渲染一次，再交给 FFmpeg
+    overlay 按时间段叠加。
+    """
+    cards = []
+    subtitles = file_to_subtitles(subtitle_path, encoding="utf-8")
+    for index, item in enumerate(subtitles):
+        clip = _create_subtitle_clip(
+            subtitle_item=item,
+            params=params,
+            font_path=font_path,
+            video_width=video_width,
+            video_height=video_height,
+        )
         try:
-            # 图片素材直接按图片方式读取，避免先走 VideoFileClip 误判后触发不稳定的回退分支。
-            if ext in const.FILE_TYPE_IMAGES:
-                clip, material_source_path = _open_image_clip_with_fallback(
-                    material_source_path
-                )
-            else:
+            x, y = compute_position(
+                clip.size,
+                (video_width, video_height),
+                clip.pos(0),
+                clip.relative_pos,
+            )
+            card_file = os.path.join(work_dir, f"subtitle-{index + 1}.png")
+            Image.fromarray(_subtitle_clip_to_rgba(clip), "RGBA").save(card_file)
+            cards.append((card_file, int(x), int(y), item[0][0], item[0][1]))
+        finally:
+            close_clip(clip)
+    return cards
+
+
+_SUBTITLE_TRACK_FILE = "subtitle-track.ffconcat"
+_SUBTITLE_TRACK_BLANK = "subtitle-track-blank.png"
+
+
+def _build_subtitle_card_track(
+    cards: List[tuple[str, int, int, float, float]], work_dir: str
+) -> tuple[str, int, int] | None:
+    """
+    把字幕卡排成一条 concat 图片序列，返回 (清单文件, x, y)，没有字幕卡时返回 None。
+
+    每张字幕卡都作为单独的 `-i` 输入和 overlay 时，参数、文件句柄和每帧要
+    计算的 overlay 数都随字幕条数增长。这里把所有卡片贴到同一尺寸的透明
+    画布上（画布为全部卡片的外接矩形），卡片之间用空白画布填充，再由
+    concat demuxer 按每条字幕的时长播放，成片只需要一个输入和一次 overlay。
+    时间重叠的字幕以后一条的开始时间截断前一条。
+    """
+    cards = sorted(cards, key=lambda card: card[3])
+    if not cards:
+        return None
+
+    images = [Image.open(card_file) for card_file, *_ in cards]
+    try:
+        left = min(x for _, x, *_ in cards)
+        top = min(y for _, _, y, *_ in cards)
+        right = max(x + image.width for (_, x, *_), image in zip(cards, images))
+        bottom = max(y + image.height for (_, _, y, *_), image in zip(cards, images))
+        canvas_size = (right - left, bottom - top)
+
+        Image.new("RGBA", canvas_size, (0, 0, 0, 0)).save(
+            os.path.join(work_dir, _SUBTITLE_TRACK_BLANK)
+        )
+        entries = []
+        cursor = 0.0
+        for index, ((_, x, y, start, end), image) in enumerate(zip(cards, images)):
+            if index + 1 < len(cards):
+                end = min(end, cards[index + 1][3])
+            start = max(start, cursor)
+            if end <= start:
+                continue
+            if start > cursor:
+                entries.append((_SUBTITLE_TRACK_BLANK, start - cursor))
+            canvas = Image.new("RGBA", canvas_size, (0, 0, 0, 0))
+            canvas.paste(image.convert("RGBA"), (x - left, y - top))
+            track_file = f"subtitle-track-{index + 1}.png"
+            canvas.save(os.path.join(work_dir, track_file))
+            entries.append((track_file, end - start))
+            cursor = end
+    finally:
+        for image in images:
+            image.close()
+
+    # 最后一条字幕之后停在空白画布上；concat demuxer 会忽略最后一项的时长，
+    # 因此空白画布再列一次作为结尾。
+    lines = ["ffconcat version 1.0"]
+    for track_file, duration in entries:
+        lines.extend([f"file '{track_file}'", f"duration {duration:.3f}"])
+    lines.extend([f"file '{_SUBTITLE_TRACK_BLANK}'", "duration 1.000"])
+    lines.append(f"file '{_SUBTITLE_TRACK_BLANK}'")
+    track_list = os.path.join(work_dir, _SUBTITLE_TRACK_FILE)
+    with open(track_list, "w", encoding="utf-8") as fp:
+        fp.write("\n".join(lines) + "\n")
+    return track_list, left, top
+
+
+_SUBTITLE_OVERLAY_DIR = "subtitle-overlay"
+_SUBTITLE_OVERLAY_MANIFEST = "manifest.json"
+# 字幕卡的渲染方式或清单结构变化时递增，让旧清单自然失效。
+_SUBTITLE_OVERLAY_VERSION = 2
+_SUBTITLE_STYLE_FIELDS = (
+    "video_aspect",
+    "render_profile",
+    "font_name",
+    "font_size",
+    "text_fore_color",
+    "text_background_color",
+    "rounded_subtitle_background",
+    "stroke_color",
+    "stroke_width",
+    "subtitle_position",
+    "custom_position",
+)
+
+
+def get_subtitle_backend() -> str:
+    """
+    读取字幕渲染方式配置。
+
+    默认 `moviepy` 在每个视频里逐帧合成 TextClip；`overlay` 每个任务只把
+    字幕渲染成一组透明字幕卡，所有视频都用 FFmpeg overlay 叠加；`ass` 把
+    字幕转换为 ASS 文件，由 FFmpeg 内置的 libass 在编码时绘制。未知取值
+    回退到 MoviePy。
+    """
+    configured_backend = str(
+        config.app.get("subtitle_backend", _SUBTITLE_BACKEND_MOVIEPY)
+        or _SUBTITLE_BACKEND_MOVIEPY
+    ).strip().lower()
+    if configured_backend not in _SUPPORTED_SUBTITLE_BACKENDS:
+        logger.warning(
+            f"unsupported subtitle backend configured: {configured_backend}, "
+            f"fallback to {_SUBTITLE_BACKEND_MOVIEPY}"
+        )
+        return _SUBTITLE_BACKEND_MOVIEPY
+    return configured_backend
+
+
+def _subtitle_overlay_key(subtitle_path: str, params: VideoParams, font_path: str) -> str:
+    """根据字幕内容和所有影响字幕卡画面的样式参数生成清单键。"""
+    with open(subtitle_path, "rb") as fp:
+        subtitle_hash = hashlib.sha256(fp.read()).hexdigest()
+    style = {
+        field: getattr(getattr(params, field, None), "value", getattr(params, field, None))
+        for field in _SUBTITLE_STYLE_FIELDS
+    }
+    # `_create_subtitle_clip` 会把字号和描边宽度就地取整，这里按取整后的
+    # 实际值计算，避免渲染前后同一份参数得到不同的键。
+    style["font_size"] = int(params.font_size)
+    style["stroke_width"] = int(params.stroke_width)
+    payload = json.dumps(
+        {
+            "version": _SUBTITLE_OVERLAY_VERSION,
+            "subtitle": subtitle_hash,
+            "font_path": font_path,
+            "style": style,
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def prepare_subtitle_overlay(
+    subtitle_path: str,
+    params: VideoParams,
+    output_dir: str,
+    backend: str = _SUBTITLE_BACKEND_OVERLAY,
+) -> str:
+    """
+    为整个任务预先生成字幕层，返回字幕卡清单或 ASS 文件路径。
+
+    同一任务的多个视频共用字幕、字体和位置，只需生成一次。`overlay` 把
+    每条字幕渲染成透明 PNG 字幕卡并排成一条图片序列，清单记录字幕内容和
+    样式的哈希，重新生成时内容未变则直接复用已有字幕卡；`ass` 生成供 libass 绘制的 ASS
+    文件。没有字幕或未启用字幕时返回空串。
+    """
+    if not params.subtitle_enabled or not subtitle_path or not os.path.exists(
+        subtitle_path
+    ):
+        return ""
+
+    video_width, video_height = get_render_resolution(
+        params.video_aspect, params.render_profile
+    )
+    params = _scale_subtitle_params(params, get_render_settings(params.render_profile))
+    font_path = _get_subtitle_font_path(params)
+    if backend == _SUBTITLE_BACKEND_ASS:
+        return _prepare_ass_subtitle(
+            subtitle_path, params, output_dir, font_path, video_width, video_height
+        )
+    overlay_key = _subtitle_overlay_key(subtitle_path, params, font_path)
+    overlay_dir = os.path.join(output_dir, _SUBTITLE_OVERLAY_DIR)
+    manifest_file = os.path.join(overlay_dir, _SUBTITLE_OVERLAY_MANIFEST)
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as fp:
+            if json.load(fp).get("key") == overlay_key:
+                logger.info(f"reusing subtitle overlay: {manifest_file}")
+                return manifest_file
+    except (OSError, ValueError):
+        pass
+
+    # 样式变化后的旧字幕卡全部清掉，避免条数减少时残留的卡片被误用。
+    shutil.rmtree(overlay_dir, ignore_errors=True)
+    os.makedirs(overlay_dir, exist_ok=True)
+    cards = _render_subtitle_cards(
+        subtitle_path=subtitle_path,
+        params=params,
+        font_path=font_path,
+        video_width=video_width,
+        video_height=video_height,
+        work_dir=overlay_dir,
+    )
+    track = _build_subtitle_card_track(cards, overlay_dir)
+    manifest = {
+        "key": overlay_key,
+        "width": video_width,
+        "height": video_height,
+        "track": (
+            {"file": os.path.basename(track[0]), "x": track[1], "y": track[2]}
+            if track
+            else None
+        ),
+        "cards": [
+            {
+                "file": os.path.basename(card_file),
+                "x": x,
+                "y": y,
+                "start": start,
+                "end": end,
+            }
+            for card_file, x, y, start, end in cards
+        ],
+    }
+    with open(manifest_file, "w", encoding="utf-8") as fp:
+        json.dump(manifest, fp, ensure_ascii=False, indent=2)
+    logger.info(f"subtitle overlay rendered: {len(cards)} cards, {manifest_file}")
+    return manifest_file
+
+
+def _prepare_ass_subtitle(
+    subtitle_path: str,
+    params: VideoParams,
+    output_dir: str,
+    font_path: str,
+    video_width: int,
+    video_height: int,
+) -> str:
+    """
+    把 SRT 转换为与 MoviePy 字幕外观一致的 ASS 文件，返回文件路径。
+
+    换行、字幕块高度、背景宽度和位置全部复用 `_layout_subtitle_text` 等
+    MoviePy 路径的计算结果。ASS 无法设置行距，因此每一行单独生成一条事件
+    并按 MoviePy 的 interline 定位；背景框用矢量绘图事件放在文字下层，
+    圆角与透明度同样沿用 MoviePy 路径的参数。
+    """
+    font = _load_font(font_path, params.font_size)
+    family, style = font.getname()
+    ascent, descent = font.getmetrics()
+    stroke_width = int(params.stroke_width)
+    metrics = ass_subtitles.read_libass_metrics(font_path)
+    if metrics is not None:
+        # libass 把 Fontsize 解释为 OS/2 win ascent + descent 的像素高度，
+        # Pillow 的字号则是 em 大小，这里换算成字形大小一致的 Fontsize。
+        units_per_em, win_ascent, win_descent = metrics
+        em_scale = params.font_size / units_per_em
+        ass_font_size = (win_ascent + win_descent) * em_scale
+        ass_ascent = win_ascent * em_scale
+    else:
+        ass_font_size = float(ascent + descent)
+        ass_ascent = float(ascent)
+    # Pillow 多行文本的行距是 "A" 的包围盒底边加描边和 interline，
+    # MoviePy 的 TextClip 按此绘制，这里用同一行距逐行定位。
+    line_pitch = font.getbbox("A", stroke_width=stroke_width)[3] + stroke_width
+
+    events = []
+    for (start, end), phrase in file_to_subtitles(subtitle_path, encoding="utf-8"):
+        layout = _layout_subtitle_text(phrase, params, font_path, video_width)
+        if layout.rounded_bg_enabled:
+            box_w = _measure_subtitle_box_width(
+                layout.wrapped_text,
+                font_path,
+                params.font_size,
+                layout.pad_x,
+                layout.max_width,
+            )
+        else:
+            box_w = int(layout.max_width)
+        box_h = layout.clip_h
+        box_x = (video_width - box_w) / 2
+        box_y = _subtitle_block_y(params, box_h, video_height)
+
+        if layout.bg_color:
+            if layout.rounded_bg_enabled:
+                alpha, radius = 140, max(8, int(params.font_size * 0.4))
+            else:
+                alpha, radius = 255, 0
+            box_color = ass_subtitles.ass_color(layout.bg_color, default="#000000")
+            box_alpha = f"&H{255 - alpha:02X}&"
+            drawing = ass_subtitles.rounded_box_drawing(box_w, box_h, radius)
+            events.append(
+                ass_subtitles.dialogue(
+                    0,
+                    start,
+                    end,
+                    "Default",
+                    f"{{\\an7\\pos({box_x:.1f},{box_y:.1f})\\bord0\\shad0"
+                    f"\\1c&H{box_color[4:]}&\\1a{box_alpha}\\p1}}{drawing}",
+                )
+            )
+
+        lines = layout.wrapped_text.split("\n")
+        pitch = line_pitch + layout.interline
+        text_h = (len(lines) - 1) * pitch + ascent + descent
+        top = box_y + (box_h - text_h) / 2
+        center_x = video_width / 2
+        for line_index, line in enumerate(lines):
+            # 对齐两边的基线：Pillow 从 ascent 处画基线，libass 的 \an8 以
+            # 自身 ascent 之上的行顶为定位点。
+            baseline = top + line_index * pitch + ascent
+            events.append(
+                ass_subtitles.dialogue(
+                    1,
+                    start,
+                    end,
+                    "Default",
+                    f"{{\\an8\\pos({center_x:.1f},{baseline - ass_ascent:.1f})}}"
+                    f"{ass_subtitles.escape_ass_text(line)}",
+                )
+            )
+
+    document = ass_subtitles.build_ass_document(
+        video_width=video_width,
+        video_height=video_height,
+        font_name=family,
+        font_size=ass_font_size,
+        bold="bold" in str(style).lower(),
+        text_color=params.text_fore_color,
+        stroke_color=params.stroke_color,
+        stroke_width=params.stroke_width,
+        events=events,
+    )
+    ass_file = os.path.join(output_dir, "subtitle.ass")
+    with open(ass_file, "w", encoding="utf-8") as fp:
+        fp.write(document)
+    logger.info(f"ass subtitle generated: {len(events)} events, {ass_file}")
+    return ass_file
+
+
+def _escape_ffmpeg_filter_value(value: str) -> str:
+    """
+    转义滤镜参数值，兼容 Windows 盘符和含引号的路径。
+
+    FFmpeg 先按滤镜图语法去掉单引号，再按滤镜参数语法解析 `:` 和 `\\`，
+    因此先做参数级转义，再整体用单引号包起来。
+    """
+    if os.name == "nt":
+        value = value.replace("\\", "/")
+    escaped = value.replace("\\", "\\\\").replace("'", "\\'").replace(":", "\\:")
+    return "'" + escaped.replace("'", "'\\''") + "'"
+
+
+def _load_subtitle_overlay(manifest_file: str) -> tuple[str, int, int] | None:
+    """读取字幕卡清单，返回与 `_build_subtitle_card_track` 相同结构的图片序列。"""
+    overlay_dir = os.path.dirname(manifest_file)
+    with open(manifest_file, "r", encoding="utf-8") as fp:
+        manifest = json.load(fp)
+    track = manifest["track"]
+    if not track:
+        return None
+    return (
+        os.path.join(overlay_dir, track["file"]),
+        int(track["x"]),
+        int(track["y"]),
+    )
+
+
+def _append_prerendered_subtitle_filters(
+    filters: List[str],
+    inputs: List[str],
+    subtitle_overlay: str,
+    video_label: str,
+    input_count: int,
+) -> tuple[str, int]:
+    """按 `prepare_subtitle_overlay` 的产物追加 libass 或字幕卡叠加滤镜。"""
+    if subtitle_overlay.endswith(".ass"):
+        filters.append(
+            f"[{video_label}]subtitles=filename="
+            f"{_escape_ffmpeg_filter_value(subtitle_overlay)}:"
+            f"fontsdir={_escape_ffmpeg_filter_value(utils.font_dir())}[vass]"
+        )
+        return "vass", input_count
+    return _append_subtitle_overlay_filters(
+        filters,
+        inputs,
+        _load_subtitle_overlay(subtitle_overlay),
+        video_label,
+        input_count,
+    )
+
+
+def _append_subtitle_overlay_filters(
+    filters: List[str],
+    inputs: List[str],
+    track: tuple[str, int, int] | None,
+    video_label: str,
+    input_count: int,
+) -> tuple[str, int]:
+    """
+    把字幕卡图片序列作为一个输入 overlay 到视频上，返回新的视频标签和输入数。
+
+    图片序列在两条字幕之间停在上一帧，overlay 默认沿用副输入的最新一帧，
+    序列结束后保持结尾的空白画布。
+    """
+    if not track:
+        return video_label, input_count
+    track_list, x, y = track
+    inputs.extend(["-f", "concat", "-safe", "0", "-i", track_list])
+    filters.append(f"[{video_label}][{input_count}:v]overlay={x}:{y}[vsub]")
+    return "vsub", input_count + 1
+
+
+def _ffmpeg_bgm_filter(
+    input_index: int,
+    params: VideoParams,
+    bgm_duration: float,
+    output_duration: float,
+    loop: bool,
+) -> str:
+    """
+    生成与 MoviePy 路径等效的 BGM 滤镜链。
+
+    MoviePy 先对原始音乐调音量和 3 秒淡出，再循环铺满，因此每一轮循环末尾
+    都会淡出；这里按同样顺序先 afade 再 aloop。提供商音乐已经完成时长适配，
+    只做音量和淡出。
+    """
+    fade_start = max(bgm_duration - 3, 0)
+    filters = [
+        "aformat=channel_layouts=stereo",
+        f"volume={params.bgm_volume}",
+        f"afade=t=out:st={fade_start:.6f}:d=3",
+    ]
+    if loop:
+        filters.append("aloop=loop=-1:size=2147483647")
+    filters.append(f"atrim=0:{output_duration:.6f}")
+    return f"[{input_index}:a]{','.join(filters)}[abgm]"
+
+
+def _resolve_ffmpeg_bgm(
+    params: VideoParams, bgm_file_override: str | None
+) -> tuple[str, float, bool]:
+    """
+    按与 `generate_video` 相同的规则解析 BGM，返回 (文件, 时长, 是否成功)。
+
+    FFmpeg 滤镜需要事先知道音乐时长来计算淡出起点；音乐无法解码时与
+    MoviePy 路径一致，输出只有旁白的视频，由任务层决定是否提示用户。
+    """
+    bgm_enabled = bgm_service.should_use_bgm(params.bgm_type, params.bgm_volume)
+    bgm_file = ""
+    if bgm_enabled:
+        bgm_file = (
+            bgm_file_override
+            if bgm_file_override is not None
+            else get_bgm_file(bgm_type=params.bgm_type, bgm_file=params.bgm_file)
+        )
+    if not bgm_file:
+        return "", 0.0, True
+    try:
+        return bgm_file, _read_audio_duration(bgm_file), True
+    except Exception:
+        logger.exception(
+            f"failed to load background music: type={params.bgm_type}, "
+            f"file={bgm_file}"
+        )
+        return "", 0.0, False
+
+
+def _append_audio_mix_filters(
+    filters: List[str],
+    params: VideoParams,
+    voice_index: int,
+    bgm_index: int | None,
+    bgm_duration: float,
+    output_duration: float,
+    loop_bgm: bool,
+    mix_duration: str = "first",
+) -> str:
+    """
+    追加旁白音量和 BGM 混音滤镜，返回最终音频标签。
+
+    MoviePy 总是按双声道读取音频；amix 却会按输入协商声道布局，单声道旁白
+    和立体声 BGM 混音时可能把 BGM 缩混成单声道。两路都先转换为立体声，
+    与 MoviePy 的混音结果保持一致。
+    """
+    filters.append(
+        f"[{voice_index}:a]aformat=channel_layouts=stereo,"
+        f"volume={params.voice_volume}[avoice]"
+    )
+    if bgm_index is None:
+        return "avoice"
+    filters.append(
+        _ffmpeg_bgm_filter(
+            bgm_index,
+            params,
+            bgm_duration=bgm_duration,
+            output_duration=output_duration,
+            loop=loop_bgm,
+        )
+    )
+    filters.append(
+        f"[avoice][abgm]amix=inputs=2:duration={mix_duration}:"
+        "dropout_transition=0:normalize=0[aout]"
+    )
+    return "aout"
+
+
+_AUDIO_MIX_BACKEND_MOVIEPY = "moviepy"
+_AUDIO_MIX_BACKEND_FFMPEG = "ffmpeg"
+_SUPPORTED_AUDIO_MIX_BACKENDS = (_AUDIO_MIX_BACKEND_MOVIEPY, _AUDIO_MIX_BACKEND_FFMPEG)
+# 混音滤镜或编码参数变化时递增，让任务目录里旧的混音结果不再被复用。
+_AUDIO_MIX_VERSION = 1
+
+
+def get_audio_mix_backend() -> str:
+    """
+    读取旁白与 BGM 的混音方式。
+
+    默认 `moviepy` 在每个视频写出时用 CompositeAudioClip 逐块重采样混音；
+    `ffmpeg` 由 `prepare_audio_mix` 生成混好的音轨，成片只需要复制音频流。
+    未知取值回退到 MoviePy。
+    """
+    configured_backend = str(
+        config.app.get("audio_mix_backend", _AUDIO_MIX_BACKEND_MOVIEPY)
+        or _AUDIO_MIX_BACKEND_MOVIEPY
+    ).strip().lower()
+    if configured_backend not in _SUPPORTED_AUDIO_MIX_BACKENDS:
+        logger.warning(
+            f"unsupported audio mix backend configured: {configured_backend}, "
+            f"fallback to {_AUDIO_MIX_BACKEND_MOVIEPY}"
+        )
+        return _AUDIO_MIX_BACKEND_MOVIEPY
+    return configured_backend
+
+
+def prepare_audio_mix(
+    audio_path: str,
+    params: VideoParams,
+    output_dir: str,
+    bgm_file_override: str | None = None,
+) -> tuple[str, bool]:
+    """
+    用 FFmpeg 生成旁白与 BGM 混好的成片音轨，返回 (音轨文件, BGM 是否成功)。
+
+    BGM 解析规则与 `generate_video` 相同：`bgm_file_override` 为 None 时按
+    bgm_type 解析并循环铺满，传入文件时只做音量和淡出，空字符串表示禁用。
+    音轨时长等于旁白时长，与拼接视频裁到音频时长的规则一致。编码参数与
+    MoviePy 写出的临时音频相同，成片可以直接复制音频流。
+
+    结果按旁白内容、BGM 文件、音量和时长命名保存在 `output_dir`，同一任务
+    里使用同一首 BGM 的多个视频只混音一次。FFmpeg 失败时抛出异常，由调用方
+    回退到 MoviePy 混音。
+    """
+    with AudioFileClip(audio_path) as voice_clip:
+        audio_duration = voice_clip.duration
+        audio_fps = int(getattr(voice_clip, "fps", 0) or 44100)
+    bgm_file, bgm_duration, bgm_mix_succeeded = _resolve_ffmpeg_bgm(
+        params, bgm_file_override
+    )
+    loop_bgm = bgm_file_override is None
+
+    payload = json.dumps(
+        {
+            "version": _AUDIO_MIX_VERSION,
+            "voice": clip_cache.source_content_hash(audio_path),
+            "voice_volume": params.voice_volume,
+            "bgm": clip_cache.source_content_hash(bgm_file) if bgm_file else "",
+            "bgm_volume": params.bgm_volume if bgm_file else 0,
+            "loop_bgm": loop_bgm,
+            "duration": round(float(audio_duration), 6),
+            "fps": audio_fps,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    cache_key = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    mix_file = os.path.join(output_dir, f"audio-mix-{cache_key[:16]}.m4a")
+    if os.path.exists(mix_file):
+        logger.info(f"reusing mixed audio: {mix_file}")
+        return mix_file, bgm_mix_succeeded
+
+    inputs = ["-i", audio_path]
+    bgm_index = None
+    if bgm_file:
+        bgm_index = 1
+        inputs.extend(["-i", bgm_file])
+    filters = []
+    audio_label = _append_audio_mix_filters(
+        filters,
+        params,
+        voice_index=0,
+        bgm_index=bgm_index,
+        bgm_duration=bgm_duration,
+        output_duration=audio_duration,
+        loop_bgm=loop_bgm,
+    )
+
+    # 先写到同目录临时文件再改名，中途失败不会留下可被复用的半个音轨。
+    fd, temp_file = tempfile.mkstemp(
+        prefix=".audio-mix-", suffix=".m4a", dir=output_dir or None
+    )
+    os.close(fd)
+    command = [
+        utils.get_ffmpeg_binary(),
+        "-y",
+        "-hide_banner",
+        *inputs,
+        "-filter_complex",
+        ";".join(filters),
+        "-map",
+        f"[{audio_label}]",
+        "-c:a",
+        audio_codec,
+        "-b:a",
+        audio_bitrate,
+        "-ar",
+        str(audio_fps),
+        # MoviePy 总是输出双声道，保持一致避免单声道旁白的成片声道数变化。
+        "-ac",
+        "2",
+        "-t",
+        f"{audio_duration:.6f}",
+        temp_file,
+    ]
+    try:
+        result = subprocess.run(
+            command,
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        if result.returncode != 0:
+            error_message = (result.stderr or result.stdout or "").strip()
+            raise RuntimeError(error_message or "ffmpeg audio mix failed")
+        os.replace(temp_file, mix_file)
+    except Exception:
+        delete_files(temp_file)
+        raise
+    logger.info(f"audio mixed with ffmpeg: {mix_file}")
+    return mix_file, bgm_mix_succeeded
+
+
+def trim_audio_for_preview(audio_file: str, duration: float, output_dir: str) -> str:
+    """
+    截取旁白开头 `duration` 秒用于草稿预览，返回截取后的文件路径。
+
+    只复制音频流不重新编码，同一时长的截取结果直接复用。
+    """
+    _, ext = os.path.splitext(audio_file)
+    preview_file = os.path.join(output_dir, f"preview-audio-{duration:g}s{ext}")
+    if os.path.exists(preview_file) and os.path.getmtime(
+        preview_file
+    ) >= os.path.getmtime(audio_file):
+        return preview_file
+    command = [
+        utils.get_ffmpeg_binary(),
+        "-y",
+        "-hide_banner",
+        "-i",
+        audio_file,
+        "-map",
+        "0:a:0",
+        "-c",
+        "copy",
+        "-t",
+        f"{duration:.3f}",
+        preview_file,
+    ]
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        error_message = (result.stderr or result.stdout or "").strip()
+        raise RuntimeError(error_message or "ffmpeg audio trim failed")
+    return preview_file
+
+
+def _remux_video_with_audio(video_path: str, audio_file: str, output_file: str):
+    """
+    把混好的音轨挂到拼接视频上，视频和音频都直接复制流，不重新编码。
+
+    成片时长与 MoviePy 路径一样取拼接视频的时长；音轨由 `prepare_audio_mix`
+    按成片参数编码，复制后与重新写出的结果一致。FFmpeg 失败时抛出异常。
+    """
+    video_duration = _read_video_duration(video_path)
+    command = [
+        utils.get_ffmpeg_binary(),
+        "-y",
+        "-hide_banner",
+        "-i",
+        video_path,
+        "-i",
+        audio_file,
+        "-map",
+        "0:v:0",
+        "-map",
+        "1:a:0",
+        "-c",
+        "copy",
+        "-t",
+        f"{video_duration:.3f}",
+        "-movflags",
+        "+faststart",
+        output_file,
+    ]
+    result = subprocess.run(
+        command,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode != 0:
+        error_message = (result.stderr or result.stdout or "").strip()
+        raise RuntimeError(error_message or "ffmpeg remux failed")
+
+
+def _compose_video_with_ffmpeg(
+    video_path: str,
+    audio_path: str,
+    output_file: str,
+    params: VideoParams,
+    subtitle_overlay: str,
+    bgm_file_override: str | None = None,
+    audio_mix_file: str = "",
+    render_settings: _RenderSettings = _STANDARD_RENDER_SETTINGS,
+) -> bool:
+    """
+    在已拼接好的视频上叠加预先生成的字幕层并混音，只调用一次 FFmpeg。
+
+    输出规则与 `generate_video` 的 MoviePy 路径一致：成片时长取拼接视频
+    时长，自动解析的 BGM 循环铺满整段视频。返回值同样只描述 BGM 是否处理
+    成功，FFmpeg 失败时抛出异常。传入 `prepare_audio_mix` 生成的音轨时
+    不再混音，直接复制该音轨。
+    """
+    output_dir = os.path.dirname(output_file)
+    video_duration = _read_video_duration(video_path)
+    if audio_mix_file:
+        audio_fps = 0
+        bgm_file, bgm_duration, bgm_mix_succeeded = "", 0.0, True
+    else:
+        with AudioFileClip(audio_path) as voice_clip:
+            audio_fps = int(getattr(voice_clip, "fps", 0) or 44100)
+        bgm_file, bgm_duration, bgm_mix_succeeded = _resolve_ffmpeg_bgm(
+            params, bgm_file_override
+        )
+
+    inputs = ["-i", video_path, "-i", audio_mix_file or audio_path]
+    input_count = 2
+    bgm_index = None
+    if bgm_file:
+        bgm_index = input_count
+        inputs.extend(["-i", bgm_file])
+        input_count += 1
+
+    filters = []
+    video_label, input_count = _append_prerendered_subtitle_filters(
+        filters, inputs, subtitle_overlay, "0:v", input_count
+    )
+    filters.append(f"[{video_label}]format=yuv420p[vout]")
+    if audio_mix_file:
+        audio_map = "1:a"
+        audio_args = ["-c:a", "copy"]
+    else:
+        audio_label = _append_audio_mix_filters(
+            filters,
+            params,
+            voice_index=1,
+            bgm_index=bgm_index,
+            bgm_duration=bgm_duration,
+            output_duration=video_duration,
+            loop_bgm=bgm_file_override is None,
+            mix_duration="longest",
+        )
+        audio_map = f"[{audio_label}]"
+        audio_args = [
+            "-c:a",
+            audio_codec,
+            "-b:a",
+            audio_bitrate,
+            "-ar",
+            str(audio_fps),
+            # MoviePy 总是输出双声道，保持一致避免单声道旁白的成片声道数变化。
+            "-ac",
+            "2",
+        ]
+
+    work_dir = tempfile.mkdtemp(prefix=".ffmpeg-compose-", dir=output_dir or None)
+    try:
+        filter_script = os.path.join(work_dir, "filtergraph.txt")
+        with open(filter_script, "w", encoding="utf-8") as fp:
+            fp.write(";\n".join(filters))
+
+        def build_command(codec: str) -> list[str]:
+            return [
+                utils.get_ffmpeg_binary(),
+                "-y",
+                "-hide_banner",
+                *inputs,
+                "-filter_complex_script",
+                filter_script,
+                "-map",
+                "[vout]",
+                "-map",
+                audio_map,
+                "-c:v",
+                codec,
+                *_video_preset_args(codec, render_settings),
+                "-pix_fmt",
+                "yuv420p",
+                "-r",
+                str(render_settings.fps),
+                *audio_args,
+                "-t",
+                f"{video_duration:.3f}",
+                "-threads",
+                str(params.n_threads or 2),
+                "-movflags",
+                "+faststart",
+                output_file,
+            ]
+
+        _run_ffmpeg_with_codec_fallback(
+            build_command, failure_message="ffmpeg subtitle overlay failed"
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return bgm_mix_succeeded
+
+
+def render_video_with_ffmpeg(
+    output_file: str,
+    video_paths: List[str],
+    audio_file: str,
+    subtitle_path: str,
+    params: VideoParams,
+    video_concat_mode: VideoConcatMode = VideoConcatMode.random,
+    bgm_file_override: str | None = None,
+    subtitle_overlay: str = "",
+) -> bool:
+    """
+    用一张 FFmpeg filtergraph 完成拼接、转场、字幕和混音，只编码一次。
+
+    MoviePy 路径需要先把每个片段编码成临时文件，再串联编码一次，最后叠加
+    字幕和音频再编码一次。这里直接按 `-ss/-t` 读取所需的源区间，所有处理
+    都在滤镜图中完成，成片只经历一次编码。返回值与 `generate_video` 相同，
+    只描述 BGM 是否处理成功；渲染失败会抛出异常，由任务层回退到 MoviePy。
+    输出分辨率、帧率和编码预设由 `params.render_profile` 决定。
+    """
+    render_settings = get_render_settings(params.render_profile)
+    video_width, video_height = get_render_resolution(
+        params.video_aspect, params.render_profile
+    )
+    params = _scale_subtitle_params(params, render_settings)
+    output_dir = os.path.dirname(output_file)
+
+    with AudioFileClip(audio_file) as voice_clip:
+        audio_duration = voice_clip.duration
+        audio_fps = int(getattr(voice_clip, "fps", 0) or 44100)
+    required_video_duration = _get_required_video_duration(audio_duration)
+    clip_speed = utils.normalize_clip_speed(params.video_clip_speed)
+    max_clip_duration = params.video_clip_duration
+    transition_value = getattr(
+        params.video_transition_mode, "value", params.video_transition_mode
+    )
+
+    logger.info(f"rendering video with ffmpeg: {video_width} x {video_height}")
+    logger.info(f"  ① audio: {audio_file}, duration: {audio_duration:.2f}s")
+    logger.info(f"  ② subtitle: {subtitle_path}")
+    logger.info(f"  ③ output: {output_file}")
+
+    subclipped_items = _plan_subclipped_items(
+        video_paths=video_paths,
+        video_concat_mode=video_concat_mode,
+        source_clip_duration=max_clip_duration * clip_speed,
+    )
+    segments = _plan_render_segments(
+        subclipped_items=subclipped_items,
+        required_video_duration=required_video_duration,
+        max_clip_duration=max_clip_duration,
+        clip_speed=clip_speed,
+        transition_value=transition_value,
+    )
+    if not segments:
+        raise ValueError("no video clips available for ffmpeg rendering")
+    logger.info(f"ffmpeg timeline: {len(segments)} clips")
+
+    audio_mix_file = ""
+    if get_audio_mix_backend() == _AUDIO_MIX_BACKEND_FFMPEG:
+        try:
+            audio_mix_file, bgm_mix_succeeded = prepare_audio_mix(
+                audio_path=audio_file,
+                params=params,
+                output_dir=output_dir,
+                bgm_file_override=bgm_file_override,
+            )
+        except Exception:
+            logger.exception(
+                f"failed to mix audio with ffmpeg, mixing in the render graph: "
+                f"{output_file}"
+            )
+    if audio_mix_file:
+        bgm_file, bgm_duration = "", 0.0
+    else:
+        bgm_file, bgm_duration, bgm_mix_succeeded = _resolve_ffmpeg_bgm(
+            params, bgm_file_override
+        )
+
+    work_dir = tempfile.mkdtemp(prefix=".ffmpeg-render-", dir=output_dir or None)
+    try:
+        inputs = []
+        filters = []
+        for index, segment in enumerate(segments):
+            inputs.extend(
+                [
+                    "-ss",
+                    f"{segment.start_time:.6f}",
+                    "-t",
+                    f"{segment.source_duration:.6f}",
+                    "-i",
+                    segment.file_path,
+                ]
+            )
+            segment_filter = _ffmpeg_segment_filter(
+                segment, clip_speed, video_width, video_height, fps=render_settings.fps
+            )
+            filters.append(f"[{index}:v]{segment_filter}[v{index}]")
+        concat_inputs = "".join(f"[v{index}]" for index in range(len(segments)))
+        filters.append(f"{concat_inputs}concat=n={len(segments)}:v=1:a=0[vcat]")
+
+        input_count = len(segments)
+        voice_index = input_count
+        inputs.extend(["-i", audio_mix_file or audio_file])
+        input_count += 1
+        bgm_index = None
+        if bgm_file:
+            bgm_index = input_count
+            inputs.extend(["-i", bgm_file])
+            input_count += 1
+
+        video_label = "vcat"
+        if subtitle_overlay:
+            # 任务层已经为所有视频生成好同一份字幕层，这里直接复用。
+            video_label, input_count = _append_prerendered_subtitle_filters(
+                filters, inputs, subtitle_overlay, video_label, input_count
+            )
+        elif params.subtitle_enabled and subtitle_path and os.path.exists(subtitle_path):
+            font_path = _get_subtitle_font_path(params)
+            logger.info(f"  ④ font: {font_path}")
+            cards = _render_subtitle_cards(
+                subtitle_path=subtitle_path,
+                params=params,
+                font_path=font_path,
+                video_width=video_width,
+                video_height=video_height,
+                work_dir=work_dir,
+            )
+            video_label, input_count = _append_subtitle_overlay_filters(
+                filters,
+                inputs,
+                _build_subtitle_card_track(cards, work_dir),
+                video_label,
+                input_count,
+            )
+        filters.append(f"[{video_label}]format=yuv420p[vout]")
+
+        if audio_mix_file:
+            audio_map = f"{voice_index}:a"
+            audio_args = ["-c:a", "copy"]
+        else:
+            audio_label = _append_audio_mix_filters(
+                filters,
+                params,
+                voice_index=voice_index,
+                bgm_index=bgm_index,
+                bgm_duration=bgm_duration,
+                output_duration=audio_duration,
+                loop_bgm=bgm_file_override is None,
+            )
+            audio_map = f"[{audio_label}]"
+            audio_args = [
+                "-c:a",
+                audio_codec,
+                "-b:a",
+                audio_bitrate,
+                "-ar",
+                str(audio_fps),
+            ]
+
+        # 上百个片段和字幕卡会让命令行超过 Windows 的长度上限，滤镜图写入
+        # 文件后再交给 FFmpeg 读取。
+        filter_script = os.path.join(work_dir, "filtergraph.txt")
+        with open(filter_script, "w", encoding="utf-8") as fp:
+            fp.write(";\n".join(filters))
+
+        def build_command(codec: str) -> list[str]:
+            return [
+                utils.get_ffmpeg_binary(),
+                "-y",
+                "-hide_banner",
+                *inputs,
+                "-filter_complex_script",
+                filter_script,
+                "-map",
+                "[vout]",
+                "-map",
+                audio_map,
+                "-c:v",
+                codec,
+                *_video_preset_args(codec, render_settings),
+                "-pix_fmt",
+                "yuv420p",
+                "-r",
+                str(render_settings.fps),
+                *audio_args,
+                "-t",
+                f"{audio_duration:.3f}",
+                "-threads",
+                str(params.n_threads or 2),
+                "-movflags",
+                "+faststart",
+                output_file,
+            ]
+
+        _run_ffmpeg_with_codec_fallback(
+            build_command, failure_message="ffmpeg render failed"
+        )
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    logger.info("ffmpeg rendering completed")
+    return bgm_mix_succeeded
+
+
+def preprocess_video(
+    materials: List[MaterialInfo],
+    clip_duration=4,
+    video_aspect: VideoAspect = VideoAspect.portrait,
+    threads: int = 1,
+    output_dir: str = "",
+):
+    # WebUI 在某些二次生成场景下可能传入空素材列表，这里直接返回空结果，避免抛出 NoneType 异常。
+    if not materials:
+        return []
+
+    # 仅返回通过预处理校验的素材，避免低分辨率图片继续进入后续的视频合成流程。
+    valid_materials = []
+    image_jobs = []
+    local_videos_dir = utils.storage_dir("local_videos", create=True)
+
+    for material in materials:
+        if not material.url:
+            continue
+
+        try:
+            material_source_path = file_security.resolve_path_within_directory(
+                local_videos_dir, material.url
+            )
+        except ValueError as exc:
+            # local video_source 的素材路径来自 API 参数，必须限制在专用素材目录。
+            # 允许用户传文件名，也兼容历史返回的绝对路径，但不允许逃逸到系统
+            # 其他目录，避免任意文件读取或通过 MoviePy 探测本地敏感文件。
+            logger.warning(
+                f"skip unsafe local material: {material.url}, "
+                f"local_videos_dir: {local_videos_dir}, error: {str(exc)}"
+            )
+            continue
+
+        ext = utils.parse_extension(material_source_path)
+        if ext not in const.FILE_TYPE_IMAGES:
+            # 普通视频素材只需要尺寸，元数据索引命中时无需打开解码器；
+            # 未命中且探测失败时继续走下方的 MoviePy 读取和图片回退逻辑。
+            metadata = media_index.get_video_metadata(material_source_path)
+            if metadata is not None:
+                if not is_material_resolution_acceptable(
+                    metadata.width, metadata.height
+                ):
+                    logger.warning(
+                        f"low resolution material: {metadata.width}x{metadata.height}, "
+                        f"minimum {_MIN_MATERIAL_DIMENSION}x{_MIN_MATERIAL_DIMENSION} "
+                        f"required (tolerance {_MIN_DIMENSION_TOLERANCE}px)"
+                    )
+                    continue
+                material.url = material_source_path
+                valid_materials.append(material)
+                continue
+
+        try:
+            # 图片素材直接按图片方式读取，避免先走 VideoFileClip 误判后触发不稳定的回退分支。
+            if ext in const.FILE_TYPE_IMAGES:
+                clip, material_source_path = _open_image_clip_with_fallback(
+                    material_source_path
+                )
+            else:
                 clip = _open_video_clip_quietly(material_source_path)
         except Exception:
             # 非标准扩展名或探测失败时再回退到图片模式，兼容历史上直接传本地图片路径的情况。
@@ -1358,35 +4121,9 @@ def preprocess_video(materials: List[MaterialInfo], clip_duration=4):
                 continue
 
             if ext in const.FILE_TYPE_IMAGES:
-                logger.info(f"processing image: {material_source_path}")
-                # 探测尺寸时已经打开过一次素材，这里先释放探测句柄，再重新创建用于导出的图片 clip。
+                # 探测尺寸后立即释放句柄，图片在全部素材校验完成后统一并发渲染。
                 close_clip(clip)
-                # Create an image clip and set its duration to 3 seconds
-                clip = (
-                    ImageClip(material_source_path)
-                    .with_duration(clip_duration)
-                    .with_position("center")
-                )
-                # Apply a zoom effect using the resize method.
-                # A lambda function is used to make the zoom effect dynamic over time.
-                # The zoom effect starts from the original size and gradually scales up to 120%.
-                # t represents the current time, and clip.duration is the total duration of the clip (3 seconds).
-                # Note: 1 represents 100% size, so 1.2 represents 120% size.
-                zoom_clip = clip.resized(
-                    lambda t: 1 + (clip_duration * 0.03) * (t / clip.duration)
-                )
-
-                # Optionally, create a composite video clip containing the zoomed clip.
-                # This is useful when you want to add other elements to the video.
-                final_clip = CompositeVideoClip([zoom_clip])
-
-                # Output the video to a file.
-                video_file = f"{material_source_path}.mp4"
-                final_clip.write_videofile(video_file, fps=30, logger=None)
-                close_clip(clip)
-                close_clip(final_clip)
-                material.url = video_file
-                logger.success(f"image processed: {video_file}")
+                image_jobs.append((material, material_source_path, width, height))
             else:
                 # 普通视频素材只需要读取尺寸做校验，校验完成后立即释放句柄即可。
                 close_clip(clip)
@@ -1399,4 +4136,242 @@ def preprocess_video(materials: List[MaterialInfo], clip_duration=4):
 
         valid_materials.append(material)
 
+    if image_jobs:
+        _render_image_materials(
+            image_jobs,
+            clip_duration,
+            video_aspect,
+            threads=threads,
+            # 图片片段不能写回 local_videos 素材目录；FFmpeg 结果进入视频缓存，
+            # 只有 MoviePy 回退的结果写入任务目录。
+            output_dir=output_dir or utils.storage_dir("temp", create=True),
+        )
     return valid_materials
+
+
+# 图片生成片段的画面实现变化时递增，让旧的渲染结果自然失效。
+_IMAGE_CLIP_VERSION = 1
+# 等待其它任务渲染同一张图片的最长时间，单张图片通常几秒内就能渲染完。
+_IMAGE_RENDER_LOCK_TIMEOUT_SECONDS = 10 * 60
+
+
+def _image_clip_cache_key(
+    image_path: str, clip_duration: float, video_width: int, video_height: int
+) -> str:
+    """
+    返回图片渲染结果的缓存键，包含内容哈希、时长和目标分辨率。
+
+    同一张图片在不同任务里反复使用时，参数相同即可复用已渲染的视频；
+    图片内容或任务画幅变化时键随之改变，不会误用旧结果。
+    """
+    payload = json.dumps(
+        {
+            "kind": "image",
+            "version": _IMAGE_CLIP_VERSION,
+            "source": clip_cache.source_content_hash(image_path),
+            "duration": round(float(clip_duration), 6),
+            "resolution": [int(video_width), int(video_height)],
+            "fps": fps,
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _render_image_clip_with_ffmpeg(
+    image_path: str,
+    output_file: str,
+    clip_duration: float,
+    video_width: int,
+    video_height: int,
+    image_width: int,
+    image_height: int,
+) -> None:
+    """
+    用 FFmpeg 把图片直接渲染成目标分辨率的 Ken Burns 片段。
+
+    先按 `_fit_geometry` 把图片缩放到画幅内，再在图片区域内从原始大小推近到
+    `1 + clip_duration * 0.03` 倍，最后补黑边，画面与 MoviePy 版本缩放后再由
+    combine_videos 补边的结果一致。不需要先按原图分辨率编码一遍大尺寸视频。
+    透明图片先预乘 alpha，透明区域与 MoviePy 合成一样变成黑色。
+    """
+    new_width, new_height, x, y = _fit_geometry(
+        image_width, image_height, video_width, video_height
+    ) or (video_width, video_height, 0, 0)
+    filters = [
+        "format=rgba",
+        "premultiply=inplace=1",
+        f"scale={new_width}:{new_height}",
+        "setsar=1",
+        "format=yuv420p",
+        video_effects.ffmpeg_ken_burns_filter(
+            clip_duration, fps, max_scale=1 + clip_duration * 0.03
+        ),
+    ]
+    if (new_width, new_height) != (video_width, video_height):
+        filters.append(f"pad={video_width}:{video_height}:{x}:{y}:black")
+
+    def build_command(codec: str) -> list[str]:
+        return [
+            utils.get_ffmpeg_binary(),
+            "-y",
+            "-hide_banner",
+            "-loop",
+            "1",
+            "-framerate",
+            str(fps),
+            "-t",
+            f"{clip_duration:.6f}",
+            "-i",
+            image_path,
+            "-vf",
+            ",".join(filters),
+            "-an",
+            "-c:v",
+            codec,
+            "-pix_fmt",
+            "yuv420p",
+            "-r",
+            str(fps),
+            # 输出到 `.part` 临时文件，扩展名无法推断容器格式。
+            "-f",
+            "mp4",
+            output_file,
+        ]
+
+    _run_ffmpeg_with_codec_fallback(
+        build_command, failure_message="ffmpeg image rendering failed"
+    )
+
+
+def _render_image_clip_with_moviepy(
+    image_path: str, clip_duration: float, video_file: str
+) -> str:
+    """FFmpeg 渲染失败时沿用原有的 MoviePy 缩放实现，输出原图分辨率的视频。"""
+    # Create an image clip and set its duration to 3 seconds
+    clip = (
+        ImageClip(image_path)
+        .with_duration(clip_duration)
+        .with_position("center")
+    )
+    # Apply a zoom effect using the resize method.
+    # A lambda function is used to make the zoom effect dynamic over time.
+    # The zoom effect starts from the original size and gradually scales up to 120%.
+    # t represents the current time, and clip.duration is the total duration of the clip (3 seconds).
+    # Note: 1 represents 100% size, so 1.2 represents 120% size.
+    zoom_clip = clip.resized(
+        lambda t: 1 + (clip_duration * 0.03) * (t / clip.duration)
+    )
+
+    # Optionally, create a composite video clip containing the zoomed clip.
+    # This is useful when you want to add other elements to the video.
+    final_clip = CompositeVideoClip([zoom_clip])
+
+    # Output the video to a file.
+    try:
+        final_clip.write_videofile(video_file, fps=30, logger=None)
+    finally:
+        close_clip(clip)
+        close_clip(final_clip)
+    return video_file
+
+
+def _render_image_material(
+    image_path: str,
+    clip_duration: float,
+    video_width: int,
+    video_height: int,
+    image_width: int,
+    image_height: int,
+    output_dir: str,
+) -> str:
+    """
+    把单张图片渲染成视频并返回路径。
+
+    FFmpeg 渲染结果与在线素材一样写入 `cache_videos`，命名为
+    `img-<哈希>.mp4`，默认配置下即可跨任务复用，并由视频缓存管理统一统计
+    和清理。渲染时持有与素材下载相同的跨进程文件锁，多个任务同时用到同一
+    张图片时只渲染一次，清理缓存也不会删掉正在写入的 `.part` 文件。
+    MoviePy 回退的结果是原图分辨率，与缓存键描述的画面不同，只写入
+    `output_dir`。
+    """
+    cache_key = _image_clip_cache_key(
+        image_path, clip_duration, video_width, video_height
+    )
+    cache_dir = utils.storage_dir("cache_videos", create=True)
+    video_file = os.path.join(cache_dir, f"img-{cache_key[:32]}.mp4")
+    if os.path.exists(video_file):
+        logger.info(f"reusing processed image: {image_path} => {video_file}")
+        return video_file
+
+    with file_lock.exclusive_file_lock(
+        f"{video_file}.lock", timeout=_IMAGE_RENDER_LOCK_TIMEOUT_SECONDS
+    ):
+        if os.path.exists(video_file):
+            logger.info(f"image processed by another task: {video_file}")
+            return video_file
+
+        logger.info(f"processing image: {image_path}")
+        # 先写到 `.part` 再改名，中途失败不会在最终路径上留下半个视频。
+        part_file = f"{video_file}.part"
+        try:
+            _render_image_clip_with_ffmpeg(
+                image_path,
+                part_file,
+                clip_duration,
+                video_width,
+                video_height,
+                image_width,
+                image_height,
+            )
+            os.replace(part_file, video_file)
+        except Exception as exc:
+            delete_files(part_file)
+            logger.warning(
+                f"failed to render image with ffmpeg, fallback to moviepy: "
+                f"{image_path}, error: {str(exc)[-500:]}"
+            )
+            video_file = _render_image_clip_with_moviepy(
+                image_path,
+                clip_duration,
+                os.path.join(output_dir, f"image-{cache_key[:16]}.moviepy.mp4"),
+            )
+    logger.success(f"image processed: {video_file}")
+    return video_file
+
+
+def _render_image_materials(
+    image_jobs: list,
+    clip_duration: float,
+    video_aspect: VideoAspect,
+    threads: int,
+    output_dir: str,
+) -> None:
+    """
+    并发渲染图片素材，并把每个素材的 url 更新为生成的视频。
+
+    每张图片都是独立的 FFmpeg 进程，线程只负责等待子进程；并发数受任务的
+    `n_threads` 和 CPU 核数共同约束，不依赖 `video_clip_parallel`。结果按
+    素材原有顺序写回，任何一张图片失败都会像以前一样抛出异常。
+    """
+    video_width, video_height = VideoAspect(video_aspect).to_resolution()
+    worker_count = max(
+        1, min(len(image_jobs), int(threads or 1), os.cpu_count() or 1)
+    )
+    with ThreadPoolExecutor(max_workers=worker_count) as executor:
+        futures = [
+            executor.submit(
+                _render_image_material,
+                image_path,
+                clip_duration,
+                video_width,
+                video_height,
+                image_width,
+                image_height,
+                output_dir,
+            )
+            for _material, image_path, image_width, image_height in image_jobs
+        ]
+        for (material, *_job), future in zip(image_jobs, futures):
+            material.url = future.result()
@@ -26,7 +26,8 @@ from moviepy.audio.io.AudioFileClip import AudioFileClip
 from openai import OpenAI
 
 from app.config import config
-from app.utils import utils
+from app.services import media_index
+from app.utils import http_client, utils
 
 _DEFAULT_EDGE_TTS_TIMEOUT_SECONDS = 30.0
 _MIMO_DEFAULT_BASE_URL = "https://api.xiaomimimo.com/v1"
@@ -180,7 +181,7 @@ def get_elevenlabs_voices(api_key: str) -> list[str]:
         url = "https://api.elevenlabs.io/v2/voices"
         params = {"is_favorite": "true", "page_size": 100}
         headers = {"xi-api-key": api_key}
-        response = requests.get(url, params=params, headers=headers, timeout=10)
+        response = http_client.get(url, params=params, headers=headers, timeout=10)
         if response.status_code != 200:
             logger.warning(
                 f"ElevenLabs voices fetch failed with status {response.status_code}: {response.text}"
@@ -941,7 +942,7 @@ def siliconflow_tts(
                 f"start siliconflow tts, model: {model}, voice: {voice}, try: {i + 1}"
             )
 
-            response = requests.post(url, json=payload, headers=headers)
+            response = http_client.post(url, json=payload, headers=headers)
 
             if response.status_code == 200:
                 # 保存音频文件
@@ -1462,7 +1463,7 @@ def get_minimax_voice_catalog(
         if tts_endpoint.endswith("/t2a_v2")
         else f"{tts_endpoint.rstrip('/')}/get_voice"
     )
-    response = requests.post(
+    response = http_client.post(
         voice_endpoint,
         json={"voice_type": voice_type},
         headers={
@@ -1586,7 +1587,7 @@ def minimax_tts(text: str, voice_id: str, voice_rate: float, voice_file: str, vo
     for attempt in range(3):
         try:
             logger.info(f"start MiniMax TTS, model: {model}, voice: {voice_id}, try: {attempt + 1}")
-            response = requests.post(url, json=payload, headers=headers, timeout=120)
+            response = http_client.post(url, json=payload, headers=headers, timeout=120)
             if response.status_code != 200:
                 logger.error(f"MiniMax TTS failed with status {response.status_code}: {response.text[:200]}")
                 continue
@@ -1659,7 +1660,7 @@ def elevenlabs_tts(
             logger.info(f"start elevenlabs tts, voice_id: {voice_id}, try: {i + 1}")
             ensure_file_path_exists(voice_file)
 
-            response = requests.post(url, json=payload, headers=headers, timeout=60)
+            response = http_client.post(url, json=payload, headers=headers, timeout=60)
             if response.status_code != 200:
                 error_status = ""
                 try:
@@ -1762,7 +1763,7 @@ def chatterbox_tts(
             logger.info(f"start chatterbox tts, voice: {voice}, try: {i + 1}")
             ensure_file_path_exists(voice_file)
 
-            response = requests.post(url, json=payload, headers=headers, timeout=120)
+            response = http_client.post(url, json=payload, headers=headers, timeout=120)
             if response.status_code != 200:
                 logger.error(
                     f"chatterbox tts failed with status {response.status_code}: {response.text[:200]}"
@@ -1878,7 +1879,7 @@ def fish_audio_tts(
             )
             ensure_file_path_exists(voice_file)
 
-            response = requests.post(url, json=payload, headers=headers, timeout=60)
+            response = http_client.post(url, json=payload, headers=headers, timeout=60)
             if response.status_code == 401:
                 logger.error(
                     "Fish Audio TTS failed: Invalid API key (401). "
@@ -2204,6 +2205,11 @@ def _get_audio_duration_from_file(audio_file: str) -> float:
         logger.error(f"audio file does not exist: {audio_file}")
         return 0.0
 
+    # 元数据索引命中时直接返回时长，同一份旁白在多次生成中不必重复解码。
+    metadata = media_index.get_media_metadata(audio_file)
+    if metadata is not None and metadata.duration > 0:
+        return metadata.duration
+
     try:
         # Use moviepy (ffmpeg) to read the duration of any supported audio format
         with AudioFileClip(audio_file) as audio:
@@ -0,0 +1,99 @@
+"""基于操作系统文件锁的跨进程互斥。"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_POLL_INTERVAL_SECONDS = 0.2
+
+
+class LockWaitCancelledError(Exception):
+    """等待文件锁期间调用方设置了取消事件。"""
+
+
+def _try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def _is_current_lock_file(fd: int, lock_path: str) -> bool:
+    """
+    确认持有的句柄仍对应目录里的锁文件。
+
+    POSIX 允许删除正被加锁的文件：清理缓存删掉锁文件后，新来的进程会
+    创建另一个同名文件并锁住它，此前锁在旧文件上的进程必须重新打开，
+    否则两边都以为自己持有锁。Windows 不能删除打开中的文件，无需检查。
+    """
+    if fcntl is None:
+        return True
+    try:
+        return os.fstat(fd).st_ino == os.stat(lock_path).st_ino
+    except FileNotFoundError:
+        return False
+
+
+@contextmanager
+def exclusive_file_lock(
+    lock_path: str,
+    timeout: float,
+    cancel_event: threading.Event | None = None,
+) -> Iterator[None]:
+    """
+    持有 `lock_path` 上的排他锁，超过 `timeout` 秒仍未获得时抛出 TimeoutError。
+
+    锁由操作系统维护：持有者进程崩溃或被杀死时锁会自动释放，不需要像
+    租约文件那样判断过期，也不会因为遗留文件卡住后续任务。锁绑定在各自
+    打开的文件句柄上，同一进程内的不同线程之间同样互斥。锁文件只能在
+    持有锁时删除，见 `_is_current_lock_file`。
+
+    等待期间 `cancel_event` 被设置时立即放弃并抛出 `LockWaitCancelledError`，
+    被取消的调用方不必在长超时内一直占着线程。
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            while not _try_lock(fd):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise LockWaitCancelledError(
+                        f"cancelled waiting for file lock: {lock_path}"
+                    )
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"timed out waiting for file lock: {lock_path}")
+                if cancel_event is not None:
+                    cancel_event.wait(_POLL_INTERVAL_SECONDS)
+                else:
+                    time.sleep(_POLL_INTERVAL_SECONDS)
+            if not _is_current_lock_file(fd, lock_path):
+                _unlock(fd)
+                continue
+            try:
+                yield
+            finally:
+                _unlock(fd)
+            return
+        finally:
+            os.close(fd)
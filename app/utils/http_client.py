@@ -0,0 +1,174 @@
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+from typing import Callable
+from urllib.parse import urlsplit
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import config
+
+# 只对幂等请求自动重试的服务端状态码。429 由各素材源自己的限流逻辑处理，
+# 这里不重试，避免在限流窗口内继续消耗配额。
+_RETRY_STATUS_CODES = (500, 502, 503, 504)
+_RETRY_BACKOFF_FACTOR = 0.5
+
+_session_lock = threading.Lock()
+_session: requests.Session | None = None
+_no_retry_session: requests.Session | None = None
+_timing_hooks: list[Callable[..., None]] = []
+
+
+def get_tls_verify() -> bool:
+    # 默认开启 TLS 证书校验，防止素材搜索和下载过程被中间人篡改。
+    # 仅在企业代理、自签证书等明确需要的场景下，允许用户通过
+    # `config.toml` 显式设置 `tls_verify = false` 临时关闭。
+    tls_verify = config.app.get("tls_verify", True)
+    if isinstance(tls_verify, str):
+        tls_verify = tls_verify.strip().lower() not in ("0", "false", "no", "off")
+
+    if not tls_verify:
+        logger.warning(
+            "TLS certificate verification is disabled by config.app.tls_verify=false. "
+            "Only use this in trusted proxy environments."
+        )
+
+    return bool(tls_verify)
+
+
+def _config_int(key: str, default: int, minimum: int) -> int:
+    try:
+        return max(minimum, int(config.app.get(key, default)))
+    except (TypeError, ValueError):
+        logger.warning(f"invalid {key}: {config.app.get(key)!r}, use {default}")
+        return default
+
+
+def _create_session(retry: bool = True) -> requests.Session:
+    """
+    创建进程共享的 Session。
+
+    urllib3 按 scheme+host+port 维护独立的连接池，同一供应商的后续请求复用
+    已建立的 TCP/TLS 连接。自动重试只覆盖连接失败和幂等方法的 5xx：POST
+    可能已经在远端生效（例如按次计费的生成任务），重试必须由调用方决定。
+    所有集成共用一个 Session，因此拒绝保存 Cookie，避免不同供应商之间
+    互相携带会话状态。代理和 TLS 校验仍由调用方逐个请求传入，保持各集成
+    原有的行为。
+
+    `retry=False` 时适配器不做任何重试，供自带重试循环的集成使用，避免
+    两层重试叠加成倍放大请求次数和等待时间。
+    """
+    retries = (
+        Retry(
+            total=_config_int("http_max_retries", 2, 0),
+            backoff_factor=_RETRY_BACKOFF_FACTOR,
+            status_forcelist=_RETRY_STATUS_CODES,
+            respect_retry_after_header=False,
+            raise_on_status=False,
+        )
+        if retry
+        else 0
+    )
+    pool_size = _config_int("http_pool_maxsize", 10, 1)
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+
+def get_session(retry: bool = True) -> requests.Session:
+    """
+    返回进程共享的 Session，首次调用时按当前配置创建。
+
+    `retry=False` 返回另一个不带自动重试的共享 Session，见 `_create_session`。
+    """
+    global _session, _no_retry_session
+    with _session_lock:
+        if not retry:
+            if _no_retry_session is None:
+                _no_retry_session = _create_session(retry=False)
+            return _no_retry_session
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+def add_timing_hook(hook: Callable[..., None]):
+    """
+    注册请求耗时回调。
+
+    回调参数为 `(method, host, status_code, elapsed, error)`：`elapsed` 是从
+    发出请求到收到响应头的秒数，流式下载不包含读取响应体的时间；请求
+    异常时 `status_code` 为 None、`error` 为异常对象。回调异常只记录日志。
+    """
+    _timing_hooks.append(hook)
+
+
+def remove_timing_hook(hook: Callable[..., None]):
+    if hook in _timing_hooks:
+        _timing_hooks.remove(hook)
+
+
+def _notify_timing_hooks(method, host, status_code, elapsed, error):
+    logger.debug(
+        f"http {method} {host}: status={status_code}, elapsed={elapsed:.3f}s"
+        + (f", error={type(error).__name__}" if error is not None else "")
+    )
+    for hook in list(_timing_hooks):
+        try:
+            hook(method, host, status_code, elapsed, error)
+        except Exception as exc:
+            logger.warning(f"http timing hook failed: {type(exc).__name__}: {exc}")
+
+
+def request(
+    method: str,
+    url: str,
+    *,
+    retry: bool = True,
+    session: requests.Session | None = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    用共享 Session 发送请求，其余参数与 `requests.request` 相同。
+
+    自带重试循环的调用方传入 `retry=False`；持有自己 Session 的集成通过
+    `session` 传入，同样经过耗时回调。日志和回调只记录主机名，URL 中的
+    查询参数可能带有 API Key 或签名。
+    """
+    method = method.upper()
+    host = urlsplit(url).hostname or ""
+    started = time.perf_counter()
+    response = None
+    error = None
+    try:
+        response = (session or get_session(retry=retry)).request(
+            method, url, **kwargs
+        )
+        return response
+    except Exception as exc:
+        error = exc
+        raise
+    finally:
+        _notify_timing_hooks(
+            method,
+            host,
+            getattr(response, "status_code", None),
+            time.perf_counter() - started,
+            error,
+        )
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
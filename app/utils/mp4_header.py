@@ -0,0 +1,198 @@
+"""
+只读取 MP4/MOV（ISO-BMFF）头部盒子的轻量解析器。
+
+下载校验和上传检查只需要确认时长、帧率等基础参数，为此启动一次 FFmpeg
+进程的开销远大于读取几十 KB 的 moov 盒子。这里按盒子结构逐层跳读：
+顶层只读取 8/16 字节的盒子头，遇到 mdat 等大盒子直接 seek 跳过，只有
+moov 会整体读入内存。解析失败时返回 None，调用方应回退到 FFmpeg 探测。
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import struct
+from dataclasses import dataclass
+from typing import Iterator
+
+# moov 里只有样本表，常见素材在几 KB 到几 MB 之间；超过上限的文件多半不是
+# 正常视频，交给 FFmpeg 处理，避免把异常文件整个读进内存。
+_MAX_MOOV_BYTES = 64 * 1024 * 1024
+_BOX_HEADER = struct.Struct(">I4s")
+
+
+@dataclass(frozen=True)
+class Mp4Header:
+    """头部解析结果，时间单位为秒，宽高按显示方向给出。"""
+
+    duration: float
+    width: int
+    height: int
+    fps: float
+    codec: str
+
+
+def _iter_boxes(data: memoryview) -> Iterator[tuple[bytes, memoryview]]:
+    """遍历一段字节里并列的子盒子，返回盒子类型和载荷。"""
+    offset = 0
+    end = len(data)
+    while offset + 8 <= end:
+        size, box_type = _BOX_HEADER.unpack_from(data, offset)
+        header_size = 8
+        if size == 1:
+            if offset + 16 > end:
+                raise ValueError("truncated box header")
+            size = struct.unpack_from(">Q", data, offset + 8)[0]
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+        if size < header_size or offset + size > end:
+            raise ValueError(f"invalid box size: {box_type!r}")
+        yield box_type, data[offset + header_size : offset + size]
+        offset += size
+
+
+def _find_box(data: memoryview, *path: bytes) -> memoryview | None:
+    """按路径查找第一个匹配的嵌套盒子。"""
+    for box_type, payload in _iter_boxes(data):
+        if box_type == path[0]:
+            if len(path) == 1:
+                return payload
+            return _find_box(payload, *path[1:])
+    return None
+
+
+def _read_moov(file_path: str) -> memoryview | None:
+    """
+    顶层逐个盒子跳读并返回 moov 载荷。
+
+    同时核对每个顶层盒子都完整落在文件内：下载中断的文件即使 moov 位于开头，
+    mdat 也会声明超出文件末尾的长度，这类文件必须判为无效而不是只看头部。
+    """
+    file_size = os.path.getsize(file_path)
+    moov = None
+    with open(file_path, "rb") as fp:
+        offset = 0
+        while offset < file_size:
+            fp.seek(offset)
+            header = fp.read(16)
+            if len(header) < 8:
+                return None
+            size, box_type = _BOX_HEADER.unpack_from(header)
+            header_size = 8
+            if size == 1:
+                if len(header) < 16:
+                    return None
+                size = struct.unpack_from(">Q", header, 8)[0]
+                header_size = 16
+            elif size == 0:
+                size = file_size - offset
+            if size < header_size or offset + size > file_size:
+                return None
+            if box_type == b"moov":
+                if moov is not None or size > _MAX_MOOV_BYTES:
+                    return None
+                fp.seek(offset + header_size)
+                payload = fp.read(size - header_size)
+                if len(payload) != size - header_size:
+                    return None
+                moov = memoryview(payload)
+            offset += size
+    return moov
+
+
+def _parse_full_box_times(payload: memoryview) -> tuple[int, int]:
+    """解析 mvhd/mdhd 共用的版本化时间字段，返回 (timescale, duration)。"""
+    version = payload[0]
+    if version == 1:
+        timescale, duration = struct.unpack_from(">IQ", payload, 20)
+    else:
+        timescale, duration = struct.unpack_from(">II", payload, 12)
+    return timescale, duration
+
+
+def _parse_tkhd(payload: memoryview) -> tuple[int, int, int]:
+    """返回轨道显示宽高（16.16 定点数取整）和按变换矩阵算出的旋转角度。"""
+    matrix_offset = 52 if payload[0] == 1 else 40
+    a, b = struct.unpack_from(">ii", payload, matrix_offset)
+    width, height = struct.unpack_from(">II", payload, matrix_offset + 36)
+    rotation = int(round(math.degrees(math.atan2(b, a)))) % 360
+    return width >> 16, height >> 16, rotation
+
+
+def _parse_video_track(trak: memoryview) -> tuple[int, int, float, str, int] | None:
+    """解析视频轨道，非视频轨道返回 None。"""
+    handler = _find_box(trak, b"mdia", b"hdlr")
+    if handler is None or bytes(handler[8:12]) != b"vide":
+        return None
+
+    tkhd = _find_box(trak, b"tkhd")
+    mdhd = _find_box(trak, b"mdia", b"mdhd")
+    stbl = _find_box(trak, b"mdia", b"minf", b"stbl")
+    if tkhd is None or mdhd is None or stbl is None:
+        return None
+    width, height, rotation = _parse_tkhd(tkhd)
+    timescale, _duration = _parse_full_box_times(mdhd)
+
+    stsd = _find_box(stbl, b"stsd")
+    if stsd is None or len(stsd) < 16:
+        return None
+    codec = bytes(stsd[12:16]).decode("latin-1")
+
+    stts = _find_box(stbl, b"stts")
+    if stts is None or len(stts) < 8:
+        return None
+    (entry_count,) = struct.unpack_from(">I", stts, 4)
+    if len(stts) < 8 + entry_count * 8:
+        return None
+    sample_count = 0
+    total_delta = 0
+    for index in range(entry_count):
+        count, delta = struct.unpack_from(">II", stts, 8 + index * 8)
+        sample_count += count
+        total_delta += count * delta
+    # 分片 MP4 的样本表位于 moof 中，moov 里的 stts 为空，无法算出帧率。
+    if not timescale or not total_delta:
+        return None
+    fps = sample_count * timescale / total_delta
+    return width, height, fps, codec, rotation
+
+
+def parse_mp4_header(file_path: str) -> Mp4Header | None:
+    """
+    读取 MP4/MOV 的时长、显示宽高、平均帧率和视频编码 fourcc。
+
+    只识别带视频轨道的非分片文件；其它容器、分片 MP4、结构损坏或下载不完整的
+    文件都返回 None，由调用方回退到 FFmpeg。
+    """
+    try:
+        moov = _read_moov(file_path)
+        if moov is None:
+            return None
+        mvhd = _find_box(moov, b"mvhd")
+        if mvhd is None:
+            return None
+        timescale, duration = _parse_full_box_times(mvhd)
+        if not timescale:
+            return None
+
+        for box_type, payload in _iter_boxes(moov):
+            if box_type != b"trak":
+                continue
+            track = _parse_video_track(payload)
+            if track is None:
+                continue
+            width, height, fps, codec, rotation = track
+            if rotation in (90, 270):
+                # 与 VideoFileClip 一致，按显示方向报告宽高。
+                width, height = height, width
+            return Mp4Header(
+                duration=duration / timescale,
+                width=width,
+                height=height,
+                fps=fps,
+                codec=codec,
+            )
+    except (OSError, ValueError, IndexError, struct.error):
+        return None
+    return None
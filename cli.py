@@ -151,6 +151,9 @@ Examples:
   Stop after script generation:
     uv run python cli.py --video-subject "How AI is changing everyday life" --stop-at script
 
+  Re-render a finished task with a different subtitle color, reusing its files:
+    uv run python cli.py --rerender --task-id <task-id> --text-fore-color "#FFD700"
+
 Pipeline stages:
   script     Generate or return the script.
   terms      Generate material search terms; unavailable with local materials.
@@ -275,6 +278,21 @@ Output and exit status:
             "(default: disabled)"
         ),
     )
+    video_group.add_argument(
+        "--render-profile",
+        choices=["draft", "standard", "final"],
+        default=None,
+        help=(
+            "draft renders a fast half-resolution, 15 fps preview; final uses a "
+            "slower encoder preset for better quality (default: standard)"
+        ),
+    )
+    video_group.add_argument(
+        "--preview-duration",
+        type=_non_negative_float,
+        default=None,
+        help="draft profile only: render only the first N seconds, 0 renders all",
+    )
     video_group.add_argument(
         "--n-threads",
         type=_positive_int,
@@ -354,7 +372,7 @@ Output and exit status:
     subtitle_group = parser.add_argument_group("subtitles")
     subtitle_group.add_argument(
         "--subtitle-enabled",
-        default=True,
+        default=None,
         action=argparse.BooleanOptionalAction,
         help=(
             "enable subtitles; use --no-subtitle-enabled to disable "
@@ -446,10 +464,31 @@ Output and exit status:
         default=None,
         help="custom UUID used for storage/tasks/<task-id>; generated automatically when omitted",
     )
+    execution_group.add_argument(
+        "--rerender",
+        action="store_true",
+        help=(
+            "re-render the finished task given by --task-id, reusing its combined "
+            "videos, audio and subtitles; only subtitle, BGM and voice volume "
+            "options are applied"
+        ),
+    )
     args = parser.parse_args(argv)
 
-    if not args.video_subject.strip() and not args.video_script.strip():
+    if args.rerender:
+        # 重新渲染只覆盖显式传入的样式参数，未传入的字幕开关必须保持 None，
+        # 才能沿用原任务的设置。
+        if not args.task_id:
+            parser.error("--rerender requires --task-id")
+        if args.video_subject.strip() or args.video_script.strip():
+            parser.error(
+                "--rerender reuses the task script; --video-subject and "
+                "--video-script are not allowed"
+            )
+    elif not args.video_subject.strip() and not args.video_script.strip():
         parser.error("one of --video-subject or --video-script is required")
+    elif args.subtitle_enabled is None:
+        args.subtitle_enabled = True
 
     if args.video_source == "local" and args.stop_at == "terms":
         parser.error(
@@ -457,7 +496,10 @@ Output and exit status:
             "(search terms are not generated for local sources)"
         )
 
-    stage_requires_materials = args.stop_at in {"materials", "video"}
+    stage_requires_materials = not args.rerender and args.stop_at in {
+        "materials",
+        "video",
+    }
     has_video_materials = bool((args.video_materials or "").strip())
     if args.video_source == "local" and stage_requires_materials and not has_video_materials:
         parser.error(
@@ -483,7 +525,7 @@ Output and exit status:
 
     if args.custom_position is not None and args.subtitle_position != "custom":
         parser.error("--custom-position requires --subtitle-position custom")
-    if args.stop_at == "subtitle" and not args.subtitle_enabled:
+    if args.stop_at == "subtitle" and args.subtitle_enabled is False:
         parser.error("--stop-at subtitle cannot be combined with --no-subtitle-enabled")
     if args.subtitle_background_enabled is False and (
         args.subtitle_background_color is not None
@@ -540,6 +582,8 @@ def build_video_params(args: argparse.Namespace) -> VideoParams:
         "video_clip_duration",
         "match_materials_to_script",
         "n_threads",
+        "render_profile",
+        "preview_duration",
         "voice_volume",
         "voice_rate",
         "custom_audio_file",
@@ -561,15 +605,46 @@ def build_video_params(args: argparse.Namespace) -> VideoParams:
         if value is not None:
             params_kwargs[name] = value
 
+    _apply_subtitle_background_args(args, params_kwargs)
+    return VideoParams(**params_kwargs)
+
+
+def _apply_subtitle_background_args(args: argparse.Namespace, params: dict) -> None:
     if args.subtitle_background_enabled is False:
-        params_kwargs["text_background_color"] = False
-        params_kwargs["rounded_subtitle_background"] = False
+        params["text_background_color"] = False
+        params["rounded_subtitle_background"] = False
     elif args.subtitle_background_color is not None:
-        params_kwargs["text_background_color"] = args.subtitle_background_color
+        params["text_background_color"] = args.subtitle_background_color
     elif args.subtitle_background_enabled is True:
-        params_kwargs["text_background_color"] = True
-
-    return VideoParams(**params_kwargs)
+        params["text_background_color"] = True
+
+
+_RERENDER_ARG_NAMES = [
+    "subtitle_enabled",
+    "voice_volume",
+    "bgm_type",
+    "bgm_file",
+    "bgm_volume",
+    "font_name",
+    "subtitle_position",
+    "custom_position",
+    "text_fore_color",
+    "font_size",
+    "stroke_color",
+    "stroke_width",
+    "rounded_subtitle_background",
+]
+
+
+def build_rerender_overrides(args: argparse.Namespace) -> dict:
+    """只收集命令行显式传入的样式参数，其余字段沿用原任务的 script.json。"""
+    overrides = {
+        name: getattr(args, name)
+        for name in _RERENDER_ARG_NAMES
+        if getattr(args, name) is not None
+    }
+    _apply_subtitle_background_args(args, overrides)
+    return overrides
 
 
 def _resolve_cli_file(
@@ -761,8 +836,44 @@ def prepare_cli_files(params: VideoParams, stop_at: str) -> None:
         material.url = prepared_path
 
 
+def run_rerender_cli(args: argparse.Namespace) -> int:
+    from app.services import task as tm
+
+    overrides = build_rerender_overrides(args)
+    logger.info(
+        f"start CLI re-render: task_id={args.task_id}, "
+        f"overrides={', '.join(sorted(overrides)) or '<none>'}"
+    )
+    try:
+        result = tm.rerender(
+            args.task_id,
+            overrides,
+            # 与完整任务一致，CLI 原任务可能使用了任务目录外的本地音频。
+            allow_server_file_input=True,
+        )
+    except Exception as exc:
+        logger.exception(
+            f"CLI re-render failed with an unexpected error: "
+            f"task_id={args.task_id}, error={exc}"
+        )
+        return 1
+    if not result or result.get("rerender_state") == tm.const.RERENDER_STATE_FAILED:
+        error = (
+            result.get("rerender_error", "unknown re-render error")
+            if result
+            else "empty result"
+        )
+        logger.error(f"CLI re-render failed: task_id={args.task_id}, error={error}")
+        return 1
+
+    print(json.dumps({"task_id": args.task_id, "result": result}, ensure_ascii=False))
+    return 0
+
+
 def run_cli(argv: Sequence[str] | None = None) -> int:
     args = parse_args(argv)
+    if args.rerender:
+        return run_rerender_cli(args)
     try:
         params = build_video_params(args)
         prepare_cli_files(params, stop_at=args.stop_at)
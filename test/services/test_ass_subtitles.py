@@ -0,0 +1,61 @@
+import os
+import unittest
+
+from app.services.utils import ass_subtitles
+from app.utils import utils
+
+
+class TestAssSubtitles(unittest.TestCase):
+    def test_format_ass_time_uses_centiseconds(self):
+        self.assertEqual(ass_subtitles.format_ass_time(0), "0:00:00.00")
+        self.assertEqual(ass_subtitles.format_ass_time(3725.456), "1:02:05.46")
+        self.assertEqual(ass_subtitles.format_ass_time(-1), "0:00:00.00")
+
+    def test_ass_color_converts_to_bgr_and_falls_back_to_default(self):
+        self.assertEqual(ass_subtitles.ass_color("#3366FF"), "&H00FF6633")
+        self.assertEqual(ass_subtitles.ass_color("white", alpha=128), "&H80FFFFFF")
+        self.assertEqual(
+            ass_subtitles.ass_color("not-a-color", default="#000000"), "&H00000000"
+        )
+
+    def test_escape_ass_text_keeps_braces_and_newlines_literal(self):
+        self.assertEqual(
+            ass_subtitles.escape_ass_text("a{b}\\c\r\nd"), "a\\{b\\}＼c\\Nd"
+        )
+
+    def test_rounded_box_drawing_clamps_radius(self):
+        self.assertEqual(
+            ass_subtitles.rounded_box_drawing(100, 40, 0),
+            "m 0 0 l 100 0 l 100 40 l 0 40",
+        )
+        drawing = ass_subtitles.rounded_box_drawing(100, 40, 50)
+        self.assertTrue(drawing.startswith("m 20 0 l 80 0 b 100 0"))
+
+    def test_read_libass_metrics_prefers_os2_win_metrics(self):
+        font_path = os.path.join(utils.font_dir(), "BeVietnamPro-Bold.ttf")
+        self.assertEqual(ass_subtitles.read_libass_metrics(font_path), (1000, 1261, 265))
+        self.assertIsNone(ass_subtitles.read_libass_metrics(__file__))
+
+    def test_build_ass_document_uses_video_resolution_and_disables_wrapping(self):
+        document = ass_subtitles.build_ass_document(
+            video_width=1080,
+            video_height=1920,
+            font_name="Be Vietnam Pro",
+            font_size=91.56,
+            bold=True,
+            text_color="#FFFFFF",
+            stroke_color="#000000",
+            stroke_width=1.5,
+            events=[ass_subtitles.dialogue(1, 0, 1.5, "Default", "Hello")],
+        )
+        self.assertIn("PlayResX: 1080\nPlayResY: 1920\nWrapStyle: 2", document)
+        self.assertIn(
+            "Style: Default,Be Vietnam Pro,91.56,&H00FFFFFF,&H00FFFFFF,&H00000000,"
+            "&H00000000,-1,0,0,0,100,100,0,0,1,1.5,0,5,0,0,0,1",
+            document,
+        )
+        self.assertIn("Dialogue: 1,0:00:00.00,0:00:01.50,Default,,0,0,0,,Hello", document)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -58,6 +58,18 @@ class TestVideoCacheManager(unittest.TestCase):
         self.assertEqual(older_than_30_days.file_count, 1)
         self.assertEqual(older_than_30_days.total_size, 10)
 
+    def test_rendered_image_clips_are_managed_with_downloaded_materials(self):
+        """图片素材渲染的 img- 片段与下载的素材一起统计和清理。"""
+        self._create_cache_file("a" * 32, 10, 1_000_000_000.0)
+        image_clip = self.cache_dir / f"img-{'b' * 32}.mp4"
+        image_clip.write_bytes(b"x" * 20)
+
+        self.assertEqual(cache_manager.get_video_cache_stats().total_size, 30)
+        result = cache_manager.clean_video_cache()
+
+        self.assertEqual(result.deleted_count, 2)
+        self.assertFalse(image_clip.exists())
+
     def test_cleanup_rescans_and_preserves_new_or_unknown_files(self):
         now = 2_000_000_000.0
         old_file = self._create_cache_file("a" * 32, 10, now - 40 * 86400)
@@ -94,6 +106,33 @@ class TestVideoCacheManager(unittest.TestCase):
         self.assertTrue(first.exists())
         self.assertFalse(second.exists())
 
+    def test_cleanup_removes_stale_download_files_but_skips_active_downloads(self):
+        """
+        中断下载留下的 `.part` 和遗留的锁文件应随缓存清理；持有下载锁的
+        素材仍在下载，它的临时文件和锁文件都不能删除。
+        """
+        stale_part = self.cache_dir / f"vid-{'a' * 32}.mp4.part"
+        stale_part.write_bytes(b"x" * 10)
+        stale_lock = self.cache_dir / f"vid-{'a' * 32}.mp4.lock"
+        stale_lock.touch()
+        orphan_lock = self.cache_dir / f"vid-{'b' * 32}.mp4.lock"
+        orphan_lock.touch()
+        active_part = self.cache_dir / f"vid-{'c' * 32}.mp4.part"
+        active_part.write_bytes(b"x" * 20)
+        active_lock = self.cache_dir / f"vid-{'c' * 32}.mp4.lock"
+
+        self.assertEqual(cache_manager.get_video_cache_stats().total_size, 30)
+        with cache_manager.file_lock.exclusive_file_lock(str(active_lock), timeout=1):
+            result = cache_manager.clean_video_cache()
+
+        self.assertEqual(result.deleted_size, 10)
+        self.assertEqual(result.failed_count, 0)
+        self.assertFalse(stale_part.exists())
+        self.assertFalse(stale_lock.exists())
+        self.assertFalse(orphan_lock.exists())
+        self.assertTrue(active_part.exists())
+        self.assertTrue(active_lock.exists())
+
     def test_invalid_cleanup_age_is_rejected(self):
         with self.assertRaises(ValueError):
             cache_manager.get_video_cache_stats(0)
@@ -113,6 +113,76 @@ class TestCli(unittest.TestCase):
         params = cli.build_video_params(args)
         self.assertFalse(params.subtitle_enabled)
 
+    def test_render_profile_maps_to_video_params(self):
+        args = cli.parse_args(
+            [
+                "--video-subject",
+                "test",
+                "--render-profile",
+                "draft",
+                "--preview-duration",
+                "8",
+            ]
+        )
+        params = cli.build_video_params(args)
+        self.assertEqual(params.render_profile, "draft")
+        self.assertEqual(params.preview_duration, 8)
+
+        default_params = cli.build_video_params(
+            cli.parse_args(["--video-subject", "test"])
+        )
+        self.assertEqual(default_params.render_profile, "standard")
+        self.assertEqual(default_params.preview_duration, 0)
+
+    def test_rerender_dispatches_only_explicit_style_overrides(self):
+        task_id = str(uuid4())
+        with patch(
+            "app.services.task.rerender", return_value={"videos": ["final-1.mp4"]}
+        ) as rerender, patch("builtins.print") as print_mock:
+            code = cli.run_cli(
+                [
+                    "--rerender",
+                    "--task-id",
+                    task_id,
+                    "--text-fore-color",
+                    "#FFD700",
+                    "--no-subtitle-background-enabled",
+                ]
+            )
+
+        self.assertEqual(code, 0)
+        self.assertEqual(rerender.call_args.args[0], task_id)
+        self.assertEqual(
+            rerender.call_args.args[1],
+            {
+                "text_fore_color": "#FFD700",
+                "text_background_color": False,
+                "rounded_subtitle_background": False,
+            },
+        )
+        self.assertIs(rerender.call_args.kwargs["allow_server_file_input"], True)
+        print_mock.assert_called_once()
+
+    def test_rerender_returns_error_when_rerender_fails(self):
+        failure = {"rerender_state": "failed", "rerender_error": "encode failed"}
+        with patch(
+            "app.services.task.rerender", return_value=failure
+        ), patch("builtins.print") as print_mock:
+            code = cli.run_cli(["--rerender", "--task-id", str(uuid4())])
+
+        self.assertEqual(code, 1)
+        print_mock.assert_not_called()
+
+    def test_rerender_requires_task_id_and_rejects_new_script(self):
+        for argv in (
+            ["--rerender"],
+            ["--rerender", "--task-id", str(uuid4()), "--video-script", "new"],
+        ):
+            with self.subTest(argv=argv):
+                with self.assertRaises(SystemExit) as cm:
+                    cli.parse_args(argv)
+                self.assertEqual(cm.exception.code, 2)
+
     def test_coverr_video_source_accepted(self):
         args = cli.parse_args(["--video-subject", "test", "--video-source", "coverr"])
         params = cli.build_video_params(args)
@@ -273,7 +343,16 @@ class TestCli(unittest.TestCase):
 
         try:
             materials = [MaterialInfo(provider="local", url=test_filename, duration=0)]
-            result = vd.preprocess_video(materials=materials, clip_duration=4)
+            # 元数据索引写到临时目录，测试不能在仓库的 storage 下留下数据库。
+            with (
+                tempfile.TemporaryDirectory() as index_dir,
+                patch.object(
+                    vd.media_index,
+                    "_db_path",
+                    return_value=os.path.join(index_dir, "media_index.db"),
+                ),
+            ):
+                result = vd.preprocess_video(materials=materials, clip_duration=4)
             self.assertTrue(len(result) > 0, "preprocess_video should return valid materials")
             self.assertTrue(
                 os.path.isabs(result[0].url),
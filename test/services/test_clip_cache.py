@@ -0,0 +1,124 @@
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.config import config
+from app.services import clip_cache
+
+
+class TestClipCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.cache_dir = os.path.join(self.temp_dir.name, "cache")
+        os.makedirs(self.cache_dir)
+        self.cache_dir_patch = patch(
+            "app.services.clip_cache.utils.storage_dir",
+            return_value=self.cache_dir,
+        )
+        self.cache_dir_patch.start()
+        self.original_app_config = dict(config.app)
+        config.app["video_clip_cache_max_mb"] = 1
+
+    def tearDown(self):
+        config.app.clear()
+        config.app.update(self.original_app_config)
+        self.cache_dir_patch.stop()
+        self.temp_dir.cleanup()
+
+    def _write(self, name: str, content: bytes) -> str:
+        file_path = os.path.join(self.temp_dir.name, name)
+        Path(file_path).write_bytes(content)
+        return file_path
+
+    def _key(self, source_file: str, **overrides) -> str:
+        options = {
+            "source_file": source_file,
+            "start_time": 0,
+            "end_time": 3,
+            "width": 1080,
+            "height": 1920,
+            "clip_speed": 1.0,
+            "transition": "FadeIn",
+            "transition_side": "left",
+            "max_clip_duration": 3,
+            "fps": 30,
+            "preset": "medium",
+            "scale": 1.0,
+            "effects_backend": "moviepy",
+        }
+        options.update(overrides)
+        return clip_cache.build_cache_key(**options)
+
+    def test_cache_key_is_content_addressed(self):
+        """相同内容的素材无论存放在哪里都应命中同一条缓存，画面参数变化则不命中。"""
+        first = self._write("a.mp4", b"same material")
+        copied = self._write("b.mp4", b"same material")
+        other = self._write("c.mp4", b"other material")
+
+        self.assertEqual(self._key(first), self._key(copied))
+        self.assertNotEqual(self._key(first), self._key(other))
+        self.assertNotEqual(self._key(first), self._key(first, end_time=2.5))
+        self.assertNotEqual(self._key(first), self._key(first, clip_speed=1.5))
+        self.assertNotEqual(self._key(first), self._key(first, width=1920))
+        # 渲染档位和特效后端不同的片段画面不同，不能互相复用。
+        self.assertNotEqual(self._key(first), self._key(first, fps=15))
+        self.assertNotEqual(self._key(first), self._key(first, preset="slow"))
+        self.assertNotEqual(self._key(first), self._key(first, scale=0.5))
+        self.assertNotEqual(
+            self._key(first), self._key(first, effects_backend="ffmpeg")
+        )
+        # 非滑动转场不使用方向，随机方向不能拆散缓存条目。
+        self.assertEqual(
+            self._key(first), self._key(first, transition_side="right")
+        )
+        self.assertNotEqual(
+            self._key(first, transition="SlideIn"),
+            self._key(first, transition="SlideIn", transition_side="right"),
+        )
+
+    def test_publish_then_restore_returns_independent_copy_and_duration(self):
+        """命中时返回记录的时长，任务删除临时片段不能影响缓存本身。"""
+        clip_file = self._write("temp-clip-1.mp4", b"encoded clip")
+        clip_cache.publish_clip("a" * 64, clip_file, 2.5)
+
+        target = os.path.join(self.temp_dir.name, "temp-clip-2.mp4")
+        self.assertEqual(clip_cache.restore_clip("a" * 64, target), 2.5)
+        self.assertEqual(Path(target).read_bytes(), b"encoded clip")
+
+        os.remove(target)
+        self.assertEqual(clip_cache.restore_clip("a" * 64, target), 2.5)
+        self.assertIsNone(clip_cache.restore_clip("b" * 64, target))
+        self.assertFalse(
+            [name for name in os.listdir(self.cache_dir) if name.endswith(".tmp")]
+        )
+
+    def test_evict_to_limit_removes_least_recently_used_entries(self):
+        """超过容量时先淘汰最久未使用的条目，刚命中的条目应保留。"""
+        clip_file = self._write("clip.mp4", b"x" * 100)
+        for key in ("1" * 64, "2" * 64, "3" * 64):
+            clip_cache.publish_clip(key, clip_file, 1.0)
+        now = time.time()
+        os.utime(os.path.join(self.cache_dir, "1" * 64 + ".mp4"), (now - 30, now - 30))
+        os.utime(os.path.join(self.cache_dir, "2" * 64 + ".mp4"), (now - 20, now - 20))
+        os.utime(os.path.join(self.cache_dir, "3" * 64 + ".mp4"), (now - 10, now - 10))
+        clip_cache.restore_clip("1" * 64, os.path.join(self.temp_dir.name, "hit.mp4"))
+
+        deleted = clip_cache.evict_to_limit(max_bytes=200)
+
+        self.assertEqual(deleted, 1)
+        remaining = sorted(os.listdir(self.cache_dir))
+        self.assertNotIn("2" * 64 + ".mp4", remaining)
+        self.assertNotIn("2" * 64 + ".json", remaining)
+        self.assertIn("1" * 64 + ".mp4", remaining)
+        self.assertIn("3" * 64 + ".mp4", remaining)
+
+    def test_cache_is_disabled_by_default(self):
+        config.app.pop("video_clip_cache_max_mb", None)
+        self.assertFalse(clip_cache.is_enabled())
+
+
+if __name__ == "__main__":
+    unittest.main()
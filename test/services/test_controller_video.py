@@ -187,6 +187,96 @@ class TestVideoControllerTasks(unittest.TestCase):
         self.assertIs(raised.exception, scheduling_error)
         self.assertIsNone(state.get_task("task-123"))
 
+    def test_rerender_marks_task_busy_and_queues_style_overrides(self):
+        """
+        重新渲染在排队前预检产物，并把重新渲染标记为处理中以阻止并发删除；
+        任务本身仍保持已完成状态。
+        """
+        state = sm.MemoryState()
+        state.update_task(
+            "task-123", state=const.TASK_STATE_COMPLETE, progress=100, videos=["a"]
+        )
+        body = video_controller.TaskRerenderRequest(font_size=80)
+
+        with (
+            patch.object(video_controller.sm, "state", state),
+            patch.object(video_controller.tm, "prepare_rerender") as prepare,
+            patch.object(video_controller.task_manager, "add_task") as add_task,
+        ):
+            response = video_controller.rerender_task(
+                self._request(), body, task_id="task-123"
+            )
+
+        self.assertEqual(response["data"]["task_id"], "task-123")
+        prepare.assert_called_once_with("task-123", {"font_size": 80})
+        add_task.assert_called_once_with(
+            video_controller.tm.rerender,
+            task_id="task-123",
+            overrides={"font_size": 80},
+        )
+        task = state.get_task("task-123")
+        self.assertEqual(task["state"], const.TASK_STATE_COMPLETE)
+        self.assertEqual(task["rerender_state"], const.RERENDER_STATE_PROCESSING)
+        self.assertEqual(task["videos"], ["a"])
+        self.assertTrue(video_controller.tm.is_task_busy(task))
+
+    def test_rerender_rejects_task_without_reusable_artifacts(self):
+        """缺少拼接视频等产物时同步返回 400，不改变原任务状态。"""
+        state = sm.MemoryState()
+        state.update_task("task-123", state=const.TASK_STATE_COMPLETE, progress=100)
+
+        with (
+            patch.object(video_controller.sm, "state", state),
+            patch.object(
+                video_controller.tm,
+                "prepare_rerender",
+                side_effect=ValueError("task has no combined videos to reuse"),
+            ),
+            patch.object(video_controller.task_manager, "add_task") as add_task,
+        ):
+            with self.assertRaises(HttpException) as raised:
+                video_controller.rerender_task(
+                    self._request(),
+                    video_controller.TaskRerenderRequest(),
+                    task_id="task-123",
+                )
+
+        self.assertEqual(raised.exception.status_code, 400)
+        add_task.assert_not_called()
+        self.assertEqual(
+            state.get_task("task-123")["state"], const.TASK_STATE_COMPLETE
+        )
+
+    def test_rerender_rejects_failed_task(self):
+        """失败任务即使留下拼接视频也返回 409，原任务的错误信息保持不变。"""
+        state = sm.MemoryState()
+        state.update_task(
+            "task-123",
+            state=const.TASK_STATE_FAILED,
+            progress=60,
+            error="failed to generate final video",
+        )
+
+        with (
+            patch.object(video_controller.sm, "state", state),
+            patch.object(video_controller.tm, "prepare_rerender") as prepare,
+            patch.object(video_controller.task_manager, "add_task") as add_task,
+        ):
+            with self.assertRaises(HttpException) as raised:
+                video_controller.rerender_task(
+                    self._request(),
+                    video_controller.TaskRerenderRequest(font_size=80),
+                    task_id="task-123",
+                )
+
+        self.assertEqual(raised.exception.status_code, 409)
+        prepare.assert_not_called()
+        add_task.assert_not_called()
+        task = state.get_task("task-123")
+        self.assertEqual(task["state"], const.TASK_STATE_FAILED)
+        self.assertEqual(task["error"], "failed to generate final video")
+        self.assertNotIn("rerender_state", task)
+
     def test_get_all_tasks_preserves_pagination(self):
         """任务列表响应必须包含状态层返回的总数和请求分页参数。"""
         with patch.object(
@@ -0,0 +1,118 @@
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from app.utils import file_lock
+
+
+class TestExclusiveFileLock(unittest.TestCase):
+    def test_lock_is_exclusive_between_threads_and_released_on_exit(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lock_path = os.path.join(temp_dir, "vid.mp4.lock")
+            with file_lock.exclusive_file_lock(lock_path, timeout=1):
+                errors = []
+
+                def acquire():
+                    try:
+                        with file_lock.exclusive_file_lock(lock_path, timeout=0.3):
+                            pass
+                    except TimeoutError as exc:
+                        errors.append(exc)
+
+                thread = threading.Thread(target=acquire)
+                thread.start()
+                thread.join()
+                self.assertEqual(len(errors), 1)
+
+            with file_lock.exclusive_file_lock(lock_path, timeout=0.3):
+                pass
+            self.assertTrue(os.path.exists(lock_path))
+
+    def test_waiter_gives_up_when_cancel_event_is_set(self):
+        """等待锁的调用方被取消后立即退出，不等到超时。"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lock_path = os.path.join(temp_dir, "vid.mp4.lock")
+            cancel_event = threading.Event()
+            with file_lock.exclusive_file_lock(lock_path, timeout=1):
+                cancel_event.set()
+                started = time.monotonic()
+                with self.assertRaises(file_lock.LockWaitCancelledError):
+                    with file_lock.exclusive_file_lock(
+                        lock_path, timeout=60, cancel_event=cancel_event
+                    ):
+                        pass
+                self.assertLess(time.monotonic() - started, 1)
+
+            # 锁空闲时已设置的取消事件不影响获取锁。
+            with file_lock.exclusive_file_lock(
+                lock_path, timeout=1, cancel_event=cancel_event
+            ):
+                pass
+
+    @unittest.skipIf(file_lock.fcntl is None, "Windows cannot delete an open lock file")
+    def test_waiter_reopens_lock_file_deleted_by_previous_holder(self):
+        """
+        持锁者删除锁文件后，等待在旧文件上的线程必须改锁新文件，不能与
+        新文件的持有者同时进入临界区。
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lock_path = os.path.join(temp_dir, "vid.mp4.lock")
+            acquired = threading.Event()
+
+            def wait_for_lock():
+                with file_lock.exclusive_file_lock(lock_path, timeout=5):
+                    acquired.set()
+
+            with file_lock.exclusive_file_lock(lock_path, timeout=1):
+                waiter = threading.Thread(target=wait_for_lock)
+                waiter.start()
+                time.sleep(0.3)
+                os.unlink(lock_path)
+                new_holder = file_lock.exclusive_file_lock(lock_path, timeout=1)
+                new_holder.__enter__()
+
+            self.assertFalse(acquired.wait(timeout=0.6))
+            new_holder.__exit__(None, None, None)
+            self.assertTrue(acquired.wait(timeout=5))
+            waiter.join()
+
+    def test_lock_held_by_another_process_is_released_when_it_dies(self):
+        """持有锁的进程被杀死后，操作系统自动释放锁，等待方不会一直卡住。"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            lock_path = os.path.join(temp_dir, "vid.mp4.lock")
+            holder = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-c",
+                    "import sys, time\n"
+                    "from app.utils import file_lock\n"
+                    "with file_lock.exclusive_file_lock(sys.argv[1], timeout=5):\n"
+                    "    print('locked', flush=True)\n"
+                    "    time.sleep(60)\n",
+                    lock_path,
+                ],
+                stdout=subprocess.PIPE,
+                text=True,
+                cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))),
+            )
+            try:
+                self.assertEqual(holder.stdout.readline().strip(), "locked")
+                with self.assertRaises(TimeoutError):
+                    with file_lock.exclusive_file_lock(lock_path, timeout=0.3):
+                        pass
+                holder.kill()
+                holder.wait()
+                with file_lock.exclusive_file_lock(lock_path, timeout=5):
+                    pass
+            finally:
+                holder.kill()
+                holder.wait()
+                holder.stdout.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
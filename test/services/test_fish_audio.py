@@ -154,7 +154,7 @@ class TestFishAudioTTSRequest(unittest.TestCase):
 
         with tempfile.TemporaryDirectory() as tmp_dir, \
              patch.object(vs.config, "fish_audio", {"api_key": "test-key", "model": model}), \
-             patch.object(vs.requests, "post", side_effect=_fake_post), \
+             patch.object(vs.http_client, "post", side_effect=_fake_post), \
              patch.object(vs, "AudioFileClip", return_value=_FakeClip()):
             voice_file = str(Path(tmp_dir) / "fish.mp3")
             result = vs.fish_audio_tts(
@@ -226,7 +226,7 @@ class TestFishAudioErrorHandling(unittest.TestCase):
 
         with tempfile.TemporaryDirectory() as tmp_dir, \
              patch.object(vs.config, "fish_audio", {"api_key": "test-key", "model": "s2.1-pro-free"}), \
-             patch.object(vs.requests, "post", return_value=resp), \
+             patch.object(vs.http_client, "post", return_value=resp), \
              patch.object(vs, "AudioFileClip", return_value=_FakeClip()):
             voice_file = str(Path(tmp_dir) / "fish.mp3")
             result = vs.fish_audio_tts("Test.", voice_file)
@@ -250,7 +250,7 @@ class TestFishAudioErrorHandling(unittest.TestCase):
         resp = _FakeResponse(status_code=200, content=b"tiny")
         with tempfile.TemporaryDirectory() as tmp_dir, \
              patch.object(vs.config, "fish_audio", {"api_key": "test-key", "model": "s2.1-pro-free"}), \
-             patch.object(vs.requests, "post", return_value=resp):
+             patch.object(vs.http_client, "post", return_value=resp):
             voice_file = str(Path(tmp_dir) / "fish.mp3")
             result = vs.fish_audio_tts("Test.", voice_file)
         self.assertIsNone(result)
@@ -0,0 +1,123 @@
+import http.client
+import unittest
+from unittest.mock import patch
+
+import requests
+
+from app.config import config
+from app.utils import http_client
+
+
+class TestHttpClient(unittest.TestCase):
+    def setUp(self):
+        self.original_app_config = dict(config.app)
+        self.original_session = http_client._session
+        self.original_no_retry_session = http_client._no_retry_session
+        http_client._session = None
+        http_client._no_retry_session = None
+
+    def tearDown(self):
+        config.app.clear()
+        config.app.update(self.original_app_config)
+        http_client._session = self.original_session
+        http_client._no_retry_session = self.original_no_retry_session
+
+    def test_session_is_shared_and_only_retries_idempotent_requests(self):
+        """
+        所有集成复用同一个 Session 的连接池；自动重试不能覆盖 POST，
+        否则按次计费的提交请求可能在远端重复生效。
+        """
+        config.app["http_max_retries"] = 3
+        config.app["http_pool_maxsize"] = 4
+
+        session = http_client.get_session()
+        self.assertIs(http_client.get_session(), session)
+
+        adapter = session.get_adapter("https://api.pexels.com/videos/search")
+        retries = adapter.max_retries
+        self.assertEqual(retries.total, 3)
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertTrue(retries.is_retry("GET", 503))
+        self.assertFalse(retries.is_retry("POST", 503))
+        self.assertFalse(retries.is_retry("GET", 429))
+
+    def test_no_retry_session_leaves_retries_to_the_caller(self):
+        """自带重试循环的集成使用单独的共享 Session，适配器层不再重试。"""
+        config.app["http_max_retries"] = 3
+        response = requests.Response()
+        response.status_code = 503
+
+        session = http_client.get_session(retry=False)
+        self.assertIs(http_client.get_session(retry=False), session)
+        self.assertIsNot(http_client.get_session(), session)
+        adapter = session.get_adapter("https://api.wavespeed.ai/api/v3")
+        self.assertEqual(adapter.max_retries.total, 0)
+
+        with patch.object(session, "request", return_value=response) as request:
+            result = http_client.get("https://api.wavespeed.ai/api/v3", retry=False)
+        self.assertIs(result, response)
+        request.assert_called_once_with("GET", "https://api.wavespeed.ai/api/v3")
+
+    def test_session_does_not_keep_cookies_between_providers(self):
+        """共享 Session 不能把一个供应商下发的 Cookie 带到其它请求里。"""
+        session = http_client.get_session()
+        request = requests.Request("GET", "https://api.example.com/").prepare()
+        headers = http.client.HTTPMessage()
+        headers["Set-Cookie"] = "session=secret; Path=/"
+
+        session.cookies.extract_cookies(
+            requests.cookies.MockResponse(headers),
+            requests.cookies.MockRequest(request),
+        )
+
+        self.assertEqual(len(session.cookies), 0)
+
+    def test_request_reports_timing_to_hooks_without_query_string(self):
+        """耗时回调只拿到主机名，URL 查询参数里的 API Key 不能外泄。"""
+        calls = []
+
+        def hook(*args):
+            calls.append(args)
+
+        response = requests.Response()
+        response.status_code = 200
+
+        http_client.add_timing_hook(hook)
+        try:
+            with patch.object(
+                http_client.get_session(), "request", return_value=response
+            ) as request:
+                result = http_client.get(
+                    "https://pixabay.com/api/videos/?key=secret", timeout=5
+                )
+            with patch.object(
+                http_client.get_session(),
+                "request",
+                side_effect=requests.ConnectionError("reset"),
+            ):
+                with self.assertRaises(requests.ConnectionError):
+                    http_client.post("https://api.example.com/v1?token=secret")
+        finally:
+            http_client.remove_timing_hook(hook)
+
+        self.assertIs(result, response)
+        request.assert_called_once_with(
+            "GET", "https://pixabay.com/api/videos/?key=secret", timeout=5
+        )
+        self.assertEqual(
+            [(call[0], call[1], call[2]) for call in calls],
+            [("GET", "pixabay.com", 200), ("POST", "api.example.com", None)],
+        )
+        self.assertIsNone(calls[0][4])
+        self.assertIsInstance(calls[1][4], requests.ConnectionError)
+        self.assertNotIn("secret", repr(calls))
+
+    def test_tls_verify_accepts_string_config(self):
+        config.app.pop("tls_verify", None)
+        self.assertTrue(http_client.get_tls_verify())
+        config.app["tls_verify"] = "false"
+        self.assertFalse(http_client.get_tls_verify())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ import tempfile
 import unittest
 from dataclasses import replace
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, call, patch
 
 from app.services.loomloom import (
     DEFAULT_BASE_URL,
@@ -21,6 +21,7 @@ from app.services.loomloom import (
     resolve_api_token,
     video_settings_from_mapping,
 )
+from app.utils import http_client
 
 
 class _Response:
@@ -123,6 +124,33 @@ class TestLoomLoomScriptBackend(unittest.TestCase):
             session=self.session,
         )
 
+    def test_default_session_leaves_retries_to_the_backend(self):
+        """execute 和轮询自带重试，默认共享 Session 不能在适配器层再重试。"""
+        backend = LoomLoomScriptBackend(self.settings)
+
+        self.assertIs(backend._session, http_client.get_session(retry=False))
+        adapter = backend._session.get_adapter(self.settings.base_url)
+        self.assertEqual(adapter.max_retries.total, 0)
+
+    def test_requests_report_timing_to_http_client_hooks(self):
+        """注入的 Session 同样经过共享客户端，耗时回调能看到 LoomLoom 请求。"""
+        self.session.request.return_value = _Response(200, {"runId": "run-1"})
+        calls = []
+
+        def hook(*args):
+            calls.append(args)
+
+        http_client.add_timing_hook(hook)
+        try:
+            self.backend._request("GET", "/runs/run-1")
+        finally:
+            http_client.remove_timing_hook(hook)
+
+        self.assertEqual(
+            [(item[0], item[1], item[2]) for item in calls],
+            [("GET", "example.test", 200)],
+        )
+
     def test_prepares_one_independent_input_row_per_candidate(self):
         batch = self.backend.prepare_script_batch(
             subject="人工智能改变生活",
@@ -466,7 +494,7 @@ class TestLoomLoomVideoBackend(unittest.TestCase):
 
     def test_downloads_video_artifact_without_forwarding_api_key(self):
         """签名产物地址无需 Bearer Key，避免把账户凭证泄漏给对象存储。"""
-        self.session.request.return_value = _Response(
+        results = _Response(
             200,
             {
                 "items": [
@@ -485,22 +513,26 @@ class TestLoomLoomVideoBackend(unittest.TestCase):
             },
         )
         response = _DownloadResponse()
-        self.session.get.return_value = response
+        self.session.request.side_effect = [results, response]
 
         with tempfile.TemporaryDirectory() as directory:
             paths = self.backend.download_video_results("run-1", directory)
             self.assertEqual(Path(paths[0]).read_bytes(), b"video-bytes")
 
-        self.session.get.assert_called_once_with(
-            "https://objects.test/video.mp4?signature=x",
-            stream=True,
-            timeout=(5.0, self.settings.request_timeout_seconds),
+        self.assertEqual(
+            self.session.request.call_args_list[-1],
+            call(
+                "GET",
+                "https://objects.test/video.mp4?signature=x",
+                stream=True,
+                timeout=(5.0, self.settings.request_timeout_seconds),
+            ),
         )
         self.assertTrue(response.closed)
 
     def test_closes_download_response_when_artifact_is_too_large(self):
         """大小预检拒绝下载时也必须立即释放流式 HTTP 连接。"""
-        self.session.request.return_value = _Response(
+        results = _Response(
             200,
             {
                 "items": [
@@ -521,7 +553,7 @@ class TestLoomLoomVideoBackend(unittest.TestCase):
         response = _DownloadResponse(
             headers={"content-length": str(MAX_VIDEO_ARTIFACT_BYTES + 1)}
         )
-        self.session.get.return_value = response
+        self.session.request.side_effect = [results, response]
 
         with tempfile.TemporaryDirectory() as directory:
             with self.assertRaisesRegex(LoomLoomAPIError, "download limit"):
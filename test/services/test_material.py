@@ -1,6 +1,8 @@
 import os
 import sys
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
 from types import SimpleNamespace
@@ -14,6 +16,28 @@ from app.config import config
 from app.services import material
 
 
+class _FakeDownloadResponse:
+    def __init__(self, chunks, *, status_code=200, headers=None, error=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._chunks = chunks
+        self._error = error
+        self.closed = False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} error")
+
+    def iter_content(self, chunk_size):
+        del chunk_size
+        yield from self._chunks
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        self.closed = True
+
+
 class TestMaterialTlsVerification(unittest.TestCase):
     def setUp(self):
         self.original_app_config = dict(config.app)
@@ -59,7 +83,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
             }
         )
 
-        with patch("app.services.material.requests.get", return_value=fake_response) as get:
+        with patch("app.services.material.http_client.get", return_value=fake_response) as get:
             results = material.search_videos_pexels("cat", minimum_duration=1)
 
         self.assertEqual(len(results), 1)
@@ -104,7 +128,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
             }
         )
 
-        with patch("app.services.material.requests.get", return_value=fake_response) as get:
+        with patch("app.services.material.http_client.get", return_value=fake_response) as get:
             results = material.search_videos_pixabay(
                 "cat",
                 minimum_duration=1,
@@ -217,7 +241,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get",
+            "app.services.material.http_client.get",
             return_value=pexels_response,
         ) as get:
             pexels_results = material.search_videos_pexels(
@@ -227,7 +251,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
             )
             pexels_url = get.call_args.args[0]
         with patch(
-            "app.services.material.requests.get",
+            "app.services.material.http_client.get",
             return_value=pixabay_response,
         ):
             pixabay_results = material.search_videos_pixabay(
@@ -236,7 +260,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
                 video_aspect=material.VideoAspect.portrait,
             )
         with patch(
-            "app.services.material.requests.get",
+            "app.services.material.http_client.get",
             return_value=coverr_response,
         ) as get:
             coverr_results = material.search_videos_coverr(
@@ -315,7 +339,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
 
         for aspect, expected_filter in cases:
             with self.subTest(aspect=aspect), patch(
-                "app.services.material.requests.get",
+                "app.services.material.http_client.get",
                 return_value=fake_response,
             ) as get:
                 material.search_videos_coverr(
@@ -376,7 +400,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get",
+            "app.services.material.http_client.get",
             return_value=pixabay_response,
         ):
             pixabay_results = material.search_videos_pixabay(
@@ -385,7 +409,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
                 video_aspect=material.VideoAspect.square,
             )
         with patch(
-            "app.services.material.requests.get",
+            "app.services.material.http_client.get",
             return_value=coverr_response,
         ):
             coverr_results = material.search_videos_coverr(
@@ -415,7 +439,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ), patch("app.services.material.logger.info") as log:
             material.search_videos_pixabay("cat", minimum_duration=1)
 
@@ -441,7 +465,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ), patch("app.services.material.logger.error") as log:
             results = material.search_videos_pixabay("nature", minimum_duration=1)
 
@@ -470,7 +494,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ), patch("app.services.material.logger.error") as log:
             results = material.search_videos_pixabay("nature", minimum_duration=1)
 
@@ -498,7 +522,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ), patch("app.services.material.logger.error") as log:
             results = material.search_videos_pixabay("nature", minimum_duration=1)
 
@@ -521,7 +545,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", side_effect=error
+            "app.services.material.http_client.get", side_effect=error
         ), patch("app.services.material.logger.error") as log:
             results = material.search_videos_pixabay("nature", minimum_duration=1)
 
@@ -545,7 +569,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", side_effect=error
+            "app.services.material.http_client.get", side_effect=error
         ), patch("app.services.material.logger.error") as log:
             results = material.search_videos_pixabay("nature", minimum_duration=1)
 
@@ -559,7 +583,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
         config.app.pop("tls_verify", None)
         config.proxy.clear()
 
-        fake_response = SimpleNamespace(content=b"fake-video")
+        fake_response = _FakeDownloadResponse([b"fake-video"])
 
         class FakeVideoFileClip:
             duration = 1
@@ -573,7 +597,7 @@ class TestMaterialTlsVerification(unittest.TestCase):
 
         with tempfile.TemporaryDirectory() as temp_dir:
             with patch(
-                "app.services.material.requests.get", return_value=fake_response
+                "app.services.material.http_client.get", return_value=fake_response
             ) as get, patch("app.services.material.VideoFileClip", FakeVideoFileClip):
                 video_path = material.save_video(
                     "https://example.com/video.mp4?token=abc", save_dir=temp_dir
@@ -582,6 +606,268 @@ class TestMaterialTlsVerification(unittest.TestCase):
             self.assertTrue(os.path.exists(video_path))
             self.assertTrue(get.call_args.kwargs["verify"])
 
+    def test_save_video_validates_mp4_header_without_ffmpeg(self):
+        """MP4 头部能读出有效时长和帧率时，下载校验不应再启动 FFmpeg。"""
+        fake_response = _FakeDownloadResponse([b"fake-video"])
+        header = material.mp4_header.Mp4Header(
+            duration=5.0, width=1080, height=1920, fps=30.0, codec="avc1"
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with (
+                patch("app.services.material.http_client.get", return_value=fake_response),
+                patch.object(
+                    material.mp4_header, "parse_mp4_header", return_value=header
+                ),
+                patch.object(material.media_probe, "probe_video") as probe,
+                patch("app.services.material.VideoFileClip") as video_clip,
+            ):
+                video_path = material.save_video(
+                    "https://example.com/video.mp4", save_dir=temp_dir
+                )
+
+            self.assertTrue(os.path.exists(video_path))
+        probe.assert_not_called()
+        video_clip.assert_not_called()
+
+    def test_save_video_resumes_interrupted_download_with_range(self):
+        """
+        连接中断后应带 Range 从已下载字节继续，而不是丢弃已传输的数据；
+        完整文件原子替换到最终路径，不留下 `.part` 临时文件。
+        """
+        responses = [
+            _FakeDownloadResponse(
+                [b"fake-"],
+                headers={"content-length": "10"},
+                error=requests.exceptions.ChunkedEncodingError("connection reset"),
+            ),
+            _FakeDownloadResponse(
+                [b"video"], status_code=206, headers={"content-length": "5"}
+            ),
+        ]
+        header = material.mp4_header.Mp4Header(
+            duration=5.0, width=1080, height=1920, fps=30.0, codec="avc1"
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with (
+                patch(
+                    "app.services.material.http_client.get", side_effect=responses
+                ) as get,
+                patch.object(
+                    material.mp4_header, "parse_mp4_header", return_value=header
+                ),
+                patch.object(material.time, "sleep"),
+            ):
+                video_path = material.save_video(
+                    "https://example.com/video.mp4", save_dir=temp_dir
+                )
+
+            self.assertEqual(Path(video_path).read_bytes(), b"fake-video")
+            self.assertFalse(os.path.exists(f"{video_path}.part"))
+        self.assertNotIn("Range", get.call_args_list[0].kwargs["headers"])
+        self.assertEqual(get.call_args_list[1].kwargs["headers"]["Range"], "bytes=5-")
+        self.assertTrue(all(call.kwargs["stream"] for call in get.call_args_list))
+        self.assertTrue(all(response.closed for response in responses))
+
+    def test_save_video_never_exposes_invalid_download_at_final_path(self):
+        """无法识别的下载结果在 `.part` 阶段就被删除，最终路径上不会出现。"""
+        url = "https://example.com/video.mp4"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = f"{temp_dir}/vid-{material.utils.md5(url)}.mp4"
+            checked_paths = []
+
+            def fake_parse(path):
+                checked_paths.append(path)
+                self.assertFalse(os.path.exists(video_path))
+                return None
+
+            with (
+                patch(
+                    "app.services.material.http_client.get",
+                    return_value=_FakeDownloadResponse([b"<html>"]),
+                ),
+                patch.object(material.mp4_header, "parse_mp4_header", fake_parse),
+                patch.object(material.media_probe, "probe_video", return_value=None),
+                patch(
+                    "app.services.material.VideoFileClip",
+                    side_effect=OSError("invalid data"),
+                ),
+            ):
+                result = material.save_video(url, save_dir=temp_dir)
+
+            self.assertEqual(result, "")
+            self.assertEqual(checked_paths, [f"{video_path}.part"])
+            self.assertFalse(os.path.exists(video_path))
+            self.assertFalse(os.path.exists(f"{video_path}.part"))
+
+    def test_save_video_abandons_transfer_and_removes_part_when_cancelled(self):
+        """并发下载凑够时长后，在途的多余下载应停止传输并删除临时文件。"""
+        url = "https://example.com/video.mp4"
+        cancel_event = threading.Event()
+        sent_chunks = []
+
+        def chunks():
+            for index in range(100):
+                sent_chunks.append(index)
+                if index == 1:
+                    cancel_event.set()
+                yield b"x" * 10
+
+        response = _FakeDownloadResponse(chunks())
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = f"{temp_dir}/vid-{material.utils.md5(url)}.mp4"
+            with patch(
+                "app.services.material.http_client.get", return_value=response
+            ):
+                with self.assertRaises(material._DownloadCancelledError):
+                    material.save_video(
+                        url, save_dir=temp_dir, cancel_event=cancel_event
+                    )
+
+            self.assertFalse(os.path.exists(video_path))
+            self.assertFalse(os.path.exists(f"{video_path}.part"))
+        self.assertLess(len(sent_chunks), 5)
+        self.assertTrue(response.closed)
+
+    def test_save_video_restarts_when_server_ignores_range(self):
+        """服务器不支持 Range 而返回完整内容时，应覆盖旧的临时文件重新写入。"""
+        header = material.mp4_header.Mp4Header(
+            duration=5.0, width=1080, height=1920, fps=30.0, codec="avc1"
+        )
+        url = "https://example.com/video.mp4"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            part_path = f"{temp_dir}/vid-{material.utils.md5(url)}.mp4.part"
+            Path(part_path).write_bytes(b"stale")
+            with (
+                patch(
+                    "app.services.material.http_client.get",
+                    return_value=_FakeDownloadResponse([b"fake-video"]),
+                ) as get,
+                patch.object(
+                    material.mp4_header, "parse_mp4_header", return_value=header
+                ),
+            ):
+                video_path = material.save_video(url, save_dir=temp_dir)
+
+            self.assertEqual(Path(video_path).read_bytes(), b"fake-video")
+        self.assertEqual(get.call_args.kwargs["headers"]["Range"], "bytes=5-")
+
+    def test_save_video_keeps_partial_file_when_resume_attempts_run_out(self):
+        """续传次数耗尽时抛出网络异常，只保留 `.part`，最终路径不能出现半个文件。"""
+        url = "https://example.com/video.mp4"
+
+        def interrupted_response(*_args, headers, **_kwargs):
+            return _FakeDownloadResponse(
+                [b"x"],
+                status_code=206 if "Range" in headers else 200,
+                error=requests.ConnectionError("connection reset"),
+            )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = f"{temp_dir}/vid-{material.utils.md5(url)}.mp4"
+            with (
+                patch(
+                    "app.services.material.http_client.get",
+                    side_effect=interrupted_response,
+                ) as get,
+                patch.object(material.time, "sleep"),
+            ):
+                with self.assertRaises(requests.ConnectionError):
+                    material.save_video(url, save_dir=temp_dir)
+
+            self.assertFalse(os.path.exists(video_path))
+            self.assertEqual(
+                Path(f"{video_path}.part").read_bytes(),
+                b"x" * (material._DOWNLOAD_RESUME_ATTEMPTS + 1),
+            )
+        self.assertEqual(get.call_count, material._DOWNLOAD_RESUME_ATTEMPTS + 1)
+
+    def test_save_video_reuses_file_downloaded_by_lock_holder(self):
+        """
+        另一个任务正在下载同一素材时应等待它完成并直接复用，而不是再发起
+        一次下载、与对方同时写同一个临时文件。
+        """
+        url = "https://example.com/video.mp4"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = f"{temp_dir}/vid-{material.utils.md5(url)}.mp4"
+            results = []
+            with patch("app.services.material.http_client.get") as get:
+                with material.file_lock.exclusive_file_lock(
+                    f"{video_path}.lock", timeout=1
+                ):
+                    waiter = threading.Thread(
+                        target=lambda: results.append(
+                            material.save_video(url, save_dir=temp_dir)
+                        )
+                    )
+                    waiter.start()
+                    waiter.join(timeout=0.5)
+                    # 持锁期间等待方不能返回，也不能自行下载。
+                    self.assertTrue(waiter.is_alive())
+                    Path(video_path).write_bytes(b"fake-video")
+                waiter.join(timeout=5)
+
+            self.assertEqual(results, [video_path])
+        get.assert_not_called()
+
+    def test_save_video_stops_waiting_for_lock_when_cancelled(self):
+        """
+        凑够时长后被放弃的下载如果正在等待别的任务持有的锁，必须随取消事件
+        立即退出，不能在 30 分钟的锁超时内一直占着下载线程。
+        """
+        url = "https://example.com/video.mp4"
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            video_path = f"{temp_dir}/vid-{material.utils.md5(url)}.mp4"
+            cancel_event = threading.Event()
+            errors = []
+
+            def download():
+                try:
+                    material.save_video(
+                        url, save_dir=temp_dir, cancel_event=cancel_event
+                    )
+                except Exception as exc:
+                    errors.append(exc)
+
+            with patch("app.services.material.http_client.get") as get:
+                with material.file_lock.exclusive_file_lock(
+                    f"{video_path}.lock", timeout=1
+                ):
+                    waiter = threading.Thread(target=download)
+                    waiter.start()
+                    waiter.join(timeout=0.3)
+                    self.assertTrue(waiter.is_alive())
+                    cancel_event.set()
+                    waiter.join(timeout=2)
+                    # 锁仍被持有，等待方已经因取消退出。
+                    self.assertFalse(waiter.is_alive())
+
+        get.assert_not_called()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], material._DownloadCancelledError)
+
+    def test_download_rate_limiter_paces_chunks_to_configured_rate(self):
+        """配置带宽上限后，每个数据块按上限预约传输时间，未配置时不等待。"""
+        limiter = material._DownloadRateLimiter()
+        with (
+            patch.object(material.time, "monotonic", return_value=100.0),
+            patch.object(material.time, "sleep") as sleep,
+        ):
+            config.app.pop("material_download_max_bytes_per_second", None)
+            limiter.consume(1000)
+            sleep.assert_not_called()
+
+            config.app["material_download_max_bytes_per_second"] = 1000
+            limiter.consume(500)
+            limiter.consume(500)
+
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.5, 1.0])
+
     def test_download_videos_accepts_plain_string_concat_mode(self):
         """
         download_videos 可能被服务层或测试直接传入字符串模式，而不是
@@ -754,6 +1040,156 @@ class TestMaterialTlsVerification(unittest.TestCase):
             ["a1.mp4", "b1.mp4", "a2.mp4"],
         )
 
+    def test_download_videos_concurrently_keeps_candidate_order(self):
+        """
+        并发下载时后面的素材可能先完成，但结果和来源记录仍按候选顺序排列；
+        失败的素材由后续候选补足，凑够时长后不再下载剩余候选。
+        """
+        items = [
+            material.MaterialInfo(
+                provider="pexels",
+                url=f"https://v.example/a{index}.mp4",
+                duration=3,
+                source_info={"provider": "pexels", "asset_id": f"a{index}"},
+            )
+            for index in range(6)
+        ]
+        later_clip_saved = threading.Event()
+        downloaded_urls = []
+        cancel_events = []
+
+        def fake_save_video(video_url, save_dir="", cancel_event=None):
+            downloaded_urls.append(video_url)
+            cancel_events.append(cancel_event)
+            name = video_url.rsplit("/", 1)[-1]
+            if name == "a0.mp4":
+                # 第一个素材最后完成，验证结果不按完成顺序排列。
+                self.assertTrue(later_clip_saved.wait(timeout=5))
+            elif name == "a1.mp4":
+                raise requests.ConnectionError("connection reset")
+            elif name == "a2.mp4":
+                later_clip_saved.set()
+            return f"/tmp/{name}"
+
+        with (
+            patch.dict(
+                config.app,
+                {"material_directory": "", "pexels_download_concurrency": 3},
+            ),
+            patch.object(material, "search_videos_pexels", return_value=items),
+            patch.object(material, "save_video", side_effect=fake_save_video),
+            patch.object(
+                material.material_cache,
+                "load_material_search_cache",
+                return_value=None,
+            ),
+            patch.object(material.material_cache, "save_material_search_cache"),
+            patch.object(
+                material.task_artifacts,
+                "patch_script_data",
+                return_value=True,
+            ) as patch_script,
+        ):
+            result = material.download_videos(
+                task_id="concurrent-materials",
+                search_terms=["city"],
+                source="pexels",
+                video_concat_mode=material.VideoConcatMode.sequential,
+                audio_duration=7,
+                max_clip_duration=3,
+            )
+
+        self.assertEqual(result, ["/tmp/a0.mp4", "/tmp/a2.mp4", "/tmp/a3.mp4"])
+        self.assertEqual(
+            sorted(downloaded_urls),
+            [f"https://v.example/a{index}.mp4" for index in range(4)],
+        )
+        recorded_sources = patch_script.call_args.kwargs["material_sources"]
+        self.assertEqual(
+            [source["asset_id"] for source in recorded_sources],
+            ["a0", "a2", "a3"],
+        )
+        # 凑够时长后通知所有在途下载放弃。
+        self.assertTrue(all(event.is_set() for event in cancel_events))
+
+    def test_material_concurrency_prefers_provider_setting(self):
+        """素材源单独配置的并发数优先，非法值回退为逐个请求。"""
+        with patch.dict(config.app, {"material_download_concurrency": 4}):
+            config.app.pop("pixabay_download_concurrency", None)
+            self.assertEqual(material._get_material_concurrency("pixabay", "download"), 4)
+            self.assertEqual(material._get_material_concurrency("pixabay", "search"), 1)
+            config.app["pixabay_download_concurrency"] = 2
+            self.assertEqual(material._get_material_concurrency("pixabay", "download"), 2)
+            config.app["pixabay_download_concurrency"] = "many"
+            self.assertEqual(material._get_material_concurrency("pixabay", "download"), 1)
+
+    def test_download_videos_searches_terms_concurrently_in_term_order(self):
+        """
+        并发搜索时后面的关键词可能先返回，但候选仍按关键词顺序合并，
+        重复 URL 只保留先出现关键词中的那一条。
+        """
+        items = {
+            term: [
+                material.MaterialInfo(
+                    provider="pexels",
+                    url=f"https://v.example/{url}.mp4",
+                    duration=3,
+                    source_info={"provider": "pexels", "asset_id": url},
+                )
+                for url in urls
+            ]
+            for term, urls in {
+                "first": ["a1", "shared"],
+                "second": ["shared", "b1"],
+                "third": ["c1"],
+            }.items()
+        }
+        searches_started = threading.Barrier(3, timeout=5)
+
+        def fake_search(search_term, minimum_duration, video_aspect):
+            # 三个关键词必须同时在途，才能越过屏障。
+            searches_started.wait()
+            if search_term == "first":
+                time.sleep(0.05)
+            return items[search_term]
+
+        with (
+            patch.dict(
+                config.app,
+                {"material_directory": "", "material_search_concurrency": 3},
+            ),
+            patch.object(material, "search_videos_pexels", side_effect=fake_search),
+            patch.object(
+                material,
+                "save_video",
+                side_effect=lambda video_url, save_dir="": (
+                    f"/tmp/{video_url.rsplit('/', 1)[-1]}"
+                ),
+            ),
+            patch.object(
+                material.material_cache,
+                "load_material_search_cache",
+                return_value=None,
+            ),
+            patch.object(material.material_cache, "save_material_search_cache"),
+            patch.object(
+                material.task_artifacts, "patch_script_data", return_value=True
+            ),
+        ):
+            result = material.download_videos(
+                task_id="concurrent-search",
+                search_terms=["first", "second", "third"],
+                source="pexels",
+                video_concat_mode=material.VideoConcatMode.sequential,
+                audio_duration=100,
+                max_clip_duration=3,
+            )
+
+        self.assertEqual(
+            result,
+            ["/tmp/a1.mp4", "/tmp/shared.mp4", "/tmp/b1.mp4", "/tmp/c1.mp4"],
+        )
+
     def test_material_source_persistence_failure_does_not_break_download(self):
         """辅助任务记录失败时，已经下载成功的素材仍应正常返回给成片主流程。"""
         item = material.MaterialInfo(
@@ -852,7 +1288,7 @@ class TestCoverrProvider(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ) as get:
             results = material.search_videos_coverr(
                 "nature",
@@ -892,7 +1328,7 @@ class TestCoverrProvider(unittest.TestCase):
         fake_response = SimpleNamespace(json=lambda: {"hits": []})
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ) as get:
             material.search_videos_coverr("nature", minimum_duration=1)
 
@@ -907,7 +1343,7 @@ class TestCoverrProvider(unittest.TestCase):
         fake_response = SimpleNamespace(json=lambda: {"hits": []})
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ) as get:
             material.search_videos_coverr("nature", minimum_duration=1)
 
@@ -942,7 +1378,7 @@ class TestCoverrProvider(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ):
             results = material.search_videos_coverr("x", minimum_duration=5)
 
@@ -980,7 +1416,7 @@ class TestCoverrProvider(unittest.TestCase):
         )
 
         with patch(
-            "app.services.material.requests.get", return_value=fake_response
+            "app.services.material.http_client.get", return_value=fake_response
         ):
             results = material.search_videos_coverr("x", minimum_duration=1)
 
@@ -1002,7 +1438,7 @@ class TestCoverrProvider(unittest.TestCase):
                 json=lambda: {"error": "rate limited"}
             )
             with patch(
-                "app.services.material.requests.get", return_value=fake_response
+                "app.services.material.http_client.get", return_value=fake_response
             ):
                 results = material.search_videos_coverr("x", minimum_duration=1)
             self.assertEqual(results, [])
@@ -1010,7 +1446,7 @@ class TestCoverrProvider(unittest.TestCase):
         # Subtest B: network exception bubbles up from requests.get
         with self.subTest("network exception"):
             with patch(
-                "app.services.material.requests.get",
+                "app.services.material.http_client.get",
                 side_effect=requests.ConnectionError("boom"),
             ):
                 results = material.search_videos_coverr("x", minimum_duration=1)
@@ -1118,10 +1554,10 @@ class TestWaveSpeedProvider(unittest.TestCase):
 
         with (
             patch(
-                "app.services.material.requests.post", return_value=submit_response
+                "app.services.material.http_client.post", return_value=submit_response
             ) as post,
             patch(
-                "app.services.material.requests.get", side_effect=poll_responses
+                "app.services.material.http_client.get", side_effect=poll_responses
             ) as get,
             patch("app.services.material.time.sleep") as sleep,
         ):
@@ -1180,9 +1616,9 @@ class TestWaveSpeedProvider(unittest.TestCase):
 
         with (
             patch(
-                "app.services.material.requests.post", return_value=submit_response
+                "app.services.material.http_client.post", return_value=submit_response
             ) as post,
-            patch("app.services.material.requests.get", return_value=poll_response),
+            patch("app.services.material.http_client.get", return_value=poll_response),
         ):
             results = material.generate_videos_wavespeed(
                 "city timelapse",
@@ -1209,8 +1645,8 @@ class TestWaveSpeedProvider(unittest.TestCase):
         )
 
         with (
-            patch("app.services.material.requests.post", return_value=submit_response),
-            patch("app.services.material.requests.get", return_value=poll_response),
+            patch("app.services.material.http_client.post", return_value=submit_response),
+            patch("app.services.material.http_client.get", return_value=poll_response),
         ):
             results = material.generate_videos_wavespeed("sunrise", minimum_duration=5)
 
@@ -1221,8 +1657,8 @@ class TestWaveSpeedProvider(unittest.TestCase):
         submit_response = self._json_response({"code": 401, "message": "invalid api key"})
 
         with (
-            patch("app.services.material.requests.post", return_value=submit_response),
-            patch("app.services.material.requests.get") as get,
+            patch("app.services.material.http_client.post", return_value=submit_response),
+            patch("app.services.material.http_client.get") as get,
         ):
             results = material.generate_videos_wavespeed("sunrise", minimum_duration=5)
 
@@ -1235,7 +1671,7 @@ class TestWaveSpeedProvider(unittest.TestCase):
         因此提交绝不自动重试,并按"状态不明"上抛,让上层停止继续下单。
         """
         with patch(
-            "app.services.material.requests.post",
+            "app.services.material.http_client.post",
             side_effect=requests.exceptions.ConnectionError("boom"),
         ) as post:
             with self.assertRaises(material.WaveSpeedUnconfirmedTaskError):
@@ -1249,7 +1685,7 @@ class TestWaveSpeedProvider(unittest.TestCase):
             status_code=502, json=lambda: {"code": 502, "message": "bad gateway"}
         )
 
-        with patch("app.services.material.requests.post", return_value=submit_response):
+        with patch("app.services.material.http_client.post", return_value=submit_response):
             with self.assertRaises(material.WaveSpeedUnconfirmedTaskError):
                 material.generate_videos_wavespeed("sunrise", minimum_duration=5)
 
@@ -1273,10 +1709,10 @@ class TestWaveSpeedProvider(unittest.TestCase):
 
         with (
             patch(
-                "app.services.material.requests.post", return_value=submit_response
+                "app.services.material.http_client.post", return_value=submit_response
             ) as post,
             patch(
-                "app.services.material.requests.get",
+                "app.services.material.http_client.get",
                 side_effect=[
                     rate_limited,
                     requests.exceptions.ConnectionError("boom"),
@@ -1304,9 +1740,9 @@ class TestWaveSpeedProvider(unittest.TestCase):
         submit_response = self._json_response({"code": 200, "data": {"id": "pred-r2"}})
 
         with (
-            patch("app.services.material.requests.post", return_value=submit_response),
+            patch("app.services.material.http_client.post", return_value=submit_response),
             patch(
-                "app.services.material.requests.get",
+                "app.services.material.http_client.get",
                 side_effect=requests.exceptions.ConnectionError("boom"),
             ) as get,
             patch("app.services.material.time.sleep"),
@@ -1326,8 +1762,8 @@ class TestWaveSpeedProvider(unittest.TestCase):
         clock = iter([0.0, 0.0, material.WAVESPEED_RUN_TIMEOUT_SECONDS + 1])
 
         with (
-            patch("app.services.material.requests.post", return_value=submit_response),
-            patch("app.services.material.requests.get", return_value=processing),
+            patch("app.services.material.http_client.post", return_value=submit_response),
+            patch("app.services.material.http_client.get", return_value=processing),
             patch(
                 "app.services.material.time.monotonic", side_effect=lambda: next(clock)
             ),
@@ -1473,9 +1909,9 @@ class TestWaveSpeedProvider(unittest.TestCase):
 
         with (
             patch(
-                "app.services.material.requests.post", return_value=submit_response
+                "app.services.material.http_client.post", return_value=submit_response
             ) as post,
-            patch("app.services.material.requests.get", return_value=poll_response),
+            patch("app.services.material.http_client.get", return_value=poll_response),
         ):
             results = material.generate_videos_wavespeed("sunrise", minimum_duration=3)
 
@@ -1499,9 +1935,9 @@ class TestWaveSpeedProvider(unittest.TestCase):
 
         with (
             patch(
-                "app.services.material.requests.post", return_value=submit_response
+                "app.services.material.http_client.post", return_value=submit_response
             ) as post,
-            patch("app.services.material.requests.get", return_value=poll_response),
+            patch("app.services.material.http_client.get", return_value=poll_response),
         ):
             results = material.generate_videos_wavespeed("sunrise", minimum_duration=20)
 
@@ -1526,9 +1962,9 @@ class TestWaveSpeedProvider(unittest.TestCase):
 
         with (
             patch(
-                "app.services.material.requests.post", return_value=submit_response
+                "app.services.material.http_client.post", return_value=submit_response
             ) as post,
-            patch("app.services.material.requests.get", return_value=poll_response),
+            patch("app.services.material.http_client.get", return_value=poll_response),
         ):
             material.generate_videos_wavespeed("sunrise", minimum_duration=3)
 
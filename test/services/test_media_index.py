@@ -0,0 +1,122 @@
+import dataclasses
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from app.services import media_index
+from app.services.media_probe import VideoMetadata
+
+_METADATA = VideoMetadata(
+    duration=10.0,
+    width=1080,
+    height=1920,
+    fps=30.0,
+    codec="h264",
+    pix_fmt="yuv420p",
+    rotation=0,
+    has_audio=True,
+    keyframes=(0.0, 2.0, 6.0),
+)
+
+
+class TestMediaIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.storage_patch = patch(
+            "app.services.media_index.utils.storage_dir",
+            return_value=self.temp_dir.name,
+        )
+        self.storage_patch.start()
+        self.material = os.path.join(self.temp_dir.name, "material.mp4")
+        Path(self.material).write_bytes(b"video bytes")
+
+    def tearDown(self):
+        self.storage_patch.stop()
+        self.temp_dir.cleanup()
+
+    def test_cached_metadata_skips_second_probe(self):
+        """同一素材第二次读取应直接命中索引，所有字段都要原样还原。"""
+        with patch.object(
+            media_index.media_probe, "probe_media", return_value=_METADATA
+        ) as probe:
+            first = media_index.get_media_metadata(self.material)
+            second = media_index.get_video_metadata(self.material)
+
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(first, _METADATA)
+        self.assertEqual(second, _METADATA)
+        self.assertEqual(second.keyframe_interval, 4.0)
+
+    def test_keyframes_are_scanned_once_on_demand(self):
+        """
+        首次探测不扫描关键帧；流复制规划请求关键帧时扫描一次并写回索引，
+        之后的元数据读取直接带上关键帧。
+        """
+        unscanned = dataclasses.replace(_METADATA, keyframes=None)
+        with (
+            patch.object(
+                media_index.media_probe, "probe_media", return_value=unscanned
+            ) as probe,
+            patch.object(
+                media_index.media_probe,
+                "probe_keyframes",
+                return_value=(0.0, 2.0, 6.0),
+            ) as probe_keyframes,
+        ):
+            self.assertIsNone(
+                media_index.get_video_metadata(self.material).keyframes
+            )
+            probe_keyframes.assert_not_called()
+            first = media_index.get_keyframes(self.material)
+            second = media_index.get_keyframes(self.material)
+            metadata = media_index.get_video_metadata(self.material)
+
+        self.assertEqual(probe.call_count, 1)
+        self.assertEqual(probe_keyframes.call_count, 1)
+        self.assertEqual(first, (0.0, 2.0, 6.0))
+        self.assertEqual(second, first)
+        self.assertEqual(metadata, _METADATA)
+
+    def test_modified_file_is_probed_again(self):
+        """文件大小或修改时间变化后旧记录失效，需要重新探测。"""
+        with patch.object(
+            media_index.media_probe, "probe_media", return_value=_METADATA
+        ) as probe:
+            media_index.get_media_metadata(self.material)
+            Path(self.material).write_bytes(b"re-downloaded video bytes")
+            media_index.get_media_metadata(self.material)
+            stat = os.stat(self.material)
+            os.utime(self.material, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+            media_index.get_media_metadata(self.material)
+
+        self.assertEqual(probe.call_count, 3)
+
+    def test_probe_failures_are_not_cached(self):
+        """探测失败只影响本次调用，下次仍需重新探测；音频文件不算视频。"""
+        audio = VideoMetadata(
+            duration=3.0,
+            width=0,
+            height=0,
+            fps=0.0,
+            codec="",
+            pix_fmt="",
+            rotation=0,
+            has_audio=True,
+            keyframes=(),
+            has_video=False,
+        )
+        with patch.object(
+            media_index.media_probe, "probe_media", side_effect=[None, audio]
+        ) as probe:
+            self.assertIsNone(media_index.get_media_metadata(self.material))
+            self.assertIsNone(media_index.get_video_metadata(self.material))
+            self.assertEqual(media_index.get_media_metadata(self.material), audio)
+
+        self.assertEqual(probe.call_count, 2)
+        self.assertIsNone(media_index.get_media_metadata("missing.mp4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import subprocess
+import types
+import unittest
+from unittest.mock import patch
+
+from app.services import media_probe
+
+_INPUT_STDERR = """Input #0, mov,mp4,m4a,3gp,3g2,mj2, from 'clip.mp4':
+  Duration: 00:00:10.00, start: 0.000000, bitrate: 6732 kb/s
+  Stream #0:0[0x1](und): Video: h264 (High) (avc1 / 0x31637661), yuv420p(progressive), 1080x1920 [SAR 1:1 DAR 9:16], 6727 kb/s, 30 fps, 30 tbr, 15360 tbn (default)
+  Stream #0:1[0x2](und): Audio: aac (LC) (mp4a / 0x6134706D), 44100 Hz, stereo, fltp, 128 kb/s (default)
+Stream mapping:
+  Stream #0:0 -> #0:0 (h264 (native) -> wrapped_avframe (native))
+"""
+_PROBE_STDERR = (
+    _INPUT_STDERR
+    + """Output #0, null, to 'pipe:':
+  Stream #0:0(und): Video: wrapped_avframe, yuv444p(progressive), 1080x1920, 30 fps
+"""
+)
+_KEYFRAME_STDERR = (
+    _INPUT_STDERR
+    + """[Parsed_showinfo_0 @ 0x1] n:   0 pts:      0 pts_time:0       duration:    512 iskey:1
+[Parsed_showinfo_0 @ 0x1] n:   1 pts:  23040 pts_time:1.5     duration:    512 iskey:1
+[Parsed_showinfo_0 @ 0x1] n:   2 pts:  46080 pts_time:3       duration:    512 iskey:1
+Output #0, null, to 'pipe:':
+  Stream #0:0(und): Video: wrapped_avframe, yuv444p(progressive), 1080x1920, 30 fps
+"""
+)
+
+
+class TestMediaProbe(unittest.TestCase):
+    def test_probe_video_parses_stream_parameters_without_scanning_keyframes(self):
+        """
+        流参数探测只解码第一帧，不能用 `-skip_frame nokey` 读完整条素材；
+        输出段里的 Stream 行不能干扰解析，关键帧留待按需扫描。
+        """
+        with patch.object(
+            media_probe.subprocess,
+            "run",
+            return_value=types.SimpleNamespace(
+                returncode=0, stdout="", stderr=_PROBE_STDERR
+            ),
+        ) as run:
+            metadata = media_probe.probe_video("clip.mp4")
+
+        command = run.call_args.args[0]
+        self.assertNotIn("-skip_frame", command)
+        self.assertEqual(command[command.index("-frames:v") + 1], "1")
+        self.assertEqual(metadata.duration, 10.0)
+        self.assertEqual((metadata.width, metadata.height), (1080, 1920))
+        self.assertEqual(metadata.fps, 30.0)
+        self.assertEqual(metadata.codec, "h264")
+        self.assertEqual(metadata.pix_fmt, "yuv420p")
+        self.assertTrue(metadata.has_audio)
+        self.assertIsNone(metadata.keyframes)
+        self.assertEqual(metadata.keyframe_interval, 0.0)
+
+    def test_probe_keyframes_reads_showinfo_timestamps(self):
+        with patch.object(
+            media_probe.subprocess,
+            "run",
+            return_value=types.SimpleNamespace(
+                returncode=0, stdout="", stderr=_KEYFRAME_STDERR
+            ),
+        ) as run:
+            keyframes = media_probe.probe_keyframes("clip.mp4")
+
+        command = run.call_args.args[0]
+        self.assertEqual(command[command.index("-skip_frame") + 1], "nokey")
+        self.assertEqual(keyframes, (0.0, 1.5, 3.0))
+
+    def test_probe_video_returns_none_when_ffmpeg_fails(self):
+        """探测失败只能降级为“没有元数据”，不能让素材处理抛异常。"""
+        failures = (
+            types.SimpleNamespace(returncode=1, stdout="", stderr="broken file"),
+            subprocess.TimeoutExpired(cmd="ffmpeg", timeout=1),
+        )
+        for failure in failures:
+            with self.subTest(failure=type(failure).__name__):
+                kwargs = (
+                    {"side_effect": failure}
+                    if isinstance(failure, Exception)
+                    else {"return_value": failure}
+                )
+                with patch.object(media_probe.subprocess, "run", **kwargs):
+                    self.assertIsNone(media_probe.probe_video("clip.mp4"))
+                    self.assertIsNone(media_probe.probe_keyframes("clip.mp4"))
+
+    def test_floor_keyframe_tolerates_text_rounding(self):
+        keyframes = (0.0, 1.5, 3.0)
+
+        self.assertEqual(media_probe.floor_keyframe(keyframes, 2.9), 1.5)
+        self.assertEqual(media_probe.floor_keyframe(keyframes, 2.9995), 3.0)
+        self.assertIsNone(media_probe.floor_keyframe((1.0,), 0.5))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from app.utils import mp4_header
+
+
+def _box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def _full_box(box_type: bytes, payload: bytes, version: int = 0) -> bytes:
+    return _box(box_type, struct.pack(">B3x", version) + payload)
+
+
+def _build_mp4(
+    width: int = 1080,
+    height: int = 1920,
+    rotation_matrix: tuple[int, int] = (0x10000, 0),
+    stts_entries: tuple[tuple[int, int], ...] = ((300, 512),),
+    mdat_size: int | None = None,
+) -> bytes:
+    """拼出最小可解析的 MP4：10 秒、30fps（timescale 15360，每帧 512）。"""
+    mvhd = _full_box(b"mvhd", struct.pack(">III", 0, 0, 1000) + struct.pack(">I", 10000))
+    a, b = rotation_matrix
+    matrix = struct.pack(">9i", a, b, 0, -b, a, 0, 0, 0, 0x40000000)
+    tkhd = _full_box(
+        b"tkhd",
+        struct.pack(">IIIII", 0, 0, 1, 0, 10000)
+        + bytes(8)
+        + bytes(8)
+        + matrix
+        + struct.pack(">II", width << 16, height << 16),
+    )
+    mdhd = _full_box(b"mdhd", struct.pack(">IIII", 0, 0, 15360, 153600) + bytes(4))
+    hdlr = _full_box(b"hdlr", bytes(4) + b"vide" + bytes(12) + b"\x00")
+    stsd = _full_box(b"stsd", struct.pack(">I", 1) + _box(b"avc1", bytes(78)))
+    stts = _full_box(
+        b"stts",
+        struct.pack(">I", len(stts_entries))
+        + b"".join(struct.pack(">II", count, delta) for count, delta in stts_entries),
+    )
+    stbl = _box(b"stbl", stsd + stts)
+    mdia = _box(b"mdia", mdhd + hdlr + _box(b"minf", stbl))
+    moov = _box(b"moov", mvhd + _box(b"trak", tkhd + mdia))
+    mdat = _box(b"mdat", bytes(64))
+    if mdat_size is not None:
+        mdat = struct.pack(">I4s", mdat_size, b"mdat") + bytes(64)
+    return _box(b"ftyp", b"isom" + bytes(4)) + moov + mdat
+
+
+class TestMp4Header(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _parse(self, content: bytes):
+        file_path = os.path.join(self.temp_dir.name, "clip.mp4")
+        with open(file_path, "wb") as fp:
+            fp.write(content)
+        return mp4_header.parse_mp4_header(file_path)
+
+    def test_parses_duration_size_fps_and_codec_from_moov(self):
+        header = self._parse(_build_mp4())
+
+        self.assertEqual(
+            header,
+            mp4_header.Mp4Header(
+                duration=10.0, width=1080, height=1920, fps=30.0, codec="avc1"
+            ),
+        )
+
+    def test_rotated_track_reports_display_size(self):
+        """与 VideoFileClip 一致，旋转 90 度的轨道按显示方向返回宽高。"""
+        header = self._parse(
+            _build_mp4(width=1920, height=1080, rotation_matrix=(0, 0x10000))
+        )
+
+        self.assertEqual((header.width, header.height), (1080, 1920))
+
+    def test_unparseable_files_return_none(self):
+        """下载不完整、分片 MP4 和非 ISO-BMFF 文件都交给 FFmpeg 回退处理。"""
+        cases = {
+            "truncated mdat": _build_mp4(mdat_size=1024 * 1024),
+            "fragmented": _build_mp4(stts_entries=()),
+            "not mp4": b"fake-video",
+            "empty": b"",
+        }
+        for name, content in cases.items():
+            with self.subTest(name):
+                self.assertIsNone(self._parse(content))
+        self.assertIsNone(mp4_header.parse_mp4_header("missing.mp4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
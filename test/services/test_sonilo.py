@@ -86,7 +86,7 @@ class TestSoniloService(unittest.TestCase):
         )
         with (
             patch.object(sonilo.config, "app", {"sonilo_api_key": "test-key"}),
-            patch.object(sonilo.requests, "get", return_value=response) as request,
+            patch.object(sonilo.http_client, "get", return_value=response) as request,
         ):
             result = sonilo.test_connection()
 
@@ -103,7 +103,7 @@ class TestSoniloService(unittest.TestCase):
         )
         with (
             patch.object(sonilo.config, "app", {"sonilo_api_key": "test-key"}),
-            patch.object(sonilo.requests, "get", return_value=response),
+            patch.object(sonilo.http_client, "get", return_value=response),
         ):
             result = sonilo.test_connection()
 
@@ -123,7 +123,7 @@ class TestSoniloService(unittest.TestCase):
                     sonilo.config, "app", {"sonilo_api_key": "test-key"}
                 ),
                 patch.object(
-                    sonilo.requests,
+                    sonilo.http_client,
                     "get",
                     return_value=_StreamingResponse(payload=payload),
                 ),
@@ -137,7 +137,7 @@ class TestSoniloService(unittest.TestCase):
         )
         with (
             patch.object(sonilo.config, "app", {"sonilo_api_key": "test-key"}),
-            patch.object(sonilo.requests, "get", return_value=response),
+            patch.object(sonilo.http_client, "get", return_value=response),
         ):
             with self.assertRaisesRegex(sonilo.SoniloError, "not available"):
                 sonilo.test_connection()
@@ -147,7 +147,7 @@ class TestSoniloService(unittest.TestCase):
         with (
             patch.object(sonilo.config, "app", {"sonilo_api_key": "test-key"}),
             patch.object(
-                sonilo.requests,
+                sonilo.http_client,
                 "get",
                 side_effect=sonilo.requests.Timeout("timed out"),
             ),
@@ -158,7 +158,7 @@ class TestSoniloService(unittest.TestCase):
         response = _StreamingResponse(payload={})
         with (
             patch.object(sonilo.config, "app", {"sonilo_api_key": "test-key"}),
-            patch.object(sonilo.requests, "get", return_value=response),
+            patch.object(sonilo.http_client, "get", return_value=response),
             patch.object(response, "json", side_effect=ValueError("invalid json")),
         ):
             with self.assertRaisesRegex(sonilo.SoniloError, "invalid service response"):
@@ -356,7 +356,7 @@ class TestSoniloService(unittest.TestCase):
             video_path.write_bytes(b"video")
             with (
                 patch.object(sonilo.config, "app", {"sonilo_api_key": "test-key"}),
-                patch.object(sonilo.requests, "post", return_value=response) as post,
+                patch.object(sonilo.http_client, "post", return_value=response) as post,
                 patch.object(
                     sonilo.bgm_service, "validate_audio_file"
                 ) as validate_audio,
@@ -411,7 +411,7 @@ class TestSoniloService(unittest.TestCase):
                     patch.object(
                         sonilo.config, "app", {"sonilo_api_key": "test-key"}
                     ),
-                    patch.object(sonilo.requests, "post", return_value=response),
+                    patch.object(sonilo.http_client, "post", return_value=response),
                     patch.object(
                         sonilo.bgm_service,
                         "validate_audio_file",
@@ -35,8 +35,8 @@ class TestTaskService(unittest.TestCase):
         with tm._cross_post_registry_lock:
             tm._cross_post_futures.clear()
 
-    def test_is_task_busy_covers_generation_and_cross_posting(self):
-        """删除入口必须同时识别视频生成和跨平台发布的活跃状态。"""
+    def test_is_task_busy_covers_generation_cross_posting_and_rerender(self):
+        """删除入口必须同时识别视频生成、跨平台发布和重新渲染的活跃状态。"""
         busy_tasks = (
             {"state": tm.const.TASK_STATE_PROCESSING},
             {
@@ -47,6 +47,10 @@ class TestTaskService(unittest.TestCase):
                 "state": tm.const.TASK_STATE_COMPLETE,
                 "cross_post_state": tm.const.CROSS_POST_STATE_PROCESSING,
             },
+            {
+                "state": tm.const.TASK_STATE_COMPLETE,
+                "rerender_state": tm.const.RERENDER_STATE_PROCESSING,
+            },
         )
         for task in busy_tasks:
             with self.subTest(task=task):
@@ -57,6 +61,7 @@ class TestTaskService(unittest.TestCase):
                 {
                     "state": tm.const.TASK_STATE_COMPLETE,
                     "cross_post_state": tm.const.CROSS_POST_STATE_COMPLETE,
+                    "rerender_state": tm.const.RERENDER_STATE_FAILED,
                 }
             )
         )
@@ -114,6 +119,312 @@ class TestTaskService(unittest.TestCase):
 
         self.assertEqual(combine_videos.call_args.kwargs["clip_speed"], 1.25)
 
+    def test_generate_final_videos_renders_draft_preview_of_trimmed_audio(self):
+        """草稿预览先裁短旁白，拼接和合成都使用裁短后的音频与同一档位。"""
+        params = VideoParams(
+            video_subject="test",
+            video_count=1,
+            render_profile="draft",
+            preview_duration=3,
+        )
+
+        with (
+            patch.object(
+                tm.video, "trim_audio_for_preview", return_value="preview.mp3"
+            ) as trim,
+            patch.object(tm.video, "combine_videos") as combine_videos,
+            patch.object(tm.video, "generate_video") as generate_video,
+            patch.object(tm.sm.state, "update_task"),
+        ):
+            tm.generate_final_videos(
+                task_id="draft-task",
+                params=params,
+                downloaded_videos=["material.mp4"],
+                audio_file="audio.mp3",
+                subtitle_path="",
+                audio_duration=5,
+            )
+
+        self.assertEqual(trim.call_args.args[:2], ("audio.mp3", 3))
+        self.assertEqual(combine_videos.call_args.kwargs["audio_file"], "preview.mp3")
+        self.assertEqual(combine_videos.call_args.kwargs["render_profile"], "draft")
+        self.assertEqual(generate_video.call_args.kwargs["audio_path"], "preview.mp3")
+
+    def _write_rerender_task(self, task_id, **params_overrides):
+        task_dir = utils.task_dir(task_id)
+        self.addCleanup(shutil.rmtree, task_dir, True)
+        params = VideoParams(
+            video_subject="test", text_fore_color="#FFFFFF", **params_overrides
+        )
+        tm.save_script_data(task_id, "script", ["term"], params)
+        for name in ("combined-1.mp4", "audio.mp3", "subtitle.srt", "final-1.mp4"):
+            Path(task_dir, name).write_text(name, encoding="utf-8")
+        return task_dir
+
+    def test_rerender_reuses_task_artifacts_with_style_overrides(self):
+        """重新渲染只调用最终合成，并用新成片替换 final-N.mp4。"""
+        task_id = f"test-rerender-{uuid4().hex}"
+        task_dir = self._write_rerender_task(task_id)
+        state = MemoryState()
+        state.update_task(
+            task_id,
+            state=tm.const.TASK_STATE_COMPLETE,
+            progress=100,
+            script="script",
+            error="stale warning",
+        )
+
+        def render(**kwargs):
+            Path(kwargs["output_file"]).write_text("rerendered", encoding="utf-8")
+            return True
+
+        with (
+            patch.object(tm.sm, "state", state),
+            patch.object(tm.video, "get_subtitle_backend", return_value="moviepy"),
+            patch.object(tm.video, "combine_videos") as combine_videos,
+            patch.object(tm.video, "generate_video", side_effect=render) as generate,
+        ):
+            result = tm.rerender(task_id, {"text_fore_color": "#FFD700"})
+
+        combine_videos.assert_not_called()
+        kwargs = generate.call_args.kwargs
+        self.assertEqual(kwargs["video_path"], os.path.join(task_dir, "combined-1.mp4"))
+        self.assertEqual(kwargs["audio_path"], os.path.join(task_dir, "audio.mp3"))
+        self.assertEqual(
+            kwargs["subtitle_path"], os.path.join(task_dir, "subtitle.srt")
+        )
+        self.assertEqual(kwargs["params"].text_fore_color, "#FFD700")
+        final_video = os.path.join(task_dir, "final-1.mp4")
+        self.assertEqual(result["videos"], [final_video])
+        self.assertEqual(Path(final_video).read_text(encoding="utf-8"), "rerendered")
+        task = state.get_task(task_id)
+        self.assertEqual(task["progress"], 100)
+        self.assertEqual(task["script"], "script")
+        self.assertEqual(task["error"], "stale warning")
+        self.assertEqual(task["videos"], [final_video])
+        self.assertEqual(task["rerender_state"], tm.const.RERENDER_STATE_COMPLETE)
+
+    def test_rerender_draft_preview_reuses_trimmed_narration(self):
+        """草稿预览的拼接视频只有开头几秒，重新渲染要用同样裁短的旁白。"""
+        task_id = f"test-rerender-{uuid4().hex}"
+        task_dir = self._write_rerender_task(
+            task_id, render_profile="draft", preview_duration=3
+        )
+        audio_file = os.path.join(task_dir, "audio.mp3")
+        state = MemoryState()
+        state.update_task(
+            task_id,
+            state=tm.const.TASK_STATE_COMPLETE,
+            progress=100,
+            audio_file=audio_file,
+            audio_duration=5,
+        )
+
+        def render(**kwargs):
+            Path(kwargs["output_file"]).write_text("rerendered", encoding="utf-8")
+
+        with (
+            patch.object(tm.sm, "state", state),
+            patch.object(tm.video, "get_subtitle_backend", return_value="moviepy"),
+            patch.object(
+                tm.video, "trim_audio_for_preview", return_value="preview.mp3"
+            ) as trim,
+            patch.object(tm.video, "generate_video", side_effect=render) as generate,
+        ):
+            tm.rerender(task_id, {"font_size": 80})
+
+        self.assertEqual(trim.call_args.args[:2], (audio_file, 3))
+        self.assertEqual(generate.call_args.kwargs["audio_path"], "preview.mp3")
+        self.assertEqual(state.get_task(task_id)["audio_file"], audio_file)
+
+    def test_rerender_failure_keeps_completed_task_and_videos(self):
+        """
+        合成失败时保留上一次成片；已完成任务的 state、进度和视频地址不变，
+        失败只记录在 rerender_state 和 rerender_error 中。
+        """
+        task_id = f"test-rerender-{uuid4().hex}"
+        task_dir = self._write_rerender_task(task_id)
+        state = MemoryState()
+        state.update_task(
+            task_id,
+            state=tm.const.TASK_STATE_COMPLETE,
+            progress=100,
+            videos=["/tasks/example/final-1.mp4"],
+        )
+
+        with (
+            patch.object(tm.sm, "state", state),
+            patch.object(tm.video, "get_subtitle_backend", return_value="moviepy"),
+            patch.object(
+                tm.video, "generate_video", side_effect=RuntimeError("encode failed")
+            ),
+        ):
+            result = tm.rerender(task_id, {"font_size": 80})
+
+        self.assertEqual(result["rerender_state"], tm.const.RERENDER_STATE_FAILED)
+        self.assertIn("encode failed", result["rerender_error"])
+        self.assertEqual(
+            Path(task_dir, "final-1.mp4").read_text(encoding="utf-8"), "final-1.mp4"
+        )
+        self.assertFalse(os.path.exists(os.path.join(task_dir, "final-1.rerender.mp4")))
+        task = state.get_task(task_id)
+        self.assertEqual(task["state"], tm.const.TASK_STATE_COMPLETE)
+        self.assertEqual(task["progress"], 100)
+        self.assertEqual(task["videos"], ["/tasks/example/final-1.mp4"])
+        self.assertEqual(task["rerender_state"], tm.const.RERENDER_STATE_FAILED)
+        self.assertIn("encode failed", task["rerender_error"])
+        self.assertNotIn("failed_stage", task)
+        self.assertFalse(tm.is_task_busy(task))
+
+    def test_prepare_rerender_rejects_unsupported_fields_and_missing_videos(self):
+        """只允许覆盖成片样式；没有拼接视频的任务无法复用。"""
+        task_id = f"test-rerender-{uuid4().hex}"
+        task_dir = self._write_rerender_task(task_id)
+        state = MemoryState()
+        state.update_task(task_id, state=tm.const.TASK_STATE_COMPLETE, progress=100)
+
+        with patch.object(tm.sm, "state", state):
+            with self.assertRaisesRegex(ValueError, "video_script"):
+                tm.prepare_rerender(task_id, {"video_script": "new script"})
+
+            os.remove(os.path.join(task_dir, "combined-1.mp4"))
+            with self.assertRaisesRegex(ValueError, "no combined videos"):
+                tm.prepare_rerender(task_id)
+
+    def test_prepare_rerender_without_task_record_requires_final_videos(self):
+        """CLI 内存状态查不到任务时，缺少成片说明任务没有完成，不能重新渲染。"""
+        task_id = f"test-rerender-{uuid4().hex}"
+        task_dir = self._write_rerender_task(task_id)
+
+        with patch.object(tm.sm, "state", MemoryState()):
+            _, combined_videos, _, _ = tm.prepare_rerender(task_id)
+            self.assertEqual(
+                combined_videos, [os.path.join(task_dir, "combined-1.mp4")]
+            )
+
+            os.remove(os.path.join(task_dir, "final-1.mp4"))
+            with self.assertRaisesRegex(ValueError, "only completed tasks"):
+                tm.prepare_rerender(task_id)
+
+    def test_rerender_rejects_failed_task_and_keeps_its_error(self):
+        """失败任务即使残留拼接视频也不能重新渲染，原任务的错误信息保持不变。"""
+        task_id = f"test-rerender-{uuid4().hex}"
+        self._write_rerender_task(task_id)
+        state = MemoryState()
+        state.update_task(
+            task_id,
+            state=tm.const.TASK_STATE_FAILED,
+            progress=60,
+            failed_stage="video",
+            error="failed to generate final video",
+        )
+
+        with (
+            patch.object(tm.sm, "state", state),
+            patch.object(tm.video, "generate_video") as generate,
+        ):
+            with self.assertRaisesRegex(ValueError, "only completed tasks"):
+                tm.prepare_rerender(task_id)
+            result = tm.rerender(task_id, {"font_size": 80})
+
+        generate.assert_not_called()
+        self.assertEqual(result["rerender_state"], tm.const.RERENDER_STATE_FAILED)
+        self.assertIn("only completed tasks", result["rerender_error"])
+        task = state.get_task(task_id)
+        self.assertEqual(task["state"], tm.const.TASK_STATE_FAILED)
+        self.assertEqual(task["progress"], 60)
+        self.assertEqual(task["failed_stage"], "video")
+        self.assertEqual(task["error"], "failed to generate final video")
+
+    def test_generate_final_videos_uses_ffmpeg_engine_when_configured(self):
+        """配置 FFmpeg 引擎后直接输出成片，不再经过两段式 MoviePy 合成。"""
+        params = VideoParams(video_subject="test", video_count=2)
+
+        with (
+            patch.object(tm.video, "get_render_engine", return_value="ffmpeg"),
+            patch.object(tm.video, "render_video_with_ffmpeg") as render,
+            patch.object(tm.video, "combine_videos") as combine_videos,
+            patch.object(tm.video, "generate_video") as generate_video,
+            patch.object(tm.sm.state, "update_task"),
+        ):
+            final_paths, combined_paths, warnings = tm.generate_final_videos(
+                task_id="ffmpeg-engine-task",
+                params=params,
+                downloaded_videos=["material.mp4"],
+                audio_file="audio.mp3",
+                subtitle_path="subtitle.srt",
+                audio_duration=5,
+            )
+
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(render.call_args.kwargs["subtitle_path"], "subtitle.srt")
+        self.assertIsNone(render.call_args.kwargs["bgm_file_override"])
+        combine_videos.assert_not_called()
+        generate_video.assert_not_called()
+        self.assertEqual(len(final_paths), 2)
+        self.assertEqual(combined_paths, [])
+        self.assertEqual(warnings, [])
+
+    def test_generate_final_videos_falls_back_to_moviepy_when_ffmpeg_fails(self):
+        """FFmpeg 引擎失败时当前视频必须回退 MoviePy 流程，不能让任务失败。"""
+        params = VideoParams(video_subject="test", video_count=1)
+
+        with (
+            patch.object(tm.video, "get_render_engine", return_value="ffmpeg"),
+            patch.object(
+                tm.video,
+                "render_video_with_ffmpeg",
+                side_effect=RuntimeError("filtergraph failed"),
+            ),
+            patch.object(tm.video, "combine_videos") as combine_videos,
+            patch.object(tm.video, "generate_video") as generate_video,
+            patch.object(tm.sm.state, "update_task"),
+        ):
+            final_paths, combined_paths, _ = tm.generate_final_videos(
+                task_id="ffmpeg-fallback-task",
+                params=params,
+                downloaded_videos=["material.mp4"],
+                audio_file="audio.mp3",
+                subtitle_path="",
+                audio_duration=5,
+            )
+
+        combine_videos.assert_called_once()
+        generate_video.assert_called_once()
+        self.assertEqual(len(final_paths), 1)
+        self.assertEqual(len(combined_paths), 1)
+
+    def test_generate_final_videos_renders_subtitle_overlay_once(self):
+        """字幕卡每个任务只渲染一次，所有视频共用同一份清单。"""
+        params = VideoParams(video_subject="test", video_count=3)
+
+        with (
+            patch.object(tm.video, "get_subtitle_backend", return_value="overlay"),
+            patch.object(
+                tm.video,
+                "prepare_subtitle_overlay",
+                return_value="/tmp/subtitle-overlay/manifest.json",
+            ) as prepare,
+            patch.object(tm.video, "combine_videos"),
+            patch.object(tm.video, "generate_video") as generate_video,
+            patch.object(tm.sm.state, "update_task"),
+        ):
+            tm.generate_final_videos(
+                task_id="subtitle-overlay-task",
+                params=params,
+                downloaded_videos=["material.mp4"],
+                audio_file="audio.mp3",
+                subtitle_path="subtitle.srt",
+                audio_duration=5,
+            )
+
+        prepare.assert_called_once()
+        self.assertEqual(generate_video.call_count, 3)
+        self.assertEqual(
+            {call.kwargs["subtitle_overlay"] for call in generate_video.call_args_list},
+            {"/tmp/subtitle-overlay/manifest.json"},
+        )
+
     def test_generate_final_videos_uses_generated_sonilo_music(self):
         """Sonilo 必须针对每条拼接后的视频生成配乐，并传给最终混音。"""
         params = VideoParams(
@@ -47,7 +47,7 @@ class TestUploadPostService(unittest.TestCase):
         "app.services.upload_post.config.app",
         {**_CONFIG_BASE, "upload_post_enabled": False},
     )
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_unconfigured_service_skips_request(self, mock_post):
         """功能未启用时不能意外上传文件或消耗第三方 API 配额。"""
         result = UploadPostService().upload_video("/fake/v.mp4", "Title")
@@ -58,7 +58,7 @@ class TestUploadPostService(unittest.TestCase):
 
     @patch("app.services.upload_post.config.app", _CONFIG_BASE)
     @patch("app.services.upload_post.os.path.exists", return_value=False)
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_missing_video_skips_request(self, mock_post, _exists):
         """本地成片不存在时应在发起网络请求前返回明确错误。"""
         result = UploadPostService().upload_video("/missing/v.mp4", "Title")
@@ -70,7 +70,7 @@ class TestUploadPostService(unittest.TestCase):
     @patch("app.services.upload_post.config.app", _CONFIG_BASE)
     @patch("app.services.upload_post.os.path.exists", return_value=True)
     @patch("builtins.open", mock_open(read_data=b"fake"))
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_upload_request_error_returns_failure(self, mock_post, _exists):
         """网络异常需要转换为稳定结果，不能让发布失败中断视频生成任务。"""
         mock_post.side_effect = requests.exceptions.Timeout("upload timed out")
@@ -81,7 +81,7 @@ class TestUploadPostService(unittest.TestCase):
         self.assertIn("upload timed out", result["error"])
 
     @patch("app.services.upload_post.config.app", _CONFIG_BASE)
-    @patch("app.services.upload_post.requests.get")
+    @patch("app.services.upload_post.http_client.get")
     def test_check_status_returns_payload_or_network_failure(self, mock_get):
         """状态查询成功和失败应使用与上传接口一致的返回约定。"""
         response = _mock_response()
@@ -104,7 +104,7 @@ class TestUploadPostYouTubePayload(unittest.TestCase):
     @patch("app.services.upload_post.config.app", _CONFIG_BASE)
     @patch("app.services.upload_post.os.path.exists", return_value=True)
     @patch("builtins.open", mock_open(read_data=b"fake"))
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_youtube_fields_en_payload(self, mock_post, _exists):
         mock_post.return_value = _mock_response()
         svc = UploadPostService()
@@ -126,7 +126,7 @@ class TestUploadPostYouTubePayload(unittest.TestCase):
     @patch("app.services.upload_post.config.app", _CONFIG_BASE)
     @patch("app.services.upload_post.os.path.exists", return_value=True)
     @patch("builtins.open", mock_open(read_data=b"fake"))
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_contains_synthetic_media_siempre_true(self, mock_post, _exists):
         mock_post.return_value = _mock_response()
         svc = UploadPostService()
@@ -142,7 +142,7 @@ class TestUploadPostYouTubePayload(unittest.TestCase):
     })
     @patch("app.services.upload_post.os.path.exists", return_value=True)
     @patch("builtins.open", mock_open(read_data=b"fake"))
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_tiktok_instagram_sin_youtube_fields(self, mock_post, _exists):
         mock_post.return_value = _mock_response()
         svc = UploadPostService()
@@ -159,7 +159,7 @@ class TestUploadPostYouTubePayload(unittest.TestCase):
     })
     @patch("app.services.upload_post.os.path.exists", return_value=True)
     @patch("builtins.open", mock_open(read_data=b"fake"))
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_youtube_extra_ignorado_si_youtube_no_en_platforms(self, mock_post, _exists):
         mock_post.return_value = _mock_response()
         svc = UploadPostService()
@@ -171,7 +171,7 @@ class TestUploadPostYouTubePayload(unittest.TestCase):
     @patch("app.services.upload_post.config.app", _CONFIG_BASE)
     @patch("app.services.upload_post.os.path.exists", return_value=True)
     @patch("builtins.open", mock_open(read_data=b"fake"))
-    @patch("app.services.upload_post.requests.post")
+    @patch("app.services.upload_post.http_client.post")
     def test_endpoint_y_platform_format_correcto(self, mock_post, _exists):
         mock_post.return_value = _mock_response()
         svc = UploadPostService()
@@ -21,7 +21,7 @@ class TestVersionChecker(unittest.TestCase):
         response.json.return_value = {"tag_name": tag_name}
         return response
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_returns_newer_release_version(self, request_get):
         request_get.return_value = self._response("v1.4.0")
 
@@ -34,7 +34,7 @@ class TestVersionChecker(unittest.TestCase):
             timeout=version_checker.RELEASE_CHECK_TIMEOUT,
         )
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_same_or_older_release_does_not_trigger_update(self, request_get):
         for tag_name in ("v1.3.2", "v1.3.1"):
             with self.subTest(tag_name=tag_name):
@@ -43,7 +43,7 @@ class TestVersionChecker(unittest.TestCase):
                     version_checker.get_available_update("v1.3.2")
                 )
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_prerelease_comparison_uses_semantic_versions(self, request_get):
         request_get.return_value = self._response("v1.3.3")
 
@@ -51,26 +51,26 @@ class TestVersionChecker(unittest.TestCase):
 
         self.assertEqual(result, "1.3.3")
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_invalid_current_version_skips_network_request(self, request_get):
         result = version_checker.get_available_update("development")
 
         self.assertIsNone(result)
         request_get.assert_not_called()
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_invalid_release_tag_is_ignored(self, request_get):
         request_get.return_value = self._response("latest")
 
         self.assertIsNone(version_checker.get_available_update("1.3.2"))
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_network_failure_is_ignored(self, request_get):
         request_get.side_effect = requests.Timeout("request timed out")
 
         self.assertIsNone(version_checker.get_available_update("1.3.2"))
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_http_failure_is_ignored(self, request_get):
         response = MagicMock()
         response.raise_for_status.side_effect = requests.HTTPError("rate limited")
@@ -78,7 +78,7 @@ class TestVersionChecker(unittest.TestCase):
 
         self.assertIsNone(version_checker.get_available_update("1.3.2"))
 
-    @patch("app.services.version_checker.requests.get")
+    @patch("app.services.version_checker.http_client.get")
     def test_invalid_json_payload_is_ignored(self, request_get):
         response = MagicMock()
         response.raise_for_status.return_value = None
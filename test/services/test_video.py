@@ -1,15 +1,22 @@
+import json
 import os
 import shutil
 import sys
 import tempfile
+import time
 import types
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import redirect_stdout
 from io import StringIO
 from pathlib import Path
 from unittest.mock import patch
 
+import numpy as np
+from PIL import Image
 from moviepy import (
+    ColorClip,
+    CompositeVideoClip,
     ImageClip,
     VideoFileClip,
 )
@@ -23,6 +30,11 @@ from app.services import video as vd
 from app.utils import utils
 
 resources_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), "resources")
+RUN_BENCHMARKS = os.environ.get("MPT_RUN_BENCHMARKS", "").lower() in {
+    "1",
+    "true",
+    "yes",
+}
 
 
 class _FakeMoviePyClip:
@@ -63,6 +75,16 @@ class TestVideoService(unittest.TestCase):
         vd._runtime_disabled_video_codecs.clear()
         vd._ffmpeg_encoder_exists.cache_clear()
 
+    @staticmethod
+    def _fail_ffmpeg_audio_mix():
+        """
+        让 FFmpeg 混音失败。没有字幕的成片总是先尝试 FFmpeg 混音后复制视频流，
+        MoviePy 混音相关的用例需要走失败后的回退路径。
+        """
+        return patch.object(
+            vd, "prepare_audio_mix", side_effect=RuntimeError("ffmpeg unavailable")
+        )
+
     def test_delete_files_deduplicates_paths_and_ignores_missing_files(self):
         """
         循环片段会让同一路径在拼接列表中重复出现，清理时每个路径只能删除一次。
@@ -126,6 +148,7 @@ class TestVideoService(unittest.TestCase):
         source_video.with_audio_result = final_video
 
         with (
+            self._fail_ffmpeg_audio_mix(),
             patch.object(
                 vd, "_open_video_clip_quietly", return_value=source_video
             ),
@@ -166,6 +189,7 @@ class TestVideoService(unittest.TestCase):
         source_video.with_audio_result = final_video
 
         with (
+            self._fail_ffmpeg_audio_mix(),
             patch.object(
                 vd, "_open_video_clip_quietly", return_value=source_video
             ),
@@ -191,7 +215,12 @@ class TestVideoService(unittest.TestCase):
         self.assertFalse(result)
         writer.assert_called_once()
         composite_audio.assert_not_called()
-        log_exception.assert_called_once()
+        bgm_errors = [
+            call
+            for call in log_exception.call_args_list
+            if "failed to mix background music" in call.args[0]
+        ]
+        self.assertEqual(len(bgm_errors), 1)
         self.assertEqual(source_video.close_calls, 1)
         self.assertEqual(voice_source.close_calls, 1)
         self.assertEqual(final_video.close_calls, 1)
@@ -219,6 +248,7 @@ class TestVideoService(unittest.TestCase):
                 source_video.with_audio_result = final_video
 
                 with (
+                    self._fail_ffmpeg_audio_mix(),
                     patch.object(
                         vd,
                         "_open_video_clip_quietly",
@@ -254,6 +284,264 @@ class TestVideoService(unittest.TestCase):
                 self.assertEqual(voice_source.close_calls, 1)
                 self.assertEqual(final_video.close_calls, 1)
 
+    def test_prepare_audio_mix_encodes_once_and_reuses_track(self):
+        """同一旁白和 BGM 只混音一次，音量变化时生成新的音轨。"""
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        voice_file = os.path.join(temp_dir, "voice.mp3")
+        bgm_file = os.path.join(temp_dir, "bgm.mp3")
+        Path(voice_file).write_bytes(b"voice")
+        Path(bgm_file).write_bytes(b"bgm")
+        params = vd.VideoParams(
+            video_subject="test",
+            bgm_type="custom",
+            bgm_file=bgm_file,
+            bgm_volume=0.3,
+        )
+
+        def fake_run(command, capture_output, text, check):
+            Path(command[-1]).write_bytes(b"audio")
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        with (
+            patch.object(
+                vd,
+                "AudioFileClip",
+                side_effect=lambda _path: _FakeMoviePyClip(duration=6),
+            ),
+            patch.object(vd, "get_bgm_file", return_value=bgm_file),
+            patch.object(vd, "_read_audio_duration", return_value=10),
+            patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+        ):
+            first, first_ok = vd.prepare_audio_mix(voice_file, params, temp_dir)
+            second, second_ok = vd.prepare_audio_mix(voice_file, params, temp_dir)
+            self.assertEqual(run.call_count, 1)
+            command = run.call_args.args[0]
+            params.bgm_volume = 0.5
+            third, _ = vd.prepare_audio_mix(voice_file, params, temp_dir)
+
+        self.assertTrue(first_ok and second_ok)
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertTrue(os.path.basename(first).startswith("audio-mix-"))
+        audio_filter = command[command.index("-filter_complex") + 1]
+        self.assertIn("[1:a]aformat=channel_layouts=stereo,volume=0.3", audio_filter)
+        self.assertIn("aloop=loop=-1", audio_filter)
+        self.assertIn("amix=inputs=2:duration=first", audio_filter)
+        self.assertEqual(command[command.index("-t") + 1], "6.000000")
+        self.assertEqual(command[command.index("-c:a") + 1], "aac")
+
+    def test_generate_video_copies_prepared_audio_mix(self):
+        """FFmpeg 混音成功后成片只复制音轨，不再打开旁白和 BGM。"""
+        config.app["audio_mix_backend"] = "ffmpeg"
+        params = vd.VideoParams(video_subject="test", subtitle_enabled=False)
+        source_video = _FakeMoviePyClip()
+
+        with (
+            patch.object(
+                vd, "prepare_audio_mix", return_value=("audio-mix.m4a", False)
+            ) as prepare,
+            patch.object(
+                vd, "_open_video_clip_quietly", return_value=source_video
+            ),
+            patch.object(vd, "AudioFileClip") as audio_file_clip,
+            patch.object(vd, "_write_videofile_with_codec_fallback") as writer,
+            patch.object(vd, "_get_configured_video_codec", return_value="libx264"),
+        ):
+            result = vd.generate_video(
+                video_path="combined.mp4",
+                audio_path="voice.mp3",
+                subtitle_path="",
+                output_file="final.mp4",
+                params=params,
+            )
+
+        self.assertFalse(result)
+        prepare.assert_called_once()
+        audio_file_clip.assert_not_called()
+        self.assertEqual(writer.call_args.kwargs["audio"], "audio-mix.m4a")
+        self.assertEqual(writer.call_args.kwargs["audio_codec"], "copy")
+        self.assertEqual(source_video.close_calls, 1)
+
+    def test_generate_video_remuxes_without_subtitles(self):
+        """没有字幕时直接复制拼接视频的画面，只挂上混好的音轨。"""
+        config.app["audio_mix_backend"] = "ffmpeg"
+        params = vd.VideoParams(video_subject="test", subtitle_enabled=False)
+
+        def fake_run(command, capture_output, text, check):
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        with (
+            patch.object(
+                vd, "prepare_audio_mix", return_value=("audio-mix.m4a", True)
+            ),
+            patch.object(vd, "_read_video_duration", return_value=12.5),
+            patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+            patch.object(vd, "_open_video_clip_quietly") as open_clip,
+            patch.object(vd, "_write_videofile_with_codec_fallback") as writer,
+        ):
+            result = vd.generate_video(
+                video_path="combined.mp4",
+                audio_path="voice.mp3",
+                subtitle_path="subtitle.srt",
+                output_file="final.mp4",
+                params=params,
+            )
+
+        self.assertTrue(result)
+        open_clip.assert_not_called()
+        writer.assert_not_called()
+        command = run.call_args.args[0]
+        self.assertEqual(command[command.index("-c") + 1], "copy")
+        self.assertEqual(
+            command[command.index("-i") : command.index("-map")],
+            ["-i", "combined.mp4", "-i", "audio-mix.m4a"],
+        )
+        self.assertEqual(command[command.index("-t") + 1], "12.500")
+        self.assertEqual(command[-1], "final.mp4")
+
+    def test_generate_video_remuxes_without_subtitles_by_default(self):
+        """默认的 MoviePy 混音配置下，没有字幕的成片也先混音再复制视频流。"""
+        config.app.pop("audio_mix_backend", None)
+        config.app.pop("final_encode_segment_duration", None)
+        params = vd.VideoParams(video_subject="test", subtitle_enabled=False)
+
+        with (
+            patch.object(
+                vd, "prepare_audio_mix", return_value=("audio-mix.m4a", True)
+            ) as prepare,
+            patch.object(vd, "_remux_video_with_audio") as remux,
+            patch.object(vd, "_open_video_clip_quietly") as open_clip,
+            patch.object(vd, "_write_videofile_with_codec_fallback") as writer,
+        ):
+            result = vd.generate_video(
+                video_path="combined.mp4",
+                audio_path="voice.mp3",
+                subtitle_path="",
+                output_file="final.mp4",
+                params=params,
+            )
+
+        self.assertTrue(result)
+        prepare.assert_called_once()
+        remux.assert_called_once_with("combined.mp4", "audio-mix.m4a", "final.mp4")
+        open_clip.assert_not_called()
+        writer.assert_not_called()
+
+    def test_plan_final_encode_segments_aligns_to_gop(self):
+        """片段边界取整为整数个 2 秒 GOP，不足一个 GOP 的尾巴并入前一段。"""
+        self.assertEqual(
+            vd._plan_final_encode_segments(25, fps=30, segment_duration=7),
+            [(0.0, 8.0), (8.0, 16.0), (16.0, None)],
+        )
+        self.assertEqual(
+            vd._plan_final_encode_segments(17, fps=30, segment_duration=8),
+            [(0.0, 8.0), (8.0, None)],
+        )
+        self.assertEqual(
+            vd._plan_final_encode_segments(5, fps=30, segment_duration=8),
+            [(0.0, None)],
+        )
+        self.assertEqual(
+            vd._plan_final_encode_segments(25, fps=30, segment_duration=0), []
+        )
+
+    def test_encode_final_video_in_segments_concats_with_stream_copy(self):
+        """各片段并行编码后用 concat demuxer 流复制拼接，并挂上混好的音轨。"""
+        params = vd.VideoParams(video_subject="test", n_threads=2)
+        segments = [(0.0, 8.0), (8.0, None)]
+        encoded = []
+        concat_lists = []
+
+        def fake_encode(*args):
+            start_time, end_time, output_file, codec, _settings, threads = args[6:]
+            Path(output_file).write_bytes(b"segment")
+            encoded.append((start_time, end_time, threads))
+            return codec
+
+        def fake_run(command, capture_output, text, check):
+            concat_lists.append(Path(command[command.index("-i") + 1]).read_text())
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file = os.path.join(temp_dir, "final-1.mp4")
+            with (
+                patch.object(
+                    vd, "ProcessPoolExecutor", lambda **_kwargs: ThreadPoolExecutor(2)
+                ),
+                patch.object(vd.os, "cpu_count", return_value=4),
+                patch.object(vd, "_encode_final_video_segment", fake_encode),
+                patch.object(vd, "_get_effective_video_codec", return_value="libx264"),
+                patch.object(vd, "_read_video_duration", return_value=12.0),
+                patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+            ):
+                vd._encode_final_video_in_segments(
+                    video_path="combined.mp4",
+                    subtitle_path="subtitle.srt",
+                    audio_mix_file="audio-mix.m4a",
+                    output_file=output_file,
+                    params=params,
+                    font_path="font.ttf",
+                    video_width=1080,
+                    video_height=1920,
+                    segments=segments,
+                    render_settings=vd.get_render_settings("standard"),
+                )
+            leftovers = sorted(os.listdir(temp_dir))
+
+        self.assertEqual(sorted(encoded), [(0.0, 8.0, 1), (8.0, None, 1)])
+        self.assertEqual(concat_lists[0].count("file '"), 2)
+        self.assertIn("segment-000.mp4", concat_lists[0].splitlines()[0])
+        command = run.call_args.args[0]
+        self.assertEqual(command[command.index("-c") + 1], "copy")
+        self.assertIn("audio-mix.m4a", command)
+        self.assertEqual(command[command.index("-t") + 1], "12.000")
+        self.assertEqual(leftovers, [])
+
+    def test_generate_video_falls_back_when_segmented_encode_fails(self):
+        """分段编码失败时回退到整段编码，仍复制 FFmpeg 混好的音轨。"""
+        config.app["final_encode_segment_duration"] = 8
+        params = vd.VideoParams(video_subject="test", n_threads=2)
+        source_video = _FakeMoviePyClip()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subtitle_path = os.path.join(temp_dir, "subtitle.srt")
+            Path(subtitle_path).write_text("", encoding="utf-8")
+            with (
+                patch.object(vd, "_read_video_duration", return_value=25.0),
+                patch.object(
+                    vd, "prepare_audio_mix", return_value=("audio-mix.m4a", True)
+                ) as prepare,
+                patch.object(vd, "_get_subtitle_font_path", return_value="font.ttf"),
+                patch.object(
+                    vd,
+                    "_encode_final_video_in_segments",
+                    side_effect=RuntimeError("worker crashed"),
+                ) as segmented,
+                patch.object(
+                    vd, "_open_video_clip_quietly", return_value=source_video
+                ),
+                patch.object(vd, "_apply_subtitle_timeline", return_value=source_video),
+                patch.object(vd, "_write_videofile_with_codec_fallback") as writer,
+                patch.object(vd, "_get_configured_video_codec", return_value="libx264"),
+                patch.object(vd.logger, "exception"),
+            ):
+                result = vd.generate_video(
+                    video_path="combined.mp4",
+                    audio_path="voice.mp3",
+                    subtitle_path=subtitle_path,
+                    output_file="final.mp4",
+                    params=params,
+                )
+
+        self.assertTrue(result)
+        prepare.assert_called_once()
+        self.assertEqual(
+            segmented.call_args.kwargs["segments"],
+            [(0.0, 8.0), (8.0, 16.0), (16.0, None)],
+        )
+        self.assertEqual(writer.call_args.kwargs["audio"], "audio-mix.m4a")
+
     def test_generate_video_chooses_looping_by_bgm_file_source(self):
         """默认曲库需要循环，任务层提供的时长适配文件不应依赖提供商名称。"""
         test_cases = [
@@ -279,6 +567,7 @@ class TestVideoService(unittest.TestCase):
                 source_video.with_audio_result = final_video
 
                 with (
+                    self._fail_ffmpeg_audio_mix(),
                     patch.object(
                         vd,
                         "_open_video_clip_quietly",
@@ -326,14 +615,20 @@ class TestVideoService(unittest.TestCase):
         m.provider = "local"
         print(m)
 
+        output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, output_dir, True)
         try:
-            materials = vd.preprocess_video([m], clip_duration=4)
+            materials = vd.preprocess_video([m], clip_duration=4, output_dir=output_dir)
             print(materials)
 
             # verify result
             self.assertIsNotNone(materials)
             self.assertEqual(len(materials), 1)
             self.assertTrue(materials[0].url.endswith(".mp4"))
+            # 图片片段写到视频缓存目录，不能留在 local_videos 素材目录里。
+            self.assertEqual(
+                os.path.dirname(materials[0].url), utils.storage_dir("cache_videos")
+            )
 
             # moviepy get video info
             clip = VideoFileClip(materials[0].url)
@@ -343,8 +638,7 @@ class TestVideoService(unittest.TestCase):
                 clip.close()
 
             # clean generated test video file
-            if os.path.exists(materials[0].url):
-                os.remove(materials[0].url)
+            vd.delete_files([materials[0].url, f"{materials[0].url}.lock"])
         finally:
             if os.path.exists(safe_img_path):
                 os.remove(safe_img_path)
@@ -360,6 +654,91 @@ class TestVideoService(unittest.TestCase):
 
         self.assertEqual(materials, [])
 
+    def test_render_image_material_uses_ffmpeg_and_reuses_cached_output(self):
+        """
+        图片直接渲染到目标画幅并写入视频缓存目录；默认配置下另一个任务使用
+        相同内容和参数时直接复用，不再启动 FFmpeg，也不会在素材目录旁边
+        留下渲染结果。
+        """
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, True)
+        image_dir, cache_dir, first_task, second_task = (
+            os.path.join(temp_dir, name)
+            for name in ("local_videos", "cache_videos", "task-1", "task-2")
+        )
+        for directory in (image_dir, cache_dir, first_task, second_task):
+            os.makedirs(directory)
+        image_path = os.path.join(image_dir, "image.png")
+        shutil.copy2(self.test_img_path, image_path)
+
+        def fake_run(command, capture_output, text, check):
+            Path(command[-1]).write_bytes(b"video")
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        with (
+            patch.object(vd.utils, "storage_dir", return_value=cache_dir),
+            patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+        ):
+            first = vd._render_image_material(
+                image_path, 4, 1080, 1920, 1200, 900, first_task
+            )
+            second = vd._render_image_material(
+                image_path, 4, 1080, 1920, 1200, 900, second_task
+            )
+
+        self.assertEqual(run.call_count, 1)
+        cache_key = vd._image_clip_cache_key(image_path, 4, 1080, 1920)
+        self.assertEqual(first, os.path.join(cache_dir, f"img-{cache_key[:32]}.mp4"))
+        self.assertEqual(second, first)
+        self.assertEqual(Path(first).read_bytes(), b"video")
+        self.assertEqual(os.listdir(image_dir), ["image.png"])
+        self.assertNotIn(f"img-{cache_key[:32]}.mp4.part", os.listdir(cache_dir))
+        command = run.call_args.args[0]
+        self.assertEqual(command[command.index("-loop") + 1], "1")
+        self.assertEqual(command[command.index("-t") + 1], "4.000000")
+        video_filter = command[command.index("-vf") + 1]
+        self.assertIn("premultiply=inplace=1,scale=1080:810", video_filter)
+        self.assertIn("perspective=", video_filter)
+        self.assertTrue(video_filter.endswith("pad=1080:1920:0:555:black"))
+        self.assertNotEqual(
+            cache_key, vd._image_clip_cache_key(image_path, 4, 1920, 1080)
+        )
+
+    def test_render_image_materials_keeps_order_and_respects_thread_limit(self):
+        """
+        并发渲染的完成顺序不固定，写回的 url 仍要和素材一一对应；默认配置下
+        就会并发渲染，并发数受任务线程数和 CPU 核数约束。
+        """
+        config.app.pop("video_clip_parallel", None)
+        materials = [MaterialInfo(provider="local", url=f"{i}.png") for i in range(4)]
+        jobs = [(m, m.url, 1200, 900) for m in materials]
+        worker_counts = []
+
+        def fake_render(image_path, clip_duration, width, height, *_args):
+            time.sleep(0.01 * (4 - int(image_path[0])))
+            return f"{image_path}.{width}x{height}.mp4"
+
+        def fake_executor(max_workers):
+            worker_counts.append(max_workers)
+            return ThreadPoolExecutor(max_workers)
+
+        with (
+            patch.object(vd.os, "cpu_count", return_value=8),
+            patch.object(vd, "ThreadPoolExecutor", side_effect=fake_executor),
+            patch.object(vd, "_render_image_material", side_effect=fake_render),
+        ):
+            vd._render_image_materials(jobs, 4, "9:16", threads=2, output_dir="/task")
+            with patch.object(vd.os, "cpu_count", return_value=3):
+                vd._render_image_materials(
+                    jobs, 4, "9:16", threads=16, output_dir="/task"
+                )
+
+        self.assertEqual(worker_counts, [2, 3])
+        self.assertEqual(
+            [m.url for m in materials],
+            [f"{i}.png.1080x1920.mp4" for i in range(4)],
+        )
+
     def test_get_bgm_file_accepts_song_directory_filename(self):
         """
         BGM 列表接口现在只暴露文件名；生成视频时应能把文件名安全解析回
@@ -864,6 +1243,530 @@ class TestVideoService(unittest.TestCase):
         self.assertEqual(write_mock.call_count, 4)
         self.assertEqual(concat_mock.call_args.kwargs["max_duration"], 10.0)
 
+    def test_get_clip_worker_count_follows_threads_and_cpu_count(self):
+        """并行编码默认关闭；开启后进程数同时受 n_threads 和 CPU 核数约束。"""
+        config.app.pop("video_clip_parallel", None)
+        self.assertEqual(vd._get_clip_worker_count(8), 1)
+
+        config.app["video_clip_parallel"] = True
+        with patch.object(vd.os, "cpu_count", return_value=4):
+            self.assertEqual(vd._get_clip_worker_count(8), 4)
+            self.assertEqual(vd._get_clip_worker_count(2), 2)
+            self.assertEqual(vd._get_clip_worker_count(0), 1)
+
+    def test_process_planned_clips_refills_failed_clips_and_keeps_order(self):
+        """
+        进程池和逐个编码共用同一套规划：只提交覆盖所需时长的片段，有片段
+        失败时再从后续候选补足，返回结果必须保持候选顺序。
+        """
+        items = [
+            vd.SubClippedVideoClip(f"clip-{index}.mp4", 0, 3)
+            for index in range(6)
+        ]
+
+        def fake_process(index, subclipped_item, **_kwargs):
+            processed_indexes.append(index)
+            if index == 1:
+                return None
+            return vd.SubClippedVideoClip(
+                file_path=f"temp-clip-{index + 1}.mp4",
+                duration=3,
+                source_file_path=subclipped_item.file_path,
+            )
+
+        for worker_count in (1, 2):
+            processed_indexes = []
+            with (
+                self.subTest(worker_count=worker_count),
+                patch.object(
+                    vd, "ProcessPoolExecutor", lambda **_kwargs: ThreadPoolExecutor(2)
+                ),
+                patch.object(vd, "_process_subclipped_item", side_effect=fake_process),
+                patch.object(vd, "_get_effective_video_codec", return_value="libx264"),
+                patch.object(vd, "_get_configured_video_codec", return_value="libx264"),
+            ):
+                planned, clips = vd._process_planned_clips(
+                    subclipped_items=items,
+                    required_video_duration=7,
+                    worker_count=worker_count,
+                    clip_options={"clip_speed": 1.0, "max_clip_duration": 5},
+                )
+
+                self.assertEqual(
+                    [clip.file_path for clip in clips],
+                    ["temp-clip-1.mp4", "temp-clip-3.mp4", "temp-clip-4.mp4"],
+                )
+                self.assertEqual(
+                    [item.file_path for item in planned],
+                    ["clip-0.mp4", "clip-2.mp4", "clip-3.mp4"],
+                )
+                # 未开启按需裁剪时保留完整源区间。
+                self.assertEqual(planned[-1].end_time, 3)
+                self.assertEqual(sorted(processed_indexes), [0, 1, 2, 3])
+
+    def test_plan_clip_timeline_trims_last_clip_to_remaining_duration(self):
+        """
+        规划只取覆盖所需时长的候选片段，越界的最后一段按播放速度裁剪源区间；
+        剩余时长过短时保留最短时长，流复制片段保持关键帧对齐的原始区间。
+        """
+        items = [
+            vd.SubClippedVideoClip(f"clip-{index}.mp4", 10, 14) for index in range(4)
+        ]
+
+        planned = vd._plan_clip_timeline(
+            items, required_duration=5.5, clip_speed=2.0, max_clip_duration=5
+        )
+        self.assertEqual(
+            [(item.file_path, item.start_time, item.end_time) for item in planned],
+            [("clip-0.mp4", 10, 14), ("clip-1.mp4", 10, 14), ("clip-2.mp4", 10, 13.0)],
+        )
+        self.assertEqual(planned[2].duration, 3.0)
+        self.assertIs(planned[0], items[0])
+
+        planned = vd._plan_clip_timeline(
+            items, required_duration=4.3, clip_speed=2.0, max_clip_duration=5
+        )
+        self.assertEqual(planned[-1].end_time, 12.0)
+
+        items[2].stream_copy = True
+        planned = vd._plan_clip_timeline(
+            items, required_duration=4.3, clip_speed=2.0, max_clip_duration=5
+        )
+        self.assertIs(planned[-1], items[2])
+
+    def test_combine_videos_trim_to_need_encodes_planned_ranges_and_writes_timeline(self):
+        """
+        开启按需裁剪后，最后一个片段只编码需要的源区间，不再整段编码后
+        由拼接阶段截掉；时间线 JSON 记录每个片段的来源和在成片中的位置。
+        """
+        config.app["video_clip_trim_to_need"] = True
+        items = [
+            vd.SubClippedVideoClip(
+                f"clip-{index}.mp4", 0, 4, source_file_path=f"src-{index}.mp4"
+            )
+            for index in range(4)
+        ]
+        processed = []
+
+        def fake_process(index, subclipped_item, **_kwargs):
+            processed.append((index, round(subclipped_item.end_time, 3)))
+            if index == 1:
+                return None
+            return vd.SubClippedVideoClip(
+                file_path=f"temp-clip-{index + 1}.mp4",
+                duration=subclipped_item.duration,
+                source_file_path=subclipped_item.source_file_path,
+            )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            combined_video_path = os.path.join(temp_dir, "combined-1.mp4")
+            with (
+                patch.object(vd, "_read_audio_duration", return_value=9.0),
+                patch.object(vd, "_plan_subclipped_items", return_value=items),
+                patch.object(vd, "_process_subclipped_item", side_effect=fake_process),
+                patch.object(vd, "concat_video_clips_with_ffmpeg") as concat_mock,
+                patch.object(vd, "delete_files"),
+            ):
+                vd.combine_videos(
+                    combined_video_path=combined_video_path,
+                    video_paths=["a.mp4"],
+                    audio_file=os.path.join(temp_dir, "audio.mp3"),
+                    video_concat_mode=vd.VideoConcatMode.sequential,
+                    max_clip_duration=5,
+                    threads=1,
+                )
+            with open(
+                os.path.join(temp_dir, "combined-1.timeline.json"), encoding="utf-8"
+            ) as fp:
+                timeline = json.load(fp)
+
+        # 首批规划的第 3 段只需要 1.1s；第 2 段失败后按剩余 4s 补上第 4 段。
+        self.assertEqual(processed, [(0, 4), (1, 4), (2, 1.1), (3, 4)])
+        self.assertEqual(
+            concat_mock.call_args.kwargs["clip_files"],
+            ["temp-clip-1.mp4", "temp-clip-3.mp4", "temp-clip-4.mp4"],
+        )
+        self.assertEqual(timeline["required_duration"], 9.1)
+        self.assertEqual(
+            [
+                (clip["source"], clip["timeline_start"], clip["source_end"])
+                for clip in timeline["clips"]
+            ],
+            [("src-0.mp4", 0.0, 4), ("src-2.mp4", 4.0, 1.1), ("src-3.mp4", 5.1, 4)],
+        )
+
+    def test_plan_stream_copy_ranges_snaps_cuts_to_keyframes(self):
+        """
+        流复制片段只能从关键帧开始。切点向前吸附到关键帧后，各段仍需首尾
+        相接且不超过最大片段时长；关键帧过稀时整条素材回退重编码。
+        """
+        metadata = vd.media_probe.VideoMetadata(
+            duration=10,
+            width=1080,
+            height=1920,
+            fps=30,
+            codec="h264",
+            pix_fmt="yuv420p",
+            rotation=0,
+            has_audio=False,
+            keyframes=(0.0, 1.5, 3.0, 4.5, 6.0, 7.5, 9.0),
+        )
+        ranges = vd._plan_stream_copy_ranges(
+            "clip.mp4",
+            metadata,
+            clip_duration=10,
+            source_clip_duration=4,
+            sequential=False,
+            target_size=(1080, 1920),
+        )
+        landscape_ranges = vd._plan_stream_copy_ranges(
+            "clip.mp4",
+            metadata,
+            clip_duration=10,
+            source_clip_duration=4,
+            sequential=False,
+            target_size=(1920, 1080),
+        )
+        sparse_ranges = vd._plan_stream_copy_ranges(
+            "clip.mp4",
+            metadata,
+            clip_duration=10,
+            source_clip_duration=1,
+            sequential=False,
+            target_size=(1080, 1920),
+        )
+
+        self.assertEqual(ranges, [(0.0, 3.0), (3.0, 6.0), (6.0, 10)])
+        self.assertIsNone(landscape_ranges)
+        self.assertIsNone(sparse_ranges)
+
+    def test_plan_stream_copy_ranges_scans_keyframes_only_for_compatible_material(
+        self,
+    ):
+        """关键帧扫描要读完整条素材，只有格式兼容、确实可能流复制时才进行。"""
+        metadata = vd.media_probe.VideoMetadata(
+            duration=10,
+            width=1080,
+            height=1920,
+            fps=30,
+            codec="h264",
+            pix_fmt="yuv420p",
+            rotation=0,
+            has_audio=False,
+        )
+        with patch.object(
+            vd.media_index, "get_keyframes", return_value=(0.0, 4.0, 8.0)
+        ) as get_keyframes:
+            incompatible = vd._plan_stream_copy_ranges(
+                "clip.mp4",
+                metadata,
+                clip_duration=10,
+                source_clip_duration=4,
+                sequential=False,
+                target_size=(1920, 1080),
+            )
+            get_keyframes.assert_not_called()
+            ranges = vd._plan_stream_copy_ranges(
+                "clip.mp4",
+                metadata,
+                clip_duration=10,
+                source_clip_duration=4,
+                sequential=False,
+                target_size=(1080, 1920),
+            )
+
+        self.assertIsNone(incompatible)
+        get_keyframes.assert_called_once_with("clip.mp4")
+        self.assertEqual(ranges, [(0.0, 4.0), (4.0, 8.0), (8.0, 10)])
+
+    def test_combine_videos_only_plans_stream_copy_without_effects(self):
+        """转场或变速都需要重新编码，此时规划阶段不能启用流复制。"""
+        config.app["video_stream_copy"] = True
+        cases = (
+            (None, 1.0, (1080, 1920)),
+            (vd.VideoTransitionMode.fade_in, 1.0, None),
+            (None, 1.5, None),
+        )
+        for transition, speed, expected_size in cases:
+            with self.subTest(transition=transition, speed=speed):
+                with (
+                    patch.object(vd, "_read_audio_duration", return_value=5.0),
+                    patch.object(
+                        vd, "_plan_subclipped_items", return_value=[]
+                    ) as plan,
+                ):
+                    vd.combine_videos(
+                        combined_video_path="/tmp/combined.mp4",
+                        video_paths=["clip.mp4"],
+                        audio_file="audio.mp3",
+                        video_transition_mode=transition,
+                        clip_speed=speed,
+                    )
+
+                self.assertEqual(
+                    plan.call_args.kwargs["stream_copy_size"], expected_size
+                )
+
+    def test_process_subclipped_item_reuses_cached_clip_without_encoding(self):
+        """缓存命中时直接复用标准化片段，不能再打开素材或重新编码。"""
+        item = vd.SubClippedVideoClip(
+            "material.mp4", 0, 3, width=1080, height=1920
+        )
+
+        with (
+            patch.object(vd, "_get_clip_cache_key", return_value="k" * 64),
+            patch.object(vd.clip_cache, "restore_clip", return_value=2.9) as restore,
+            patch.object(vd, "_open_video_clip_quietly") as open_clip,
+            patch.object(vd, "_write_videofile_with_codec_fallback") as write,
+        ):
+            processed = vd._process_subclipped_item(
+                0,
+                item,
+                output_dir="/task",
+                video_width=1080,
+                video_height=1920,
+                clip_speed=1.0,
+                max_clip_duration=3,
+                transition_value=None,
+                codec="libx264",
+            )
+
+        restore.assert_called_once_with("k" * 64, "/task/temp-clip-1.mp4")
+        open_clip.assert_not_called()
+        write.assert_not_called()
+        self.assertEqual(processed.file_path, "/task/temp-clip-1.mp4")
+        self.assertEqual(processed.duration, 2.9)
+
+    def test_shuffle_transition_is_stable_for_the_same_source_range(self):
+        """
+        shuffle 模式按素材内容和源区间固定转场，重复渲染同一片段得到相同的
+        缓存键，才能命中片段缓存。
+        """
+        config.app["video_clip_cache_max_mb"] = 10
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source_file = os.path.join(temp_dir, "material.mp4")
+            Path(source_file).write_bytes(b"material")
+            items = [
+                vd.SubClippedVideoClip(source_file, start, start + 3)
+                for start in range(0, 60, 3)
+            ]
+            keys = []
+            with (
+                patch.object(vd, "_get_clip_cache_key", return_value=None) as key,
+                patch.object(
+                    vd, "_open_video_clip_quietly", side_effect=OSError("skip")
+                ),
+                patch.object(vd.logger, "error"),
+            ):
+                for _ in range(2):
+                    for item in items:
+                        vd._process_subclipped_item(
+                            0,
+                            item,
+                            output_dir=temp_dir,
+                            video_width=1080,
+                            video_height=1920,
+                            clip_speed=1.0,
+                            max_clip_duration=3,
+                            transition_value=vd.VideoTransitionMode.shuffle.value,
+                            codec="libx264",
+                        )
+                    keys.append(
+                        [
+                            (call.kwargs["transition"], call.kwargs["transition_side"])
+                            for call in key.call_args_list[-len(items) :]
+                        ]
+                    )
+
+        self.assertEqual(keys[0], keys[1])
+        # 不同源区间仍然各自随机，shuffle 不会退化成同一种转场。
+        self.assertGreater(len({transition for transition, _ in keys[0]}), 1)
+
+    def test_fit_geometry_matches_letterbox_rules(self):
+        """同比例直接缩放，横屏转竖屏按宽度缩放后上下居中补黑边。"""
+        self.assertIsNone(vd._fit_geometry(1080, 1920, 1080, 1920))
+        self.assertEqual(vd._fit_geometry(720, 1280, 1080, 1920), (1080, 1920, 0, 0))
+        self.assertEqual(vd._fit_geometry(1920, 1080, 1080, 1920), (1080, 607, 0, 656))
+        self.assertEqual(vd._fit_geometry(1080, 1920, 1920, 1080), (607, 1080, 656, 0))
+        self.assertEqual(
+            vd._ffmpeg_fit_filter(1920, 1080, 1080, 1920),
+            "scale=1080:607,pad=1080:1920:0:656:black",
+        )
+
+    def test_pad_clip_to_canvas_places_frame_on_black_canvas(self):
+        """补黑边只把画面写进预分配画布的中间区域，不再叠加整幅 ColorClip。"""
+        frame = np.full((4, 6, 3), 200, dtype=np.uint8)
+        clip = ImageClip(frame).with_duration(1)
+
+        padded = vd._pad_clip_to_canvas(clip, 6, 10, 0, 3)
+        first = padded.get_frame(0)
+
+        self.assertEqual(padded.size, (6, 10))
+        self.assertTrue((first[3:7] == 200).all())
+        self.assertTrue((first[:3] == 0).all())
+        self.assertTrue((first[7:] == 0).all())
+        self.assertTrue(np.shares_memory(first, padded.get_frame(0.5)))
+
+    def test_render_profile_scales_resolution_and_subtitles(self):
+        """draft 半分辨率输出，字号按比例缩小且保留至少 1 像素描边。"""
+        self.assertEqual(vd.get_render_resolution("9:16", "draft"), (540, 960))
+        self.assertEqual(vd.get_render_resolution("16:9", "final"), (1920, 1080))
+        self.assertEqual(vd.get_render_resolution("1:1", None), (1080, 1080))
+        self.assertEqual(vd.get_render_settings("unknown").fps, vd.fps)
+
+        params = vd.VideoParams(video_subject="test", font_size=61, stroke_width=1.5)
+        draft_params = vd._scale_subtitle_params(
+            params, vd.get_render_settings("draft")
+        )
+        self.assertEqual(draft_params.font_size, 30)
+        self.assertEqual(draft_params.stroke_width, 1.0)
+        self.assertIs(
+            vd._scale_subtitle_params(params, vd.get_render_settings("final")),
+            params,
+        )
+
+    def test_write_videofile_uses_profile_preset_for_software_encoder_only(self):
+        """硬件编码器不认识 x264 预设，回退到 libx264 时才使用档位预设。"""
+        clip = types.SimpleNamespace(write_videofile=None)
+        calls = []
+
+        def write_videofile(output_file, codec, **kwargs):
+            calls.append((codec, kwargs.get("preset")))
+            if codec != "libx264":
+                raise RuntimeError("hardware encoder failed")
+
+        clip.write_videofile = write_videofile
+        with patch.object(vd, "_get_effective_video_codec", return_value="h264_nvenc"):
+            vd._write_videofile_with_codec_fallback(
+                clip,
+                "out.mp4",
+                codec="h264_nvenc",
+                render_settings=vd.get_render_settings("draft"),
+                fps=15,
+            )
+
+        self.assertEqual(calls, [("h264_nvenc", "medium"), ("libx264", "ultrafast")])
+
+    def test_process_subclipped_item_encodes_draft_profile_with_ffmpeg(self):
+        """
+        draft 档位的片段按预览分辨率、帧率和快速预设编码；滤镜里的统一帧率
+        和缩放转场的总帧数也要按 draft 帧率计算。
+        """
+        item = vd.SubClippedVideoClip("material.mp4", 0, 4, width=1920, height=1080)
+
+        def fake_run(command, capture_output, text, check):
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        with (
+            patch.object(vd, "_get_clip_cache_key", return_value=None),
+            patch.object(vd, "_get_effective_video_codec", return_value="libx264"),
+            patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+        ):
+            vd._process_subclipped_item(
+                0,
+                item,
+                output_dir="/task",
+                video_width=540,
+                video_height=960,
+                clip_speed=1.0,
+                max_clip_duration=4,
+                transition_value=vd.VideoTransitionMode.zoom_in.value,
+                codec="libx264",
+                effects_backend="ffmpeg",
+                render_settings=vd.get_render_settings("draft"),
+            )
+
+        command = run.call_args.args[0]
+        video_filter = command[command.index("-vf") + 1]
+        self.assertEqual(command[command.index("-preset") + 1], "ultrafast")
+        self.assertEqual(command[command.index("-r") + 1], "15")
+        self.assertIn("scale=540:303,pad=540:960:0:328:black", video_filter)
+        self.assertIn(",fps=15,", video_filter)
+        # 4 秒片段在 15fps 下共 60 帧。
+        self.assertIn("min(in/60.000000,1)", video_filter)
+
+    def test_process_subclipped_item_applies_transition_with_ffmpeg_backend(self):
+        """FFmpeg 特效后端用一条滤镜链完成适配和转场，不再逐帧走 MoviePy。"""
+        item = vd.SubClippedVideoClip(
+            "material.mp4", 2, 8, width=1920, height=1080
+        )
+
+        def fake_run(command, capture_output, text, check):
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        with (
+            patch.object(vd, "_get_clip_cache_key", return_value=None),
+            patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+            patch.object(vd, "_open_video_clip_quietly") as open_clip,
+        ):
+            processed = vd._process_subclipped_item(
+                0,
+                item,
+                output_dir="/task",
+                video_width=1080,
+                video_height=1920,
+                clip_speed=2.0,
+                max_clip_duration=3,
+                transition_value=vd.VideoTransitionMode.fade_out.value,
+                codec="libx264",
+                effects_backend="ffmpeg",
+            )
+
+        open_clip.assert_not_called()
+        command = run.call_args.args[0]
+        self.assertEqual(command[command.index("-ss") + 1], "2.000000")
+        self.assertEqual(command[command.index("-t") + 1], "6.000000")
+        video_filter = command[command.index("-vf") + 1]
+        self.assertIn("setpts=(PTS-STARTPTS)/2.000000", video_filter)
+        self.assertIn("scale=1080:607,pad=1080:1920:0:656:black", video_filter)
+        self.assertTrue(video_filter.endswith("fade=t=out:st=2.000000:d=1.000000"))
+        self.assertEqual(command[-1], "/task/temp-clip-1.mp4")
+        self.assertEqual(processed.duration, 3)
+
+    def test_process_subclipped_item_falls_back_to_moviepy_when_ffmpeg_fails(self):
+        """
+        FFmpeg 滤镜执行失败时回退到 MoviePy 特效，片段不能因此丢失；
+        回退生成的片段只能发布到 MoviePy 后端的缓存键下。
+        """
+        item = vd.SubClippedVideoClip(
+            "material.mp4", 0, 3, width=1080, height=1920
+        )
+        clip = _FakeMoviePyClip(duration=3)
+        clip.size = (1080, 1920)
+        clip.subclipped = lambda start, end: clip
+
+        def fake_run(command, capture_output, text, check):
+            return types.SimpleNamespace(returncode=1, stdout="", stderr="boom")
+
+        def fake_cache_key(subclipped_item, effects_backend, **_kwargs):
+            return f"{effects_backend}-key"
+
+        with (
+            patch.object(vd, "_get_clip_cache_key", side_effect=fake_cache_key),
+            patch.object(vd.clip_cache, "restore_clip", return_value=None),
+            patch.object(vd.clip_cache, "publish_clip") as publish,
+            patch.object(vd.subprocess, "run", side_effect=fake_run),
+            patch.object(vd, "_open_video_clip_quietly", return_value=clip),
+            patch.object(vd, "_write_videofile_with_codec_fallback") as write,
+            patch.object(vd, "close_clip"),
+        ):
+            processed = vd._process_subclipped_item(
+                0,
+                item,
+                output_dir="/task",
+                video_width=1080,
+                video_height=1920,
+                clip_speed=1.0,
+                max_clip_duration=3,
+                transition_value=None,
+                codec="libx264",
+                effects_backend="ffmpeg",
+            )
+
+        write.assert_called_once()
+        self.assertEqual(processed.duration, 3)
+        self.assertEqual(publish.call_args.args[0], "moviepy-key")
+
     def test_concat_video_clips_limits_output_to_audio_duration(self):
         """最终拼接时应裁到音频时长，避免安全余量带来明显静音尾巴。"""
 
@@ -1047,6 +1950,58 @@ class TestVideoService(unittest.TestCase):
         self.assertEqual(wrapped_text, text)
         self.assertEqual(text_height, 2 * sum(font.getmetrics()))
 
+    def test_glyph_metrics_width_matches_pillow_bbox(self):
+        """字形宽度表累加出的行宽必须与 getbbox 完全一致，换行结果才不会变化。"""
+        rng = np.random.default_rng(10)
+        alphabet = list("abcdefghijklmnopqrstuvwxyzAVWTY0123456789 ,.!?'(){}ăđêôơưấầẩẫậ")
+        font_paths = sorted(
+            path
+            for path in Path(utils.font_dir()).iterdir()
+            if path.suffix.lower() == ".ttf"
+        )
+        for font_path in font_paths:
+            for font_size in (30, 60, 77):
+                metrics = vd._get_glyph_metrics(str(font_path), font_size)
+                for _ in range(50):
+                    text = "".join(rng.choice(alphabet, size=rng.integers(1, 30)))
+                    left, _top, right, _bottom = metrics.font.getbbox(text)
+                    with self.subTest(font=font_path.name, size=font_size, text=text):
+                        self.assertEqual(metrics.measure(text), right - left)
+
+        self.assertIs(
+            vd._get_glyph_metrics(str(font_paths[0]), 60).font,
+            vd._load_font(str(font_paths[0]), 60),
+        )
+
+    @unittest.skipUnless(RUN_BENCHMARKS, "set MPT_RUN_BENCHMARKS=1 to run benchmarks")
+    def test_benchmark_wrap_text_with_glyph_metrics(self):
+        """对比字形宽度表与逐前缀 getbbox 的换行耗时，两者结果必须一致。"""
+        font_path = os.path.join(utils.font_dir(), "BeVietnamPro-Bold.ttf")
+        # 不含空格的长句会走逐字拆分分支，相当于中文字幕的换行场景。
+        alphabet = "ẩđôưAVWaybcmnoptrs,."
+        texts = [
+            "".join(alphabet[(i + j * 7) % len(alphabet)] for j in range(40 + i % 80))
+            for i in range(100)
+        ]
+        exact_metrics = vd._GlyphMetrics(vd._load_font(font_path, 60))
+        exact_metrics.use_table = False
+
+        def run_wrap():
+            started_at = time.perf_counter()
+            results = [vd.wrap_text(text, 972, font_path, 60)[0] for text in texts]
+            return results, time.perf_counter() - started_at
+
+        with patch.object(vd, "_get_glyph_metrics", return_value=exact_metrics):
+            expected, bbox_seconds = run_wrap()
+        results, table_seconds = run_wrap()
+
+        print(
+            f"wrap_text x{len(texts)}: getbbox {bbox_seconds:.3f}s, "
+            f"glyph table {table_seconds:.3f}s"
+        )
+        self.assertEqual(results, expected)
+        self.assertLess(table_seconds, bbox_seconds)
+
     def test_small_subtitle_with_thick_stroke_keeps_a_bottom_margin(self):
         """
         小字号配粗描边是最容易重新触底的比例边界。遍历全部内置字体并读取
@@ -1215,6 +2170,360 @@ class TestVideoService(unittest.TestCase):
         finally:
             clip.close()
 
+    def test_get_render_engine_falls_back_to_moviepy_for_unknown_value(self):
+        """渲染引擎配置拼写错误时必须回退 MoviePy，不能让任务在合成阶段失败。"""
+        config.app.pop("video_render_engine", None)
+        self.assertEqual(vd.get_render_engine(), "moviepy")
+
+        config.app["video_render_engine"] = " FFmpeg "
+        self.assertEqual(vd.get_render_engine(), "ffmpeg")
+
+        config.app["video_render_engine"] = "gstreamer"
+        self.assertEqual(vd.get_render_engine(), "moviepy")
+
+    def test_plan_render_segments_applies_speed_and_loops_to_required_duration(self):
+        """
+        FFmpeg 时间线必须沿用 combine_videos 的规则：按速度折算片段时长、
+        受最大片段时长约束，素材不足时循环复用已选片段。
+        """
+        items = [
+            vd.SubClippedVideoClip("a.mp4", 0, 6, width=1080, height=1920),
+            vd.SubClippedVideoClip("b.mp4", 0, 2, width=1920, height=1080),
+        ]
+
+        segments = vd._plan_render_segments(
+            subclipped_items=items,
+            required_video_duration=10,
+            max_clip_duration=2.5,
+            clip_speed=2.0,
+            transition_value=None,
+        )
+
+        self.assertEqual(
+            [(segment.file_path, segment.duration) for segment in segments],
+            [("a.mp4", 2.5), ("b.mp4", 1.0), ("a.mp4", 2.5), ("b.mp4", 1.0),
+             ("a.mp4", 2.5), ("b.mp4", 1.0)],
+        )
+        self.assertEqual(segments[0].source_duration, 6)
+        self.assertTrue(all(segment.transition is None for segment in segments))
+
+    def test_ffmpeg_fit_filter_matches_moviepy_letterbox_geometry(self):
+        """FFmpeg 画幅适配的缩放尺寸和居中偏移必须与 MoviePy 路径一致。"""
+        self.assertEqual(vd._ffmpeg_fit_filter(1080, 1920, 1080, 1920), "")
+        self.assertEqual(
+            vd._ffmpeg_fit_filter(720, 1280, 1080, 1920), "scale=1080:1920"
+        )
+        self.assertEqual(
+            vd._ffmpeg_fit_filter(1920, 1080, 1080, 1920),
+            "scale=1080:607,pad=1080:1920:0:656:black",
+        )
+
+    def test_render_video_with_ffmpeg_encodes_once_with_mixed_audio(self):
+        """
+        单次编码引擎只能调用一次 FFmpeg：片段裁剪、拼接、字幕和混音都在
+        同一张滤镜图中完成，并按旁白时长截断输出。
+        """
+
+        class _FakeVideoClip:
+            duration = 4.0
+            size = (1920, 1080)
+
+            def close(self):
+                pass
+
+        filter_scripts = []
+
+        def fake_run(command, capture_output, text, check):
+            script_file = command[command.index("-filter_complex_script") + 1]
+            filter_scripts.append(Path(script_file).read_text(encoding="utf-8"))
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        params = vd.VideoParams(
+            video_subject="test",
+            video_clip_duration=3,
+            video_transition_mode=vd.VideoTransitionMode.fade_in,
+            subtitle_enabled=False,
+            bgm_type="random",
+            bgm_volume=0.3,
+        )
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_file = os.path.join(temp_dir, "final-1.mp4")
+            bgm_file = os.path.join(temp_dir, "bgm.mp3")
+            with (
+                patch.object(
+                    vd, "AudioFileClip", return_value=_FakeMoviePyClip(duration=5)
+                ),
+                patch.object(
+                    vd, "_open_video_clip_quietly", return_value=_FakeVideoClip()
+                ),
+                patch.object(vd, "_read_audio_duration", return_value=20.0),
+                patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+            ):
+                bgm_mixed = vd.render_video_with_ffmpeg(
+                    output_file=output_file,
+                    video_paths=["a.mp4"],
+                    audio_file="audio.mp3",
+                    subtitle_path="",
+                    params=params,
+                    video_concat_mode=vd.VideoConcatMode.sequential,
+                    bgm_file_override=bgm_file,
+                )
+            leftovers = os.listdir(temp_dir)
+
+        self.assertTrue(bgm_mixed)
+        self.assertEqual(run.call_count, 1)
+        command = run.call_args.args[0]
+        self.assertEqual(command[command.index("-t", command.index("-map")) + 1], "5.000")
+        self.assertEqual(command[-1], output_file)
+        self.assertEqual(leftovers, [])
+        filter_script = filter_scripts[0]
+        # 顺序模式只取素材开头 3 秒，循环一次后覆盖 5.1 秒所需时长。
+        self.assertIn("concat=n=2:v=1:a=0", filter_script)
+        self.assertIn("fade=t=in:st=0:d=1.000000", filter_script)
+        self.assertIn("pad=1080:1920:0:656:black", filter_script)
+        # 提供商传入的音乐已经适配时长，不能再循环。
+        self.assertNotIn("aloop", filter_script)
+        self.assertIn("amix=inputs=2:duration=first", filter_script)
+
+    def test_prepare_subtitle_overlay_renders_cards_once_per_content(self):
+        """字幕内容和样式不变时复用已有字幕卡，样式变化后重新渲染。"""
+        params = vd.VideoParams(video_subject="test", stroke_width=1.5)
+
+        def fake_render_cards(work_dir, **kwargs):
+            card_file = os.path.join(work_dir, "subtitle-1.png")
+            Image.new("RGBA", (40, 20), (255, 255, 255, 255)).save(card_file)
+            return [(card_file, 54, 1500, 0.0, 2.0)]
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subtitle_file = os.path.join(temp_dir, "subtitle.srt")
+            Path(subtitle_file).write_text(
+                "1\n00:00:00,000 --> 00:00:02,000\nHello\n\n", encoding="utf-8"
+            )
+            with patch.object(
+                vd, "_render_subtitle_cards", side_effect=fake_render_cards
+            ) as render:
+                manifest = vd.prepare_subtitle_overlay(subtitle_file, params, temp_dir)
+                # 渲染字幕时会把描边宽度就地取整，复用判断不能因此失效。
+                params.stroke_width = 1
+                reused = vd.prepare_subtitle_overlay(subtitle_file, params, temp_dir)
+                params.font_size = 72
+                vd.prepare_subtitle_overlay(subtitle_file, params, temp_dir)
+
+            track = vd._load_subtitle_overlay(manifest)
+
+        self.assertEqual(manifest, reused)
+        self.assertEqual(render.call_count, 2)
+        self.assertEqual(
+            track,
+            (
+                os.path.join(temp_dir, "subtitle-overlay", "subtitle-track.ffconcat"),
+                54,
+                1500,
+            ),
+        )
+
+    def test_build_subtitle_card_track_sequences_cards_on_one_canvas(self):
+        """
+        字幕卡贴到同一尺寸的画布上按时长排成一条序列，空档用空白画布填充，
+        时间重叠时截断前一条；无论多少条字幕都只需要一个输入和一次 overlay。
+        """
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cards = []
+            for index, (x, y, start, end) in enumerate(
+                [(60, 1500, 0.5, 2.0), (40, 1520, 1.8, 3.0), (50, 1490, 4.0, 5.25)]
+            ):
+                card_file = os.path.join(temp_dir, f"subtitle-{index + 1}.png")
+                Image.new("RGBA", (100, 40), (255, 255, 255, 255)).save(card_file)
+                cards.append((card_file, x, y, start, end))
+
+            track = vd._build_subtitle_card_track(list(reversed(cards)), temp_dir)
+            track_list, x, y = track
+            lines = Path(track_list).read_text(encoding="utf-8").splitlines()
+            with Image.open(os.path.join(temp_dir, "subtitle-track-2.png")) as canvas:
+                canvas_size = canvas.size
+                # 第二张卡在画布里的偏移等于它相对外接矩形左上角的位置。
+                self.assertEqual(canvas.getpixel((0, 30))[3], 255)
+                self.assertEqual(canvas.getpixel((0, 29))[3], 0)
+
+            filters, inputs = [], []
+            label, input_count = vd._append_subtitle_overlay_filters(
+                filters, inputs, track, "vcat", 2
+            )
+
+        self.assertEqual((x, y), (40, 1490))
+        self.assertEqual(canvas_size, (120, 70))
+        self.assertEqual(
+            lines,
+            [
+                "ffconcat version 1.0",
+                "file 'subtitle-track-blank.png'",
+                "duration 0.500",
+                "file 'subtitle-track-1.png'",
+                "duration 1.300",
+                "file 'subtitle-track-2.png'",
+                "duration 1.200",
+                "file 'subtitle-track-blank.png'",
+                "duration 1.000",
+                "file 'subtitle-track-3.png'",
+                "duration 1.250",
+                "file 'subtitle-track-blank.png'",
+                "duration 1.000",
+                "file 'subtitle-track-blank.png'",
+            ],
+        )
+        self.assertEqual(
+            inputs, ["-f", "concat", "-safe", "0", "-i", track_list]
+        )
+        self.assertEqual(filters, ["[vcat][2:v]overlay=40:1490[vsub]"])
+        self.assertEqual((label, input_count), ("vsub", 3))
+
+    def test_generate_video_overlays_prerendered_subtitles_with_ffmpeg(self):
+        """传入字幕卡清单时由 FFmpeg 一次完成叠加和混音，不再创建 TextClip。"""
+        filter_scripts = []
+
+        def fake_run(command, capture_output, text, check):
+            script_file = command[command.index("-filter_complex_script") + 1]
+            filter_scripts.append(Path(script_file).read_text(encoding="utf-8"))
+            return types.SimpleNamespace(returncode=0, stdout="", stderr="")
+
+        params = vd.VideoParams(video_subject="test", bgm_type="", subtitle_enabled=True)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            overlay_dir = os.path.join(temp_dir, "subtitle-overlay")
+            os.makedirs(overlay_dir)
+            manifest = os.path.join(overlay_dir, "manifest.json")
+            Path(manifest).write_text(
+                json.dumps(
+                    {
+                        "key": "k",
+                        "track": {
+                            "file": "subtitle-track.ffconcat",
+                            "x": 54,
+                            "y": 1500,
+                        },
+                        "cards": [
+                            {"file": "subtitle-1.png", "x": 54, "y": 1500, "start": 0, "end": 2},
+                            {"file": "subtitle-2.png", "x": 60, "y": 1500, "start": 2, "end": 4.5},
+                        ],
+                    }
+                ),
+                encoding="utf-8",
+            )
+            with (
+                patch.object(vd, "_read_video_duration", return_value=6.0),
+                patch.object(
+                    vd, "AudioFileClip", return_value=_FakeMoviePyClip(duration=5)
+                ),
+                patch.object(vd, "_create_subtitle_clip") as create_subtitle_clip,
+                patch.object(vd.subprocess, "run", side_effect=fake_run) as run,
+            ):
+                result = vd.generate_video(
+                    video_path="combined-1.mp4",
+                    audio_path="audio.mp3",
+                    subtitle_path="subtitle.srt",
+                    output_file=os.path.join(temp_dir, "final-1.mp4"),
+                    params=params,
+                    subtitle_overlay=manifest,
+                )
+
+        self.assertTrue(result)
+        self.assertEqual(run.call_count, 1)
+        create_subtitle_clip.assert_not_called()
+        # 所有字幕卡合成一条图片序列，只占一个输入和一次 overlay。
+        self.assertIn("[0:v][2:v]overlay=54:1500[vsub]", filter_scripts[0])
+        self.assertEqual(filter_scripts[0].count("overlay="), 1)
+        command = run.call_args.args[0]
+        self.assertEqual(
+            command[command.index("concat") - 1 : command.index("concat") + 5],
+            [
+                "-f",
+                "concat",
+                "-safe",
+                "0",
+                "-i",
+                os.path.join(overlay_dir, "subtitle-track.ffconcat"),
+            ],
+        )
+        self.assertEqual(command[command.index("-t") + 1], "6.000")
+
+    def test_prepare_subtitle_overlay_writes_ass_with_moviepy_layout(self):
+        """ASS 后端沿用 MoviePy 的换行结果，每行一条事件并由 subtitles 滤镜烧录。"""
+        params = vd.VideoParams(
+            video_subject="test",
+            font_name="BeVietnamPro-Bold.ttf",
+            text_background_color="#3366FF",
+            rounded_subtitle_background=True,
+        )
+        with tempfile.TemporaryDirectory() as temp_dir:
+            subtitle_file = os.path.join(temp_dir, "subtitle.srt")
+            Path(subtitle_file).write_text(
+                "1\n00:00:00,000 --> 00:00:02,500\n"
+                "This is a much longer subtitle line that should wrap {x}\n\n",
+                encoding="utf-8",
+            )
+            ass_file = vd.prepare_subtitle_overlay(
+                subtitle_file, params, temp_dir, backend="ass"
+            )
+            document = Path(ass_file).read_text(encoding="utf-8")
+            filters = []
+            vd._append_prerendered_subtitle_filters(filters, [], ass_file, "0:v", 2)
+
+        self.assertTrue(ass_file.endswith("subtitle.ass"))
+        self.assertIn("Style: Default,Be Vietnam Pro,", document)
+        events = [line for line in document.splitlines() if line.startswith("Dialogue:")]
+        # 一条圆角背景事件，加上换行后的每一行文字。
+        self.assertGreaterEqual(len(events), 3)
+        self.assertTrue(events[0].startswith("Dialogue: 0,0:00:00.00,0:00:02.50,"))
+        self.assertIn("\\p1}m ", events[0])
+        self.assertTrue(all(event.startswith("Dialogue: 1,") for event in events[1:]))
+        self.assertIn("\\{x\\}", events[-1])
+        self.assertEqual(len(filters), 1)
+        self.assertTrue(filters[0].startswith("[0:v]subtitles=filename='"))
+        self.assertIn(":fontsdir='", filters[0])
+
+    def test_subtitle_timeline_finds_active_cards_by_interval(self):
+        """区间索引只返回当前时刻在播放的字幕，重叠字幕按开始时间叠放。"""
+        card = np.zeros((1, 1, 4), dtype=np.uint8)
+        timeline = vd._SubtitleTimeline(
+            [
+                (card, 0, 0, 4.0, 6.0),
+                (card, 0, 0, 0.0, 10.0),
+                (card, 0, 0, 2.0, 3.0),
+            ]
+        )
+
+        self.assertEqual([c[3] for c in timeline.active_cards(0.0)], [0.0])
+        self.assertEqual([c[3] for c in timeline.active_cards(2.5)], [0.0, 2.0])
+        self.assertEqual([c[3] for c in timeline.active_cards(3.0)], [0.0])
+        self.assertEqual([c[3] for c in timeline.active_cards(5.0)], [0.0, 4.0])
+        self.assertEqual(timeline.active_cards(10.0), [])
+
+    def test_subtitle_timeline_blit_matches_composite_video_clip(self):
+        """NumPy 局部混合的结果应与 CompositeVideoClip 的 Pillow 合成一致。"""
+        rng = np.random.default_rng(7)
+        background = ColorClip((40, 30), color=(30, 120, 200), duration=2)
+        rgb = rng.integers(0, 256, size=(10, 16, 3), dtype=np.uint8)
+        alpha = rng.random((10, 16))
+        subtitle_clip = (
+            ImageClip(rgb)
+            .with_mask(ImageClip(alpha, is_mask=True))
+            .with_position((30, 5))
+            .with_start(0.5)
+            .with_duration(1)
+        )
+        expected = CompositeVideoClip([background, subtitle_clip]).get_frame(1.0)
+
+        rgba = vd._subtitle_clip_to_rgba(subtitle_clip)
+        # MoviePy 合成时对遮罩截断取整，这里沿用同一份 alpha 便于逐像素比较。
+        rgba[:, :, 3] = (alpha * 255).astype(np.uint8)
+        timeline = vd._SubtitleTimeline([(rgba, 30, 5, 0.5, 1.5)])
+        frame = background.get_frame(1.0)
+
+        np.testing.assert_allclose(
+            timeline.blit(frame, 1.0).astype(int), expected.astype(int), atol=1
+        )
+        self.assertIs(timeline.blit(frame, 1.6), frame)
+
     def test_get_temp_audio_dir_returns_system_temp_on_windows(self):
         with patch("sys.platform", "win32"):
             result = vd._get_temp_audio_dir("/some/output/dir")
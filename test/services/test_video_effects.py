@@ -1,4 +1,6 @@
+import os
 import sys
+import time
 import unittest
 from pathlib import Path
 
@@ -11,6 +13,11 @@ from moviepy import ImageClip
 from app.models.schema import VideoTransitionMode
 from app.services.utils import video_effects
 
+RUN_BENCHMARKS = os.environ.get("MPT_RUN_BENCHMARKS", "").lower() in {
+    "1",
+    "true",
+    "yes",
+}
 
 def _gradient_clip(width=64, height=48, duration=1.0):
     """创建非均匀渐变画面，确保缩放前后的像素差异可以被可靠检测。"""
@@ -190,6 +197,110 @@ class TestZoomTransitions(unittest.TestCase):
             atol=1,
         )
 
+    def test_zoom_kernel_matches_pillow_zoom_within_rounding(self):
+        """NumPy 缩放核与 Pillow 版本逐像素差异不超过 1，且复用输出缓冲区。"""
+        rng = np.random.default_rng(12)
+        for width, height in ((128, 96), (59, 75)):
+            frame = rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+            kernel = video_effects._ZoomKernel(width, height)
+            for scale_factor in (1.0001, 1.05, 1.1, 1.2):
+                with self.subTest(size=(width, height), scale=scale_factor):
+                    expected = video_effects._zoom_frame(frame, scale_factor)
+                    zoomed = kernel.apply(frame, scale_factor)
+                    self.assertEqual(zoomed.shape, frame.shape)
+                    self.assertEqual(zoomed.dtype, np.uint8)
+                    np.testing.assert_allclose(
+                        zoomed.astype(int), expected.astype(int), atol=1
+                    )
+
+        self.assertTrue(
+            np.shares_memory(kernel.apply(frame, 1.1), kernel.apply(frame, 1.2))
+        )
+        self.assertIs(kernel.apply(frame, 1.0), frame)
+        with self.assertRaisesRegex(ValueError, "scale_factor"):
+            kernel.apply(frame, 0)
+
+    @unittest.skipUnless(RUN_BENCHMARKS, "set MPT_RUN_BENCHMARKS=1 to run benchmarks")
+    def test_benchmark_zoom_kernel_against_pillow(self):
+        """对比竖屏整帧缩放时 NumPy 缩放核与 Pillow EXTENT 变换的耗时。"""
+        frame = _detail_frame(width=1080, height=1920)
+        kernel = video_effects._ZoomKernel(1080, 1920)
+        scale_factors = np.linspace(1.0, 1.2, 31)[1:]
+
+        started_at = time.perf_counter()
+        for scale_factor in scale_factors:
+            video_effects._zoom_frame(frame, scale_factor)
+        pillow_seconds = time.perf_counter() - started_at
+
+        started_at = time.perf_counter()
+        for scale_factor in scale_factors:
+            kernel.apply(frame, scale_factor)
+        numpy_seconds = time.perf_counter() - started_at
+
+        print(
+            f"zoom x{len(scale_factors)} 1080x1920 frames: "
+            f"pillow {pillow_seconds:.3f}s, numpy {numpy_seconds:.3f}s"
+        )
+        self.assertLess(numpy_seconds, pillow_seconds)
+
+
+class TestFFmpegTransitionFilters(unittest.TestCase):
+    def test_fade_filters_cover_clip_edges(self):
+        """FFmpeg 淡入从片段开头开始，淡出在片段最后一秒结束。"""
+        self.assertEqual(
+            video_effects.ffmpeg_transition_filter(
+                "FadeIn", 3, 1, "left", 1080, 1920, 30
+            ),
+            "fade=t=in:st=0:d=1.000000",
+        )
+        self.assertEqual(
+            video_effects.ffmpeg_transition_filter(
+                "FadeOut", 3, 1, "left", 1080, 1920, 30
+            ),
+            "fade=t=out:st=2.000000:d=1.000000",
+        )
+
+    def test_slide_filters_place_black_border_on_motion_side(self):
+        """滑动方向决定黑边所在一侧，滑入和滑出只是裁剪窗口移动方向相反。"""
+        expected_pads = {
+            "left": "pad=2160:1920:0:0:black",
+            "right": "pad=2160:1920:1080:0:black",
+            "top": "pad=1080:3840:0:0:black",
+            "bottom": "pad=1080:3840:0:1920:black",
+        }
+        for transition in ("SlideIn", "SlideOut"):
+            for side, expected_pad in expected_pads.items():
+                with self.subTest(transition=transition, side=side):
+                    filter_chain = video_effects.ffmpeg_transition_filter(
+                        transition, 3, 1, side, 1080, 1920, 30
+                    )
+                    self.assertTrue(filter_chain.startswith(expected_pad))
+                    self.assertIn("crop=1080:1920", filter_chain)
+
+        self.assertEqual(
+            video_effects.ffmpeg_transition_filter(
+                "SlideIn", 3, 1, "unknown", 1080, 1920, 30
+            ),
+            "",
+        )
+
+    def test_zoom_filters_use_subpixel_perspective_over_whole_clip(self):
+        """缩放使用浮点四角坐标，并按整段片段的帧数计算进度。"""
+        zoom_in = video_effects.ffmpeg_transition_filter(
+            "ZoomIn", 2, 1, "left", 1080, 1920, 30
+        )
+        zoom_out = video_effects.ffmpeg_transition_filter(
+            "ZoomOut", 2, 1, "left", 1080, 1920, 30
+        )
+
+        self.assertTrue(zoom_in.startswith("perspective="))
+        self.assertIn("min(in/60.000000,1)", zoom_in)
+        self.assertIn("(1+0.200000*", zoom_in)
+        self.assertIn("(1.200000-0.200000*", zoom_out)
+        self.assertEqual(
+            video_effects.ffmpeg_transition_filter(None, 2, 1, "left", 1080, 1920, 30),
+            "",
+        )
 
 if __name__ == "__main__":
     unittest.main()
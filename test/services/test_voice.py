@@ -663,7 +663,7 @@ class TestVoiceService(unittest.TestCase):
         }
         with tempfile.TemporaryDirectory() as tmp_dir, patch.object(
             vs.config, "minimax_tts", settings
-        ), patch.object(vs.requests, "post", side_effect=_post), patch.object(
+        ), patch.object(vs.http_client, "post", side_effect=_post), patch.object(
             vs, "AudioFileClip", return_value=_Clip()
         ):
             voice_file = str(Path(tmp_dir) / "minimax.mp3")
@@ -710,7 +710,7 @@ class TestVoiceService(unittest.TestCase):
         with tempfile.TemporaryDirectory() as tmp_dir, patch.object(
             vs.config, "minimax_tts", settings
         ), patch.object(vs.config, "app", app_settings), patch.object(
-            vs.requests, "post", side_effect=_post
+            vs.http_client, "post", side_effect=_post
         ), patch.object(vs, "AudioFileClip", return_value=_Clip()):
             voice_file = str(Path(tmp_dir) / "minimax.mp3")
             result = vs.minimax_tts("测试。", "male-qn-qingse", 1.0, voice_file)
@@ -740,7 +740,7 @@ class TestVoiceService(unittest.TestCase):
                     "base_resp": {"status_code": "0"},
                 }
 
-        with patch.object(vs.requests, "post", return_value=_Response()) as post:
+        with patch.object(vs.http_client, "post", return_value=_Response()) as post:
             catalog = vs.get_minimax_voice_catalog(
                 api_key="test-key",
                 endpoint=vs.MINIMAX_TTS_CN_URL,
@@ -791,7 +791,7 @@ class TestVoiceService(unittest.TestCase):
                     }
                 }
 
-        with patch.object(vs.requests, "post", return_value=_Response()):
+        with patch.object(vs.http_client, "post", return_value=_Response()):
             with self.assertRaisesRegex(RuntimeError, "invalid api key"):
                 vs.get_minimax_voice_catalog(api_key="invalid-key")
 
@@ -810,7 +810,7 @@ class TestVoiceService(unittest.TestCase):
         }
         with tempfile.TemporaryDirectory() as tmp_dir, patch.object(
             vs.config, "minimax_tts", settings
-        ), patch.object(vs.requests, "post", return_value=_Response()), patch.object(
+        ), patch.object(vs.http_client, "post", return_value=_Response()), patch.object(
             vs, "AudioFileClip", side_effect=OSError("invalid audio")
         ):
             voice_path = Path(tmp_dir) / "minimax.mp3"
@@ -893,7 +893,7 @@ class TestVoiceService(unittest.TestCase):
                 "model_id": "chatterbox",
             },
         ), patch.object(
-            vs.requests, "post", side_effect=_fake_post
+            vs.http_client, "post", side_effect=_fake_post
         ) as post, patch.object(
             vs, "AudioFileClip", return_value=_FakeClip()
         ):
@@ -926,7 +926,7 @@ class TestVoiceService(unittest.TestCase):
         """Missing base_url short-circuits without any network call."""
         with patch.object(
             vs.config, "chatterbox", {"base_url": ""}
-        ), patch.object(vs.requests, "post") as post:
+        ), patch.object(vs.http_client, "post") as post:
             result = vs.chatterbox_tts(
                 text="hi", voice="default", voice_file="unused.mp3"
             )
@@ -944,7 +944,7 @@ class TestVoiceService(unittest.TestCase):
         with tempfile.TemporaryDirectory() as tmp_dir, patch.object(
             vs.config, "chatterbox", {"base_url": "http://localhost:4123/v1"}
         ), patch.object(
-            vs.requests, "post", return_value=_FakeResponse()
+            vs.http_client, "post", return_value=_FakeResponse()
         ) as post:
             voice_file = str(Path(tmp_dir) / "chatterbox.mp3")
             result = vs.chatterbox_tts(
@@ -1212,7 +1212,7 @@ class TestElevenLabsVoice(unittest.TestCase):
         result = vs.get_elevenlabs_voices("")
         self.assertEqual(result, [])
 
-    @patch("app.services.voice.requests.get")
+    @patch("app.services.voice.http_client.get")
     def test_get_elevenlabs_voices_success(self, mock_get):
         mock_get.return_value.status_code = 200
         mock_get.return_value.json.return_value = {
@@ -1230,21 +1230,21 @@ class TestElevenLabsVoice(unittest.TestCase):
         call_kwargs = mock_get.call_args
         self.assertIn("xi-api-key", call_kwargs.kwargs.get("headers", {}))
 
-    @patch("app.services.voice.requests.get")
+    @patch("app.services.voice.http_client.get")
     def test_get_elevenlabs_voices_http_error(self, mock_get):
         mock_get.return_value.status_code = 401
         mock_get.return_value.text = "Unauthorized"
         result = vs.get_elevenlabs_voices("bad-key")
         self.assertEqual(result, [])
 
-    @patch("app.services.voice.requests.get")
+    @patch("app.services.voice.http_client.get")
     def test_get_elevenlabs_voices_network_error(self, mock_get):
         import requests as req_lib
         mock_get.side_effect = req_lib.exceptions.ConnectionError("timeout")
         result = vs.get_elevenlabs_voices("fake-key")
         self.assertEqual(result, [])
 
-    @patch("app.services.voice.requests.post")
+    @patch("app.services.voice.http_client.post")
     @patch("app.services.voice.AudioFileClip")
     @patch("app.services.voice.config")
     def test_elevenlabs_tts_success(self, mock_config, mock_clip_cls, mock_post):
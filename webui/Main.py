@@ -15,7 +15,6 @@ from datetime import datetime
 from pathlib import Path
 from uuid import UUID, uuid4
 
-import requests
 import streamlit as st
 from loguru import logger
 from streamlit_tour import Tour
@@ -57,7 +56,7 @@ from app.services import state as sm
 from app.services import task as tm
 from app.services import version_checker
 from app.utils.logging_utils import configure_terminal_logger
-from app.utils import utils
+from app.utils import http_client, utils
 
 st.set_page_config(
     page_title="MoneyPrinterTurbo",
@@ -2022,7 +2021,7 @@ def get_groq_model_ids(api_key: str, base_url: str) -> list[str]:
     models_url = f"{normalized_base_url}/models"
 
     try:
-        response = requests.get(
+        response = http_client.get(
             models_url,
             headers={"Authorization": f"Bearer {api_key}"},
             timeout=10,